@@ -0,0 +1,459 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing a pretend HPC resource for benchmarking Longbow.
+
+The FakeCluster class stands in for the network, the remote machine and its
+batch scheduler. Once installed it replaces shellwrappers.sendtoshell and
+shellwrappers.sendtoshellstream, so every ssh and rsync command Longbow sends
+is answered from this process instead:
+
+ssh
+    Scheduler commands (submitting, listing and deleting jobs) are answered
+    from an in-memory queue. Jobs wait in the queue for "queuetime" seconds,
+    run for "runtime" seconds and then leave the queue having written an
+    output file into their working directory. Module commands and "which"
+    always succeed. Anything else (making directories, checksums, cleaning up)
+    is run locally with sh, with the cluster's home directory standing in for
+    the remote one.
+
+rsync
+    Files are copied locally, following the include and exclude masks, and
+    the usual progress lines are printed so that transfer sizes are recorded.
+
+Each command can be delayed by "latency" seconds to stand in for the round
+trip to a real machine, and can be made to fail as if the connection dropped
+with probability "failures", so that retries are exercised. The number of
+commands of each kind is counted in the "calls" dictionary.
+
+The slurm, pbs and lsf schedulers can be simulated.
+"""
+
+import collections
+import fnmatch
+import itertools
+import os
+import random
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+import longbow.shellwrappers as shellwrappers
+
+# The commands used to submit, list and delete jobs with each scheduler.
+COMMANDS = {
+    "lsf": ("bsub", "bjobs", "bkill"),
+    "pbs": ("qsub", "qstat", "qdel"),
+    "slurm": ("sbatch", "squeue", "scancel")
+}
+
+# What each scheduler says when a job is submitted.
+SUBMITTED = {
+    "lsf": "Job <{0}> is submitted to default queue <normal>.",
+    "pbs": "{0}.fakecluster",
+    "slurm": "Submitted batch job {0}"
+}
+
+# The header of each scheduler's job listing and a line for a job in it,
+# with the state in the column each scheduler plugin reads.
+LISTINGS = {
+    "lsf": ("JOBID   USER    STAT  QUEUE   FROM_HOST  EXEC_HOST  JOB_NAME",
+            "{0} {1} {2} normal login node001 job{0}"),
+    "pbs": ("Job ID  Username Queue Jobname SessID NDS TSK Memory Time S Time",
+            "{0}.fakecluster {1} short job{0} 1000 1 24 -- 00:10 {2} 00:00"),
+    "slurm": ("JOBID PARTITION NAME USER ST TIME NODES NODELIST(REASON)",
+              "{0} short job{0} {1} {2} 0:00 1 node001")
+}
+
+# The codes each scheduler uses for queued and running jobs.
+STATES = {
+    "lsf": ("PEND", "RUN"),
+    "pbs": ("Q", "R"),
+    "slurm": ("PD", "R")
+}
+
+# The bit of an rsync path that says which host it is on.
+REMOTEPATH = re.compile(r"^[^/:]+@[^/:]+:")
+
+
+class FakeCluster(object):
+
+    """A pretend HPC resource that answers Longbow's commands locally.
+
+    Required arguments are:
+
+    home (string) - A local directory that stands in for the remote home
+                    directory.
+
+    Optional arguments are:
+
+    scheduler (string) - The scheduler to simulate, one of "slurm", "pbs"
+                         or "lsf".
+
+    latency (float) - The number of seconds each command takes to come back.
+
+    failures (float) - The chance, between 0 and 1, that a command fails as
+                       though the connection dropped.
+
+    queuetime (float) - The number of seconds jobs wait in the queue.
+
+    runtime (float) - The number of seconds jobs run for.
+
+    outputsize (int) - The size in bytes of the output file each job writes.
+
+    seed (int) - Seed for the failure injection, to make runs repeatable.
+
+    """
+
+    def __init__(self, home, scheduler="slurm", latency=0.0, failures=0.0,
+                 queuetime=1.0, runtime=2.0, outputsize=1024, seed=None):
+
+        if scheduler not in COMMANDS:
+
+            raise ValueError("Unknown scheduler '{0}', use one of {1}."
+                             .format(scheduler, ", ".join(sorted(COMMANDS))))
+
+        self.home = home
+        self.scheduler = scheduler
+        self.latency = latency
+        self.failures = failures
+        self.queuetime = queuetime
+        self.runtime = runtime
+        self.outputsize = outputsize
+
+        self.calls = collections.Counter()
+        self.queue = collections.OrderedDict()
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._jobids = itertools.count(100000)
+        self._saved = None
+
+    def __enter__(self):
+
+        return self.install()
+
+    def __exit__(self, *exc):
+
+        self.uninstall()
+
+    def install(self):
+        """Send Longbow's shell commands to this cluster."""
+        self._saved = (shellwrappers.sendtoshell,
+                       shellwrappers.sendtoshellstream)
+
+        shellwrappers.sendtoshell = self.sendtoshell
+        shellwrappers.sendtoshellstream = self.sendtoshellstream
+
+        return self
+
+    def uninstall(self):
+        """Put Longbow's shell commands back as they were."""
+        if self._saved is not None:
+
+            (shellwrappers.sendtoshell,
+             shellwrappers.sendtoshellstream) = self._saved
+
+            self._saved = None
+
+    def sendtoshell(self, cmd, timeout=None):
+        """Stand in for shellwrappers.sendtoshell."""
+        return self._run(cmd)
+
+    def sendtoshellstream(self, cmd, callback, timeout=None):
+        """Stand in for shellwrappers.sendtoshellstream."""
+        stdout, stderr, errorstate = self._run(cmd)
+
+        for line in stdout.splitlines():
+
+            if callback(line) is True:
+
+                break
+
+        return "", stderr, errorstate
+
+    def _run(self, cmd):
+        """Answer a command after the latency, failing it if unlucky."""
+        kind = os.path.basename(cmd[0])
+
+        with self._lock:
+
+            self.calls[kind] += 1
+            failed = self._random.random() < self.failures
+
+        if self.latency > 0:
+
+            time.sleep(self.latency)
+
+        if failed:
+
+            with self._lock:
+
+                self.calls["failed"] += 1
+
+            return ("", "ssh: connect to host fakecluster port 22: "
+                    "Connection timed out\r\n", 255)
+
+        if kind == "ssh":
+
+            return self._ssh(cmd[3:])
+
+        if kind == "rsync":
+
+            return self._rsync(cmd[1:])
+
+        return "", "{0}: command not found\n".format(kind), 127
+
+    def _ssh(self, args):
+        """Carry out a command sent over ssh."""
+        script = " ".join(args)
+
+        if script.startswith("source /etc/profile;"):
+
+            script = script[len("source /etc/profile;"):]
+
+        lines = [line.strip() for line in script.split("\n")
+                 if line.strip() != ""]
+        submit, status, delete = COMMANDS[self.scheduler]
+        simulated = {"module", "which", "env", submit, status, delete}
+
+        # Anything that isn't for the scheduler or the module system is run
+        # for real.
+        if not any(line.split()[0] in simulated for line in lines):
+
+            return self._local(script)
+
+        workdir = self.home
+        stdout = []
+
+        for line in lines:
+
+            words = line.split()
+
+            if words[0] == "cd":
+
+                workdir = self._path(words[1])
+
+            elif words[0] == "module":
+
+                if words[1:2] == ["avail"]:
+
+                    stdout.append("amber/18 gromacs/2018 namd/2.12")
+
+            elif words[0] == "which":
+
+                stdout.append("/usr/bin/" + words[1])
+
+            elif words[0] == "env":
+
+                if self.scheduler not in line.lower():
+
+                    return "\n".join(stdout), "", 1
+
+                stdout.append(self.scheduler.upper() + "_VERSION=1.0")
+
+            elif words[0] == submit:
+
+                stdout.append(SUBMITTED[self.scheduler].format(
+                    self._submit(workdir)))
+
+            elif words[0] == status:
+
+                stdout.extend(self._listing(words[-1]))
+
+            elif words[0] == delete:
+
+                self._delete(re.findall(r"\d+", line))
+
+        return "\n".join(stdout) + "\n", "", 0
+
+    def _path(self, path):
+        """Turn a remote path into the local one standing in for it."""
+        if path.startswith("~/"):
+
+            path = path[2:]
+
+        return os.path.join(self.home, path)
+
+    def _local(self, script):
+        """Run a command locally in place of the remote machine."""
+        env = dict(os.environ, HOME=self.home)
+        handle = subprocess.run(["sh", "-c", script], cwd=self.home, env=env,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+
+        return (handle.stdout.decode("utf-8"), handle.stderr.decode("utf-8"),
+                handle.returncode)
+
+    def _submit(self, workdir):
+        """Add a job to the queue."""
+        with self._lock:
+
+            jobid = next(self._jobids)
+            self.queue[jobid] = (time.time(), workdir)
+
+        return jobid
+
+    def _listing(self, user):
+        """List the jobs still in the queue, finishing any that are done."""
+        now = time.time()
+        queued, running = STATES[self.scheduler]
+        header, row = LISTINGS[self.scheduler]
+        lines = [header]
+        finished = []
+
+        with self._lock:
+
+            for jobid, (submitted, workdir) in list(self.queue.items()):
+
+                if now < submitted + self.queuetime:
+
+                    lines.append(row.format(jobid, user, queued))
+
+                elif now < submitted + self.queuetime + self.runtime:
+
+                    lines.append(row.format(jobid, user, running))
+
+                else:
+
+                    del self.queue[jobid]
+                    finished.append((jobid, workdir))
+
+        for jobid, workdir in finished:
+
+            self._output(jobid, workdir)
+
+        return lines
+
+    def _delete(self, jobids):
+        """Take jobs out of the queue."""
+        with self._lock:
+
+            for jobid in jobids:
+
+                self.queue.pop(int(jobid), None)
+
+    def _output(self, jobid, workdir):
+        """Write the output file of a finished job."""
+        if os.path.isdir(workdir):
+
+            with open(os.path.join(workdir, "fake-output.log"), "w") as out:
+
+                out.write("job {0} finished\n".format(jobid).ljust(
+                    self.outputsize, "."))
+
+    def _rsync(self, args):
+        """Copy files as rsync would, printing its progress lines."""
+        rules = []
+        paths = []
+        args = iter(args)
+
+        for arg in args:
+
+            if arg in ("--include", "--exclude"):
+
+                rules.append((arg == "--include", next(args)))
+
+            elif arg == "-e":
+
+                next(args)
+
+            elif not arg.startswith("-"):
+
+                paths.append(self._path(REMOTEPATH.sub("", arg)))
+
+        src, dst = paths[-2:]
+
+        if not os.path.isdir(src):
+
+            return ("", "rsync: change_dir \"{0}\" failed: No such file or "
+                    "directory (2)\n".format(src), 23)
+
+        # Like rsync, a source without a trailing slash is copied into the
+        # destination rather than its contents.
+        if not src.endswith("/"):
+
+            dst = os.path.join(dst, os.path.basename(src))
+
+        stdout = []
+        self._copytree(src, dst, rules, stdout)
+
+        return "".join(stdout), "", 0
+
+    def _copytree(self, src, dst, rules, stdout):
+        """Copy the files of a directory that the rules let through."""
+        if not os.path.isdir(dst):
+
+            os.makedirs(dst)
+
+        for name in sorted(os.listdir(src)):
+
+            # The first rule that matches decides, everything else is copied.
+            for include, pattern in rules:
+
+                if fnmatch.fnmatch(name, pattern):
+
+                    break
+
+            else:
+
+                include = True
+
+            if include is False:
+
+                continue
+
+            source = os.path.join(src, name)
+            target = os.path.join(dst, name)
+
+            if os.path.isdir(source):
+
+                self._copytree(source, target, rules, stdout)
+
+                continue
+
+            # Files that look the same are skipped, as rsync would.
+            stat = os.stat(source)
+
+            if (os.path.isfile(target) and
+                    os.path.getsize(target) == stat.st_size and
+                    int(os.path.getmtime(target)) == int(stat.st_mtime)):
+
+                continue
+
+            shutil.copy2(source, target)
+
+            stdout.append("{0}\n{1:>15,} 100%    0.00kB/s    0:00:00 "
+                          "(xfr#{2}, to-chk=0/1)\n".format(
+                              name, stat.st_size, len(stdout) + 1))
@@ -0,0 +1,357 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Benchmark whole Longbow sessions against a pretend HPC resource.
+
+This script runs complete sessions, from reading the configuration files to
+cleaning up, with the commands for the remote resource answered by a
+FakeCluster (see fakecluster.py) so that no real machine is needed. Each
+session size is run in a process of its own, so that memory use is measured
+cleanly, and the wall time, processor time, peak memory use and the number
+of ssh and rsync commands per job are reported. For example:
+
+    python benchmarks/run.py --jobs 10 100 1000 --latency 0.05
+
+Results can be saved and later runs compared against them, any figure that
+has grown by more than the tolerance is reported and the script exits with an
+error, so that a slow down can be caught before it is merged:
+
+    python benchmarks/run.py --save before.json
+    python benchmarks/run.py --compare before.json
+
+The Longbow in this source tree is the one benchmarked, rather than any copy
+that has been installed.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# The figures that are compared between runs, smaller is better for all of
+# them.
+FIGURES = ["wall", "cpu", "memory", "ssh", "rsync"]
+
+# The column headings of the results table.
+HEADINGS = ["jobs", "wall (s)", "cpu (s)", "memory (MB)", "ssh/job",
+            "rsync/job", "failed"]
+
+# The input files each job has.
+INPUTS = ["example.in", "example.rst", "example.top"]
+
+HOSTS = """[fakecluster]
+host = fakecluster
+user = benchmark
+remoteworkdir = {remote}
+scheduler = {scheduler}
+handler = mpirun
+polling-frequency = 1
+staging-frequency = 0
+retry-backoff = 0.1
+retry-backoff-max = 1
+"""
+
+JOB = """[bench]
+resource = fakecluster
+executable = pmemd.MPI
+maxtime = 00:10
+executableargs = -i example.in -c example.rst -p example.top -o example.out
+sweep = n: 1..{jobs}
+"""
+
+
+def main():
+    """Run the benchmarks given on the command-line."""
+    args = _arguments()
+
+    if args.session is not None:
+
+        print(json.dumps(session(args.session, args)))
+
+        return 0
+
+    results = []
+    print(_row(HEADINGS))
+
+    for jobs in args.jobs:
+
+        cmd = [sys.executable, os.path.abspath(__file__), "--session",
+               str(jobs)] + _passon(args)
+        output = subprocess.check_output(cmd)
+        result = json.loads(output.decode("utf-8").splitlines()[-1])
+
+        results.append(result)
+        print(_row([result["jobs"], "{0:.2f}".format(result["wall"]),
+                    "{0:.2f}".format(result["cpu"]),
+                    "{0:.1f}".format(result["memory"]),
+                    "{0:.2f}".format(result["ssh"]),
+                    "{0:.2f}".format(result["rsync"]), result["failed"]]))
+
+    if args.save is not None:
+
+        with open(args.save, "w") as saved:
+
+            json.dump(results, saved, indent=2)
+
+    if args.compare is not None:
+
+        with open(args.compare) as saved:
+
+            return compare(json.load(saved), results, args.tolerance)
+
+    return 0
+
+
+def session(jobs, args):
+    """Run one Longbow session and measure it.
+
+    Required arguments are:
+
+    jobs (int) - The number of jobs in the session.
+
+    args (namespace) - The command-line arguments, for the settings of the
+                       fake cluster.
+
+    Return parameters are:
+
+    result (dictionary) - The measurements of the session.
+
+    """
+    scratch = tempfile.mkdtemp(prefix="longbow-benchmark-")
+
+    try:
+
+        # Longbow keeps its recovery files and caches in the home directory,
+        # so use one that is thrown away afterwards. This has to happen
+        # before Longbow is imported.
+        home = os.path.join(scratch, "home")
+        local = os.path.join(scratch, "local")
+        remote = os.path.join(scratch, "remote")
+
+        os.makedirs(os.path.join(home, ".longbow"))
+        os.makedirs(remote)
+        os.environ["HOME"] = home
+
+        _inputs(local, jobs, args)
+
+        sys.path.insert(0, os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+
+        from fakecluster import FakeCluster
+        import longbow.entrypoints as entrypoints
+
+        parameters = dict(entrypoints.PARAMETERS)
+        parameters["hosts"] = os.path.join(local, "hosts.conf")
+        parameters["job"] = os.path.join(local, "job.conf")
+        parameters["pipeline"] = args.pipeline
+
+        cluster = FakeCluster(
+            remote, scheduler=args.scheduler, latency=args.latency,
+            failures=args.failures, queuetime=args.queuetime,
+            runtime=args.runtime, seed=args.seed)
+
+        os.chdir(local)
+
+        startmemory = _memory()
+        startcpu = time.process_time()
+        start = time.time()
+
+        with cluster:
+
+            entrypoints.longbow({}, parameters)
+
+        wall = time.time() - start
+        cpu = time.process_time() - startcpu
+
+        return {
+            "jobs": jobs,
+            "wall": wall,
+            "cpu": cpu,
+            "memory": max(_memory(), startmemory),
+            "ssh": cluster.calls["ssh"] / float(jobs),
+            "rsync": cluster.calls["rsync"] / float(jobs),
+            "failed": cluster.calls["failed"]
+        }
+
+    finally:
+
+        os.chdir(os.path.dirname(scratch))
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def compare(before, after, tolerance):
+    """Report the figures that have got worse since an earlier run.
+
+    Required arguments are:
+
+    before (list) - The results of the earlier run.
+
+    after (list) - The results of this run.
+
+    tolerance (float) - The percentage a figure can grow by before it counts
+                        as having got worse.
+
+    Return parameters are:
+
+    status (int) - 1 if anything got worse, otherwise 0.
+
+    """
+    earlier = dict((result["jobs"], result) for result in before)
+    worse = []
+
+    for result in after:
+
+        if result["jobs"] not in earlier:
+
+            continue
+
+        for figure in FIGURES:
+
+            old = earlier[result["jobs"]][figure]
+            new = result[figure]
+
+            if old > 0 and (new - old) / old * 100.0 > tolerance:
+
+                worse.append("{0} jobs: {1} went from {2:.2f} to {3:.2f} "
+                             "(+{4:.0f}%)".format(result["jobs"], figure, old,
+                                                  new, (new - old) / old *
+                                                  100.0))
+
+    for line in worse:
+
+        print(line)
+
+    if worse:
+
+        return 1
+
+    print("No figures grew by more than {0}%.".format(tolerance))
+
+    return 0
+
+
+def _arguments():
+    """Parse the command-line."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark Longbow sessions against a fake cluster.")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[10, 100, 1000],
+                        help="the session sizes to run")
+    parser.add_argument("--scheduler", default="slurm",
+                        choices=["slurm", "pbs", "lsf"],
+                        help="the scheduler to simulate")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds each remote command takes")
+    parser.add_argument("--failures", type=float, default=0.0,
+                        help="chance of a remote command failing")
+    parser.add_argument("--queuetime", type=float, default=1.0,
+                        help="seconds each job waits in the queue")
+    parser.add_argument("--runtime", type=float, default=2.0,
+                        help="seconds each job runs for")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the failure injection")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run the sessions with --pipeline")
+    parser.add_argument("--save", help="save the results to a file")
+    parser.add_argument("--compare",
+                        help="compare the results with a saved file")
+    parser.add_argument("--tolerance", type=float, default=10.0,
+                        help="percentage growth allowed when comparing")
+    parser.add_argument("--session", type=int, help=argparse.SUPPRESS)
+
+    return parser.parse_args()
+
+
+def _passon(args):
+    """The arguments that a session process needs."""
+    passon = ["--scheduler", args.scheduler, "--latency", str(args.latency),
+              "--failures", str(args.failures), "--queuetime",
+              str(args.queuetime), "--runtime", str(args.runtime)]
+
+    if args.seed is not None:
+
+        passon.extend(["--seed", str(args.seed)])
+
+    if args.pipeline is True:
+
+        passon.append("--pipeline")
+
+    return passon
+
+
+def _inputs(local, jobs, args):
+    """Write the configuration and input files for a session."""
+    for job in range(1, jobs + 1):
+
+        workdir = os.path.join(local, "bench-" + str(job))
+        os.makedirs(workdir)
+
+        for name in INPUTS:
+
+            with open(os.path.join(workdir, name), "w") as inputfile:
+
+                inputfile.write(name + "\n")
+
+    with open(os.path.join(local, "hosts.conf"), "w") as hosts:
+
+        hosts.write(HOSTS.format(remote=os.path.join(
+            os.path.dirname(local), "remote"), scheduler=args.scheduler))
+
+    with open(os.path.join(local, "job.conf"), "w") as job:
+
+        job.write(JOB.format(jobs=jobs))
+
+
+def _memory():
+    """The peak memory use of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes and macOS bytes.
+    if sys.platform == "darwin":
+
+        return peak / 1024.0 / 1024.0
+
+    return peak / 1024.0
+
+
+def _row(columns):
+    """Format a row of the results table."""
+    return "".join(str(column).rjust(12) for column in columns)
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
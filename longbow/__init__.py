@@ -33,15 +33,16 @@
 """Longbow package. Import all of the usable functions to the top level."""
 
 from longbow.applications import checkapp, processjobs
-from longbow.configuration import (processconfigs, loadconfigs, saveconfigs,
-                                   saveini)
+from longbow.configuration import (processconfigs, loadconfigs, loadrecovery,
+                                   parseconfigs, saveconfigs, saveini)
 from longbow.entrypoints import launcher, longbow, recovery
 from longbow.scheduling import (checkenv, delete, monitor, prepare,
                                 submit)
+from longbow.session import Session
 from longbow.shellwrappers import (checkconnections, sendtoshell, sendtossh,
                                    sendtorsync, localcopy, localdelete,
                                    locallist, remotecopy, remotedelete,
-                                   remotelist, upload, download)
+                                   remotelist, remotestat, upload, download)
 from longbow.staging import stage_upstream, stage_downstream, cleanup
 
 __version__ = "1.5.5"
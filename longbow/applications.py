@@ -51,7 +51,11 @@ processjobs(jobs)
 
 import logging
 import os
+import threading
 
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import longbow.dependencies as dependencies
 import longbow.exceptions as exceptions
 import longbow.shellwrappers as shellwrappers
 import longbow.apps as apps
@@ -59,6 +63,65 @@ import longbow.apps as apps
 
 LOG = logging.getLogger("longbow.applications")
 
+# Dependency scans of input files, so that input files shared between jobs
+# and replicates are only read once (see _scanfile).
+SCANCACHE = {}
+
+# Scans that are under way, so that threads wanting the same scan wait for
+# the one already running rather than parsing the file again.
+SCANNING = {}
+SCANLOCK = threading.Lock()
+
+# Number of threads used to process jobs, and to scan their input files.
+WORKERS = 8
+
+
+class FileList(list):
+    """An ordered list of files with fast membership checks.
+
+    The file parsers in the application plugins check whether a file is
+    already in the upload list before adding it, for ensembles with many
+    replicates doing this on a plain list gets slow.
+
+    """
+
+    def __init__(self, items=()):
+        """Create the list along with the set of its items."""
+        list.__init__(self, items)
+        self._items = set(self)
+
+    def __contains__(self, item):
+        """Check for an item using the set."""
+        return item in self._items
+
+    def append(self, item):
+        """Append an item."""
+        list.append(self, item)
+        self._items.add(item)
+
+    def extend(self, items):
+        """Append several items."""
+        for item in items:
+
+            self.append(item)
+
+    def insert(self, index, item):
+        """Insert an item."""
+        list.insert(self, index, item)
+        self._items.add(item)
+
+    def remove(self, item):
+        """Remove an item."""
+        list.remove(self, item)
+        self._items = set(self)
+
+    def pop(self, index=-1):
+        """Remove and return an item."""
+        item = list.pop(self, index)
+        self._items = set(self)
+
+        return item
+
 
 def checkapp(jobs):
     """Test that executables and their modules are launchable.
@@ -116,7 +179,7 @@ def checkapp(jobs):
 
             try:
 
-                shellwrappers.sendtossh(jobs[job], cmd)
+                shellwrappers.sendtossh(jobs[job], cmd, cmdclass="probe")
                 LOG.info("Executable check - passed.")
 
             except exceptions.SSHError:
@@ -142,119 +205,149 @@ def processjobs(jobs):
     """
     LOG.info("Processing job/s and detecting files that require upload.")
 
-    # Process each job.
-    for job in [a for a in jobs if "lbowconf" not in a]:
+    jobnames = [a for a in jobs if "lbowconf" not in a]
 
-        filelist = []
-        foundflags = []
-        substitution = {}
+    # Only the scans used by these jobs are explained.
+    dependencies.begin()
 
-        LOG.debug("Command-line arguments for job '%s' are '%s'",
-                  job, " ".join(jobs[job]["executableargs"]))
+    # Directory listings are used in place of many isfile calls, which
+    # matters on network filesystems where each stat is slow. They are
+    # shared by all jobs in this call only, so that calls running at the
+    # same time do not disturb each other.
+    listings = {}
 
-        # Check for any files that are located outside the work directory or
-        # absolute paths.
-        for arg in jobs[job]["executableargs"]:
+    # Jobs are processed concurrently, and the dependency scans that they
+    # hand out go to a separate pool so the two can't starve each other.
+    try:
 
-            if arg.count(os.path.pardir) > 0 or os.path.isabs(arg):
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool, \
+                ThreadPoolExecutor(max_workers=WORKERS) as jobpool:
 
-                raise exceptions.RequiredinputError(
-                    "In job '{0}' input files are being provided with absolute"
-                    " paths or from directories above localworkdir. This is "
-                    "not supported".format(job))
+            futures = [jobpool.submit(_processjob, jobs, job, pool,
+                                      listings)
+                       for job in jobnames]
 
-        # If we have multiple jobs.
-        if len([a for a in jobs if "lbowconf" not in a]) > 1:
+            # Errors are raised for the first job that had one, in order.
+            for future in futures:
 
-            # Add the job name to the path.
-            jobs[job]["localworkdir"] = os.path.join(
-                jobs[job]["localworkdir"], job)
+                future.result()
 
-        # Check that the directory exists.
-        if os.path.isdir(jobs[job]["localworkdir"]) is False:
+    finally:
 
-            # If not, this is bad.
-            raise exceptions.DirectorynotfoundError(
-                "The local job directory '{0}' cannot be found for job '{1}'"
-                .format(jobs[job]["localworkdir"], job))
+        # Keep the scans for the next run.
+        dependencies.save()
 
-        # Here we want to support generic executable launching. To do this
-        # we will switch off all checking and testing and simply upload all
-        # files in the job directory.
-        try:
+    LOG.info("Processing jobs - complete.")
 
-            appplugins = getattr(apps, "PLUGINEXECS")
-            app = appplugins[os.path.basename(jobs[job]["executable"])]
 
-        except KeyError:
+def _processjob(jobs, job, pool, listings=None):
+    """Process the command-line of a single job, see processjobs."""
+    filelist = FileList()
+    foundflags = []
+    substitution = {}
 
-            LOG.info("The software you are using is unsupported by a plugin. "
-                     "Longbow will attempt to submit, but will assume you are"
-                     "supplying modules manually or have used a absolute path"
-                     "to your executable. If you think this is in error, "
-                     "please open a ticket on github.")
+    LOG.debug("Command-line arguments for job '%s' are '%s'",
+              job, " ".join(jobs[job]["executableargs"]))
 
-            jobs[job]["upload-include"] = ""
-            jobs[job]["upload-exclude"] = "*.log"
+    # Check for any files that are located outside the work directory or
+    # absolute paths.
+    for arg in jobs[job]["executableargs"]:
 
-            # Replace the input command line with the execution command line.
-            jobs[job]["executableargs"] = (
-                jobs[job]["executable"] + " " +
-                " ".join(jobs[job]["executableargs"]))
+        if arg.count(os.path.pardir) > 0 or os.path.isabs(arg):
 
-            LOG.info("For job '%s' - execution string: %s",
-                     job, jobs[job]["executableargs"])
+            raise exceptions.RequiredinputError(
+                "In job '{0}' input files are being provided with absolute"
+                " paths or from directories above localworkdir. This is "
+                "not supported".format(job))
 
-            LOG.info("Processing jobs - complete.")
+    # If we have multiple jobs.
+    if len([a for a in jobs if "lbowconf" not in a]) > 1:
 
-            return
+        # Add the job name to the path.
+        jobs[job]["localworkdir"] = os.path.join(
+            jobs[job]["localworkdir"], job)
 
-        # Hook to determine command-line parameter substitutions.
-        try:
+    # Check that the directory exists.
+    if os.path.isdir(jobs[job]["localworkdir"]) is False:
 
-            substitution = getattr(
-                apps, app.lower()).detectsubstitutions(
-                    list(jobs[job]["executableargs"]))
+        # If not, this is bad.
+        raise exceptions.DirectorynotfoundError(
+            "The local job directory '{0}' cannot be found for job '{1}'"
+            .format(jobs[job]["localworkdir"], job))
 
-        except AttributeError:
+    # Here we want to support generic executable launching. To do this
+    # we will switch off all checking and testing and simply upload all
+    # files in the job directory.
+    try:
 
-            pass
+        appplugins = getattr(apps, "PLUGINEXECS")
+        app = appplugins[os.path.basename(jobs[job]["executable"])]
 
-        # Process the command-line.
-        foundflags = _proccommandline(jobs[job], filelist, foundflags,
-                                      substitution)
+    except KeyError:
 
-        # Validate if all required flags are present.
-        _flagvalidator(jobs[job], foundflags)
+        LOG.info("The software you are using is unsupported by a plugin. "
+                 "Longbow will attempt to submit, but will assume you are"
+                 "supplying modules manually or have used a absolute path"
+                 "to your executable. If you think this is in error, "
+                 "please open a ticket on github.")
 
-        # Some programs are too complex to do file detection, such as
-        # chemshell.
-        try:
+        jobs[job]["upload-include"] = ""
+        jobs[job]["upload-exclude"] = "*.log"
 
-            substitution = getattr(apps,
-                                   app.lower()).rsyncuploadhook(jobs, job)
+        # Replace the input command line with the execution command line.
+        jobs[job]["executableargs"] = (
+            jobs[job]["executable"] + " " +
+            " ".join(jobs[job]["executableargs"]))
 
-        except AttributeError:
+        LOG.info("For job '%s' - execution string: %s",
+                 job, jobs[job]["executableargs"])
+
+        return
+
+    # Hook to determine command-line parameter substitutions.
+    try:
+
+        substitution = getattr(
+            apps, app.lower()).detectsubstitutions(
+                list(jobs[job]["executableargs"]))
+
+    except AttributeError:
 
-            # Setup the rysnc upload masks.
-            if jobs[job]["upload-include"] != "":
+        pass
 
-                jobs[job]["upload-include"] = (
-                    jobs[job]["upload-include"] + ", ")
+    # Process the command-line.
+    foundflags = _proccommandline(jobs[job], filelist, foundflags,
+                                  substitution, pool, listings)
+
+    # Validate if all required flags are present.
+    _flagvalidator(jobs[job], foundflags)
+
+    # Some programs are too complex to do file detection, such as
+    # chemshell.
+    try:
+
+        substitution = getattr(apps,
+                               app.lower()).rsyncuploadhook(jobs, job)
+
+    except AttributeError:
+
+        # Setup the rysnc upload masks.
+        if jobs[job]["upload-include"] != "":
 
             jobs[job]["upload-include"] = (
-                jobs[job]["upload-include"] + ", ".join(filelist))
+                jobs[job]["upload-include"] + ", ")
 
-            jobs[job]["upload-exclude"] = "*"
+        jobs[job]["upload-include"] = (
+            jobs[job]["upload-include"] + ", ".join(filelist))
 
-        # Replace the input command line with the execution command line.
-        jobs[job]["executableargs"] = (jobs[job]["executable"] + " " +
-                                       " ".join(jobs[job]["executableargs"]))
+        jobs[job]["upload-exclude"] = "*"
 
-        LOG.info("For job '%s' - execution string: %s",
-                 job, jobs[job]["executableargs"])
+    # Replace the input command line with the execution command line.
+    jobs[job]["executableargs"] = (jobs[job]["executable"] + " " +
+                                   " ".join(jobs[job]["executableargs"]))
 
-    LOG.info("Processing jobs - complete.")
+    LOG.info("For job '%s' - execution string: %s",
+             job, jobs[job]["executableargs"])
 
 
 def _flagvalidator(job, foundflags):
@@ -327,10 +420,13 @@ def _markfoundfiles(arg, initargs, foundflags):
     return foundflags
 
 
-def _proccommandline(job, filelist, foundflags, substitution):
+def _proccommandline(job, filelist, foundflags, substitution, pool=None,
+                     listings=None):
     """Command-line processor.
 
-    This method selects which type of command-line we have.
+    This method selects which type of command-line we have. Input files are
+    scanned for dependencies using the thread pool if one is given, and
+    looked for in the directory listings if they are given (see _isfile).
 
     """
     # Initialisation.
@@ -348,7 +444,7 @@ def _proccommandline(job, filelist, foundflags, substitution):
                     arg[0] != "+" and arg not in subexe):
 
                 foundflags = _procfiles(job, arg, filelist, foundflags,
-                                        substitution)
+                                        substitution, pool, listings)
 
     except (IndexError, ValueError):
 
@@ -361,13 +457,22 @@ def _proccommandline(job, filelist, foundflags, substitution):
     return foundflags
 
 
-def _procfiles(job, arg, filelist, foundflags, substitution):
-    """Processor for finding flags and files."""
+def _procfiles(job, arg, filelist, foundflags, substitution, pool=None,
+               listings=None):
+    """Processor for finding flags and files.
+
+    The files for each replicate are found first, then their dependencies are
+    scanned (concurrently if a thread pool is given) and finally everything is
+    merged into the file list in replicate order.
+
+    """
     # Initialisation.
     appplugins = getattr(apps, "PLUGINEXECS")
     executable = os.path.basename(job["executable"])
     app = appplugins[executable]
     initargs = list(job["executableargs"])
+    parser = getattr(getattr(apps, app.lower()), "file_parser", None)
+    entries = []
 
     # Check for as many files as there are replicates (default of 1).
     for rep in range(1, int(job["replicates"]) + 1):
@@ -377,7 +482,8 @@ def _procfiles(job, arg, filelist, foundflags, substitution):
         # If we do only have a single job then file path should be.
         if int(job["replicates"]) == 1:
 
-            fileitem = _procfilessinglejob(app, arg, job["localworkdir"])
+            fileitem = _procfilessinglejob(app, arg, job["localworkdir"],
+                                           listings)
 
         # Otherwise we have a replicate job so check these.
         else:
@@ -385,40 +491,59 @@ def _procfiles(job, arg, filelist, foundflags, substitution):
             repx = str(job["replicate-naming"]) + str(rep)
 
             # Add the repx dir
-            if (repx) not in filelist:
-
-                filelist.append(repx)
+            entries.append((repx, None))
 
             fileitem = _procfilesreplicatejobs(
-                app, arg, job["localworkdir"], initargs, repx)
+                app, arg, job["localworkdir"], initargs, repx, listings)
 
             job["executableargs"] = initargs
 
         # If we have a valid file
-        if os.path.isfile(os.path.join(job["localworkdir"], fileitem)):
+        if _isfile(os.path.join(job["localworkdir"], fileitem), listings):
 
             _markfoundfiles(arg, initargs, foundflags)
 
-            # Hook to search input file for any file dependencies.
-            try:
+            entries.append((fileitem, True))
 
-                getattr(apps, app.lower()).file_parser(
-                    fileitem, job["localworkdir"], filelist, substitution)
+    # Hook to search input files for any file dependencies.
+    scans = [(parser, app, fileitem, job["localworkdir"], substitution)
+             for fileitem, scan in entries if scan]
 
-            except AttributeError:
+    if pool is None:
+
+        scans = [_scanfile(*scan) for scan in scans]
+
+    else:
+
+        scans = list(pool.map(lambda scan: _scanfile(*scan), scans))
+
+    scans.reverse()
+
+    for fileitem, scan in entries:
+
+        found = [fileitem]
+
+        if scan:
+
+            found, after = scans.pop()
+
+            # Some parsers pick up substitutions from within files.
+            substitution.update(after)
+
+        for item in found:
 
-                if fileitem not in filelist:
+            if item not in filelist:
 
-                    filelist.append(fileitem)
+                filelist.append(item)
 
     return foundflags
 
 
-def _procfilessinglejob(app, arg, cwd):
+def _procfilessinglejob(app, arg, cwd, listings=None):
     """Processor for single jobs."""
     fileitem = ""
 
-    if os.path.isfile(os.path.join(cwd, arg)):
+    if _isfile(os.path.join(cwd, arg), listings):
 
         fileitem = arg
 
@@ -438,7 +563,7 @@ def _procfilessinglejob(app, arg, cwd):
     return fileitem
 
 
-def _procfilesreplicatejobs(app, arg, cwd, initargs, repx):
+def _procfilesreplicatejobs(app, arg, cwd, initargs, repx, listings=None):
     """Processor for replicate jobs."""
     fileitem = ""
     tmpitem = ""
@@ -448,14 +573,16 @@ def _procfilesreplicatejobs(app, arg, cwd, initargs, repx):
 
         os.mkdir(os.path.join(cwd, repx))
 
+        _forgetlisting(cwd, listings)
+
     # If we have a replicate job then we should check if the file resides
     # within ./rep{i} or if it is a global (common to each replicate) file.
-    if os.path.isfile(os.path.join(cwd, repx, arg)):
+    if _isfile(os.path.join(cwd, repx, arg), listings):
 
         fileitem = os.path.join(repx, arg)
 
     # Otherwise do we have a file in cwd
-    elif os.path.isfile(os.path.join(cwd, arg)):
+    elif _isfile(os.path.join(cwd, arg), listings):
 
         fileitem = arg
 
@@ -495,3 +622,173 @@ def _procfilesreplicatejobs(app, arg, cwd, initargs, repx):
                 pass
 
     return fileitem
+
+
+def _scanfile(parser, app, fileitem, cwd, substitution):
+    """Find the dependencies of an input file.
+
+    The plugin file parser is run on a fresh list, and the files it finds are
+    remembered against the path, size and modification time of the input file
+    and the substitutions in force. Later scans of the same file, for other
+    replicates or jobs sharing it, are then served from SCANCACHE for as long
+    as none of the files found have changed. Scans from earlier runs are kept
+    by the dependencies module against the content of the files, so only
+    input files that have changed since are parsed again. The parser works on
+    a copy of the substitutions, so this is safe to run from several threads
+    at once, and threads wanting a scan that is already under way wait for
+    it instead of parsing the file too.
+
+    Returns the files found (including the input file itself) and the
+    substitutions after the parser has picked up any from within the files.
+
+    """
+    # Plugins that can't look inside their input files.
+    if parser is None:
+
+        return [fileitem], {}
+
+    path = os.path.abspath(os.path.join(cwd, fileitem))
+    info = os.stat(path)
+    key = (app, os.path.abspath(cwd), fileitem, info.st_mtime, info.st_size,
+           tuple(sorted((str(name), str(value))
+                        for name, value in substitution.items())))
+
+    with SCANLOCK:
+
+        waiting = key in SCANNING
+        scanning = SCANNING.setdefault(key, Future())
+
+    if waiting is True:
+
+        found, after = scanning.result()
+        dependencies.record(cwd, fileitem, found, "cached")
+
+        return found, after
+
+    try:
+
+        found, after, source = _scanfilekey(parser, app, fileitem, cwd,
+                                            substitution, key)
+
+    except Exception as err:
+
+        scanning.set_exception(err)
+
+        raise
+
+    else:
+
+        scanning.set_result((found, after))
+
+    finally:
+
+        with SCANLOCK:
+
+            del SCANNING[key]
+
+    dependencies.record(cwd, fileitem, found, source)
+
+    return found, after
+
+
+def _scanfilekey(parser, app, fileitem, cwd, substitution, key):
+    """Scan an input file, or fetch its scan from either of the caches."""
+    try:
+
+        found, stamps, after = SCANCACHE[key]
+
+        if stamps != _scanstamps(cwd, found):
+
+            raise KeyError(key)
+
+        LOG.debug("Using the earlier scan of '%s'", fileitem)
+        source = "cached"
+
+    except KeyError:
+
+        earlier = dependencies.lookup(app, fileitem, cwd, substitution)
+
+        if earlier is not None:
+
+            LOG.debug("Using the scan of '%s' from a previous run", fileitem)
+            found, after = earlier
+            source = "cached"
+
+        else:
+
+            found = FileList()
+            after = dict(substitution)
+
+            parser(fileitem, cwd, found, after)
+
+            found = list(found)
+            source = "parsed"
+            dependencies.store(app, fileitem, cwd, substitution, found, after)
+
+        SCANCACHE[key] = (found, _scanstamps(cwd, found), after)
+
+    return found, after, source
+
+
+def _scanstamps(cwd, files):
+    """Get the size and modification time of each file found by a scan."""
+    stamps = []
+
+    for item in files:
+
+        try:
+
+            info = os.stat(os.path.join(cwd, item))
+            stamps.append((info.st_mtime, info.st_size))
+
+        except OSError:
+
+            stamps.append(None)
+
+    return stamps
+
+
+def _isfile(path, listings=None):
+    """Check if a path is a file.
+
+    If a dictionary of listings is given this is answered from a listing of
+    the directory, so each directory is only read once however many files are
+    checked in it.
+
+    """
+    if listings is None:
+
+        return os.path.isfile(path)
+
+    directory, name = os.path.split(path)
+
+    try:
+
+        files = listings[directory]
+
+    except KeyError:
+
+        files = set()
+
+        try:
+
+            for entry in os.scandir(directory or os.curdir):
+
+                if entry.is_file():
+
+                    files.add(entry.name)
+
+        except OSError:
+
+            pass
+
+        listings[directory] = files
+
+    return name in files
+
+
+def _forgetlisting(directory, listings):
+    """Drop the listing of a directory after it has been changed."""
+    if listings is not None:
+
+        listings.pop(directory, None)
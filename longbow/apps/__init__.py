@@ -34,40 +34,129 @@
 
 All code for a new plugin should be placed inside the plugin module itself
 and not here, follow the template for constructing new app plugins.
+
+The executables of the plugins shipped with Longbow are listed in INDEX, along
+with any module name overrides, so that the plugins themselves are only
+imported when first used, rather than every time Longbow starts. Plugin files
+that are not listed in INDEX are still found and imported at start up, so new
+plugins work without being listed.
+Plugins installed from other packages under the "longbow.apps" entry point are
+added from the registry kept by the plugins module, plugins shipped with
+Longbow take precedence over any of the same name or executable.
 """
 
+import importlib
 import os
-import pkgutil
-import sys
+
+import longbow.plugins as plugins
 
 PATH = os.path.dirname(__file__)
-MODULES = pkgutil.iter_modules(path=[PATH])
+
+# Plugin modules are found from a listing of the package rather than with
+# pkgutil, which is slow to import.
+PLUGINS = sorted(os.path.splitext(name)[0] for name in os.listdir(PATH)
+                 if name.endswith(".py") and name != "__init__.py")
+
+# The executables supported by each plugin shipped with Longbow and its module
+# name overrides, laid out as in the plugin registry (see plugins.py). These
+# must match the EXECDATA and MODULENAME of the plugin.
+INDEX = {
+    "amber": {
+        "executables": ["pmemd", "pmemd.MPI", "pmemd.cuda"],
+        "modulename": {}
+    },
+    "charmm": {
+        "executables": ["charmm", "charmm_mpi", "charmm_cuda"],
+        "modulename": {}
+    },
+    "chemshell": {
+        "executables": ["chemsh.x"],
+        "modulename": {}
+    },
+    "desmond": {
+        "executables": ["desmond"],
+        "modulename": {}
+    },
+    "gromacs": {
+        "executables": ["gmx", "gmx_d", "mdrun", "mdrun_d", "mdrun_mpi",
+                        "mdrun_mpi_d"],
+        "modulename": {}
+    },
+    "lammps": {
+        "executables": ["lmp_xc30", "lmp_linux", "lmp_gpu", "lmp_mpi",
+                        "lmp_cuda", "lmp", "lmp_intel_cpu_intelmpi"],
+        "modulename": {}
+    },
+    "namd": {
+        "executables": ["namd2", "namd2.mpi", "namd2.cuda"],
+        "modulename": {}
+    }
+}
 
 EXECLIST = []
 PLUGINEXECS = {}
 MODNAMEOVERRIDES = {}
 
 # Loop through all the modules in the plugin.
-for loader, modulename, ispkg in MODULES:
+for modulename in PLUGINS:
 
-    # Check for double loading in the namespace.
-    if modulename not in sys.modules:
+    if modulename in INDEX:
 
-        mod = __import__("longbow.apps." + modulename, fromlist=[""])
+        executables = INDEX[modulename]["executables"]
+        overrides = INDEX[modulename]["modulename"]
 
-        for executable, _ in getattr(mod, "EXECDATA").items():
+    else:
 
-            # Compile a list of executables across all plugins.
-            EXECLIST.append(executable)
+        mod = importlib.import_module("longbow.apps." + modulename)
+        executables = list(getattr(mod, "EXECDATA").keys())
+        overrides = getattr(mod, "MODULENAME", {})
+
+    for executable in executables:
+
+        # Compile a list of executables across all plugins.
+        EXECLIST.append(executable)
+
+        # Compile a dictionary associating executable with plugins.
+        PLUGINEXECS[executable] = modulename
+
+    # Is the module named differently on HPC than the software is called.
+    if overrides:
+
+        MODNAMEOVERRIDES[modulename] = overrides.items()
+
+# The module to import for each plugin.
+MODULES = dict((name, "longbow.apps." + name) for name in PLUGINS)
 
-            # Compile a dictionary associating executable with plugins.
+# Plugins installed from other packages.
+for modulename, plugin in sorted(plugins.registry()["apps"].items()):
+
+    if modulename in MODULES:
+
+        continue
+
+    PLUGINS.append(modulename)
+    MODULES[modulename] = plugin["module"]
+
+    for executable in plugin["executables"]:
+
+        if executable not in PLUGINEXECS:
+
+            EXECLIST.append(executable)
             PLUGINEXECS[executable] = modulename
 
-        # Is the module named differently on HPC than the software is called.
-        try:
+    if plugin["modulename"]:
+
+        MODNAMEOVERRIDES[modulename] = plugin["modulename"].items()
+
+
+def __getattr__(name):
+    """Import a plugin the first time it is used."""
+    if name in MODULES:
 
-            MODNAMEOVERRIDES[modulename] = getattr(mod, "MODULENAME").items()
+        mod = importlib.import_module(MODULES[name])
+        globals()[name] = mod
 
-        except AttributeError:
+        return mod
 
-            pass
+    raise AttributeError(
+        "module '{0}' has no attribute '{1}'".format(__name__, name))
@@ -41,6 +41,7 @@ import os
 import re
 
 import longbow.exceptions as exceptions
+import longbow.scanner as scanner
 
 
 EXECDATA = {
@@ -58,6 +59,10 @@ EXECDATA = {
     }
 }
 
+# Only lines that set variables or name a file to read are tokenized.
+PATTERN = scanner.compilepattern(first=['set'], anywhere=['name'],
+                                 comment="!")
+
 
 def file_parser(filename, path, files, substitutions=None):
     """Find dependancy files and add them to the upload list.
@@ -85,43 +90,33 @@ def file_parser(filename, path, files, substitutions=None):
         # Open the input file.
         fil = _fileopen(path, addfile)
 
-        # Search every line for possible input files.
-        for line in fil:
-
-            # Remove comments.
-            if '!' in line:
-
-                words = line[:line.index('!')].split()
-
-            else:
-
-                words = line[:len(line)].split()
+        # Search the lines that set variables or might read input files.
+        for words in scanner.tokenize(fil, PATTERN, "!"):
 
-            if len(words) > 0:
+            _internalsubstitutions(variables, words)
 
-                _internalsubstitutions(variables, words)
+            lowered = [x.lower() for x in words]
 
-                # Try to detect other input files.
-                if (('read' in [x.lower() for x in words]) and
-                        ('name' in [x.lower() for x in words])):
+            # Try to detect other input files.
+            if 'read' in lowered and 'name' in lowered:
 
-                    # Grab the last word in the line.
-                    newfile = words[-1]
+                # Grab the last word in the line.
+                newfile = words[-1]
 
-                    # Do variable substitutons
-                    newfile = _variablesubstitutions(newfile, variables)
+                # Do variable substitutons
+                newfile = _variablesubstitutions(newfile, variables)
 
-                    # Remove any quotes.
-                    newfile.replace("'", "").replace('"', '')
+                # Remove any quotes.
+                newfile.replace("'", "").replace('"', '')
 
-                    # Deduce the location of newfile.
-                    newpath = path
+                # Deduce the location of newfile.
+                newpath = path
 
-                    # Check newfile.
-                    newfile = _newfilechecks(addfile, newfile, path)
+                # Check newfile.
+                newfile = _newfilechecks(addfile, newfile, path)
 
-                    # Recursive function.
-                    file_parser(newfile, newpath, files, substitutions)
+                # Recursive function.
+                file_parser(newfile, newpath, files, substitutions)
 
         fil.close()
 
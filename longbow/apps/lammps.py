@@ -41,6 +41,7 @@ import os
 import re
 
 import longbow.exceptions as exceptions
+import longbow.scanner as scanner
 
 
 EXECDATA = {
@@ -74,6 +75,13 @@ EXECDATA = {
     }
 }
 
+# LAMMPS output commands, these will be used to mask against keywords that
+# shouldn't used to detect files for transfer.
+OUTPUTCOMMANDS = frozenset([
+    "print", "dump", "log", "restart", "write_dump", "write_restart",
+    "pair_write", "write_coeff", "ave/time", "ave/chunk", "bond_write",
+    "ave/histo/weight", "saed/vtk", "ave/histo", "write_data"])
+
 
 def file_parser(filename, path, files, substitutions=None):
     """Find dependancy files and add them to the upload list.
@@ -93,58 +101,40 @@ def file_parser(filename, path, files, substitutions=None):
 
         files.append(addfile)
 
-        # List of LAMMPS output commands, these will be used to mask against
-        # keywords that shouldn't used to detect files for transfer.
-        output_commands = ["print", "dump", "log", "restart", "write_dump",
-                           "write_restart", "pair_write", "write_coeff",
-                           "ave/time", "ave/chunk", "bond_write",
-                           "ave/histo/weight", "saed/vtk", "ave/histo",
-                           "write_data"]
-
         # Setup variables to be substituted.
         variables = {} if not substitutions else substitutions
 
-        fil = _fileopen(path, addfile)
-
-        # Search every line for possible input files.
-        for line in fil:
+        # Whether each word names a file, as the same words tend to recur.
+        isfile = {}
 
-            # If line commented out, skip.
-            if line[0] == "#":
-
-                continue
-
-            # Remove comments.
-            if '#' in line:
-
-                words = line[:line.index('#')].split()
+        fil = _fileopen(path, addfile)
 
-            else:
+        # Any line might refer to a file, so all lines are tokenized.
+        for words in scanner.tokenize(fil, None, "#"):
 
-                words = line.split()
+            _internalsubstitutions(variables, words)
 
-            if len(words) > 0:
+            # Does this line contain an output command?
+            if OUTPUTCOMMANDS.isdisjoint(words):
 
-                _internalsubstitutions(variables, words)
+                for word in words:
 
-                # Does this line contain an output command?
-                if set(words).isdisjoint(output_commands):
+                    if word not in isfile:
 
-                    for word in words:
+                        isfile[word] = os.path.isfile(os.path.join(path, word))
 
-                        if os.path.isfile(os.path.join(path, word)):
+                    if isfile[word]:
 
-                            newfile = word
+                        newfile = word
 
-                            # Do variable substitutons
-                            newfile = _variablesubstitutions(newfile,
-                                                             variables)
+                        # Do variable substitutons
+                        newfile = _variablesubstitutions(newfile, variables)
 
-                            # Check newfile.
-                            newfile = _newfilechecks(addfile, newfile, path)
+                        # Check newfile.
+                        newfile = _newfilechecks(addfile, newfile, path)
 
-                            # Recursive function.
-                            file_parser(newfile, path, files, substitutions)
+                        # Recursive function.
+                        file_parser(newfile, path, files, substitutions)
 
         fil.close()
 
@@ -41,6 +41,7 @@ import os
 import re
 import logging
 import longbow.exceptions as exceptions
+import longbow.scanner as scanner
 
 LOG = logging.getLogger("longbow.apps.namd")
 
@@ -59,6 +60,15 @@ EXECDATA = {
     }
 }
 
+# Keywords that read in other input files.
+KEYWORDS = ['coordinates', 'extendedsystem', 'structure', 'parameters',
+            'velocities', 'binvelocities', 'bincoordinates', 'ambercoor',
+            'parmfile', 'conskfile', 'tclforcesscript', 'fixedatomsfile',
+            'grotopfile', 'grocoorfile']
+
+# Only lines that read files or set variables are tokenized.
+PATTERN = scanner.compilepattern(first=KEYWORDS + ['set'], comment="#")
+
 
 def file_parser(filename, path, files, substitutions=None):
     """Find dependancy files and add them to the upload list.
@@ -79,48 +89,31 @@ def file_parser(filename, path, files, substitutions=None):
 
         files.append(addfile)
 
-        # Create a dict for any variable substitutions and define keywords.
-        keywords = ['coordinates', 'extendedsystem', 'structure', 'parameters',
-                    'velocities', 'binvelocities', 'bincoordinates',
-                    'ambercoor', 'parmfile', 'conskfile', 'tclforcesscript',
-                    'fixedatomsfile', 'grotopfile', 'grocoorfile']
-
         variables = {}
 
         fil = _fileopen(path, addfile)
 
         try:
 
-            # Search every line for possible input files.
-            for line in fil:
-
-                # Remove comments.
-                if '#' in line:
-
-                    words = line[:line.index('#')].split()
-
-                else:
-
-                    words = line[:len(line)].split()
-
-                if len(words) > 0:
+            # Search the lines that set variables or read input files.
+            for words in scanner.tokenize(fil, PATTERN, "#"):
 
-                    # Pick up substitutions from within file
-                    _internalsubstitutions(variables, words)
+                # Pick up substitutions from within file
+                _internalsubstitutions(variables, words)
 
-                    # If this line is reading in an input file.
-                    if words[0].lower() in keywords:
+                # If this line is reading in an input file.
+                if words[0].lower() in KEYWORDS:
 
-                        newfile = words[-1]
+                    newfile = words[-1]
 
-                        # Do variable substitutons
-                        newfile = _variablesubstitutions(newfile, variables)
+                    # Do variable substitutons
+                    newfile = _variablesubstitutions(newfile, variables)
 
-                        # Check newfile.
-                        newfile = _newfilechecks(addfile, newfile, path)
+                    # Check newfile.
+                    newfile = _newfilechecks(addfile, newfile, path)
 
-                        # Recursive function
-                        file_parser(newfile, path, files, substitutions)
+                    # Recursive function
+                    file_parser(newfile, path, files, substitutions)
 
         except UnicodeDecodeError:
 
@@ -54,6 +54,13 @@ loadconfigs(configfile)
     Method for loading and extracting data from the Longbow configuration
     files.
 
+loadrecovery(recoveryfile)
+    Method for loading the jobs data structure back out of a recovery file.
+
+parseconfigs(configfile)
+    The same as loadconfigs, but also returns the line each section and option
+    was found on.
+
 saveconfigs(configfile, params)
     Method for saving data to Longbow configuration files, this method will
     honour comments and simply amend the file structure with new or changed
@@ -65,25 +72,47 @@ saveini(inifile, params)
     method which has been tuned to simply update configuration files.
 """
 
+import hashlib
+import json
 import logging
+import marshal
 import os
-import re
+import stat
+import sys
+import tempfile
 import time
 from random import randint
 
+import longbow
 import longbow.exceptions as exceptions
 import longbow.apps as apps
+import longbow.plugins as plugins
+import longbow.sweeps as sweeps
 
 
 LOG = logging.getLogger("longbow.configuration")
 
+# Cache of merged configurations, see processconfigs.
+CONFIGCACHE = os.path.expanduser("~/.longbow/configcache")
+
+# Bump this when the cached structure changes.
+CONFIGCACHEVERSION = 1
+
+# Number of different configurations kept in the cache.
+CONFIGCACHESIZE = 8
+
 JOBTEMPLATE = {
     "account": "",
     "accountflag": "",
+    "circuit-cooldown": "300",
+    "circuit-threshold": "5",
+    "cleanup-detach": "false",
     "cores": "24",
     "corespernode": "24",
+    "download-checksum": "sha256sum",
     "download-exclude": "",
     "download-include": "",
+    "download-verify": "false",
     "email-address": "",
     "email-flags": "",
     "env-fix": "false",
@@ -105,15 +134,25 @@ JOBTEMPLATE = {
     "replicates": "1",
     "replicate-naming": "rep",
     "resource": "",
+    "retry-attempts": "3",
+    "retry-backoff": "10",
+    "retry-backoff-max": "300",
     "scheduler": "",
     "scripts": "",
     "sge-peflag": "mpi",
     "sge-peoverride": "false",
     "slurm-gres": "",
     "staging-frequency": "300",
+    "status-push": "false",
     "stdout": "",
     "stderr": "",
     "subfile": "",
+    "submit-template": "",
+    "timeout-probe": "60",
+    "timeout-stall": "600",
+    "timeout-status": "120",
+    "timeout-submit": "120",
+    "timeout-transfer": "0",
     "upload-exclude": "",
     "upload-include": "",
     "user": ""
@@ -133,6 +172,15 @@ def processconfigs(parameters):
     of their application, in this case developers should use the JOBTEMPLATE
     as the template to create this to minimise problems.
 
+    The merged configuration is cached in ~/.longbow (if that directory
+    exists), keyed by the contents of the configuration files, the
+    command-line parameters and the working directory, so that repeat launches
+    with the same inputs skip the parsing and merging.
+
+    A "localworkdir" parameter, if given, is used in place of the working
+    directory for jobs that don't set their own local working directory, and
+    relative ones are taken from it.
+
     Required arguments are:
 
     parameters (dictionary): This parameter is required. It is used to provide
@@ -143,42 +191,55 @@ def processconfigs(parameters):
     jobs (dictionary) A fully processed Longbow jobs data structure.
 
     """
-    # Try and load the host file.
-    _, hostsections, hostdata = loadconfigs(parameters["hosts"])
+    # A previous launch with exactly the same inputs can skip straight to the
+    # last bits of initialisation.
+    cachekey = _configcachekey(parameters)
+    jobs = _configcacheload(cachekey)
 
-    # If we have been given a job file then try and load it.
-    if parameters["job"] != "":
+    if jobs is None:
 
-        _, _, jobdata = loadconfigs(parameters["job"])
+        # Try and load the host file.
+        _, hostsections, hostdata = loadconfigs(parameters["hosts"])
 
-    # If there is no job file, then attempt to build a job from other sources.
-    else:
+        # If we have been given a job file then try and load it.
+        if parameters["job"] != "":
 
-        jobdata = {}
+            _, _, jobdata = loadconfigs(parameters["job"])
 
-        if parameters["jobname"] != "":
-
-            jobname = parameters["jobname"]
+            # Turn any parameter sweeps into the jobs they describe.
+            jobdata = sweeps.expandjobs(jobdata)
 
+        # If there is no job file, then attempt to build a job from other
+        # sources.
         else:
 
-            jobname = "LongbowJob"
+            jobdata = {}
+
+            if parameters["jobname"] != "":
+
+                jobname = parameters["jobname"]
+
+            else:
+
+                jobname = "LongbowJob"
 
-        # Create an job structure from the template.
-        jobdata[jobname] = JOBTEMPLATE.copy()
+            # Create an job structure from the template.
+            jobdata[jobname] = JOBTEMPLATE.copy()
 
-        # Empty values so that priority ordering is easier (important!).
-        for item in jobdata[jobname]:
+            # Empty values so that priority ordering is easier (important!).
+            for item in jobdata[jobname]:
 
-            jobdata[jobname][item] = ""
+                jobdata[jobname][item] = ""
 
-    jobs = _processconfigsresource(parameters, jobdata, hostsections)
+        jobs = _processconfigsresource(parameters, jobdata, hostsections)
 
-    _processconfigsparams(jobs, parameters, jobdata, hostdata)
+        _processconfigsparams(jobs, parameters, jobdata, hostdata)
 
-    _processconfigsvalidate(jobs)
+        _processconfigsvalidate(jobs)
 
-    _processconfigsfinalinit(jobs)
+        _configcachesave(cachekey, jobs)
+
+    _processconfigsfinalinit(jobs, parameters.get("localworkdir", ""))
 
     return jobs
 
@@ -237,79 +298,98 @@ def loadconfigs(configfile):
                           dictionaries).
 
     """
-    LOG.info("Loading configuration information from file '%s'", configfile)
+    contents, sections, params, _ = parseconfigs(configfile)
 
-    sections = []
-    params = {}
+    return contents, sections, params
 
-    # Open configuration file.
-    try:
 
-        tmp = open(configfile, "r")
+def loadrecovery(recoveryfile):
+    """Load a jobs data structure from a recovery file.
 
-        # Grab all of the information from the file.
-        contents = tmp.readlines()
+    Recovery files are written to the ~/.longbow directory shortly after jobs
+    are submitted, this method loads one back in so that the session can be
+    picked up again.
 
-    except IOError:
+    Required arguments are:
 
-        raise exceptions.ConfigurationError(
-            "Can't read the configurations from '{0}'".format(configfile))
+    recoveryfile (string): The name of the recovery file in ~/.longbow.
 
-    # Strip out the newline chars.
-    contents = [line.strip("\n") for line in contents]
+    Return parameters are:
 
-    # Close configuration file (don't need it anymore).
-    tmp.close()
+    jobs (dictionary) The jobs data structure saved in the recovery file.
 
-    # Pull out sections into list.
-    for item in contents:
+    """
+    jobfile = os.path.join(os.path.expanduser('~/.longbow'), recoveryfile)
 
-        # Find section markers
-        if len(item) > 0 and item[0] == "[" and item[len(item) - 1] == "]":
+    LOG.info("Attempting to find the recovery file '{0}'".format(jobfile))
 
-            # Remove the square bracket section markers.
-            section = "".join(a for a in item if a not in "[]")
+    if not os.path.isfile(jobfile):
 
-            # Add to list of sections.
-            sections.append(section)
+        raise exceptions.RequiredinputError(
+            "Recovery file could not be found, make sure you haven't deleted "
+            "the recovery file and that you are not providing the full path, "
+            "just the file name is needed.")
 
-            # Create a new section in the data structure.
-            params[section] = {}
+    LOG.info("Recovery file found.")
 
-        # Find comment markers.
-        elif len(item) > 0 and item[0] == "#":
+    _, _, jobs = loadconfigs(jobfile)
 
-            # Ignore comments.
-            pass
+    return jobs
 
-        # Anything else must be option data.
-        elif len(item) > 0 and "=" in item:
 
-            # Option is in the format key = param. Added regular expression so
-            # that if user writes with/without spaces then we can still extract
-            # the configuration info.
-            key, value = re.split(" = |= | =|=", item, 1)
+def parseconfigs(configfile):
+    """Load a Longbow configuration file, recording where each entry is.
 
-            # Store the keys and values in the data structure.
-            params[section][key] = value
+    This method parses the file in a single pass and is otherwise the same as
+    loadconfigs, but it also returns the position of every section header
+    and option in the file. This lets the file be edited in place and errors
+    be reported against the line they came from.
 
-    # Check if there are zero sections.
-    if len(sections) == 0:
+    Required arguments are:
+
+    configfile (string): This should be an absolute path to a configuration
+                         file.
+
+    Return parameters are:
+
+    contents (list): This is the raw file structure where each line is an item
+                     in the list.
+
+    sections (list): This is a list of section headers in the data (preserves
+                     order).
+
+    data (dict of dicts): This is a structure containing the data loaded from
+                          the file, see loadconfigs.
+
+    lines (dict): The index into contents of each section header, keyed by
+                  the section name, and of each option, keyed by a (section,
+                  option) tuple. Add one to get the line number.
+
+    """
+    LOG.info("Loading configuration information from file '%s'", configfile)
+
+    # Open configuration file.
+    try:
+
+        with open(configfile, "r") as tmp:
+
+            # Splitting the whole file in one go is quicker than reading it
+            # line by line.
+            contents = tmp.read().split("\n")
+
+    except IOError:
 
         raise exceptions.ConfigurationError(
-            "Error no sections are defined in configuration file '{0}'"
-            .format(configfile))
+            "Can't read the configurations from '{0}'".format(configfile))
 
-    # Check for sections with zero options.
-    for section in sections:
+    # Drop the empty string left by the newline at the end of the file.
+    if contents[-1] == "":
 
-        if len(params[section]) == 0:
+        contents.pop()
 
-            raise exceptions.ConfigurationError(
-                "Error section '{0}' contains no parameter definitions using "
-                "configuration file '{1}'".format(section, configfile))
+    sections, params, lines = _parseconfiglines(contents, configfile)
 
-    return contents, sections, params
+    return contents, sections, params, lines
 
 
 def saveconfigs(configfile, params):
@@ -361,35 +441,59 @@ def saveconfigs(configfile, params):
     # Load up the original file including comment structure (list).
     try:
 
-        contents, _, oldparams = loadconfigs(configfile)
+        contents, _, oldparams, lines = parseconfigs(configfile)
 
     except exceptions.ConfigurationError:
 
         contents = []
         oldparams = {}
+        lines = {}
 
     # Calculate the diffs.
     _saveconfigdiffs(params, oldparams, keydiff, valuediff)
 
     # Update the file metastructure. Firstly handle the updates.
-    _saveconfigupdates(contents, oldparams, valuediff)
+    _saveconfigupdates(contents, lines, valuediff)
 
     # Now handle new entries. Run through each section.
-    _saveconfignew(contents, keydiff)
+    contents = _saveconfignew(contents, lines, keydiff)
+
+    # Write to a temporary file alongside the original and move it into
+    # place, so the file is never left half written.
+    directory = os.path.dirname(os.path.abspath(configfile))
 
     try:
 
-        # Open file for writing.
-        tmp = open(configfile, "w")
+        handle, tmpfile = tempfile.mkstemp(prefix=".longbow-", dir=directory)
 
-        # Write it all out.
-        for item in contents:
-            tmp.write(item + "\n")
+    except (IOError, OSError):
 
-        # Close file.
-        tmp.close()
+        raise exceptions.ConfigurationError(
+            "Error saving to '{0}'".format(configfile))
 
-    except IOError:
+    try:
+
+        with os.fdopen(handle, "w") as tmp:
+
+            tmp.write("".join(item + "\n" for item in contents))
+
+        # Keep the permissions of the file being replaced.
+        try:
+
+            mode = os.stat(configfile).st_mode
+
+        except OSError:
+
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+
+        os.chmod(tmpfile, stat.S_IMODE(mode))
+        os.replace(tmpfile, configfile)
+
+    except (IOError, OSError):
+
+        os.remove(tmpfile)
 
         raise exceptions.ConfigurationError(
             "Error saving to '{0}'".format(configfile))
@@ -425,7 +529,7 @@ def saveini(inifile, params):
     ini.close()
 
 
-def _processconfigsfinalinit(jobs):
+def _processconfigsfinalinit(jobs, localworkdir=""):
     """Perform some last bits of initialisation."""
     # Initialisation.
     modules = getattr(apps, "PLUGINEXECS")
@@ -437,10 +541,17 @@ def _processconfigsfinalinit(jobs):
         # This is just for logging messages.
         jobs[job]["jobname"] = job
 
-        # If the local working directory has not been set, then default to cwd
+        # If the local working directory has not been set, then default to the
+        # one given in the parameters or else cwd.
         if jobs[job]["localworkdir"] == "":
 
-            jobs[job]["localworkdir"] = os.getcwd()
+            jobs[job]["localworkdir"] = localworkdir or os.getcwd()
+
+        # Relative paths are taken from the one given in the parameters.
+        elif localworkdir != "":
+
+            jobs[job]["localworkdir"] = os.path.join(
+                localworkdir, jobs[job]["localworkdir"])
 
         jobs[job]["executableargs"] = jobs[job]["executableargs"].split()
 
@@ -489,8 +600,10 @@ def _processconfigsparams(jobs, parameters, jobdata, hostdata):
             # This should already be dealt with.
             if item != "resource":
 
-                # Command-line overrides are highest priority.
-                if item in parameters and parameters[item] != "":
+                # Command-line overrides are highest priority, apart from the
+                # local working directory which is only a default.
+                if (item in parameters and parameters[item] != "" and
+                        item != "localworkdir"):
 
                     jobs[job][item] = parameters[item]
 
@@ -592,6 +705,213 @@ def _processconfigsvalidate(jobs):
 
                 raise exceptions.ConfigurationError(required[validationitem])
 
+        # The retry, circuit breaker and timeout settings must be numbers.
+        for item in [a for a in jobs[job] if a.startswith(
+                ("retry-", "circuit-", "timeout-"))]:
+
+            try:
+
+                float(jobs[job][item])
+
+            except ValueError:
+
+                raise exceptions.ConfigurationError(
+                    "The parameter '{0}' must be a number, '{1}' was given."
+                    .format(item, jobs[job][item]))
+
+
+def _configcachekey(parameters):
+    """Work out the configuration cache key for a set of inputs."""
+    digest = hashlib.sha256()
+
+    # The merge also depends on the plugins that are installed, through the
+    # executables and module names that they give, and on the version of
+    # Longbow doing it.
+    digest.update(json.dumps(
+        [CONFIGCACHEVERSION, longbow.__version__, sys.version_info[:2],
+         os.getcwd(), sorted(JOBTEMPLATE.items()),
+         sorted(parameters.items()),
+         apps.PLUGINS, plugins.registry(),
+         sorted([name, sorted(overrides)]
+                for name, overrides in apps.MODNAMEOVERRIDES.items())],
+        default=str, sort_keys=True).encode("utf-8"))
+
+    # Changes to the merging and validation code between releases count too.
+    for module in (sys.modules[__name__], sweeps):
+
+        with open(module.__file__, "rb") as source:
+
+            digest.update(source.read())
+
+    for configfile in (parameters["hosts"], parameters["job"]):
+
+        if configfile == "":
+
+            continue
+
+        try:
+
+            with open(configfile, "rb") as tmp:
+
+                digest.update(configfile.encode("utf-8") + b"\0" + tmp.read())
+
+        except (IOError, OSError):
+
+            # Let the normal loading report the problem.
+            return None
+
+    return digest.hexdigest()
+
+
+def _configcacheread():
+    """Read the configuration cache entries, if there are any."""
+    try:
+
+        # Loading from the bytes is far quicker than from the file object.
+        with open(CONFIGCACHE, "rb") as tmp:
+
+            cache = marshal.loads(tmp.read())
+
+        if cache["version"] == CONFIGCACHEVERSION:
+
+            return cache["entries"]
+
+    except (IOError, OSError, EOFError, ValueError, TypeError, KeyError):
+
+        pass
+
+    return []
+
+
+def _configcacheload(key):
+    """Get the merged jobs for a cache key, or None if not cached."""
+    if key is None:
+
+        return None
+
+    for entry in _configcacheread():
+
+        if entry[0] == key:
+
+            LOG.debug("Using the cached configuration '%s'", key)
+
+            jobs = {}
+
+            for job in entry[1]:
+
+                jobs[job] = JOBTEMPLATE.copy()
+                jobs[job].update(entry[1][job])
+
+            return jobs
+
+    return None
+
+
+def _configcachesave(key, jobs):
+    """Add merged jobs to the configuration cache."""
+    directory = os.path.dirname(CONFIGCACHE)
+
+    if key is None or os.path.isdir(directory) is False:
+
+        return
+
+    # Only keep the values that differ from the template.
+    changes = {}
+
+    for job in jobs:
+
+        changes[job] = dict((item, value) for item, value in jobs[job].items()
+                            if JOBTEMPLATE.get(item) != value)
+
+    # Newest first, dropping the oldest once the cache is full.
+    entries = [entry for entry in _configcacheread() if entry[0] != key]
+    entries = [[key, changes]] + entries[:CONFIGCACHESIZE - 1]
+
+    try:
+
+        handle, tmpfile = tempfile.mkstemp(prefix=".configcache-",
+                                           dir=directory)
+
+        with os.fdopen(handle, "wb") as tmp:
+
+            marshal.dump({"version": CONFIGCACHEVERSION,
+                          "entries": entries}, tmp)
+
+        os.replace(tmpfile, CONFIGCACHE)
+
+    except (IOError, OSError, ValueError) as err:
+
+        LOG.debug("Could not save the configuration cache - %s", err)
+
+
+def _parseconfiglines(contents, configfile):
+    """Parse the lines of a configuration file, see parseconfigs."""
+    sections = []
+    params = {}
+    lines = {}
+    section = None
+    options = None
+
+    for index, item in enumerate(contents):
+
+        # Find section markers
+        if item[:1] == "[" and item[-1:] == "]":
+
+            # Remove the square bracket section markers.
+            section = item[1:-1].replace("[", "").replace("]", "")
+
+            # Add to list of sections.
+            sections.append(section)
+
+            # Create a new section in the data structure.
+            options = params[section] = {}
+            lines[section] = index
+
+        # Ignore comments, anything else must be option data.
+        elif item[:1] != "#" and "=" in item:
+
+            if options is None:
+
+                raise exceptions.ConfigurationError(
+                    "Error the option on line {0} of configuration file "
+                    "'{1}' is not inside a section"
+                    .format(index + 1, configfile))
+
+            # Option is in the format key = param, with or without the
+            # spaces around the equals sign.
+            key, _, value = item.partition("=")
+
+            if key[-1:] == " ":
+
+                key = key[:-1]
+
+            if value[:1] == " ":
+
+                value = value[1:]
+
+            # Store the keys and values in the data structure.
+            options[key] = value
+            lines[(section, key)] = index
+
+    # Check if there are zero sections.
+    if len(sections) == 0:
+
+        raise exceptions.ConfigurationError(
+            "Error no sections are defined in configuration file '{0}'"
+            .format(configfile))
+
+    # Check for sections with zero options.
+    for section in sections:
+
+        if len(params[section]) == 0:
+
+            raise exceptions.ConfigurationError(
+                "Error section '{0}' on line {1} contains no parameter "
+                "definitions using configuration file '{2}'"
+                .format(section, lines[section] + 1, configfile))
+
+    return sections, params, lines
+
 
 def _saveconfigdiffs(params, oldparams, kdiff, vdiff):
     """Calculate configuration data diffs.
@@ -638,95 +958,73 @@ def _saveconfigdiffs(params, oldparams, kdiff, vdiff):
                     kdiff[section] = {option: params[section][option]}
 
 
-def _saveconfigupdates(contents, oldparams, valuediff):
+def _saveconfigupdates(contents, lines, valuediff):
     """Update the file metastructure for existing params.
 
     This method is a private method used by the saveconfigs method to update
     parameters that already exist in the configuration file, with the new
-    values if they have changed.
+    values if they have changed. The lines to edit are looked up in the line
+    map from parseconfigs.
 
     """
     for section in valuediff:
 
-        # Find the section start (so we know where to look)
-        sectionstartindex = contents.index("[" + section + "]")
-
-        # Find the section end.
-        try:
-
-            sectionendindex = contents.index(
-                [a for a in contents if "[" and "]" in a and
-                 contents.index(a) > sectionstartindex][0]) - 1
+        for option in valuediff[section]:
 
-        except IndexError:
+            # Edit the entry.
+            contents[lines[(section, option)]] = (
+                str(option) + " = " + str(valuediff[section][option]))
 
-            sectionendindex = len(contents)
 
-        # Limit our search to this range for the parameter.
-        for option in valuediff[section]:
+def _saveconfignew(contents, lines, keydiff):
+    """Add new params to the file metastructure.
 
-            for item in [" = ", " =", "= ", "="]:
+    This method is a private method used by the saveconfigs method to add new
+    parameters to the configuration file, if they have been created. New
+    parameters go after the last parameter of their section, and new sections
+    go at the end of the file. The file is rebuilt in a single pass, using the
+    line map from parseconfigs.
 
-                try:
+    """
+    inserts = {}
+    sectionends = {}
 
-                    # Get the line index to edit.
-                    editposition = (
-                        sectionstartindex +
-                        contents[sectionstartindex:sectionendindex].index(
-                            str(option) + item +
-                            str(oldparams[section][option])))
+    # Find the last line of each section that new parameters should follow.
+    for key, index in lines.items():
 
-                    break
+        section = key[0] if isinstance(key, tuple) else key
 
-                except ValueError:
+        if index > sectionends.get(section, -1):
 
-                    pass
+            sectionends[section] = index
 
-            # Edit the entry.
-            contents[editposition] = (
-                str(option) + " = " + str(valuediff[section][option]))
+    newsections = []
 
+    for section in keydiff:
 
-def _saveconfignew(contents, keydiff):
-    """Calculate configuration data diffs.
+        entries = [str(option) + " = " + str(keydiff[section][option])
+                   for option in keydiff[section]]
 
-    This method is a private method used by the saveconfigs method to add new
-    parameters to the configuration file, if they have been created.
+        if section in sectionends:
 
-    """
-    for section in keydiff:
+            inserts.setdefault(sectionends[section], []).extend(entries)
 
-        try:
-            # Find the section start.
-            sectionstartindex = contents.index("[" + section + "]")
+        else:
 
-            # Find the section end.
-            try:
-                sectionendindex = contents.index(
-                    [a for a in contents if "[" and "]" in a and
-                     contents.index(a) > sectionstartindex][0])
+            newsections.extend(["", "[" + section + "]"] + entries)
 
-            except IndexError:
+    if len(inserts) > 0:
 
-                sectionendindex = len(contents)
+        updated = []
 
-            # Now for each option.
-            for option in keydiff[section]:
+        for index, item in enumerate(contents):
 
-                # Insert into the list in the appropriate place.
-                contents.insert(
-                    sectionendindex,
-                    str(option) + " = " + str(keydiff[section][option]))
+            updated.append(item)
 
-        # Doesn't exist so it is a new section.
-        except ValueError:
+            if index in inserts:
 
-            # Append the section.
-            contents.extend(["", "[" + section + "]"])
+                updated.extend(inserts[index])
 
-            # Now run through each option.
-            for option in keydiff[section]:
+        contents = updated
 
-                # And append it to the end of the list.
-                contents.append(
-                    str(option) + " = " + str(keydiff[section][option]))
+    return contents + newsections
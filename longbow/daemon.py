@@ -0,0 +1,390 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing the Longbow daemon.
+
+Normally each launch of Longbow monitors its own jobs, so a user with many
+sessions on the go has many processes each asking the same scheduler about
+their jobs. The daemon looks after any number of sessions from one process.
+It has a single monitor loop for all of them in which identical status
+queries, from any session, are sent once per poll for each host and user
+(sessions with the same polling interval poll together), and the per host
+retry and timeout state is shared by every session.
+
+The daemon listens on a Unix socket (~/.longbow/daemon.sock by default) that
+only the user can connect to. Each request is a single line of JSON with a
+"command" key, and each reply is a single line of JSON holding either a
+"result" or an "error". The commands are:
+
+submit
+    Submit a new session, "parameters" holds the parameters dictionary that
+    would be handed to entrypoints.longbow() (any that are missing take their
+    defaults from entrypoints.PARAMETERS) and "cwd" the client's working
+    directory, which the configuration files and local working directories
+    are found from. The result is the name of the recovery file for the
+    session.
+
+recover
+    Pick up an existing session from the recovery file named by
+    "recoveryfile", as with the --recover command-line flag.
+
+status
+    The result maps the recovery file name of each session to a dictionary
+    of its jobs, each with their "jobid", "resource" and "laststatus".
+
+shutdown
+    Stop the daemon. Sessions that have not finished can be picked up again
+    from their recovery files.
+
+The following methods can be found:
+
+serve(socketpath)
+    This method runs the daemon until it is told to stop.
+
+request(command, socketpath, **fields)
+    This method sends a request to a running daemon and returns the result.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+
+import longbow.configuration as configuration
+import longbow.entrypoints as entrypoints
+import longbow.exceptions as exceptions
+import longbow.scheduling as scheduling
+import longbow.shellwrappers as shellwrappers
+import longbow.staging as staging
+
+LOG = logging.getLogger("longbow.daemon")
+
+# Where the daemon listens for requests.
+SOCKET = os.path.join(os.path.expanduser("~/.longbow"), "daemon.sock")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    """Socket server holding the sessions looked after by the daemon."""
+
+    daemon_threads = True
+
+    def __init__(self, socketpath):
+
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+        # Nobody else should be able to submit jobs as this user.
+        umask = os.umask(0o177)
+
+        try:
+
+            socketserver.UnixStreamServer.__init__(self, socketpath,
+                                                   _Handler)
+
+        finally:
+
+            os.umask(umask)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    """Answer each request sent on a connection to the daemon."""
+
+    def handle(self):
+
+        for line in self.rfile:
+
+            try:
+
+                message = json.loads(line.decode("utf-8"))
+                command = COMMANDS[message["command"]]
+
+            except (KeyError, TypeError, ValueError):
+
+                reply = {"error": "Could not understand the request '{0}'."
+                                  .format(line.decode("utf-8").strip())}
+
+            else:
+
+                try:
+
+                    reply = {"result": command(self.server, message)}
+
+                except Exception as err:
+
+                    reply = {"error": str(err)}
+
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+def serve(socketpath=SOCKET):
+    """Run the Longbow daemon.
+
+    Listen for requests on a Unix socket and monitor every session that is
+    submitted or recovered through it, until a shutdown request is received.
+    Sessions that complete are cleaned up and dropped, as they would be by
+    a normal Longbow launch.
+
+    Optional arguments are:
+
+    socketpath (string): The path of the socket to listen on.
+
+    """
+    # A socket left behind by a daemon that died can be reused, one that
+    # still answers cannot.
+    if os.path.exists(socketpath):
+
+        try:
+
+            request("status", socketpath)
+
+        except exceptions.DaemonError:
+
+            os.remove(socketpath)
+
+        else:
+
+            raise exceptions.DaemonError(
+                "A Longbow daemon is already listening on '{0}'."
+                .format(socketpath))
+
+    server = _Server(socketpath)
+    listener = threading.Thread(target=server.serve_forever)
+    listener.daemon = True
+    listener.start()
+
+    LOG.info("Longbow daemon listening on '%s'.", socketpath)
+
+    try:
+
+        _monitor(server)
+
+    finally:
+
+        server.shutdown()
+        server.server_close()
+
+        # Sessions left running are no longer being monitored.
+        for jobs, _ in server.sessions.values():
+
+            scheduling.monitorstop(jobs)
+
+        if os.path.exists(socketpath):
+
+            os.remove(socketpath)
+
+        LOG.info("Longbow daemon stopped, %s session/s left running.",
+                 len(server.sessions))
+
+
+def request(command, socketpath=SOCKET, **fields):
+    """Send a request to a running Longbow daemon.
+
+    Required arguments are:
+
+    command (string): One of "submit", "recover", "status" or "shutdown".
+
+    Optional arguments are:
+
+    socketpath (string): The path of the socket the daemon listens on.
+
+    fields: Any other fields of the request, see the module description.
+
+    Return parameters are:
+
+    result: The result of the request.
+
+    """
+    fields["command"] = command
+
+    try:
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+
+            sock.connect(socketpath)
+            sock.sendall(json.dumps(fields).encode("utf-8") + b"\n")
+
+            with sock.makefile("rb") as stream:
+
+                reply = json.loads(stream.readline().decode("utf-8"))
+
+    except (OSError, ValueError) as err:
+
+        raise exceptions.DaemonError(
+            "Could not talk to the Longbow daemon on '{0}': {1}"
+            .format(socketpath, err))
+
+    if "error" in reply:
+
+        raise exceptions.DaemonError(reply["error"])
+
+    return reply["result"]
+
+
+def _monitor(server):
+    """Monitor every session until the daemon is stopped."""
+    while not server.stopping.wait(1.0):
+
+        now = time.time()
+
+        with server.lock:
+
+            sessions = list(server.sessions.items())
+
+        # All sessions polling on this pass share their status queries.
+        with shellwrappers.statusround():
+
+            for name, (jobs, state) in sessions:
+
+                try:
+
+                    allcomplete, _ = scheduling.monitorstep(jobs, state, now)
+
+                    if allcomplete is True:
+
+                        scheduling.monitorfinish(jobs)
+                        staging.cleanup(jobs)
+
+                # A broken session should not stop the others, it can be
+                # picked up again from its recovery file.
+                except Exception as err:
+
+                    LOG.error("Session '%s' has been dropped: %s", name, err)
+                    scheduling.monitorstop(jobs)
+
+                    allcomplete = True
+
+                if allcomplete is True:
+
+                    with server.lock:
+
+                        del server.sessions[name]
+
+
+def _adopt(server, jobs):
+    """Add a session to those being monitored by the daemon."""
+    name = jobs["lbowconf"]["recoveryfile"]
+
+    with server.lock:
+
+        if name in server.sessions:
+
+            raise exceptions.DaemonError(
+                "Session '{0}' is already being monitored.".format(name))
+
+        server.sessions[name] = (
+            jobs, scheduling.monitorstart(jobs, align=True))
+
+    LOG.info("Monitoring session '%s'.", name)
+
+    return name
+
+
+def _submit(server, message):
+    """Submit a new session."""
+    parameters = dict(entrypoints.PARAMETERS)
+    parameters.update(message["parameters"])
+    jobs = {}
+
+    # The daemon must stay connected. The daemon's working directory is shared
+    # by every session, so the configuration files and the local working
+    # directory are found from the client's instead.
+    parameters["disconnect"] = True
+    parameters["explain-deps"] = False
+    parameters.setdefault("localworkdir", message["cwd"])
+
+    entrypoints._hostfileproc(parameters, message["cwd"])
+    entrypoints._jobfileproc(parameters, message["cwd"])
+
+    # Only one session can be set up at a time.
+    with entrypoints.SUBMITLOCK:
+
+        try:
+
+            entrypoints.longbow(jobs, parameters)
+
+        except exceptions.DisconnectException:
+
+            pass
+
+    return _adopt(server, jobs)
+
+
+def _recover(server, message):
+    """Pick up a session from its recovery file."""
+    with server.lock:
+
+        if message["recoveryfile"] in server.sessions:
+
+            raise exceptions.DaemonError(
+                "Session '{0}' is already being monitored."
+                .format(message["recoveryfile"]))
+
+    return _adopt(server, configuration.loadrecovery(message["recoveryfile"]))
+
+
+def _status(server, message):
+    """Report the status of the jobs in every session."""
+    with server.lock:
+
+        sessions = dict(server.sessions)
+
+    return {
+        name: {
+            item: {
+                "jobid": jobs[item].get("jobid", ""),
+                "laststatus": jobs[item].get("laststatus", ""),
+                "resource": jobs[item]["resource"]
+            } for item in jobs if "lbowconf" not in item
+        } for name, (jobs, _) in sessions.items()
+    }
+
+
+def _shutdown(server, message):
+    """Stop the daemon."""
+    server.stopping.set()
+
+    return "Stopping."
+
+
+# The requests that the daemon answers.
+COMMANDS = {
+    "recover": _recover,
+    "shutdown": _shutdown,
+    "status": _status,
+    "submit": _submit
+}
@@ -0,0 +1,407 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing methods for caching the dependencies of input files.
+
+The file parsers in the application plugins follow every include in an input
+file, and the includes within those, to find the files that a job needs.
+This module keeps the result of each of those scans in ~/.longbow between
+runs, keyed by the content hash of the input file, so that a scan is only
+repeated when one of the files it found has changed. Entries that have not
+been used for MAXAGE seconds, and the hashes of files that no longer exist,
+are dropped whenever the cache is saved so that it does not grow without
+limit. The following methods can be found within this module:
+
+lookup(app, fileitem, cwd, substitution)
+    This method will return the files found by an earlier scan of an input
+    file, and the substitutions picked up from them, provided that none of
+    those files have changed since.
+
+store(app, fileitem, cwd, substitution, found, after)
+    This method will remember the result of a scan of an input file.
+
+begin()
+    This method will forget the scans noted for the previous run.
+
+record(cwd, fileitem, found, source)
+    This method will note a scan used during this run, for explain.
+
+save()
+    This method will prune the cache and write any new scans to file.
+
+explain(jobs)
+    This method will return a printable description of the dependencies found
+    for each job, and whether they came from the cache or were parsed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+LOG = logging.getLogger("longbow.dependencies")
+
+# Bump this whenever the layout of the cache file changes, older caches are
+# then ignored rather than misread.
+VERSION = 2
+
+# Entries of the cache that have not been used for this many seconds are
+# dropped when it is saved.
+MAXAGE = 30 * 24 * 60 * 60
+
+CACHEFILE = os.path.join(os.path.expanduser("~/.longbow"), "dependencies.json")
+
+# The cache as loaded from disk, this is None until it is first needed.
+CACHE = None
+
+# Scans used during this run, in the order they were used.
+USED = []
+
+# Files hashed since the cache was last saved, these are known to exist.
+TOUCHED = set()
+
+LOCK = threading.RLock()
+
+_DIRTY = [False]
+
+
+def lookup(app, fileitem, cwd, substitution):
+    """Find an earlier scan of an input file.
+
+    Required arguments are:
+
+    app (string) - The name of the application plugin.
+
+    fileitem (string) - The input file, relative to cwd.
+
+    cwd (string) - The directory the job runs from.
+
+    substitution (dictionary) - The substitutions in force for the scan.
+
+    Returns a tuple of the files found and the substitutions after the scan,
+    or None if there is no earlier scan or any of its files have changed.
+
+    """
+    key = _key(app, fileitem, cwd, substitution)
+
+    if key is None:
+
+        return None
+
+    with LOCK:
+
+        entry = _load()["graphs"].get(key)
+
+    if entry is None:
+
+        return None
+
+    # Every file found must still have the same content.
+    for item, digest in zip(entry["found"], entry["digests"]):
+
+        if _digest(os.path.join(cwd, item)) != digest:
+
+            LOG.debug("'%s' has changed since '%s' was last scanned",
+                      item, fileitem)
+
+            return None
+
+    with LOCK:
+
+        entry["used"] = time.time()
+        _DIRTY[0] = True
+
+    return list(entry["found"]), dict(entry["after"])
+
+
+def store(app, fileitem, cwd, substitution, found, after):
+    """Remember the result of a scan of an input file.
+
+    Required arguments are:
+
+    app (string) - The name of the application plugin.
+
+    fileitem (string) - The input file, relative to cwd.
+
+    cwd (string) - The directory the job runs from.
+
+    substitution (dictionary) - The substitutions in force for the scan.
+
+    found (list) - The files found by the scan, relative to cwd.
+
+    after (dictionary) - The substitutions after the scan.
+
+    """
+    key = _key(app, fileitem, cwd, substitution)
+
+    if key is None:
+
+        return
+
+    digests = [_digest(os.path.join(cwd, item)) for item in found]
+
+    # Only plain values survive the round trip through json.
+    entry = {
+        "found": list(found),
+        "digests": digests,
+        "after": dict((str(name), str(value))
+                      for name, value in after.items()),
+        "used": time.time()
+        }
+
+    with LOCK:
+
+        _load()["graphs"][key] = entry
+        _DIRTY[0] = True
+
+
+def begin():
+    """Forget the scans noted for the previous run, see record."""
+    with LOCK:
+
+        del USED[:]
+
+
+def record(cwd, fileitem, found, source):
+    """Note a scan used during this run.
+
+    Required arguments are:
+
+    cwd (string) - The directory the job runs from.
+
+    fileitem (string) - The input file, relative to cwd.
+
+    found (list) - The files found by the scan, relative to cwd.
+
+    source (string) - Where the scan came from, "cached" or "parsed".
+
+    """
+    with LOCK:
+
+        USED.append((os.path.abspath(cwd), fileitem, list(found), source))
+
+
+def save():
+    """Prune the cache and write any new scans to the cache file.
+
+    Entries not used for MAXAGE seconds and the hashes of files that no
+    longer exist are dropped first. The cache is only written if the
+    ~/.longbow directory already exists, and is written to a temporary file
+    first so a cache is never left half written. Failures are logged rather
+    than raised, as the cache is only an aid to speed.
+
+    """
+    with LOCK:
+
+        if CACHE is None or _DIRTY[0] is False:
+
+            return
+
+        _prune(time.time())
+
+        directory = os.path.dirname(CACHEFILE)
+
+        if os.path.isdir(directory) is False:
+
+            return
+
+        try:
+
+            handle, tmpfile = tempfile.mkstemp(
+                prefix=".dependencies-", dir=directory)
+
+            with os.fdopen(handle, "w") as fil:
+
+                json.dump(CACHE, fil)
+
+            os.replace(tmpfile, CACHEFILE)
+            _DIRTY[0] = False
+
+        except (IOError, OSError) as err:
+
+            LOG.debug("Could not save the dependency cache - %s", err)
+
+
+def explain(jobs):
+    """Describe the dependencies found for each job.
+
+    Required arguments are:
+
+    jobs (dictionary) - The Longbow jobs data structure, see configuration.py
+                        for more information about the format of this
+                        structure.
+
+    Returns a string listing, for each job, the input files scanned with the
+    files each depends on and a short content hash for each.
+
+    """
+    lines = []
+
+    with LOCK:
+
+        used = list(USED)
+
+    for job in [a for a in jobs if "lbowconf" not in a]:
+
+        cwd = os.path.abspath(jobs[job]["localworkdir"])
+        lines.append("Job '{0}' in '{1}':".format(job, cwd))
+
+        scans = [scan for scan in used if scan[0] == cwd]
+
+        if not scans:
+
+            lines.append("    no input files were scanned")
+
+        for _, fileitem, found, source in scans:
+
+            lines.append("    {0} ({1})".format(fileitem, source))
+
+            for item in found:
+
+                digest = _digest(os.path.join(cwd, item)) or "missing"
+                lines.append("        {0}  {1}".format(digest[:12], item))
+
+    return "\n".join(lines)
+
+
+def _prune(now):
+    """Drop the entries of the cache that are stale or for missing files."""
+    oldest = now - MAXAGE
+
+    for path, known in list(CACHE["files"].items()):
+
+        if known[3] < oldest or (path not in TOUCHED and
+                                 not os.path.isfile(path)):
+
+            del CACHE["files"][path]
+
+    for key, entry in list(CACHE["graphs"].items()):
+
+        if entry["used"] < oldest:
+
+            del CACHE["graphs"][key]
+
+    TOUCHED.clear()
+
+
+def _key(app, fileitem, cwd, substitution):
+    """Build the cache key for a scan, or None if the file can't be read."""
+    digest = _digest(os.path.join(cwd, fileitem))
+
+    if digest is None:
+
+        return None
+
+    return json.dumps([app, fileitem, digest,
+                       sorted([str(name), str(value)]
+                              for name, value in substitution.items())])
+
+
+def _digest(path):
+    """Get the sha256 of a file, skipping the read if it hasn't changed."""
+    path = os.path.abspath(path)
+
+    try:
+
+        info = os.stat(path)
+
+    except OSError:
+
+        return None
+
+    with LOCK:
+
+        known = _load()["files"].get(path)
+
+    if known is not None and known[:2] == [info.st_mtime, info.st_size]:
+
+        with LOCK:
+
+            known[3] = time.time()
+            TOUCHED.add(path)
+            _DIRTY[0] = True
+
+        return known[2]
+
+    digest = hashlib.sha256()
+
+    try:
+
+        with open(path, "rb") as fil:
+
+            for block in iter(lambda: fil.read(1048576), b""):
+
+                digest.update(block)
+
+    except (IOError, OSError):
+
+        return None
+
+    with LOCK:
+
+        _load()["files"][path] = [info.st_mtime, info.st_size,
+                                  digest.hexdigest(), time.time()]
+        TOUCHED.add(path)
+        _DIRTY[0] = True
+
+    return digest.hexdigest()
+
+
+def _load():
+    """Load the cache file the first time it is needed."""
+    global CACHE
+
+    with LOCK:
+
+        if CACHE is None:
+
+            CACHE = {"version": VERSION, "files": {}, "graphs": {}}
+
+            try:
+
+                with open(CACHEFILE, "r") as fil:
+
+                    cache = json.load(fil)
+
+                if (cache.get("version") == VERSION and
+                        "files" in cache and "graphs" in cache):
+
+                    CACHE = cache
+
+            except (IOError, OSError, ValueError, AttributeError):
+
+                pass
+
+        return CACHE
@@ -60,11 +60,17 @@ import os
 import sys
 import logging
 import subprocess
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
 
 import longbow.applications as applications
 import longbow.apps as apps
 import longbow.configuration as configuration
+import longbow.daemon as daemon
+import longbow.dependencies as dependencies
 import longbow.exceptions as exceptions
+import longbow.metrics as metrics
 import longbow.scheduling as scheduling
 import longbow.shellwrappers as shellwrappers
 import longbow.staging as staging
@@ -74,6 +80,38 @@ LONGBOWVERSION = "1.5.3-dev"
 
 LOG = logging.getLogger("longbow")
 
+# Only one session can be set up at a time in a process, as the library keeps
+# some of its state in module globals. Code that runs longbow() from more than
+# one thread (such as the daemon and the Session class) holds this while doing
+# so with the "disconnect" parameter set.
+SUBMITLOCK = threading.Lock()
+
+# The parameters that can be given on the command-line, along with their
+# defaults. These can alternatively be provided in configuration files.
+PARAMETERS = {
+    "daemon": False,
+    "debug": False,
+    "disconnect": False,
+    "executable": "",
+    "executableargs": "",
+    "explain-deps": False,
+    "hosts": "",
+    "job": "",
+    "jobname": "",
+    "log": "",
+    "maxtime": "",
+    "metrics-file": "",
+    "metrics-port": "",
+    "nochecks": False,
+    "pipeline": False,
+    "recover": "",
+    "resource": "",
+    "replicates": "",
+    "trace": "",
+    "update": "",
+    "verbose": False
+}
+
 
 def launcher():
     """Entry point for Longbow when used as an application.
@@ -94,32 +132,17 @@ def launcher():
     commandlineargs = sys.argv
     commandlineargs.pop(0)
 
-    # Initialise parameters that could alternatively be provided in
-    # configuration files
-    parameters = {
-        "debug": False,
-        "disconnect": False,
-        "executable": "",
-        "executableargs": "",
-        "hosts": "",
-        "job": "",
-        "jobname": "",
-        "log": "",
-        "maxtime": "",
-        "nochecks": False,
-        "recover": "",
-        "resource": "",
-        "replicates": "",
-        "update": "",
-        "verbose": False
-    }
+    # Start from the default parameters.
+    parameters = dict(PARAMETERS)
 
     # Specify all recognised longbow arguments
     alllongbowargs = [
         "--about",
+        "--daemon",
         "--debug",
         "--disconnect",
         "--examples",
+        "--explain-deps",
         "-h",
         "--help",
         "--hosts",
@@ -127,10 +150,14 @@ def launcher():
         "--jobname",
         "--log",
         "--maxtime",
+        "--metrics-file",
+        "--metrics-port",
         "--nochecks",
+        "--pipeline",
         "--recover",
         "--resource",
         "--replicates",
+        "--trace",
         "--update",
         "-V",
         "--verbose",
@@ -188,6 +215,28 @@ def launcher():
         LOG.info("Longbow version: %s", LONGBOWVERSION)
         LOG.info("Longbow Commandline: %s", (" ").join(sys.argv))
 
+        # Write out each timing as it is taken if asked to.
+        if parameters["trace"] != "":
+
+            metrics.trace(parameters["trace"])
+
+        # Let Prometheus see how things are going if asked to.
+        if parameters["metrics-file"] != "":
+
+            metrics.textfile(parameters["metrics-file"])
+
+        if parameters["metrics-port"] != "":
+
+            try:
+
+                metrics.listen(int(parameters["metrics-port"]))
+
+            except ValueError:
+
+                raise exceptions.CommandlineargsError(
+                    "The port given with --metrics-port must be a number, "
+                    "'{0}' was given.".format(parameters["metrics-port"]))
+
         _hostfileproc(parameters)
         _jobfileproc(parameters)
 
@@ -195,7 +244,8 @@ def launcher():
 
         # If no executable and jobfile has been given then fail.
         if (parameters["executable"] == "" and parameters["job"] == "" and
-                parameters["recover"] == "" and parameters["update"] == ""):
+                parameters["recover"] == "" and parameters["update"] == "" and
+                parameters["daemon"] is False):
 
             raise exceptions.RequiredinputError(
                 "There was no executable or job file given on the "
@@ -207,12 +257,23 @@ def launcher():
 
         jobs = {}
 
+        # In daemon mode sessions are submitted and recovered over a socket.
+        if parameters["daemon"] is True:
+
+            LOG.info("Starting the Longbow daemon.")
+
+            daemon.serve()
+
         # If recovery or update mode is not active then this is a new run.
-        if parameters["recover"] == "" and parameters["update"] == "":
+        elif parameters["recover"] == "" and parameters["update"] == "":
 
             LOG.info("Initialisation complete.")
 
-            longbow(jobs, parameters)
+            explanation = longbow(jobs, parameters)
+
+            if explanation is not None:
+
+                print(explanation)
 
         # If recovery mode is set then start the recovery process.
         elif parameters["recover"] != "" and parameters["update"] == "":
@@ -251,6 +312,9 @@ def launcher():
 
             LOG.info("Kill any queued or running jobs and clean up.")
 
+            todelete = []
+            tostage = []
+
             # If we are exiting at this stage then we need to kill off
             for item in [a for a in jobs if "lbowconf" not in a]:
 
@@ -263,17 +327,23 @@ def launcher():
                             job["laststatus"] != "Finished" and
                             job["laststatus"] != "Submit Error"):
 
-                        # Kill it.
-                        scheduling.delete(job)
-
-                        # Transfer the directories as they are.
-                        staging.stage_downstream(job)
+                        todelete.append(job)
+                        tostage.append(job)
 
                     # Job is finished then just stage.
                     elif job["laststatus"] != "Submit Error":
 
-                        # Transfer the directories as they are.
-                        staging.stage_downstream(job)
+                        tostage.append(job)
+
+            # Kill them, with one command per batch of jobs on each resource.
+            if todelete:
+
+                scheduling.bulkdelete(todelete)
+
+            # Transfer the directories as they are.
+            with ThreadPoolExecutor(max_workers=staging.WORKERS) as pool:
+
+                list(pool.map(staging.stage_downstream, tostage))
 
             staging.cleanup(jobs)
 
@@ -322,6 +392,16 @@ def launcher():
     # Show nice exit message.
     finally:
 
+        # Let the user know where the time went, and if any hosts were being
+        # troublesome.
+        for line in metrics.summary():
+
+            LOG.info(line)
+
+        metrics.trace(None)
+        metrics.textfile(None)
+        metrics.listen(None)
+
         LOG.info("Good bye from Longbow!")
         LOG.info("Check out http://www.hecbiosim.ac.uk/ for other "
                  "powerful biomolecular simulation software tools.")
@@ -339,44 +419,65 @@ def longbow(jobs, parameters):
     parameters (dictionary): A dictionary containing the parameters and
                              overrides from the command-line.
 
+    Returns the description of the dependencies of each job (see
+    dependencies.explain) if the "explain-deps" parameter is set, in which
+    case nothing is submitted, otherwise None.
+
     """
     # A failure at this level will result in jobs being killed off before
     # escalating the exception to trigger graceful exit.
 
     # Load configurations and initialise Longbow data structures.
-    jobparams = configuration.processconfigs(parameters)
+    jobparams = _phase("processconfigs", configuration.processconfigs,
+                       parameters)
 
     # Copy to jobs so when exceptions are raised the structure is available.
     for param in jobparams:
 
         jobs[param] = jobparams[param]
 
+    # Show the input files that each job depends on, without going anywhere
+    # near the remote resource.
+    if parameters.get("explain-deps", False) is True:
+
+        _phase("processjobs", applications.processjobs, jobs)
+
+        return dependencies.explain(jobs)
+
     # Test all connection/s specified in the job configurations
-    shellwrappers.checkconnections(jobs)
+    _phase("checkconnections", shellwrappers.checkconnections, jobs)
 
     # Test the hosts listed in the jobs configuration file have their
     # scheduler environments listed, if not then test and save them.
-    scheduling.checkenv(jobs, parameters["hosts"])
+    _phase("checkenv", scheduling.checkenv, jobs, parameters["hosts"])
 
     # Test that for the applications listed in the job configuration
     # file are available and that the executable is present.
     if parameters["nochecks"] is False:
 
-        applications.checkapp(jobs)
+        _phase("checkapp", applications.checkapp, jobs)
 
     # Process the jobs command line arguments and find files for
     # staging.
-    applications.processjobs(jobs)
+    _phase("processjobs", applications.processjobs, jobs)
+
+    # In pipeline mode each job is submitted as soon as it has been prepared
+    # and staged, rather than waiting for every job to finish each step.
+    if parameters.get("pipeline", False) is True:
+
+        _phase("pipeline", scheduling.pipeline, jobs)
+
+    else:
 
-    # Create jobfile and add it to the list of files that needs
-    # uploading.
-    scheduling.prepare(jobs)
+        # Create jobfile and add it to the list of files that needs
+        # uploading.
+        _phase("prepare", scheduling.prepare, jobs)
 
-    # Stage all of the job files along with the scheduling script.
-    staging.stage_upstream(jobs)
+        # Stage all of the job files along with the scheduling script.
+        _phase("stage_upstream", staging.stage_upstream, jobs)
 
-    # Submit all jobs.
-    scheduling.submit(jobs)
+        # Submit all jobs.
+        _phase("submit", scheduling.submit, jobs)
 
     # Process the disconnect function.
     if parameters["disconnect"] is True:
@@ -384,10 +485,10 @@ def longbow(jobs, parameters):
         raise exceptions.DisconnectException
 
     # Monitor all jobs.
-    scheduling.monitor(jobs)
+    _phase("monitor", scheduling.monitor, jobs)
 
     # Clean up all jobs
-    staging.cleanup(jobs)
+    _phase("cleanup", staging.cleanup, jobs)
 
 
 def recovery(jobs, recoveryfile):
@@ -406,36 +507,19 @@ def recovery(jobs, recoveryfile):
 
     """
 
-    jobfile = os.path.join(os.path.expanduser('~/.longbow'), recoveryfile)
-
-    LOG.info("Attempting to find the recovery file '{0}'".format(jobfile))
-
-    # Load the jobs recovery file.
-    if os.path.isfile(jobfile):
-
-        LOG.info("Recovery file found.")
+    jobparams = configuration.loadrecovery(recoveryfile)
 
-        _, _, jobparams = configuration.loadconfigs(jobfile)
-
-        # Copy to jobs so when exceptions are raised the structure is
-        # available.
-        for param in jobparams:
-
-            jobs[param] = jobparams[param]
-
-    else:
+    # Copy to jobs so when exceptions are raised the structure is available.
+    for param in jobparams:
 
-        raise exceptions.RequiredinputError(
-            "Recovery file could not be found, make sure you haven't deleted "
-            "the recovery file and that you are not providing the full path, "
-            "just the file name is needed.")
+        jobs[param] = jobparams[param]
 
     # Rejoin at the monitoring stage. This will assume that all jobs that
     # are no longer in the queue have completed.
-    scheduling.monitor(jobs)
+    _phase("monitor", scheduling.monitor, jobs)
 
     # Cleanup the remote working directory.
-    staging.cleanup(jobs)
+    _phase("cleanup", staging.cleanup, jobs)
 
 
 def update(jobs, updatefile):
@@ -445,38 +529,28 @@ def update(jobs, updatefile):
     Longbow session. All job statuses will be checked and updated in the
     recovery file and all output files will be synced before disconnecting."""
 
-    jobfile = os.path.join(os.path.expanduser('~/.longbow'), updatefile)
+    jobparams = configuration.loadrecovery(updatefile)
 
-    LOG.info("Attempting to find the recovery file '{0}'".format(jobfile))
-
-    # Load the jobs recovery file.
-    if os.path.isfile(jobfile):
-
-        LOG.info("Recovery file found.")
-
-        _, _, jobparams = configuration.loadconfigs(jobfile)
-
-        # Copy to jobs so when exceptions are raised the structure is
-        # available.
-        for param in jobparams:
-
-            jobs[param] = jobparams[param]
-
-    else:
+    # Copy to jobs so when exceptions are raised the structure is available.
+    for param in jobparams:
 
-        raise exceptions.RequiredinputError(
-            "Recovery file could not be found, make sure you haven't deleted "
-            "the recovery file and that you are not providing the full path, "
-            "just the file name is needed.")
+        jobs[param] = jobparams[param]
 
     # Add the updater key
     jobs["lbowconf"]["update"] = True
 
     # Enter monitoring loop
-    scheduling.monitor(jobs)
+    _phase("monitor", scheduling.monitor, jobs)
 
     # Cleanup the remote working directory.
-    staging.cleanup(jobs)
+    _phase("cleanup", staging.cleanup, jobs)
+
+
+def _phase(name, method, *args):
+    """Run one phase of a session, timing it as a "phase" span."""
+    with metrics.span("phase", phase=name):
+
+        return method(*args)
 
 
 def _commandlineproc(alllongbowargs, cmdlnargs, parameters):
@@ -595,8 +669,10 @@ def _downloadexamples(longbowargs):
         exit(0)
 
 
-def _hostfileproc(parameters):
+def _hostfileproc(parameters, cwd=""):
     """Locate the host configuration file."""
+    cwd = cwd or os.getcwd()
+
     # Hosts - if a filename hasn't been provided default to hosts.conf
     if parameters["hosts"] == "":
 
@@ -608,15 +684,15 @@ def _hostfileproc(parameters):
     if os.path.isabs(parameters["hosts"]) is False:
 
         # CWD.
-        cwd = os.path.join(os.getcwd(), parameters["hosts"])
+        cwdfile = os.path.join(cwd, parameters["hosts"])
 
         # Path for ~/.longbow directory.
         longbowdir = os.path.join(os.path.expanduser("~/.longbow"),
                                   parameters["hosts"])
 
-        if os.path.isfile(cwd):
+        if os.path.isfile(cwdfile):
 
-            parameters["hosts"] = cwd
+            parameters["hosts"] = cwdfile
 
         # The ~/.longbow directory.
         elif os.path.isfile(longbowdir):
@@ -629,12 +705,14 @@ def _hostfileproc(parameters):
                 "No host configuration file found in the current working "
                 "directory '{0}', the execution directory '{1}' or in the "
                 "~/.longbow directory."
-                .format(os.getcwd(),
+                .format(cwd,
                         os.path.dirname(os.path.realpath(__file__))))
 
 
-def _jobfileproc(parameters):
+def _jobfileproc(parameters, cwd=""):
     """Locate the job configuration file."""
+    cwd = cwd or os.getcwd()
+
     # Job - if a job configuration file has been supplied but the path hasn't
     # look in the current working directory and then the execution directory
     # if needs be.
@@ -643,11 +721,11 @@ def _jobfileproc(parameters):
         if os.path.isabs(parameters["job"]) is False:
 
             # Path for CWD.
-            cwd = os.path.join(os.getcwd(), parameters["job"])
+            cwdfile = os.path.join(cwd, parameters["job"])
 
-            if os.path.isfile(cwd):
+            if os.path.isfile(cwdfile):
 
-                parameters["job"] = cwd
+                parameters["job"] = cwdfile
 
             else:
 
@@ -655,7 +733,7 @@ def _jobfileproc(parameters):
                     "The job configuration file '{0}' couldn't be found in "
                     "the current working directory '{1}', the execution "
                     "directory '{2}'."
-                    .format(parameters["job"], os.getcwd(),
+                    .format(parameters["job"], cwd,
                             os.path.dirname(os.path.realpath(__file__))))
 
 
@@ -714,12 +792,16 @@ def _messageflags(longbowargs):
               "example.top -o output\n\n"
               "longbow args:\n\n"
               "--about                   : prints Longbow description.\n"
+              "--daemon                  : runs the Longbow daemon to monitor "
+              "many sessions.\n"
               "--debug                   : additional output to assist "
               "debugging.\n"
               "--disconnect              : instructs Longbow to disconnect and"
               " exit\n                            after submitting jobs.\n"
               "--examples                : downloads example files to "
               "./LongbowExamples\n"
+              "--explain-deps            : prints the input files each job "
+              "depends on and exits.\n"
               "--help, -h                : prints Longbow help.\n"
               "--hosts [file name]       : specifies the hosts configuration "
               "file name.\n"
@@ -731,10 +813,18 @@ def _messageflags(longbowargs):
               "should be directed to.\n"
               "--maxtime [HH:MM]         : set the maximum job time for all "
               "jobs.\n"
+              "--metrics-file [file]     : writes metrics for the "
+              "Prometheus textfile collector.\n"
+              "--metrics-port [port]     : serves metrics for Prometheus "
+              "on a local port.\n"
+              "--pipeline                : submits each job as soon as it "
+              "has been staged.\n"
               "--recover [file name]     : launches the recovery mode.\n"
               "--resource [name]         : specifies the remote resource.\n"
               "--replicates [number]     : number of replicate jobs to be "
               "submitted.\n"
+              "--trace [file name]       : writes the time taken by each "
+              "step to a file.\n"
               "--verbose                 : additional run-time info to be "
               "output.\n"
               "--update [file name]      : launches the update mode to sync "
@@ -113,6 +113,16 @@ class ConfigurationError(Exception):
 
     pass
 
+# -----------------------------------------------------------------------------
+# Exceptions for daemon.py
+
+
+class DaemonError(Exception):
+
+    """Longbow daemon exception."""
+
+    pass
+
 # -----------------------------------------------------------------------------
 # Exceptions for plugin.py
 
@@ -162,6 +172,16 @@ class QueuemaxError(Exception):
 
     pass
 
+# -----------------------------------------------------------------------------
+# Exceptions for session.py
+
+
+class SessionError(Exception):
+
+    """Longbow session exception."""
+
+    pass
+
 # -----------------------------------------------------------------------------
 # Exceptions for shellwrappers.py
 
@@ -322,3 +342,13 @@ class RemoteworkdirError(Exception):
     """Remote working directory related generic exception."""
 
     pass
+
+# -----------------------------------------------------------------------------
+# Exceptions for templates.py
+
+
+class TemplateError(Exception):
+
+    """Submit script template exception."""
+
+    pass
@@ -0,0 +1,626 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module for measuring where the time in a Longbow session goes.
+
+Timings are taken around each remote command (labelled with the host and the
+class of command), each phase of entrypoints.longbow() and each pass of the
+monitor loop. These are totalled in memory so that a summary can be shown
+when Longbow exits, and can also be written as they happen to a trace file,
+one JSON object per line, for looking at offline. Measuring is cheap enough
+to always be on.
+
+Long running sessions can also be watched with Prometheus. Timings are
+exported as histograms, counters as counters, and gauges (such as the number
+of jobs in each state on each resource, set by the monitor) as gauges, all
+in the Prometheus text format with names starting "longbow_". They can be
+written to a file for the node exporter's textfile collector, or served over
+HTTP on the local machine.
+
+The following methods can be found:
+
+span(name, **labels)
+    This method returns a context manager that times the code inside it.
+
+observe(name, seconds, **labels)
+    This method records a timing that was taken elsewhere.
+
+count(name, value, **labels)
+    This method adds to a counter.
+
+total(name, **labels)
+    This method returns the value of a counter.
+
+gauge(name, value, **labels)
+    This method sets a gauge.
+
+cleargauges(name, **labels)
+    This method removes the gauges with the given labels.
+
+trace(path)
+    This method starts or stops writing each timing to a trace file.
+
+summary()
+    This method returns a table of the timings and counters.
+
+exposition()
+    This method returns everything recorded in the Prometheus text format.
+
+textfile(path, interval)
+    This method starts or stops writing the exposition to a file.
+
+listen(port)
+    This method starts or stops serving the exposition over HTTP.
+
+reset()
+    This method throws away everything recorded so far.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+LOG = logging.getLogger("longbow.metrics")
+
+LOCK = threading.Lock()
+
+# The upper bounds, in seconds, of the histogram buckets timings are sorted
+# into for Prometheus.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+           300.0)
+
+# The number of times, total time, longest time taken and the count in each
+# histogram bucket of each timed operation, keyed by name and then labels.
+TIMINGS = {}
+
+# The value of each counter, keyed by name and then labels.
+COUNTS = {}
+
+# The value of each gauge, keyed by name and then labels.
+GAUGES = {}
+
+# The trace file being written to, if there is one.
+TRACE = None
+
+# The thread writing the exposition to a file, and the HTTP server giving it
+# out, if they are running.
+TEXTFILE = None
+LISTENER = None
+
+# Characters that cannot be used in Prometheus metric names.
+UNSAFE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+@contextlib.contextmanager
+def span(name, **labels):
+    """Time the code inside the returned context manager.
+
+    The context manager gives a dictionary that the code being timed can add
+    details to, such as a byte count, these are written to the trace file
+    along with the timing. Details that are numbers are also added to the
+    counter named after the span and the detail, for example the "bytes"
+    detail of a "remote" span counts towards "remote-bytes". Spans that end
+    with an exception count towards the "<name>-errors" counter.
+
+    Required arguments are:
+
+    name (string) - The name of the operation being timed.
+
+    Optional arguments are:
+
+    labels - Strings that tell apart different instances of the operation,
+             such as the host a command was sent to.
+
+    """
+    details = {}
+    start = time.time()
+    began = time.perf_counter()
+
+    try:
+
+        yield details
+
+    except BaseException as err:
+
+        details["error"] = type(err).__name__
+
+        count(name + "-errors", **labels)
+
+        raise
+
+    finally:
+
+        for key, value in details.items():
+
+            if (isinstance(value, (int, float)) and
+                    not isinstance(value, bool)):
+
+                count(name + "-" + key, value, **labels)
+
+        observe(name, time.perf_counter() - began, start, details, **labels)
+
+
+def observe(name, seconds, start=None, details=None, **labels):
+    """Record a timing.
+
+    Required arguments are:
+
+    name (string) - The name of the operation that was timed.
+
+    seconds (float) - How long the operation took.
+
+    Optional arguments are:
+
+    start (float) - When the operation started, as a Unix time, defaults to
+                    the time it would have started if it just ended.
+
+    details (dictionary) - Extra details to write to the trace file.
+
+    labels - Strings that tell apart different instances of the operation.
+
+    """
+    key = _labels(labels)
+
+    with LOCK:
+
+        timing = TIMINGS.setdefault(name, {}).setdefault(
+            key, [0, 0.0, 0.0, [0] * len(BUCKETS)])
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+
+        for index, bound in enumerate(BUCKETS):
+
+            if seconds <= bound:
+
+                timing[3][index] += 1
+
+                break
+
+        if TRACE is not None:
+
+            event = {
+                "name": name,
+                "start": round(start if start is not None else
+                               time.time() - seconds, 6),
+                "seconds": round(seconds, 6),
+                "thread": threading.current_thread().name
+            }
+            event.update(labels)
+            event.update(details or {})
+
+            TRACE.write(json.dumps(event, sort_keys=True) + "\n")
+
+
+def count(name, value=1, **labels):
+    """Add to a counter.
+
+    Required arguments are:
+
+    name (string) - The name of the counter.
+
+    Optional arguments are:
+
+    value (number) - The amount to add, defaults to 1.
+
+    labels - Strings that tell apart different instances of the counter.
+
+    """
+    key = _labels(labels)
+
+    with LOCK:
+
+        counts = COUNTS.setdefault(name, {})
+        counts[key] = counts.get(key, 0) + value
+
+
+def total(name, **labels):
+    """Return the value of a counter, zero if it has not been counted."""
+    with LOCK:
+
+        return COUNTS.get(name, {}).get(_labels(labels), 0)
+
+
+def gauge(name, value, **labels):
+    """Set a gauge.
+
+    Required arguments are:
+
+    name (string) - The name of the gauge.
+
+    value (number) - The value of the gauge.
+
+    Optional arguments are:
+
+    labels - Strings that tell apart different instances of the gauge.
+
+    """
+    key = _labels(labels)
+
+    with LOCK:
+
+        GAUGES.setdefault(name, {})[key] = value
+
+
+def cleargauges(name, **labels):
+    """Remove every instance of a gauge that has the given labels.
+
+    This is used when a set of gauges is replaced, so that ones that are no
+    longer set do not linger, for example the count of jobs in a state that
+    no job is in any more.
+
+    """
+    wanted = set(_labels(labels))
+
+    with LOCK:
+
+        gauges = GAUGES.get(name, {})
+
+        for key in [key for key in gauges if wanted.issubset(key)]:
+
+            del gauges[key]
+
+
+def trace(path):
+    """Start or stop writing a trace file.
+
+    Each timing recorded while the trace file is open is written to it as a
+    line of JSON, with its name, labels, start time, duration and details.
+
+    Required arguments are:
+
+    path (string) - The file to write to (it is appended to if it exists),
+                    or None to stop writing and close the current file.
+
+    """
+    global TRACE
+
+    with LOCK:
+
+        if TRACE is not None:
+
+            TRACE.close()
+            TRACE = None
+
+        if path is not None:
+
+            TRACE = open(path, "a")
+
+
+def summary():
+    """Return a table of the timings and counters recorded so far.
+
+    Return parameters are:
+
+    lines (list) - The lines of the table, empty if nothing was recorded.
+
+    """
+    with LOCK:
+
+        timings = [(name, _format(key), values)
+                   for name in sorted(TIMINGS)
+                   for key, values in sorted(TIMINGS[name].items())]
+        counts = [(name, _format(key), value)
+                  for name in sorted(COUNTS)
+                  for key, value in sorted(COUNTS[name].items())
+                  if value != 0]
+
+    lines = []
+
+    if timings:
+
+        width = max(len(name + " " + labels) for name, labels, _ in timings)
+
+        lines.append("{0}  {1:>7}  {2:>10}  {3:>9}  {4:>9}".format(
+            "Timing".ljust(width), "count", "total(s)", "mean(s)", "max(s)"))
+
+        for name, labels, (number, seconds, longest, _) in timings:
+
+            lines.append("{0}  {1:>7}  {2:>10.3f}  {3:>9.3f}  {4:>9.3f}"
+                         .format((name + " " + labels).ljust(width), number,
+                                 seconds, seconds / number, longest))
+
+    if counts:
+
+        width = max(len(name + " " + labels) for name, labels, _ in counts)
+
+        lines.append("{0}  {1:>10}".format("Counter".ljust(width), "value"))
+
+        for name, labels, value in counts:
+
+            lines.append("{0}  {1:>10}".format(
+                (name + " " + labels).ljust(width), _number(value)))
+
+    return lines
+
+
+def exposition():
+    """Return everything recorded so far in the Prometheus text format.
+
+    Timings are given as histograms named "longbow_<name>_seconds", counters
+    as "longbow_<name>_total" and gauges as "longbow_<name>", with any "-" in
+    the names changed to "_".
+
+    Return parameters are:
+
+    text (string) - The exposition, ready to be scraped.
+
+    """
+    lines = []
+
+    with LOCK:
+
+        for name in sorted(TIMINGS):
+
+            metric = _metricname(name) + "_seconds"
+            lines.append("# TYPE {0} histogram".format(metric))
+
+            for key, (number, seconds, _, buckets) in sorted(
+                    TIMINGS[name].items()):
+
+                cumulative = 0
+
+                for bound, hits in zip(BUCKETS, buckets):
+
+                    cumulative += hits
+                    lines.append("{0}_bucket{1} {2}".format(
+                        metric, _metriclabels(key, ("le", repr(bound))),
+                        cumulative))
+
+                lines.append("{0}_bucket{1} {2}".format(
+                    metric, _metriclabels(key, ("le", "+Inf")), number))
+                lines.append("{0}_sum{1} {2}".format(
+                    metric, _metriclabels(key), repr(float(seconds))))
+                lines.append("{0}_count{1} {2}".format(
+                    metric, _metriclabels(key), number))
+
+        for name in sorted(COUNTS):
+
+            metric = _metricname(name) + "_total"
+            lines.append("# TYPE {0} counter".format(metric))
+
+            for key, value in sorted(COUNTS[name].items()):
+
+                lines.append("{0}{1} {2}".format(
+                    metric, _metriclabels(key), value))
+
+        for name in sorted(GAUGES):
+
+            metric = _metricname(name)
+            lines.append("# TYPE {0} gauge".format(metric))
+
+            for key, value in sorted(GAUGES[name].items()):
+
+                lines.append("{0}{1} {2}".format(
+                    metric, _metriclabels(key), value))
+
+    return "".join(line + "\n" for line in lines)
+
+
+def textfile(path, interval=15.0):
+    """Start or stop writing the exposition to a file.
+
+    This is for the textfile collector of the Prometheus node exporter. The
+    file is replaced every interval seconds (so that the collector never
+    reads a half written file) and once more when writing is stopped.
+
+    Required arguments are:
+
+    path (string) - The file to write to, which should end in ".prom", or
+                    None to stop writing.
+
+    Optional arguments are:
+
+    interval (float) - The number of seconds between writes.
+
+    """
+    global TEXTFILE
+
+    if TEXTFILE is not None:
+
+        thread, stop = TEXTFILE
+        TEXTFILE = None
+
+        stop.set()
+        thread.join()
+
+    if path is not None:
+
+        _writetextfile(path)
+
+        stop = threading.Event()
+        thread = threading.Thread(target=_textfileloop,
+                                  args=(path, interval, stop))
+        thread.daemon = True
+        thread.start()
+
+        TEXTFILE = thread, stop
+
+
+def listen(port, address="127.0.0.1"):
+    """Start or stop serving the exposition over HTTP.
+
+    The exposition is served at "/metrics", on the local machine only unless
+    another address is given.
+
+    Required arguments are:
+
+    port (int) - The port to listen on, or None to stop listening.
+
+    Optional arguments are:
+
+    address (string) - The address to listen on.
+
+    Return parameters are:
+
+    port (int) - The port being listened on, useful if port 0 was asked for
+                 to pick any free port.
+
+    """
+    global LISTENER
+
+    if LISTENER is not None:
+
+        LISTENER.shutdown()
+        LISTENER.server_close()
+        LISTENER = None
+
+    if port is None:
+
+        return None
+
+    LISTENER = _HTTPServer((address, port), _Handler)
+
+    thread = threading.Thread(target=LISTENER.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    LOG.info("Serving metrics at http://%s:%s/metrics", address,
+             LISTENER.server_address[1])
+
+    return LISTENER.server_address[1]
+
+
+def reset():
+    """Throw away all of the timings, counters and gauges recorded so far."""
+    with LOCK:
+
+        TIMINGS.clear()
+        COUNTS.clear()
+        GAUGES.clear()
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+
+    """HTTP server giving out the exposition."""
+
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    """Answer requests for the exposition."""
+
+    def do_GET(self):
+
+        if self.path.split("?")[0] != "/metrics":
+
+            self.send_error(404)
+
+            return
+
+        body = exposition().encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+
+        LOG.debug("Metrics request: " + format, *args)
+
+
+def _textfileloop(path, interval, stop):
+    """Write the exposition to a file until told to stop."""
+    while not stop.wait(interval):
+
+        _writetextfile(path)
+
+    _writetextfile(path)
+
+
+def _writetextfile(path):
+    """Replace a file with the current exposition."""
+    directory = os.path.dirname(os.path.abspath(path))
+
+    try:
+
+        handle, tmppath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+        with os.fdopen(handle, "w") as tmp:
+
+            tmp.write(exposition())
+
+        os.chmod(tmppath, 0o644)
+        os.replace(tmppath, path)
+
+    except (OSError, IOError) as err:
+
+        LOG.warning("Could not write metrics to '%s': %s", path, err)
+
+
+def _labels(labels):
+    """Turn a set of labels into a dictionary key."""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _metricname(name):
+    """Turn a name into a Prometheus metric name."""
+    return "longbow_" + UNSAFE.sub("_", name)
+
+
+def _metriclabels(key, *extra):
+    """Format the labels of a dictionary key for Prometheus."""
+    labels = ["{0}=\"{1}\"".format(
+        UNSAFE.sub("_", label), value.replace("\\", "\\\\")
+        .replace("\"", "\\\"").replace("\n", "\\n"))
+        for label, value in key + extra]
+
+    if not labels:
+
+        return ""
+
+    return "{" + ",".join(labels) + "}"
+
+
+def _format(key):
+    """Format the labels of a dictionary key for the summary."""
+    return " ".join("{0}={1}".format(label, value) for label, value in key)
+
+
+def _number(value):
+    """Format a counter value for the summary."""
+    if isinstance(value, float):
+
+        return "{0:.3f}".format(value)
+
+    return str(value)
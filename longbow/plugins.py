@@ -0,0 +1,220 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing methods for finding plugins installed from packages.
+
+Besides the plugins in the apps and schedulers packages, Longbow will use any
+plugin module that an installed package registers under the "longbow.apps" or
+"longbow.schedulers" entry point groups, so that site specific plugins can be
+shipped as packages of their own. For example, in the pyproject.toml of such a
+package::
+
+    [project.entry-points."longbow.schedulers"]
+    mysched = "mypackage.mysched"
+
+Finding entry points means reading the metadata of every installed package,
+which is slow, so what was found is kept in ~/.longbow/plugins.json along with
+a fingerprint of the python path. The installed packages are only read again
+once that fingerprint changes, such as when a package is installed or removed.
+The following methods can be found within this module:
+
+registry()
+    This method will return the plugins installed from packages, from the
+    cache where it is still valid.
+"""
+
+import importlib
+import json
+import os
+import sys
+import tempfile
+
+# Bump this whenever the layout of the cache file changes.
+VERSION = 1
+
+CACHEFILE = os.path.join(os.path.expanduser("~/.longbow"), "plugins.json")
+
+GROUPS = ["longbow.apps", "longbow.schedulers"]
+
+REGISTRY = None
+
+
+def registry():
+    """Get the plugins installed from packages.
+
+    Returns a dictionary with an "apps" and a "schedulers" entry, each of which
+    is a dictionary of plugin names. Each plugin has a "module" entry giving
+    the module to import, application plugins have their "executables" and
+    any "modulename" overrides, and scheduler plugins have their "query".
+
+    """
+    global REGISTRY
+
+    if REGISTRY is None:
+
+        fingerprint = _fingerprint()
+        REGISTRY = _load(fingerprint)
+
+        if REGISTRY is None:
+
+            REGISTRY = _scan()
+            _save(fingerprint, REGISTRY)
+
+    return REGISTRY
+
+
+def _fingerprint():
+    """Describe the python path, so that installs are noticed."""
+    paths = []
+
+    # The current directory changes from run to run, and is rarely where
+    # plugins would be installed.
+    for path in [a for a in sys.path if os.path.isabs(a)]:
+
+        try:
+
+            paths.append([path, os.stat(path).st_mtime])
+
+        except OSError:
+
+            paths.append([path, None])
+
+    return [VERSION, list(sys.version_info[:2]), paths]
+
+
+def _load(fingerprint):
+    """Load the cached registry, if it is still valid."""
+    try:
+
+        with open(CACHEFILE, "r") as fil:
+
+            cache = json.load(fil)
+
+        if cache["fingerprint"] == fingerprint:
+
+            return cache["registry"]
+
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+
+        pass
+
+    return None
+
+
+def _save(fingerprint, plugins):
+    """Save the registry, if the ~/.longbow directory exists."""
+    directory = os.path.dirname(CACHEFILE)
+
+    if os.path.isdir(directory) is False:
+
+        return
+
+    try:
+
+        handle, tmpfile = tempfile.mkstemp(prefix=".plugins-", dir=directory)
+
+        with os.fdopen(handle, "w") as fil:
+
+            json.dump({"fingerprint": fingerprint, "registry": plugins}, fil)
+
+        os.replace(tmpfile, CACHEFILE)
+
+    except (IOError, OSError):
+
+        pass
+
+
+def _scan():
+    """Import the plugins registered by installed packages."""
+    plugins = {"apps": {}, "schedulers": {}}
+
+    for group in GROUPS:
+
+        kind = group.split(".")[1]
+
+        for entrypoint in _entrypoints(group):
+
+            module = entrypoint.value.split(":")[0].strip()
+
+            # A broken plugin shouldn't stop Longbow from starting.
+            try:
+
+                mod = importlib.import_module(module)
+
+                if kind == "apps":
+
+                    plugin = {
+                        "module": module,
+                        "executables": list(getattr(mod, "EXECDATA").keys()),
+                        "modulename": dict(getattr(mod, "MODULENAME", {}))
+                        }
+
+                else:
+
+                    plugin = {
+                        "module": module,
+                        "query": getattr(mod, "QUERY_STRING")
+                        }
+
+            except (ImportError, AttributeError):
+
+                continue
+
+            plugins[kind][entrypoint.name] = plugin
+
+    return plugins
+
+
+def _entrypoints(group):
+    """List the entry points in a group."""
+    try:
+
+        from importlib import metadata
+
+    except ImportError:
+
+        try:
+
+            import importlib_metadata as metadata
+
+        except ImportError:
+
+            return []
+
+    entrypoints = metadata.entry_points()
+
+    # The selection interface only arrived in python 3.10.
+    if hasattr(entrypoints, "select"):
+
+        return list(entrypoints.select(group=group))
+
+    return list(entrypoints.get(group, []))
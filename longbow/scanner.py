@@ -0,0 +1,130 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing methods for tokenizing application input files.
+
+The file parsers in the application plugins look for the few lines in an input
+file that set variables or refer to other files. Input decks can run to
+hundreds of thousands of lines, so rather than splitting every line into words
+the parsers compile a test for the lines they care about, once, and this
+module only tokenizes the lines that pass it. The following methods can be
+found within this module:
+
+compilepattern(first, anywhere, comment)
+    This method will compile a test for lines that start with one of the words
+    in first, or that contain one of the words in anywhere.
+
+tokenize(fil, pattern, comment)
+    This method will yield the words of each line in a file that matches the
+    pattern, with any comment removed.
+"""
+
+import re
+
+
+def compilepattern(first=(), anywhere=(), comment="#"):
+    """Compile a test picking out the lines worth tokenizing.
+
+    Words given in first are matched whole and regardless of case, where a
+    word is delimited by whitespace, the comment character or the end of the
+    line. Words given in anywhere are only looked for within the line, again
+    regardless of case, which is much cheaper than matching whole words. Lines
+    picked out should therefore still be checked once tokenized, but no line
+    that could be of interest is ever missed.
+
+    Required arguments are:
+
+    first (sequence) - Words that are of interest as the first on a line.
+
+    anywhere (sequence) - Words that are of interest anywhere on a line.
+
+    comment (string) - The character that starts a comment.
+
+    Returns a function that takes a line and returns True if it is of
+    interest.
+
+    """
+    match = None
+    anywhere = tuple(word.lower() for word in anywhere)
+
+    if first:
+
+        match = re.compile(
+            r"\s*(?:" + "|".join(re.escape(word) for word in first) +
+            r")(?=\s|" + re.escape(comment) + r"|$)", re.IGNORECASE).match
+
+    def pattern(line):
+        """Test whether a line is of interest."""
+        if match is not None and match(line) is not None:
+
+            return True
+
+        if anywhere:
+
+            lowered = line.lower()
+
+            return any(word in lowered for word in anywhere)
+
+        return False
+
+    return pattern
+
+
+def tokenize(fil, pattern=None, comment="#"):
+    """Yield the words of the lines of interest in a file.
+
+    Lines are read lazily, so errors reading the file are raised to the caller
+    as it iterates. Lines that are blank once comments are removed are never
+    yielded.
+
+    Required arguments are:
+
+    fil (iterable) - The open file, or any other iterable of lines.
+
+    pattern (function) - A test from compilepattern, lines that don't pass it
+                         are skipped without being split. If this is None
+                         then every line is tokenized.
+
+    comment (string) - The character that starts a comment.
+
+    """
+    for line in fil:
+
+        if pattern is not None and pattern(line) is False:
+
+            continue
+
+        words = line.split(comment, 1)[0].split()
+
+        if words:
+
+            yield words
@@ -34,22 +34,72 @@
 
 All code for a new plugin should be placed inside the plugin module itself
 and not here, follow the template for constructing new app plugins.
+
+The query strings of the plugins shipped with Longbow are listed in INDEX, so
+that the plugins themselves are only imported when first used. Plugin files
+that are not listed in INDEX are still found and imported at start up.
+Plugins installed from other packages under the "longbow.schedulers" entry
+point are added from the registry kept by the plugins module, plugins shipped
+with Longbow take precedence over any of the same name.
 """
 
-import sys
+import importlib
 import os
-import pkgutil
 
-QUERY = {}
+import longbow.plugins as plugins
 
 PATH = os.path.dirname(__file__)
-MODULES = pkgutil.iter_modules(path=[PATH])
 
-for loader, modulename, ispkg in MODULES:
+# Plugin modules are found from a listing of the package rather than with
+# pkgutil, which is slow to import.
+PLUGINS = sorted(os.path.splitext(name)[0] for name in os.listdir(PATH)
+                 if name.endswith(".py") and name != "__init__.py")
+
+# The query string of each plugin shipped with Longbow, these must match the
+# QUERY_STRING of the plugin.
+INDEX = {
+    "lsf": "env | grep -i 'lsf'",
+    "pbs": "env | grep -i 'pbs'",
+    "sge": "env | grep -i 'sge'",
+    "slurm": "which sbatch",
+    "soge": "env | grep -i 'sge'"
+}
+
+QUERY = {}
 
-    if modulename not in sys.modules:
+for modulename in PLUGINS:
 
-        mod = __import__("longbow.schedulers." + modulename,
-                         fromlist=[""])
+    if modulename in INDEX:
+
+        QUERY[modulename] = [INDEX[modulename]]
+
+    else:
+
+        mod = importlib.import_module("longbow.schedulers." + modulename)
 
         QUERY[modulename] = [getattr(mod, "QUERY_STRING")]
+
+# The module to import for each plugin.
+MODULES = dict((name, "longbow.schedulers." + name) for name in PLUGINS)
+
+# Plugins installed from other packages.
+for modulename, plugin in sorted(plugins.registry()["schedulers"].items()):
+
+    if modulename not in MODULES:
+
+        PLUGINS.append(modulename)
+        MODULES[modulename] = plugin["module"]
+        QUERY[modulename] = [plugin["query"]]
+
+
+def __getattr__(name):
+    """Import a plugin the first time it is used."""
+    if name in MODULES:
+
+        mod = importlib.import_module(MODULES[name])
+        globals()[name] = mod
+
+        return mod
+
+    raise AttributeError(
+        "module '{0}' has no attribute '{1}'".format(__name__, name))
@@ -45,14 +45,97 @@ submit(job)
     The method for submitting a single job.
 """
 
-import os
 import re
 
 import longbow.exceptions as exceptions
 import longbow.shellwrappers as shellwrappers
+import longbow.templates as templates
 
 QUERY_STRING = "env | grep -i 'lsf'"
 
+# The submit script, see the templates module for the syntax.
+TEMPLATE = """\
+#!/bin/bash --login
+{% if array %}
+#BSUB -J {{jobname}}[1-{{replicates}}]
+{% else %}
+#BSUB -J {{jobname}}
+{% endif %}
+{% if queue %}
+#BSUB -q {{queue}}
+{% endif %}
+{% if lsf-cluster %}
+#BSUB -m {{lsf-cluster}}
+{% endif %}
+{% if memory %}
+#BSUB -R "rusage[mem={{memory}}G]"
+{% endif %}
+{% if account %}
+{% if accountflag %}
+#BSUB {{accountflag}} {{account}}
+{% else %}
+#BSUB -P {{account}}
+{% endif %}
+{% endif %}
+{% if email-address %}
+{% if email-flags %}
+#BSUB {{email-flags}}
+{% endif %}
+#BSUB -u {{email-address}}
+{% endif %}
+#BSUB -W {{maxtime}}
+#BSUB -n {{cores}}
+{% if stdout %}
+#BSUB -o {{stdout}}
+{% else %}
+#BSUB -o %J.out
+{% endif %}
+{% if stderr %}
+#BSUB -e {{stderr}}
+{% else %}
+#BSUB -e %J.err
+{% endif %}
+
+export OMP_NUM_THREADS=1
+{% if scripts %}
+
+{% for script in scripts %}
+{{script}}
+{% endfor %}
+{% endif %}
+{% for module in modules %}
+
+module load {{module}}
+
+{% endfor %}
+{% if statusfile %}
+echo "{{jobname}} start {{task}} {{replicates}}" >> {{statusfile}}
+{% endif %}
+{% if array %}
+cd rep${LSB_JOBINDEX}/
+{% endif %}
+{{mpirun}} {{executableargs}}
+{% if statusfile %}
+echo "{{jobname}} finish {{task}} {{replicates}} $?" >> {{statusfile}}
+{% endif %}
+"""
+
+
+def bulkdelete(jobs):
+    """Delete several jobs on the same resource with one command."""
+    jobids = [job["jobid"] for job in jobs]
+
+    try:
+
+        shellout = shellwrappers.sendtossh(
+            jobs[0], ["bkill " + " ".join(jobids)])
+
+    except exceptions.SSHError:
+
+        raise exceptions.JobdeleteError("Unable to delete jobs.")
+
+    return shellout[0]
+
 
 def delete(job):
     """Delete a job."""
@@ -72,129 +155,12 @@ def delete(job):
 
 def prepare(job):
     """Create the LSF jobfile ready for submitting jobs."""
-    # Open file for LSF script.
-    lsffile = os.path.join(job["localworkdir"], "submit.lsf")
-    jobfile = open(lsffile, "w+")
-
-    # Write the PBS script
-    jobfile.write("#!/bin/bash --login\n")
-
-    # Single job
-    if int(job["replicates"]) == 1:
-
-        jobfile.write("#BSUB -J " + job["jobname"] + "\n")
-
-    # Job array
-    elif int(job["replicates"]) > 1:
-
-        jobfile.write("#BSUB -J " + job["jobname"] + "[1-" +
-                      job["replicates"] + "]\n")
-
-    if job["queue"] != "":
-
-        jobfile.write("#BSUB -q " + job["queue"] + "\n")
+    values = templates.variables(job)
 
-    if job["lsf-cluster"] != "":
+    # The task within the job array, for the status-push markers.
+    values["task"] = "${LSB_JOBINDEX}" if values["array"] else "1"
 
-        jobfile.write("#BSUB -m " + job["lsf-cluster"] + "\n")
-
-    if job["memory"] != "":
-
-        jobfile.write('#BSUB -R "rusage[mem=' + job["memory"] + 'G]"\n')
-
-    # Account to charge (if supplied).
-    if job["account"] != "":
-
-        # if no accountflag is provided use the default
-        if job["accountflag"] == "":
-
-            jobfile.write("#BSUB -P " + job["account"] + "\n")
-
-        else:
-
-            jobfile.write("#BSUB " + job["accountflag"] + " " +
-                          job["account"] + "\n")
-
-    # Email user.
-    if job["email-address"] != "":
-
-        if job["email-flags"] != "":
-
-            jobfile.write("#BSUB " + job["email-flags"] + "\n")
-
-        jobfile.write("#BSUB -u " + job["email-address"] + "\n")
-
-    jobfile.write("#BSUB -W " + job["maxtime"] + "\n")
-
-    jobfile.write("#BSUB -n " + job["cores"] + "\n")
-
-    # Redirect stdout
-    if job["stdout"] != "":
-
-        jobfile.write("#BSUB -o " + job["stdout"] + "\n")
-
-    else:
-
-        jobfile.write("#BSUB -o %J.out" + "\n")
-
-    # Redirect stderr
-    if job["stderr"] != "":
-
-        jobfile.write("#BSUB -e " + job["stderr"] + "\n")
-
-    else:
-
-        jobfile.write("#BSUB -e %J.err" + "\n")
-
-    jobfile.write("\n")
-    jobfile.write("export OMP_NUM_THREADS=1\n")
-
-    # Load any custom scripts.
-    if job["scripts"] != "":
-
-        scripts = job["scripts"].split(',')
-
-        if len(scripts) > 0:
-
-            jobfile.write("\n")
-
-            for item in scripts:
-
-                jobfile.write(item.strip() + "\n")
-
-    if job["modules"] != "":
-
-        for module in job["modules"].split(","):
-
-            module = module.replace(" ", "")
-            jobfile.write("\n" + "module load {0}\n\n" .format(module))
-
-    # A quick work-around for the hartree phase 3 machines
-    if job["handler"] == "mpiexec.hydra":
-
-        mpirun = job["handler"]
-
-    else:
-
-        mpirun = job["handler"]
-
-    # Single job
-    if int(job["replicates"]) == 1:
-
-        jobfile.write(mpirun + " " + job["executableargs"] + "\n")
-
-    # Job array
-    elif int(job["replicates"]) > 1:
-
-        jobfile.write("cd rep${LSB_JOBINDEX}/\n" + mpirun + " " +
-                      job["executableargs"] + "\n")
-
-    # Close the file (housekeeping)
-    jobfile.close()
-
-    # Append lsf file to list of files ready for staging.
-    job["upload-include"] = job["upload-include"] + ", submit.lsf"
-    job["subfile"] = "submit.lsf"
+    templates.write(job, "submit.lsf", TEMPLATE, values)
 
 
 def status(job):
@@ -213,26 +179,30 @@ def status(job):
         "ZOMBI": "Zombie Job"
     }
 
-    jobstate = ""
-
-    shellout = shellwrappers.sendtossh(job, ["bjobs -u " + job["user"]])
-
-    # PBS will return a table, so split lines into a list.
-    stdout = shellout[0].split("\n")
+    found = []
 
     # Look up the job state and convert it to Longbow terminology.
-    # Now match the jobid against the list of jobs, extract the line and
-    # split it into a list
-    for line in stdout:
-
+    # Now match the jobid against each line of the table as it arrives,
+    # stopping as soon as it is found.
+    def parse(line):
+        """Parse a line of the job table."""
         line = line.split()
 
         if len(line) > 0 and job["jobid"] in line[0]:
 
-            jobstate = states[line[2]]
-            break
+            found.append(states[line[2]])
+
+            return True
+
+        return False
 
-    if jobstate == "":
+    shellwrappers.sendtosshstream(job, ["bjobs -u " + job["user"]], parse)
+
+    if found:
+
+        jobstate = found[0]
+
+    else:
 
         jobstate = "Finished"
 
@@ -247,7 +217,7 @@ def submit(job):
     # Process the submit
     try:
 
-        shellout = shellwrappers.sendtossh(job, cmd)
+        shellout = shellwrappers.sendtossh(job, cmd, cmdclass="submit")
 
     except exceptions.SSHError as inst:
 
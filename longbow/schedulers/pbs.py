@@ -46,14 +46,101 @@ submit(job)
 """
 
 import math
-import os
 import re
 
 import longbow.exceptions as exceptions
 import longbow.shellwrappers as shellwrappers
+import longbow.templates as templates
 
 QUERY_STRING = "env | grep -i 'pbs'"
 
+# The submit script, see the templates module for the syntax.
+TEMPLATE = """\
+#!/bin/bash --login
+#PBS -N {{jobname}}
+{% if queue %}
+#PBS -q {{queue}}
+{% endif %}
+{% if account %}
+{% if accountflag %}
+#PBS {{accountflag}} {{account}}
+{% else %}
+#PBS -A {{account}}
+{% endif %}
+{% endif %}
+#PBS -l {{resources}}
+{% if email-address %}
+{% if email-flags %}
+#PBS -m {{email-flags}}
+{% endif %}
+#PBS -M {{email-address}}
+{% endif %}
+#PBS -l walltime={{maxtime}}:00
+{% if array %}
+#PBS -J 1-{{replicates}}
+#PBS -r y
+{% endif %}
+{% if stdout %}
+#PBS -o {{stdout}}
+{% endif %}
+{% if stderr %}
+#PBS -e {{stderr}}
+{% endif %}
+
+export PBS_O_WORKDIR=$(readlink -f $PBS_O_WORKDIR)
+cd $PBS_O_WORKDIR
+export OMP_NUM_THREADS=1
+
+{% if scripts %}
+{% for script in scripts %}
+{{script}}
+{% endfor %}
+
+{% endif %}
+{% for module in modules %}
+module load {{module}}
+
+{% endfor %}
+{% if statusfile %}
+echo "{{jobname}} start {{task}} {{replicates}}" >> {{statusfile}}
+{% endif %}
+{% if array %}
+basedir=$PBS_O_WORKDIR\x20
+cd $basedir/rep${PBS_ARRAY_INDEX}/
+
+{% endif %}
+{{mpirun}} {{executableargs}}
+{% if statusfile %}
+echo "{{jobname}} finish {{task}} {{replicates}} $?" >> {{statusfile}}
+{% endif %}
+"""
+
+
+def bulkdelete(jobs):
+    """Delete several jobs on the same resource with one command."""
+    jobids = []
+
+    for job in jobs:
+
+        if int(job["replicates"]) > 1:
+
+            jobids.append(job["jobid"] + "[]")
+
+        else:
+
+            jobids.append(job["jobid"])
+
+    try:
+
+        shellout = shellwrappers.sendtossh(
+            jobs[0], ["qdel " + " ".join(jobids)])
+
+    except exceptions.SSHError:
+
+        raise exceptions.JobdeleteError("Unable to delete jobs.")
+
+    return shellout[0]
+
 
 def delete(job):
     """Delete a job."""
@@ -79,34 +166,7 @@ def delete(job):
 
 def prepare(job):
     """Create the PBS jobfile ready for submitting jobs."""
-    # Open file for PBS script.
-    pbsfile = os.path.join(job["localworkdir"], "submit.pbs")
-    jobfile = open(pbsfile, "w+")
-
-    # Write the PBS script
-    jobfile.write("#!/bin/bash --login\n")
-
-    # Job name (if supplied)
-    jobfile.write("#PBS -N " + job["jobname"] + "\n")
-
-    # Queue to submit to (if supplied)
-    if job["queue"] != "":
-
-        jobfile.write("#PBS -q " + job["queue"] + "\n")
-
-    # Account to charge (if supplied).
-    if job["account"] != "":
-
-        # if no accountflag is provided use the default
-        if job["accountflag"] == "":
-
-            jobfile.write("#PBS -A " + job["account"] + "\n")
-
-        # else use the accountflag provided
-        else:
-
-            jobfile.write("#PBS " + job["accountflag"] + " " +
-                          job["account"] + "\n")
+    values = templates.variables(job)
 
     processes = job["cores"]
     cpn = job["corespernode"]
@@ -132,91 +192,18 @@ def prepare(job):
 
         tmp = tmp + ":mem=" + job["memory"] + "gb"
 
-    # Write the resource requests
-    jobfile.write("#PBS -l " + tmp + "\n")
-
-    # Email user.
-    if job["email-address"] != "":
-
-        if job["email-flags"] != "":
-
-            jobfile.write("#PBS -m " + job["email-flags"] + "\n")
-
-        jobfile.write("#PBS -M " + job["email-address"] + "\n")
-
-    # Walltime for job.
-    jobfile.write("#PBS -l walltime=" + job["maxtime"] + ":00\n")
-
-    # Set up replicates jobs
-    if int(job["replicates"]) > 1:
-
-        jobfile.write("#PBS -J 1-" + job["replicates"] + "\n")
-        jobfile.write("#PBS -r y\n")
-
-    # Redirect stdout
-    if job["stdout"] != "":
-
-        jobfile.write("#PBS -o " + job["stdout"] + "\n")
-
-    # Redirect stderr
-    if job["stderr"] != "":
-
-        jobfile.write("#PBS -e " + job["stderr"] + "\n")
-
-    # Set some environment variables for PBS.
-    jobfile.write(
-        "\n" + "export PBS_O_WORKDIR=$(readlink -f $PBS_O_WORKDIR)\n"
-        "cd $PBS_O_WORKDIR\n"
-        "export OMP_NUM_THREADS=1\n\n")
-
-    # Load any custom scripts.
-    if job["scripts"] != "":
-
-        scripts = job["scripts"].split(',')
-
-        if len(scripts) > 0:
-
-            for item in scripts:
-
-                jobfile.write(item.strip() + "\n")
-
-            jobfile.write("\n")
-
-    # Load up modules if required.
-    if job["modules"] != "":
-
-        for module in job["modules"].split(","):
-
-            module = module.replace(" ", "")
-            jobfile.write("module load {0}\n\n" .format(module))
-
-    # Handler that is used for job submission.
-    mpirun = job["handler"]
+    values["resources"] = tmp
 
     # CRAY's use aprun which has slightly different requirements to mpirun.
-    if mpirun == "aprun":
-
-        mpirun = mpirun + " -n " + processes + " -N " + mpiprocs
-
-    # Single jobs only need one run command.
-    if int(job["replicates"]) == 1:
-
-        jobfile.write(mpirun + " " + job["executableargs"] + "\n")
+    if job["handler"] == "aprun":
 
-    # Job array
-    elif int(job["replicates"]) > 1:
+        values["mpirun"] = (job["handler"] + " -n " + processes + " -N " +
+                            mpiprocs)
 
-        jobfile.write(
-            "basedir=$PBS_O_WORKDIR \n"
-            "cd $basedir/rep${PBS_ARRAY_INDEX}/\n\n" +
-            mpirun + " " + job["executableargs"] + "\n")
+    # The task within the job array, for the status-push markers.
+    values["task"] = "${PBS_ARRAY_INDEX}" if values["array"] else "1"
 
-    # Close the file (housekeeping)
-    jobfile.close()
-
-    # Append pbs file to list of files ready for staging.
-    job["upload-include"] = job["upload-include"] + ", submit.pbs"
-    job["subfile"] = "submit.pbs"
+    templates.write(job, "submit.pbs", TEMPLATE, values)
 
 
 def status(job):
@@ -236,23 +223,30 @@ def status(job):
         "X": "Subjob Completed Execution/Has Been Deleted"
     }
 
-    jobstate = ""
+    found = []
 
-    shellout = shellwrappers.sendtossh(job, ["qstat -u " + job["user"]])
+    # Look up the job state and convert it to Longbow terminology.
+    # Now match the jobid against each line of the table as it arrives,
+    # stopping as soon as it is found.
+    def parse(line):
+        """Parse a line of the job table."""
+        line = line.split()
 
-    # PBS will return a table, so split lines into a list.
-    stdout = shellout[0].split("\n")
+        if len(line) > 0 and job["jobid"] in line[0]:
 
-    for line in stdout:
+            found.append(states[line[9]])
 
-        line = line.split()
+            return True
 
-        if len(line) > 0 and job["jobid"] in line[0]:
+        return False
+
+    shellwrappers.sendtosshstream(job, ["qstat -u " + job["user"]], parse)
+
+    if found:
 
-            jobstate = states[line[9]]
-            break
+        jobstate = found[0]
 
-    if jobstate == "":
+    else:
 
         jobstate = "Finished"
 
@@ -266,7 +260,7 @@ def submit(job):
 
     try:
 
-        shellout = shellwrappers.sendtossh(job, cmd)
+        shellout = shellwrappers.sendtossh(job, cmd, cmdclass="submit")
 
     except exceptions.SSHError as inst:
 
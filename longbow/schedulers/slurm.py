@@ -46,14 +46,111 @@ submit(job)
 """
 
 import math
-import os
 import re
 
 import longbow.exceptions as exceptions
 import longbow.shellwrappers as shellwrappers
+import longbow.templates as templates
 
 QUERY_STRING = "which sbatch"
 
+# The submit script, see the templates module for the syntax. Replicates all
+# run within the one job, so there is only ever one task for status-push.
+TEMPLATE = """\
+#!/bin/bash --login
+#SBATCH -J {{jobname}}
+{% if queue %}
+#SBATCH -p {{queue}}
+{% endif %}
+{% if account %}
+{% if accountflag %}
+#SBATCH {{accountflag}} {{account}}
+{% else %}
+#SBATCH -A {{account}}
+{% endif %}
+{% endif %}
+{% if memory %}
+#SBATCH --mem={{memory}}G
+{% endif %}
+{% if slurm-gres %}
+#SBATCH --gres={{slurm-gres}}
+{% endif %}
+{% if email-address %}
+{% if email-flags %}
+#SBATCH --mail-type={{email-flags}}
+{% endif %}
+#SBATCH --mail-user={{email-address}}
+{% endif %}
+#SBATCH -n {{cores}}
+{% if nodes %}
+#SBATCH -N {{nodes}}
+{% endif %}
+#SBATCH -t {{maxtime}}:00
+
+export OMP_NUM_THREADS=1
+
+{% if stdout %}
+#SBATCH -o {{stdout}}
+{% endif %}
+{% if stderr %}
+#SBATCH -e {{stderr}}
+
+{% endif %}
+{% if scripts %}
+{% for script in scripts %}
+{{script}}
+{% endfor %}
+
+{% endif %}
+{% for module in modules %}
+module load {{module}}
+
+{% endfor %}
+{% if statusfile %}
+echo "{{jobname}} start 1 1" >> {{statusfile}}
+{% endif %}
+{% if array %}
+basedir = `pwd`
+{% if statusfile %}
+status=0
+{% endif %}
+for i in {1..{{replicates}}};
+do
+  cd $basedir/rep$i/
+  {{mpirun}} {{executableargs}}
+{% if statusfile %}
+  rc=$?
+  if [ $rc -ne 0 ]; then status=$rc; fi
+{% endif %}
+done
+wait
+{% else %}
+{{mpirun}} {{executableargs}}
+{% if statusfile %}
+status=$?
+{% endif %}
+{% endif %}
+{% if statusfile %}
+echo "{{jobname}} finish 1 1 $status" >> {{statusfile}}
+{% endif %}
+"""
+
+
+def bulkdelete(jobs):
+    """Delete several jobs on the same resource with one command."""
+    jobids = [job["jobid"] for job in jobs]
+
+    try:
+
+        shellout = shellwrappers.sendtossh(
+            jobs[0], ["scancel " + " ".join(jobids)])
+
+    except exceptions.SSHError:
+
+        raise exceptions.JobdeleteError("Unable to delete jobs.")
+
+    return shellout[0]
+
 
 def delete(job):
     """Delete a job."""
@@ -73,56 +170,11 @@ def delete(job):
 
 def prepare(job):
     """Create the SLURM jobfile ready for submitting jobs."""
-    # Open file for SLURM script.
-    slurmfile = os.path.join(job["localworkdir"], "submit.slurm")
-    jobfile = open(slurmfile, "w+")
-
-    # Write the SLURM script
-    jobfile.write("#!/bin/bash --login\n")
-
-    jobfile.write("#SBATCH -J " + job["jobname"] + "\n")
-
-    # Queue to submit to (if supplied)
-    if job["queue"] != "":
-
-        jobfile.write("#SBATCH -p " + job["queue"] + "\n")
-
-    # Account to charge (if supplied)
-    if job["account"] != "":
-
-        # if no accountflag is provided use the default
-        if job["accountflag"] == "":
-
-            jobfile.write("#SBATCH -A " + job["account"] + "\n")
-
-        else:
-
-            jobfile.write("#SBATCH " + job["accountflag"] + " " +
-                          job["account"] + "\n")
-
-    if job["memory"] != "":
-
-        jobfile.write("#SBATCH --mem=" + job["memory"] + "G" + "\n")
-
-    # Generic resource (if supplied)
-    if job["slurm-gres"] != "":
-
-        jobfile.write("#SBATCH --gres=" + job["slurm-gres"] + "\n")
-
-    # Email user.
-    if job["email-address"] != "":
-
-        if job["email-flags"] != "":
-
-            jobfile.write("#SBATCH --mail-type=" + job["email-flags"] + "\n")
-
-        jobfile.write("#SBATCH --mail-user=" + job["email-address"] + "\n")
+    values = templates.variables(job)
 
     cores = job["cores"]
     cpn = job["corespernode"]
-
-    # Specify the total number of mpi tasks required
-    jobfile.write("#SBATCH -n " + cores + "\n")
+    values["nodes"] = ""
 
     # If user has specified corespernode for under utilisation then
     # set the total nodes (-N) parameter.
@@ -131,71 +183,9 @@ def prepare(job):
         nodes = float(cores) / float(cpn)
 
         # Make sure nodes is rounded up to the next highest integer
-        nodes = str(int(math.ceil(nodes)))
-        jobfile.write("#SBATCH -N " + nodes + "\n")
-
-    # Walltime for job
-    jobfile.write("#SBATCH -t " + job["maxtime"] + ":00\n\n")
-
-    jobfile.write("export OMP_NUM_THREADS=1\n\n")
-
-    # Redirect stdout
-    if job["stdout"] != "":
-
-        jobfile.write("#SBATCH -o " + job["stdout"] + "\n")
-
-    # Redirect stderr
-    if job["stderr"] != "":
-
-        jobfile.write("#SBATCH -e " + job["stderr"] + "\n\n")
-
-    # Load any custom scripts.
-    if job["scripts"] != "":
-
-        scripts = job["scripts"].split(',')
-
-        if len(scripts) > 0:
-
-            for item in scripts:
-
-                jobfile.write(item.strip() + "\n")
-
-            jobfile.write("\n")
-
-    # Load up modules if required.
-    if job["modules"] != "":
-
-        for module in job["modules"].split(","):
+        values["nodes"] = str(int(math.ceil(nodes)))
 
-            module = module.replace(" ", "")
-            jobfile.write("module load {0}\n\n" .format(module))
-
-    # Handler that is used for job submission.
-    mpirun = job["handler"]
-
-    # Single jobs only need one run command.
-    if int(job["replicates"]) == 1:
-
-        jobfile.write(mpirun + " " + job["executableargs"] + "\n")
-
-    # Ensemble jobs need a loop.
-    elif int(job["replicates"]) > 1:
-
-        jobfile.write("basedir = `pwd`\n"
-                      "for i in {1.." + job["replicates"] + "};\n"
-                      "do\n"
-                      "  cd $basedir/rep$i/\n"
-                      "  " + mpirun + " " + job["executableargs"] +
-                      "\n"
-                      "done\n"
-                      "wait\n")
-
-    # Close the file
-    jobfile.close()
-
-    # Append submitfile to list of files ready for staging.
-    job["upload-include"] = job["upload-include"] + ", submit.slurm"
-    job["subfile"] = "submit.slurm"
+    templates.write(job, "submit.slurm", TEMPLATE, values)
 
 
 def status(job):
@@ -215,26 +205,30 @@ def status(job):
         "TO": "Timed out"
     }
 
-    jobstate = ""
-
-    shellout = shellwrappers.sendtossh(job, ["squeue -u " + job["user"]])
-
-    # PBS will return a table, so split lines into a list.
-    stdout = shellout[0].split("\n")
+    found = []
 
     # Look up the job state and convert it to Longbow terminology.
-    # Now match the jobid against the list of jobs, extract the line and
-    # split it into a list
-    for line in stdout:
-
+    # Now match the jobid against each line of the table as it arrives,
+    # stopping as soon as it is found.
+    def parse(line):
+        """Parse a line of the job table."""
         line = line.split()
 
         if len(line) > 0 and job["jobid"] in line[0]:
 
-            jobstate = states[line[4]]
-            break
+            found.append(states[line[4]])
+
+            return True
+
+        return False
+
+    shellwrappers.sendtosshstream(job, ["squeue -u " + job["user"]], parse)
+
+    if found:
+
+        jobstate = found[0]
 
-    if jobstate == "":
+    else:
 
         jobstate = "Finished"
 
@@ -249,7 +243,7 @@ def submit(job):
     # Process the submit
     try:
 
-        shellout = shellwrappers.sendtossh(job, cmd)
+        shellout = shellwrappers.sendtossh(job, cmd, cmdclass="submit")
 
     except exceptions.SSHError as inst:
 
@@ -46,14 +46,92 @@ submit(job)
 """
 
 import math
-import os
 import re
 
 import longbow.exceptions as exceptions
 import longbow.shellwrappers as shellwrappers
+import longbow.templates as templates
 
 QUERY_STRING = "env | grep -i 'sge'"
 
+# The submit script, see the templates module for the syntax.
+TEMPLATE = """\
+#!/bin/bash --login
+#$ -cwd -V
+#$ -N {{jobname}}
+{% if queue %}
+#$ -q {{queue}}
+{% endif %}
+{% if account %}
+{% if accountflag %}
+#$ {{accountflag}} {{account}}
+{% else %}
+#$ -A {{account}}
+{% endif %}
+{% endif %}
+#$ -l h_rt={{maxtime}}:00
+{% if memory %}
+#$ -l h_vmem={{memory}}G
+{% endif %}
+{% if email-address %}
+{% if email-flags %}
+#$ -m {{email-flags}}
+{% endif %}
+#$ -M {{email-address}}
+{% endif %}
+{% if array %}
+#$ -t 1-{{replicates}}
+{% endif %}
+#$ -l nodes={{nodes}}
+#$ -pe ib {{cores}}
+
+export OMP_NUM_THREADS=1
+
+{% if stdout %}
+#$ -o {{stdout}}
+{% endif %}
+{% if stderr %}
+#$ -e {{stderr}}
+
+{% endif %}
+{% if scripts %}
+{% for script in scripts %}
+{{script}}
+{% endfor %}
+
+{% endif %}
+{% for module in modules %}
+module load {{module}}
+
+{% endfor %}
+{% if statusfile %}
+echo "{{jobname}} start {{task}} {{replicates}}" >> {{statusfile}}
+{% endif %}
+{% if array %}
+cd rep${SGE_TASK_ID}/
+{% endif %}
+{{mpirun}} {{executableargs}}
+{% if statusfile %}
+echo "{{jobname}} finish {{task}} {{replicates}} $?" >> {{statusfile}}
+{% endif %}
+"""
+
+
+def bulkdelete(jobs):
+    """Delete several jobs on the same resource with one command."""
+    jobids = [job["jobid"] for job in jobs]
+
+    try:
+
+        shellout = shellwrappers.sendtossh(
+            jobs[0], ["qdel " + " ".join(jobids)])
+
+    except exceptions.SSHError:
+
+        raise exceptions.JobdeleteError("Unable to delete jobs.")
+
+    return shellout[0]
+
 
 def delete(job):
     """Delete a job."""
@@ -73,53 +151,7 @@ def delete(job):
 
 def prepare(job):
     """Create the SGE jobfile ready for submitting jobs."""
-    # Open file for SGE script.
-    sgefile = os.path.join(job["localworkdir"], "submit.soge")
-    jobfile = open(sgefile, "w+")
-
-    # Write the PBS script
-    jobfile.write("#!/bin/bash --login\n"
-                  "#$ -cwd -V\n")
-
-    jobfile.write("#$ -N " + job["jobname"] + "\n")
-
-    if job["queue"] != "":
-
-        jobfile.write("#$ -q " + job["queue"] + "\n")
-
-    # Account to charge (if supplied).
-    if job["account"] != "":
-
-        # if no accountflag is provided use the default
-        if job["accountflag"] == "":
-
-            jobfile.write("#$ -A " + job["account"] + "\n")
-
-        # else use the accountflag provided
-        else:
-
-            jobfile.write("#$ " + job["accountflag"] + " " + job["account"] +
-                          "\n")
-
-    jobfile.write("#$ -l h_rt=" + job["maxtime"] + ":00\n")
-
-    if job["memory"] != "":
-
-        jobfile.write("#$ -l h_vmem=" + job["memory"] + "G\n")
-
-    # Email user.
-    if job["email-address"] != "":
-
-        if job["email-flags"] != "":
-
-            jobfile.write("#$ -m " + job["email-flags"] + "\n")
-
-        jobfile.write("#$ -M " + job["email-address"] + "\n")
-
-    # Job array
-    if int(job["replicates"]) > 1:
-
-        jobfile.write("#$ -t 1-" + job["replicates"] + "\n")
+    values = templates.variables(job)
 
     cores = job["cores"]
     cpn = job["corespernode"]
@@ -134,73 +166,12 @@ def prepare(job):
     nodes = float(cores) / float(cpn)
 
     # Makes sure nodes is rounded up to the next highest integer.
-    nodes = str(int(math.ceil(nodes)))
-
-    # Number of cpus per node (most machines will charge for all available cpus
-    # per node whether you are using them or not)
-    # ncpus = cpn
+    values["nodes"] = str(int(math.ceil(nodes)))
 
-    # Number of mpi processes per node.
-    # mpiprocs = cpn
+    # The task within the job array, for the status-push markers.
+    values["task"] = "${SGE_TASK_ID}" if values["array"] else "1"
 
-    tmp = "nodes=" + nodes
-
-    # Write the resource requests
-    jobfile.write("#$ -l " + tmp + "\n")
-
-    jobfile.write("#$ -pe ib " + cores + "\n\n")
-
-    jobfile.write("export OMP_NUM_THREADS=1\n\n")
-
-    # Redirect stdout
-    if job["stdout"] != "":
-
-        jobfile.write("#$ -o " + job["stdout"] + "\n")
-
-    # Redirect stderr
-    if job["stderr"] != "":
-
-        jobfile.write("#$ -e " + job["stderr"] + "\n\n")
-
-    # Load any custom scripts.
-    if job["scripts"] != "":
-
-        scripts = job["scripts"].split(',')
-
-        if len(scripts) > 0:
-
-            for item in scripts:
-
-                jobfile.write(item.strip() + "\n")
-
-            jobfile.write("\n")
-
-    if job["modules"] != "":
-
-        for module in job["modules"].split(","):
-
-            module = module.replace(" ", "")
-            jobfile.write("module load {0}\n\n" .format(module))
-
-    mpirun = job["handler"]
-
-    # Single job
-    if int(job["replicates"]) == 1:
-
-        jobfile.write(mpirun + " " + job["executableargs"] + "\n")
-
-    # Job array
-    elif int(job["replicates"]) > 1:
-
-        jobfile.write("cd rep${SGE_TASK_ID}/\n" + mpirun +
-                      job["executableargs"] + "\n")
-
-    # Close the file (housekeeping)
-    jobfile.close()
-
-    # Append lsf file to list of files ready for staging.
-    job["upload-include"] = job["upload-include"] + ", submit.soge"
-    job["subfile"] = "submit.soge"
+    templates.write(job, "submit.soge", TEMPLATE, values)
 
 
 def status(job):
@@ -212,26 +183,30 @@ def status(job):
         "r": "Running"
     }
 
-    jobstate = ""
-
-    shellout = shellwrappers.sendtossh(job, ["qstat -u " + job["user"]])
-
-    # PBS will return a table, so split lines into a list.
-    stdout = shellout[0].split("\n")
+    found = []
 
     # Look up the job state and convert it to Longbow terminology.
-    # Now match the jobid against the list of jobs, extract the line and
-    # split it into a list
-    for line in stdout:
-
+    # Now match the jobid against each line of the table as it arrives,
+    # stopping as soon as it is found.
+    def parse(line):
+        """Parse a line of the job table."""
         line = line.split()
 
         if len(line) > 0 and job["jobid"] in line[0]:
 
-            jobstate = states[line[4]]
-            break
+            found.append(states[line[4]])
+
+            return True
+
+        return False
+
+    shellwrappers.sendtosshstream(job, ["qstat -u " + job["user"]], parse)
+
+    if found:
+
+        jobstate = found[0]
 
-    if jobstate == "":
+    else:
 
         jobstate = "Finished"
 
@@ -246,7 +221,7 @@ def submit(job):
     # Process the submit
     try:
 
-        shellout = shellwrappers.sendtossh(job, cmd)
+        shellout = shellwrappers.sendtossh(job, cmd, cmdclass="submit")
 
     except exceptions.SSHError as inst:
 
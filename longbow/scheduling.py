@@ -47,11 +47,29 @@ delete(job)
     A method containing the generic and boiler plate Longbow code for deleting
     a job.
 
+bulkdelete(joblist)
+    A method for deleting many jobs, with as few commands as the scheduler
+    plugins allow.
+
 monitor(jobs)
     A method containing the generic and boiler plate Longbow code for
     monitoring a job, this method contains the entire structure of the loop
     that deals with monitoring jobs.
 
+monitorstart(jobs, align)
+    A method to set up the monitoring of jobs from a loop that is not the one
+    in monitor().
+
+monitorstep(jobs, state, now)
+    A method to carry out one pass of the monitor loop.
+
+monitorfinish(jobs)
+    A method to finish the monitoring of jobs once they are all complete.
+
+monitorstop(jobs)
+    A method to stop counting jobs in the job gauges when their monitoring
+    ends before they are complete.
+
 prepare(jobs)
     A method containing the generic and boiler plate Longbow code for
     constructing the submit file.
@@ -59,14 +77,24 @@ prepare(jobs)
 submit(jobs)
     A method containing the generic and boiler plate Longbow code for
     submitting a job.
+
+pipeline(jobs)
+    A method to prepare, stage and submit jobs with each job moving through
+    these steps independently.
 """
 
 import logging
+import queue
+import threading
 import time
 import os
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
 
 import longbow.configuration as configuration
 import longbow.exceptions as exceptions
+import longbow.metrics as metrics
 import longbow.shellwrappers as shellwrappers
 import longbow.staging as staging
 import longbow.schedulers as schedulers
@@ -74,6 +102,26 @@ import longbow.schedulers as schedulers
 
 LOG = logging.getLogger("longbow.scheduling")
 
+# Jobs using push style status updates that have started are still checked
+# with the scheduler every this many polls, to catch jobs that were killed
+# before they could write their finish marker (walltime etc).
+PUSHCONFIRM = 10
+
+# The most job ids given to a single bulk delete command.
+DELETEBATCH = 100
+
+# Number of resources deleted from at once.
+WORKERS = 8
+
+# The most jobs that can be between preparation and submission at once when
+# running as a pipeline.
+PIPELINEDEPTH = 32
+
+# Number of jobs in each state on each resource for every session being
+# monitored in this process, which the job gauges total up (see _jobgauges).
+JOBSTATES = {}
+JOBSTATESLOCK = threading.Lock()
+
 
 def checkenv(jobs, hostconf):
     """Determine the scheduler and job handler on a machine.
@@ -197,6 +245,38 @@ def delete(job):
     LOG.info("Deletion successful")
 
 
+def bulkdelete(joblist):
+    """Delete many jobs.
+
+    This method is for deleting many jobs at once, such as when a session is
+    aborted. The jobs are grouped by resource, and the jobs on each resource
+    are deleted with one command per batch of DELETEBATCH jobs, through the
+    bulkdelete method of the scheduler plugin. Resources are dealt with at the
+    same time. Plugins without a bulkdelete method, or a batch that fails to
+    delete, fall back to deleting one job at a time. Jobs that have no job id,
+    such as those still waiting to be submitted, are left out as there is
+    nothing on the resource to delete.
+
+    Required arguments are:
+
+    joblist (list) - The job dictionaries of the jobs to delete.
+
+    """
+    groups = {}
+
+    for job in [a for a in joblist if a.get("jobid", "") != ""]:
+
+        groups.setdefault((job["resource"], job["scheduler"]), []).append(job)
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+
+        # Wait on each resource so any errors are raised here.
+        for future in [pool.submit(_bulkdelete, group)
+                       for group in groups.values()]:
+
+            future.result()
+
+
 def monitor(jobs):
     """Monitor the status of jobs (loop).
 
@@ -214,16 +294,8 @@ def monitor(jobs):
     LOG.info("Monitoring job/s. Depending on the chosen logging mode, Longbow "
              "might appear to be doing nothing. Please be patient!")
 
-    stageinterval, pollinterval = _monitorinitialise(jobs)
-
+    state = monitorstart(jobs)
     allcomplete = False
-    allfinished = False
-    lastpolltime = 0
-    laststagetime = 0
-    basepath = os.path.expanduser('~/.longbow')
-    recoveryfile = os.path.join(basepath, jobs["lbowconf"]["recoveryfile"])
-    saverecoveryfile = True
-    recoveryfileerror = False
 
     # Loop until all jobs are done.
     while allcomplete is False:
@@ -231,48 +303,165 @@ def monitor(jobs):
         # Sane time interval (CPU core maxes out easily otherwise).
         time.sleep(1.0)
 
-        now = time.time()
+        allcomplete, allfinished = monitorstep(jobs, state)
+
+        if ("update" in jobs["lbowconf"] and allfinished is False and
+                allcomplete is False):
+
+            if jobs["lbowconf"]["update"] is True:
+
+                jobs["lbowconf"]["update"] = False
+                raise exceptions.UpdateExit
+
+    monitorfinish(jobs)
+
+
+def monitorstart(jobs, align=False):
+    """Set up the monitoring of jobs.
+
+    This method, along with monitorstep and monitorfinish, allows the monitor
+    loop to be driven from elsewhere, for example to monitor several sessions
+    from one loop. The returned state should be handed to monitorstep each
+    time it is called.
+
+    Required arguments are:
+
+    jobs (dictionary) - The Longbow jobs data structure, see configuration.py
+                        for more information about the format of this
+                        structure.
+
+    Optional arguments are:
+
+    align (boolean) - Poll at whole multiples of the polling interval, so
+                      that sessions with the same interval poll together.
+
+    Return parameters are:
+
+    state (dictionary) - The monitoring state of this set of jobs.
+
+    """
+    stageinterval, pollinterval = _monitorinitialise(jobs)
+
+    # Each session has an id of its own for counting its jobs in the gauges,
+    # as the recovery file name isn't always set and need not be unique. It
+    # is kept in the recovery file so that a recovered session replaces its
+    # own counts.
+    jobs["lbowconf"].setdefault("session", uuid.uuid4().hex)
+
+    return {
+        "align": align,
+        "allfinished": False,
+        "lastpolltime": 0,
+        "laststagetime": 0,
+        "pollinterval": pollinterval,
+        "recoveryfile": os.path.join(os.path.expanduser('~/.longbow'),
+                                     jobs["lbowconf"]["recoveryfile"]),
+        "recoveryfileerror": False,
+        "saverecoveryfile": True,
+        "stageinterval": stageinterval
+    }
+
+
+def monitorstep(jobs, state, now=None):
+    """Carry out one pass of the monitor loop.
+
+    Poll the jobs and stage their files if it is time to do so, then save the
+    recovery file if anything has changed.
+
+    Required arguments are:
+
+    jobs (dictionary) - The Longbow jobs data structure, see configuration.py
+                        for more information about the format of this
+                        structure.
+
+    state (dictionary) - The monitoring state returned by monitorstart.
+
+    Optional arguments are:
+
+    now (float) - The time of this pass, defaults to the current time.
+
+    Return parameters are:
+
+    allcomplete (boolean) - True once all jobs are complete.
+
+    allfinished (boolean) - True once all jobs have finished running.
+
+    Each pass is timed as a "monitor" span.
+
+    """
+    with metrics.span("monitor"):
+
+        if now is None:
+
+            now = time.time()
+
+        basepath = os.path.expanduser('~/.longbow')
+        pollinterval = state["pollinterval"]
+        stageinterval = state["stageinterval"]
 
         # Check if we should be polling.
-        if int(now - lastpolltime) > int(pollinterval):
+        if int(now - state["lastpolltime"]) > int(pollinterval):
+
+            state["lastpolltime"] = int(now)
 
-            lastpolltime = int(now)
-            saverecoveryfile = _polljobs(jobs, saverecoveryfile)
-            saverecoveryfile = _checkwaitingjobs(jobs, saverecoveryfile)
+            if state["align"] is True:
+
+                state["lastpolltime"] -= (state["lastpolltime"] %
+                                          int(pollinterval))
+
+            state["saverecoveryfile"] = _polljobs(
+                jobs, state["saverecoveryfile"])
+            state["saverecoveryfile"] = _checkwaitingjobs(
+                jobs, state["saverecoveryfile"])
 
         # Check if we should be staging.
-        if ((int(now - laststagetime) > int(stageinterval) and
-                int(stageinterval) != 0) or allfinished is True):
+        if ((int(now - state["laststagetime"]) > int(stageinterval) and
+                int(stageinterval) != 0) or state["allfinished"] is True):
 
-            laststagetime = int(now)
-            saverecoveryfile = _stagejobfiles(jobs, saverecoveryfile)
+            state["laststagetime"] = int(now)
+            state["saverecoveryfile"] = _stagejobfiles(
+                jobs, state["saverecoveryfile"])
 
         # Save out the recovery files.
-        if (os.path.isdir(basepath) and saverecoveryfile is True and 
-        recoveryfileerror is False and recoveryfile != ""):
+        if (os.path.isdir(basepath) and state["saverecoveryfile"] is True and
+                state["recoveryfileerror"] is False and
+                jobs["lbowconf"]["recoveryfile"] != ""):
 
-            saverecoveryfile = False
+            state["saverecoveryfile"] = False
 
             try:
 
-                configuration.saveini(recoveryfile, jobs)
+                configuration.saveini(state["recoveryfile"], jobs)
 
             except (OSError, IOError):
 
-                recoveryfileerror = True
+                state["recoveryfileerror"] = True
 
                 LOG.warning("Could not write recovery file, possibly due to "
                             "permissions on the ~/.longbow directory.")
 
-        allcomplete, allfinished = _checkcomplete(jobs)
+        allcomplete, state["allfinished"] = _checkcomplete(jobs)
 
-        if ("update" in jobs["lbowconf"] and allfinished is False and
-                allcomplete is False):
+        _jobgauges(jobs)
 
-            if jobs["lbowconf"]["update"] is True:
+        return allcomplete, state["allfinished"]
 
-                jobs["lbowconf"]["update"] = False
-                raise exceptions.UpdateExit
+
+def monitorfinish(jobs):
+    """Finish the monitoring of jobs.
+
+    Remove any status files left by the jobs and report how the session went.
+
+    Required arguments are:
+
+    jobs (dictionary) - The Longbow jobs data structure, see configuration.py
+                        for more information about the format of this
+                        structure.
+
+    """
+    _removestatusfiles(jobs)
+
+    monitorstop(jobs)
 
     complete = 0
     error = 0
@@ -291,13 +480,13 @@ def monitor(jobs):
              "errors.", complete, error)
 
 
-def prepare(jobs):
-    """Create job submission scripts.
+def monitorstop(jobs):
+    """Stop counting jobs in the job gauges.
 
-    This method will loop through all jobs in the "jobs" data structure and use
-    the parameters for each job to create the submission file. This method acts
-    as a generic interface to scheduler specific plugins which contain the
-    specific code to create the submit file.
+    This is done by monitorfinish, and should be called instead when the
+    monitoring of jobs ends before they are all complete, for example when a
+    session is closed or given up on, so that the gauges only count the jobs
+    that are still being monitored.
 
     Required arguments are:
 
@@ -306,36 +495,33 @@ def prepare(jobs):
                         structure.
 
     """
-    LOG.info("Creating submit files for job/s.")
-
-    for item in [a for a in jobs if "lbowconf" not in a]:
-
-        job = jobs[item]
-        scheduler = job["scheduler"]
+    with JOBSTATESLOCK:
 
-        try:
+        if JOBSTATES.pop(jobs["lbowconf"].get("session"), None) is not None:
 
-            if job["subfile"] == "":
+            _jobgaugestotal()
 
-                LOG.info("Creating submit file for job '%s'", item)
 
-                getattr(schedulers, scheduler.lower()).prepare(job)
+def prepare(jobs):
+    """Create job submission scripts.
 
-                LOG.info("Submit file created successfully")
+    This method will loop through all jobs in the "jobs" data structure and use
+    the parameters for each job to create the submission file. This method acts
+    as a generic interface to scheduler specific plugins which contain the
+    specific code to create the submit file.
 
-            else:
+    Required arguments are:
 
-                LOG.info("For job '%s' user has supplied their own job submit "
-                         "script - skipping creation.", item)
+    jobs (dictionary) - The Longbow jobs data structure, see configuration.py
+                        for more information about the format of this
+                        structure.
 
-                job["upload-include"] = (job["upload-include"] + ", " +
-                                         job["subfile"])
+    """
+    LOG.info("Creating submit files for job/s.")
 
-        except AttributeError:
+    for item in [a for a in jobs if "lbowconf" not in a]:
 
-            raise exceptions.PluginattributeError(
-                "prepare method cannot be found in plugin '{0}'"
-                .format(scheduler))
+        _preparejob(jobs, item)
 
     LOG.info("Submit file/s created.")
 
@@ -360,95 +546,118 @@ def submit(jobs):
 
     LOG.info("Submitting job/s.")
 
+    _submitinit(jobs)
+
     for item in [a for a in jobs if "lbowconf" not in a]:
 
-        job = jobs[item]
+        # Try and submit.
+        try:
 
-        # Set up counters for each resource.
-        jobs["lbowconf"][job["resource"] + "-" + "queue-slots"] = str(0)
-        jobs["lbowconf"][job["resource"] + "-" + "queue-max"] = str(0)
+            if _submitjob(jobs, item):
 
-    for item in [a for a in jobs if "lbowconf" not in a]:
+                submitted += 1
 
-        job = jobs[item]
-        scheduler = job["scheduler"]
+            else:
 
-        # Try and submit.
-        try:
+                error += 1
+
+        # Hit maximum slots on resource, Longbow will sub-schedule these.
+        except exceptions.QueuemaxError:
+
+            queued = _submithold(jobs)
+
+            break
+
+    _saverecovery(jobs)
+
+    LOG.info("%s Submitted, %s Held due to queue limits and %s Failed.",
+             submitted, queued, error)
 
-            getattr(schedulers, scheduler.lower()).submit(job)
 
-            LOG.info("Job '%s' submitted with id '%s'", item, job["jobid"])
+def pipeline(jobs):
+    """Prepare, stage and submit jobs as a pipeline.
 
-            job["laststatus"] = "Queued"
+    This method does the same work as calling prepare, staging.stage_upstream
+    and submit in turn, but each job moves through these steps on its own.
+    Jobs are prepared in order and handed to a pool of staging workers, and
+    each job is submitted as soon as its files have been staged, so that the
+    first jobs are queueing on the resource while the rest are still being
+    uploaded. At most PIPELINEDEPTH jobs are in flight at any time. Queue
+    slot limits are handled in the same way as submit, and the first error
+    in any step is raised once the jobs already being staged have finished.
 
-            # Increment the queue counter by one (used to count the slots).
-            jobs["lbowconf"][job["resource"] + "-" + "queue-slots"] = str(int(
-                jobs["lbowconf"][job["resource"] + "-" + "queue-slots"]) + 1)
+    Required arguments are:
 
-            submitted += 1
+    jobs (dictionary) - The Longbow jobs data structure, see configuration.py
+                        for more information about the format of this
+                        structure.
 
-        # Submit method can't be found.
-        except AttributeError:
+    """
+    # Initialise some counters.
+    submitted = 0
+    queued = 0
+    error = 0
 
-            raise exceptions.PluginattributeError(
-                "submit method cannot be found in plugin '{0}'"
-                .format(scheduler))
+    LOG.info("Preparing, staging and submitting job/s.")
 
-        # Some sort of error in submitting the job.
-        except exceptions.JobsubmitError as err:
+    _submitinit(jobs)
 
-            LOG.error(err)
+    slots = threading.Semaphore(PIPELINEDEPTH)
+    staged = queue.Queue()
+    stop = threading.Event()
 
-            job["laststatus"] = "Submit Error"
+    feeder = threading.Thread(target=_pipelinefeed,
+                              args=(jobs, slots, staged, stop))
+    feeder.start()
 
-            error += 1
+    try:
 
-        # Hit maximum slots on resource, Longbow will sub-schedule these.
-        except exceptions.QueuemaxError:
+        while True:
 
-            for item in [a for a in jobs if "lbowconf" not in a]:
+            item, err = staged.get()
 
-                if "laststatus" not in jobs[item]:
+            if err is not None:
 
-                    LOG.info("The job '%s' has been held back by Longbow due "
-                             "to reaching queue slot limit, it will be "
-                             "submitted when a slot opens up.", item)
+                raise err
 
-                    # We will set a flag so that we can inform the user that
-                    # it is handled.
-                    jobs[item]["laststatus"] = "Waiting Submission"
+            if item is None:
 
-                    queued += 1
+                break
 
-            break
+            slots.release()
 
-        # We want to find out what the maximum number of slots we have are.
-        if int(jobs["lbowconf"][job["resource"] + "-" + "queue-slots"]) > \
-                int(jobs["lbowconf"][job["resource"] + "-" + "queue-max"]):
+            # Jobs held back by a queue limit are still staged, so that they
+            # can be submitted when a slot opens up.
+            if "laststatus" in jobs[item]:
 
-            jobs["lbowconf"][job["resource"] + "-" + "queue-max"] = \
-                jobs["lbowconf"][job["resource"] + "-" + "queue-slots"]
+                continue
 
-    # Save out the recovery files.
-    if (os.path.isdir(os.path.expanduser('~/.longbow')) and
-            jobs["lbowconf"]["recoveryfile"] != ""):
+            try:
 
-        basepath = os.path.expanduser('~/.longbow')
-        recoveryfile = os.path.join(basepath, jobs["lbowconf"]["recoveryfile"])
+                if _submitjob(jobs, item):
 
-        try:
+                    submitted += 1
 
-            LOG.info("Recovery file will be placed at path '%s'",
-                     recoveryfile)
+                else:
 
-            configuration.saveini(recoveryfile, jobs)
+                    error += 1
 
-        except (OSError, IOError):
+            except exceptions.QueuemaxError:
 
-            LOG.warning(
-                "Could not write recovery file, possibly due to permissions "
-                "on the ~/.longbow directory.")
+                queued = _submithold(jobs)
+
+    finally:
+
+        # Let the feeder run out so that no job is left half staged.
+        stop.set()
+
+        for _ in range(PIPELINEDEPTH):
+
+            slots.release()
+
+        feeder.join()
+
+    _saverecovery(jobs)
 
     LOG.info("%s Submitted, %s Held due to queue limits and %s Failed.",
              submitted, queued, error)
@@ -466,7 +675,8 @@ def _testscheduler(job):
 
         try:
 
-            shellwrappers.sendtossh(job, schedulerqueries[param])
+            shellwrappers.sendtossh(job, schedulerqueries[param],
+                                    cmdclass="probe")
 
             job["scheduler"] = param
 
@@ -509,7 +719,7 @@ def _testhandler(job):
 
             cmd = modules[:]
             cmd.extend(handlers[param])
-            shellwrappers.sendtossh(job, cmd)
+            shellwrappers.sendtossh(job, cmd, cmdclass="probe")
 
             job["handler"] = param
 
@@ -563,49 +773,186 @@ def _polljobs(jobs, save):
     """Poll the status of all jobs.
 
     Poll the status of all jobs that are not in error states, queued or
-    finihed.
+    finihed. Jobs that push their status into a status file are read from
+    that first, the scheduler is only asked about jobs that have not started.
+    Jobs sharing a host and user share one scheduler query per poll.
 
     """
-    for job in [a for a in jobs if "lbowconf" not in a]:
+    markers = _readstatusfiles(jobs)
 
-        if (jobs[job]["laststatus"] != "Finished" and
-                jobs[job]["laststatus"] != "Complete" and
-                jobs[job]["laststatus"] != "Submit Error" and
-                jobs[job]["laststatus"] != "Waiting Submission"):
+    with shellwrappers.statusround():
 
-            # Get the job status.
-            try:
+        for job in [a for a in jobs if "lbowconf" not in a]:
 
-                status = getattr(
-                    schedulers, jobs[job]["scheduler"].lower()).status(
-                        jobs[job])
+            if (jobs[job]["laststatus"] != "Finished" and
+                    jobs[job]["laststatus"] != "Complete" and
+                    jobs[job]["laststatus"] != "Submit Error" and
+                    jobs[job]["laststatus"] != "Waiting Submission"):
 
-            except AttributeError:
+                status = _pushedstatus(jobs[job], markers)
 
-                raise exceptions.PluginattributeError(
-                    "Status method cannot be"
-                    "found in plugin '{0}'".format(jobs[job]["scheduler"]))
+                # Get the job status.
+                try:
 
-            # If the last status is different then change the flag (stops
-            # logfile getting flooded!)
-            if jobs[job]["laststatus"] != status:
+                    if status is None:
 
-                jobs[job]["laststatus"] = status
+                        status = getattr(
+                            schedulers, jobs[job]["scheduler"].lower()).status(
+                                jobs[job])
 
-                save = True
+                except AttributeError:
+
+                    raise exceptions.PluginattributeError(
+                        "Status method cannot be"
+                        "found in plugin '{0}'".format(jobs[job]["scheduler"]))
+
+                # A host that is having problems should not bring down the
+                # monitoring of every other job, try again on the next poll.
+                except exceptions.SSHError:
+
+                    LOG.warning("Could not get the status of job '%s' from "
+                                "'%s', will try again at the next poll.", job,
+                                jobs[job]["resource"])
+
+                    continue
+
+                # If the last status is different then change the flag (stops
+                # logfile getting flooded!)
+                if jobs[job]["laststatus"] != status:
+
+                    jobs[job]["laststatus"] = status
+
+                    save = True
 
-                if status == "Finished":
+                    if status == "Finished":
 
-                    qslots = jobs[job]["resource"] + "-" + "queue-slots"
-                    jobs["lbowconf"][qslots] = str(int(
-                        jobs["lbowconf"][qslots]) - 1)
+                        qslots = jobs[job]["resource"] + "-" + "queue-slots"
+                        jobs["lbowconf"][qslots] = str(int(
+                            jobs["lbowconf"][qslots]) - 1)
 
-                LOG.info("Status of job '%s' with id '%s' is '%s'", job,
-                         jobs[job]["jobid"], status)
+                    LOG.info("Status of job '%s' with id '%s' is '%s'", job,
+                             jobs[job]["jobid"], status)
 
     return save
 
 
+def _readstatusfiles(jobs):
+    """Read the markers from the status files of jobs that push their status.
+
+    Each status file is read with a single cat, however many jobs share it.
+
+    """
+    markers = {}
+    statusfiles = {}
+
+    for job in [a for a in jobs if "lbowconf" not in a]:
+
+        if ("statusfile" in jobs[job] and
+                jobs[job]["laststatus"] != "Finished" and
+                jobs[job]["laststatus"] != "Complete"):
+
+            statusfiles.setdefault(
+                (jobs[job]["resource"], jobs[job]["statusfile"]), jobs[job])
+
+    def parse(line):
+        """Parse a "jobname event task tasks [exitcode]" marker line."""
+        line = line.split()
+
+        try:
+
+            marker = markers.setdefault(line[0], {
+                "started": set(), "finished": {}, "tasks": int(line[3])})
+
+        except (IndexError, ValueError):
+
+            return False
+
+        if line[1] == "start":
+
+            marker["started"].add(line[2])
+
+        elif line[1] == "finish":
+
+            marker["started"].add(line[2])
+            marker["finished"][line[2]] = line[4] if len(line) > 4 else ""
+
+        return False
+
+    for (resource, statusfile), job in statusfiles.items():
+
+        # The status file won't exist until the first job starts.
+        try:
+
+            shellwrappers.sendtosshstream(
+                job, ["cat " + statusfile + " 2>/dev/null || true"], parse)
+
+        except exceptions.SSHError:
+
+            LOG.warning("Could not read the status file '%s' on '%s', will "
+                        "try again at the next poll.", statusfile, resource)
+
+    return markers
+
+
+def _pushedstatus(job, markers):
+    """Get the status of a job from its status file markers.
+
+    Returns None when the scheduler should be asked instead, this is the case
+    for jobs that haven't started yet and every PUSHCONFIRM polls for jobs
+    that are running.
+
+    """
+    if "statusfile" not in job or job["jobname"] not in markers:
+
+        return None
+
+    marker = markers[job["jobname"]]
+
+    if len(marker["finished"]) >= marker["tasks"]:
+
+        failed = sorted(task for task, code in marker["finished"].items()
+                        if code != "0")
+
+        if failed:
+
+            LOG.warning("Job '%s' finished but task/s %s exited with an "
+                        "error.", job["jobname"], ", ".join(failed))
+
+        return "Finished"
+
+    polls = int(job.get("statuspolls", "0")) + 1
+    job["statuspolls"] = str(polls)
+
+    if polls % PUSHCONFIRM == 0:
+
+        return None
+
+    return "Running"
+
+
+def _removestatusfiles(jobs):
+    """Remove the status files of jobs that pushed their status."""
+    statusfiles = {}
+
+    for job in [a for a in jobs if "lbowconf" not in a]:
+
+        if "statusfile" in jobs[job]:
+
+            statusfiles.setdefault(
+                (jobs[job]["resource"], jobs[job]["statusfile"]), jobs[job])
+
+    for (resource, statusfile), job in statusfiles.items():
+
+        try:
+
+            shellwrappers.sendtossh(job, ["rm -f " + statusfile])
+
+        except exceptions.SSHError:
+
+            LOG.warning("Could not remove the status file '%s' on '%s'.",
+                        statusfile, resource)
+
+
 def _stagejobfiles(jobs, save):
     """Stage all files for each running job.
 
@@ -631,6 +978,38 @@ def _stagejobfiles(jobs, save):
     return save
 
 
+def _jobgauges(jobs):
+    """Set the gauges counting the jobs in each state on each resource."""
+    states = {}
+
+    for job in [a for a in jobs if "lbowconf" not in a]:
+
+        key = (jobs[job]["resource"], jobs[job]["laststatus"])
+        states[key] = states.get(key, 0) + 1
+
+    with JOBSTATESLOCK:
+
+        JOBSTATES[jobs["lbowconf"]["session"]] = states
+        _jobgaugestotal()
+
+
+def _jobgaugestotal():
+    """Total the jobs of every session into the job gauges."""
+    totals = {}
+
+    for states in JOBSTATES.values():
+
+        for key, number in states.items():
+
+            totals[key] = totals.get(key, 0) + number
+
+    metrics.cleargauges("jobs")
+
+    for (resource, status), number in totals.items():
+
+        metrics.gauge("jobs", number, resource=resource, state=status)
+
+
 def _checkwaitingjobs(jobs, save):
     """Check if any jobs marked as "Waiting Submission" can be submitted."""
     for job in [a for a in jobs if "lbowconf" not in a]:
@@ -685,6 +1064,38 @@ def _checkwaitingjobs(jobs, save):
     return save
 
 
+def _bulkdelete(group):
+    """Delete the jobs on a single resource, see bulkdelete."""
+    plugin = getattr(schedulers, group[0]["scheduler"].lower())
+
+    if not hasattr(plugin, "bulkdelete"):
+
+        for job in group:
+
+            delete(job)
+
+        return
+
+    for start in range(0, len(group), DELETEBATCH):
+
+        batch = group[start:start + DELETEBATCH]
+
+        LOG.info("Deleting %d jobs on '%s'", len(batch), batch[0]["resource"])
+
+        try:
+
+            plugin.bulkdelete(batch)
+
+        except exceptions.JobdeleteError:
+
+            LOG.info("Unable to delete the jobs on '%s' together, deleting "
+                     "them one at a time", batch[0]["resource"])
+
+            for job in batch:
+
+                delete(job)
+
+
 def _checkcomplete(jobs):
     """Check if all the jobs are complete."""
     # Initialise variables
@@ -722,3 +1133,177 @@ def _checkcomplete(jobs):
         allfinished = True
 
     return allcomplete, allfinished
+
+
+def _preparejob(jobs, item):
+    """Create the submit file for a single job."""
+    job = jobs[item]
+    scheduler = job["scheduler"]
+
+    try:
+
+        if job["subfile"] == "":
+
+            # Jobs can push their progress into a status file shared by
+            # the whole session, rather than Longbow polling for it.
+            if job.get("status-push", "false") == "true":
+
+                job["statusfile"] = os.path.join(
+                    job["remoteworkdir"], ".longbow-" +
+                    jobs["lbowconf"]["recoveryfile"].replace(
+                        "recovery-", "") + ".status")
+
+            LOG.info("Creating submit file for job '%s'", item)
+
+            getattr(schedulers, scheduler.lower()).prepare(job)
+
+            LOG.info("Submit file created successfully")
+
+        else:
+
+            LOG.info("For job '%s' user has supplied their own job submit "
+                     "script - skipping creation.", item)
+
+            job["upload-include"] = (job["upload-include"] + ", " +
+                                     job["subfile"])
+
+    except AttributeError:
+
+        raise exceptions.PluginattributeError(
+            "prepare method cannot be found in plugin '{0}'"
+            .format(scheduler))
+
+
+def _submitinit(jobs):
+    """Set up the queue slot counters for each resource."""
+    for item in [a for a in jobs if "lbowconf" not in a]:
+
+        job = jobs[item]
+
+        jobs["lbowconf"][job["resource"] + "-" + "queue-slots"] = str(0)
+        jobs["lbowconf"][job["resource"] + "-" + "queue-max"] = str(0)
+
+
+def _submitjob(jobs, item):
+    """Submit a single job, returning False if the submission failed."""
+    job = jobs[item]
+    scheduler = job["scheduler"]
+    submitted = True
+
+    try:
+
+        getattr(schedulers, scheduler.lower()).submit(job)
+
+        LOG.info("Job '%s' submitted with id '%s'", item, job["jobid"])
+
+        job["laststatus"] = "Queued"
+
+        # Increment the queue counter by one (used to count the slots).
+        jobs["lbowconf"][job["resource"] + "-" + "queue-slots"] = str(int(
+            jobs["lbowconf"][job["resource"] + "-" + "queue-slots"]) + 1)
+
+    # Submit method can't be found.
+    except AttributeError:
+
+        raise exceptions.PluginattributeError(
+            "submit method cannot be found in plugin '{0}'"
+            .format(scheduler))
+
+    # Some sort of error in submitting the job.
+    except exceptions.JobsubmitError as err:
+
+        LOG.error(err)
+
+        job["laststatus"] = "Submit Error"
+
+        submitted = False
+
+    # We want to find out what the maximum number of slots we have are.
+    if int(jobs["lbowconf"][job["resource"] + "-" + "queue-slots"]) > \
+            int(jobs["lbowconf"][job["resource"] + "-" + "queue-max"]):
+
+        jobs["lbowconf"][job["resource"] + "-" + "queue-max"] = \
+            jobs["lbowconf"][job["resource"] + "-" + "queue-slots"]
+
+    return submitted
+
+
+def _submithold(jobs):
+    """Hold back all jobs not yet submitted, returning how many there were."""
+    queued = 0
+
+    for item in [a for a in jobs if "lbowconf" not in a]:
+
+        if "laststatus" not in jobs[item]:
+
+            LOG.info("The job '%s' has been held back by Longbow due to "
+                     "reaching queue slot limit, it will be submitted when a "
+                     "slot opens up.", item)
+
+            # We will set a flag so that we can inform the user that it is
+            # handled.
+            jobs[item]["laststatus"] = "Waiting Submission"
+
+            queued += 1
+
+    return queued
+
+
+def _saverecovery(jobs):
+    """Save out the recovery file if there is somewhere to put it."""
+    if (os.path.isdir(os.path.expanduser('~/.longbow')) and
+            jobs["lbowconf"]["recoveryfile"] != ""):
+
+        basepath = os.path.expanduser('~/.longbow')
+        recoveryfile = os.path.join(basepath, jobs["lbowconf"]["recoveryfile"])
+
+        try:
+
+            LOG.info("Recovery file will be placed at path '%s'",
+                     recoveryfile)
+
+            configuration.saveini(recoveryfile, jobs)
+
+        except (OSError, IOError):
+
+            LOG.warning(
+                "Could not write recovery file, possibly due to permissions "
+                "on the ~/.longbow directory.")
+
+
+def _pipelinefeed(jobs, slots, staged, stop):
+    """Prepare jobs in order and stage them on a pool of workers."""
+    def stage(item):
+        """Stage a single job and pass it on for submission."""
+        try:
+
+            staging.stage_upstreamjob(item, jobs[item])
+
+            staged.put((item, None))
+
+        except Exception as err:
+
+            staged.put((item, err))
+
+    try:
+
+        with ThreadPoolExecutor(max_workers=staging.WORKERS) as pool:
+
+            for item in [a for a in jobs if "lbowconf" not in a]:
+
+                slots.acquire()
+
+                if stop.is_set():
+
+                    break
+
+                _preparejob(jobs, item)
+
+                pool.submit(stage, item)
+
+    except Exception as err:
+
+        staged.put((None, err))
+
+    # The pool has finished with every job by the time this is reached.
+    staged.put((None, None))
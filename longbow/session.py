@@ -0,0 +1,367 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing a Python interface to Longbow sessions.
+
+entrypoints.longbow() runs a whole session in one call, blocking until every
+job is complete. This module is for programs, such as workflow engines, that
+want to submit jobs and carry on with other work while they run. A Session
+submits jobs and monitors them in the background, from a single thread shared
+by every job it has submitted. Each submitted job is returned as a Job handle,
+whose future completes once the job has finished and its files have been
+downloaded. For example:
+
+    with Session(hosts="/path/to/hosts.conf") as session:
+
+        jobs = session.submit(executable="pmemd.MPI", resource="archer",
+                              executableargs="-i md.in -c md.rst -p md.top")
+
+        for job in jobs:
+
+            print(job.name, job.wait())
+
+Job handles can also be awaited from asyncio code, or their futures used with
+concurrent.futures.wait() and as_completed().
+
+The following classes can be found:
+
+Session
+    A set of jobs submitted and monitored together.
+
+Job
+    A handle on a single submitted job.
+"""
+
+import logging
+import threading
+import time
+
+from concurrent.futures import Future
+
+import longbow.entrypoints as entrypoints
+import longbow.exceptions as exceptions
+import longbow.scheduling as scheduling
+import longbow.shellwrappers as shellwrappers
+import longbow.staging as staging
+
+LOG = logging.getLogger("longbow.session")
+
+# Number of monitoring passes in a row that can fail for a group of jobs
+# before the group is given up on.
+MONITORRETRIES = 5
+
+
+class Session(object):
+
+    """A set of jobs submitted and monitored together.
+
+    Any parameters given when creating the session (see entrypoints.PARAMETERS)
+    are used for every submission, each call to submit can add to or override
+    them. Jobs are monitored by a background thread once the first of them has
+    been submitted. Closing the session stops the monitoring, but leaves any
+    jobs that are still running alone, so that they can be picked up again
+    from their recovery file.
+    """
+
+    def __init__(self, **parameters):
+
+        self.parameters = parameters
+        self.jobs = []
+        self._groups = []
+        self._lock = threading.RLock()
+        self._steplock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.close()
+
+    def submit(self, **parameters):
+        """Submit jobs.
+
+        Prepare, stage and submit jobs in the same way as a launch of Longbow
+        with the given parameters, see entrypoints.PARAMETERS (parameters
+        with a "-" in their names can be given by unpacking a dictionary).
+        This returns once the jobs have been submitted. If the submission
+        fails part way through, any jobs that did reach the queue are still
+        monitored, and their handles added to the jobs attribute, before the
+        error is raised.
+
+        Return parameters are:
+
+        jobs (list) - A Job handle for each job that was submitted.
+
+        """
+        if self._stop.is_set():
+
+            raise exceptions.SessionError("The session has been closed.")
+
+        params = dict(entrypoints.PARAMETERS)
+        params.update(self.parameters)
+        params.update(parameters)
+
+        # Monitoring is done by the session, not by this call.
+        params["disconnect"] = True
+        params["explain-deps"] = False
+
+        entrypoints._hostfileproc(params)
+        entrypoints._jobfileproc(params)
+
+        jobs = {}
+
+        # Sessions in other threads could be setting up jobs at the same time.
+        with entrypoints.SUBMITLOCK:
+
+            try:
+
+                entrypoints.longbow(jobs, params)
+
+            except exceptions.DisconnectException:
+
+                pass
+
+            # Jobs that made it onto the queue before the failure still need
+            # to be followed, their handles can be found in self.jobs.
+            except Exception:
+
+                submitted = dict((item, jobs[item]) for item in jobs
+                                 if "lbowconf" not in item and
+                                 jobs[item].get("jobid", "") != "")
+
+                if submitted and "lbowconf" in jobs:
+
+                    submitted["lbowconf"] = jobs["lbowconf"]
+                    self._follow(submitted)
+
+                raise
+
+        return self._follow(jobs)
+
+    def _follow(self, jobs):
+        """Start monitoring a set of submitted jobs."""
+        handles = [Job(self, jobs, item) for item in jobs
+                   if "lbowconf" not in item]
+
+        with self._lock:
+
+            self._groups.append(
+                (jobs, scheduling.monitorstart(jobs, align=True), handles))
+            self.jobs.extend(handles)
+
+            if self._monitor is None:
+
+                self._monitor = threading.Thread(target=self._monitorloop)
+                self._monitor.daemon = True
+                self._monitor.start()
+
+        _resolve(jobs, handles)
+
+        return handles
+
+    def close(self):
+        """Stop monitoring jobs.
+
+        Jobs that have not completed are left running, and their futures are
+        cancelled.
+
+        """
+        self._stop.set()
+
+        if self._monitor is not None:
+
+            self._monitor.join()
+
+        with self._lock:
+
+            for jobs, _, _ in self._groups:
+
+                scheduling.monitorstop(jobs)
+
+        for job in self.jobs:
+
+            job.future.cancel()
+
+    def _monitorloop(self):
+        """Monitor every group of submitted jobs until the session closes."""
+        failures = {}
+
+        while not self._stop.wait(1.0):
+
+            now = time.time()
+
+            with self._lock:
+
+                groups = list(self._groups)
+
+            # All groups polling on this pass share their status queries.
+            with shellwrappers.statusround():
+
+                for group in groups:
+
+                    jobs, state, handles = group
+
+                    try:
+
+                        with self._steplock:
+
+                            allcomplete, _ = scheduling.monitorstep(
+                                jobs, state, now)
+
+                        _resolve(jobs, handles)
+
+                        if allcomplete is True:
+
+                            scheduling.monitorfinish(jobs)
+                            staging.cleanup(jobs)
+
+                        failures.pop(id(group), None)
+
+                    # A failure might only be a passing one, so the jobs are
+                    # tried again on the next pass, unless they keep failing.
+                    except Exception as err:
+
+                        failures[id(group)] = failures.get(id(group), 0) + 1
+
+                        if failures[id(group)] < MONITORRETRIES:
+
+                            LOG.error("Monitoring of jobs failed, trying "
+                                      "again on the next pass: %s", err)
+
+                            continue
+
+                        LOG.error("Monitoring of jobs stopped: %s", err)
+                        failures.pop(id(group))
+                        scheduling.monitorstop(jobs)
+
+                        for job in handles:
+
+                            if not job.future.done():
+
+                                job.future.set_exception(err)
+
+                        allcomplete = True
+
+                    if allcomplete is True:
+
+                        with self._lock:
+
+                            self._groups.remove(group)
+
+
+class Job(object):
+
+    """A handle on a single submitted job.
+
+    The future of the job completes with the final status of the job
+    ("Complete") once it has finished and its files have been downloaded, or
+    with a JobsubmitError if it could not be submitted.
+    """
+
+    def __init__(self, session, jobs, name):
+
+        self.name = name
+        self.future = Future()
+        self._session = session
+        self._job = jobs[name]
+
+    def __repr__(self):
+
+        return "<Job '{0}' id '{1}' {2}>".format(
+            self.name, self.jobid, self.status())
+
+    def __await__(self):
+
+        # asyncio is only needed by callers that await jobs, so is not
+        # imported at start up.
+        import asyncio
+
+        return asyncio.wrap_future(self.future).__await__()
+
+    @property
+    def jobid(self):
+        """The id given to the job by the scheduler."""
+        return self._job.get("jobid", "")
+
+    def status(self):
+        """Return the last known status of the job."""
+        return self._job.get("laststatus", "")
+
+    def done(self):
+        """Return True once the job is complete or has failed."""
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """Wait for the job to complete and return its final status.
+
+        Optional arguments are:
+
+        timeout (float) - The most seconds to wait, a TimeoutError is raised
+                          if the job has not completed by then.
+
+        """
+        return self.future.result(timeout)
+
+    def download(self):
+        """Download the current output of the job.
+
+        The output is downloaded when the job completes anyway, this gets a
+        snapshot of it while the job is still running.
+
+        """
+        with self._session._steplock:
+
+            staging.stage_downstream(self._job)
+
+
+def _resolve(jobs, handles):
+    """Complete the futures of jobs that have reached a final state."""
+    for job in handles:
+
+        if job.future.done():
+
+            continue
+
+        status = jobs[job.name].get("laststatus", "")
+
+        if status == "Complete":
+
+            job.future.set_result(status)
+
+        elif status == "Submit Error":
+
+            job.future.set_exception(exceptions.JobsubmitError(
+                "Job '{0}' could not be submitted.".format(job.name)))
@@ -44,15 +44,28 @@ testconnections(jobs)
     badly configured hosts, networking problems, or even system maintenance/
     downtime on the HPC host.
 
-sendtoshell(cmd)
+sendtoshell(cmd, timeout)
     This method is responsible for handing off commands to the Unix shell, it
     makes use of the subprocess library from the Python standard library.
 
-sendtossh(job, args)
+sendtoshellstream(cmd, callback, timeout)
+    This method is the same as sendtoshell() except that standard output is
+    handed to a callback one line at a time instead of being returned.
+
+sendtossh(job, args, cmdclass)
     This method constructs a string containing commands to be executed via SSH.
     This string is then handed off to the sendtoshell() method for execution.
 
-sendtorsync(job, src, dst, includemask, excludemask)
+sendtosshstream(job, args, callback, cmdclass)
+    This method is the same as sendtossh() except that standard output is
+    handed to a callback one line at a time by sendtoshellstream().
+
+statusround()
+    This method returns a context manager, while it is open the output of
+    sendtosshstream() is shared between identical status queries so that
+    each one is only sent to the remote host once.
+
+sendtorsync(job, src, dst, includemask, excludemask, extraflags)
     This method constructs a string that forms an rsync command, this string is
     then handed off to the sendtoshell() method for execution.
 
@@ -77,29 +90,92 @@ remotedelete(job)
     This method is for deleting a file/directory from a path on a remote host,
     this is done via passing a delete command to the sendtossh() method.
 
+remotecleanup(job, paths, background)
+    This method is for deleting many job directories from a remote host with
+    a single command, checking each path is a real directory first.
+
 remotelist(job)
     This method is for listing the contents of a directory on a remote host,
     this is done via passing a list command to the sendtoshell() method.
 
+remotestat(job, path, checksum)
+    This method is for listing a whole directory tree on a remote host along
+    with the type, size, modification time and optionally the checksum of
+    each entry, all from a single command sent via the sendtossh() method.
+
 upload(job)
     This method is for uploading files to a remote host, this method is
     responsible for specifying the direction that the transfer takes place.
 
-download(job)
+download(job, extraflags)
     This method is for downloading files from a remote host, this method is
     responsible for specifying the direction that the transfer takes place.
 """
 
+import contextlib
 import os
+import random
+import re
 import shutil
+import signal
 import subprocess
 import logging
+import threading
 import time
 
+import longbow.configuration as configuration
 import longbow.exceptions as exceptions
+import longbow.metrics as metrics
 
 LOG = logging.getLogger("longbow.shellwrappers")
 
+# SSH reserves exit code 255 for its own errors, anything else came from the
+# remote command so there is no point retrying it.
+SSHTRANSIENT = [255]
+
+# rsync exit codes that indicate network or remote problems that are worth
+# retrying: socket I/O (10), protocol stream (12), partial transfer (23),
+# timeout (30), daemon timeout (35) and ssh failing underneath rsync (255).
+RSYNCTRANSIENT = [10, 12, 23, 30, 35, 255]
+
+# Per host circuit breaker state, shared by every job using the host.
+CIRCUITS = {}
+CIRCUITLOCK = threading.Lock()
+
+# Exit code of a command that was killed for taking too long.
+TIMEOUTCODE = -signal.SIGKILL
+
+# The progress line rsync prints when it has finished transferring a file,
+# along with the size of the file.
+TRANSFERRED = re.compile(r"([\d,]+)\s+100%\s+\S+\s+\S+\s+\(xfr#")
+
+# The escapes used in file names by the checksum tools, see _parsechecksums.
+CHECKSUMESCAPES = {"\\": "\\", "n": "\n", "r": "\r"}
+
+# Output of the status queries sent during the current polling round in each
+# thread, see statusround().
+STATUSROUND = threading.local()
+
+# Remote script for remotecleanup(), the paths are given as its arguments.
+# Each one must be a real directory (not a symlink to somewhere else) to be
+# deleted, the outcome for each path is reported on its own line.
+CLEANUPSCRIPT = (
+    'n=$#; '
+    'while [ $n -gt 0 ]; do '
+    'd=$1; shift; n=$((n-1)); '
+    'if [ -d "$d" ] && [ ! -L "$d" ]; then '
+    'set -- "$@" "$d"; echo "deleted $d"; '
+    'else echo "missing $d"; fi; '
+    'done; '
+    '[ $# -eq 0 ] || {0}')
+
+# How remotecleanup() deletes the checked paths, in the foreground or handed
+# off to a detached process so that the command returns straight away.
+CLEANUPDELETE = {
+    False: 'rm -r -- "$@"',
+    True: 'nohup rm -r -- "$@" </dev/null >/dev/null 2>&1 &'
+}
+
 
 def checkconnections(jobs):
     """Test that connections to HPC machines can be established.
@@ -140,7 +216,7 @@ def checkconnections(jobs):
             LOG.debug("Testing connection to '%s'", jobs[item]["resource"])
 
             # Test that the connection works.
-            sendtossh(jobs[item], ["ls"])
+            sendtossh(jobs[item], ["ls"], cmdclass="probe")
 
             LOG.info("Test connection to '%s' - passed",
                      jobs[item]["resource"])
@@ -148,7 +224,7 @@ def checkconnections(jobs):
             # Test that basic enviroment looks ok.
             try:
 
-                sendtossh(jobs[item], ["module avail"])
+                sendtossh(jobs[item], ["module avail"], cmdclass="probe")
 
             except exceptions.SSHError as err:
 
@@ -167,7 +243,7 @@ def checkconnections(jobs):
                             jobs[job]["env-fix"] = "true"
 
 
-def sendtoshell(cmd):
+def sendtoshell(cmd, timeout=None):
     """Send assembled commands to the Unix shell.
 
     This method is responsible for handing off commands to the Unix shell, it
@@ -177,6 +253,12 @@ def sendtoshell(cmd):
 
     cmd (string) - A fully qualified Unix command.
 
+    Optional arguments are:
+
+    timeout (float) - The number of seconds to wait for the command before
+                      killing it along with anything it started. A command
+                      that is killed exits with TIMEOUTCODE.
+
     Return parameters are:
 
     stdout (string) - Contains the output from the standard output of the Unix
@@ -191,12 +273,33 @@ def sendtoshell(cmd):
     """
     LOG.debug("Sending the following to subprocess '%s'", cmd)
 
+    # Run in a new process group so that a hung command can be killed along
+    # with anything it has started (ssh control processes, pipelines etc).
     handle = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE)
+        stderr=subprocess.PIPE,
+        start_new_session=True)
+
+    try:
+
+        stdout, stderr = handle.communicate(timeout=timeout)
 
-    stdout, stderr = handle.communicate()
+    except subprocess.TimeoutExpired:
+
+        LOG.debug("Command '%s' did not finish within %s seconds - killing "
+                  "it.", cmd, timeout)
+
+        _killgroup(handle)
+
+        stdout, stderr = handle.communicate()
+
+    # Don't leave anything running behind if we are interrupted.
+    except BaseException:
+
+        _killgroup(handle)
+
+        raise
 
     # Format stdout to utf-8 for python 3, python 2 should be untouched.
     if not isinstance(stdout, str):
@@ -214,7 +317,120 @@ def sendtoshell(cmd):
     return stdout, stderr, errorstate
 
 
-def sendtossh(job, args):
+def sendtoshellstream(cmd, callback, timeout=None):
+    """Send assembled commands to the Unix shell, streaming the output.
+
+    This method is the same as sendtoshell() except that standard output is
+    never held in memory, each line is decoded and handed to the callback as
+    soon as it arrives. This keeps memory flat for commands with very large
+    outputs, such as scheduler listings for users with thousands of jobs. If
+    the callback returns True then the command is killed straight away and
+    treated as having succeeded, so parsers can stop once they have found
+    what they are looking for.
+
+    Required arguments are:
+
+    cmd (string) - A fully qualified Unix command.
+
+    callback (function) - Called with each line of standard output, without
+                          the trailing newline.
+
+    Optional arguments are:
+
+    timeout (float) - The number of seconds to wait for the command before
+                      killing it along with anything it started. A command
+                      that is killed exits with TIMEOUTCODE.
+
+    Return parameters are:
+
+    stdout (string) - Always empty, the output went to the callback.
+
+    stderr (string) - Contains the output from the standard error of the Unix
+                      shell.
+
+    errorstate (string) - Contains the exit code that the Unix shell exits
+                          with.
+
+    """
+    LOG.debug("Streaming the following from subprocess '%s'", cmd)
+
+    handle = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True)
+
+    stderr = []
+    stopped = False
+    timedout = threading.Event()
+
+    def expire():
+        """Kill the command once the timeout is up."""
+        timedout.set()
+        _killgroup(handle)
+
+    # Standard error is read on the side so a chatty command can't block.
+    reader = threading.Thread(target=lambda: stderr.append(
+        handle.stderr.read()))
+    reader.daemon = True
+    reader.start()
+
+    timer = None
+
+    if timeout is not None:
+
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+
+    try:
+
+        for line in iter(handle.stdout.readline, b""):
+
+            if callback(line.decode("utf-8").rstrip("\n")) is True:
+
+                stopped = True
+                _killgroup(handle)
+                break
+
+    # Don't leave anything running behind if we are interrupted.
+    except BaseException:
+
+        _killgroup(handle)
+
+        raise
+
+    finally:
+
+        if timer is not None:
+
+            timer.cancel()
+
+    handle.stdout.close()
+    handle.wait()
+    reader.join()
+
+    stderr = b"".join(stderr).decode("utf-8")
+
+    if stopped:
+
+        errorstate = 0
+
+    elif timedout.is_set():
+
+        LOG.debug("Command '%s' did not finish within %s seconds - killed "
+                  "it.", cmd, timeout)
+
+        errorstate = TIMEOUTCODE
+
+    else:
+
+        errorstate = handle.returncode
+
+    return "", stderr, errorstate
+
+
+def sendtossh(job, args, cmdclass="status"):
     """Construct SSH commands and hand them off to the shell.
 
     This method constructs a string containing commands to be executed via SSH.
@@ -228,6 +444,13 @@ def sendtossh(job, args):
     args (list) - A list containing commands to be sent to SSH, multiple
                   commands should each be an entry in the list.
 
+    Optional arguments are:
+
+    cmdclass (string) - The class of command being sent, one of "probe",
+                        "submit", "status" or "transfer". This selects the
+                        timeout used for the command (see the timeout-*
+                        parameters).
+
     Return parameters are:
 
     shellout (tuple of strings) - Contains the three strings returned from the
@@ -235,62 +458,151 @@ def sendtossh(job, args):
                                   output, standard error and the exit code.
 
     """
-    # basic ssh command.
-    cmd = ["ssh", "-p " + job["port"], job["user"] + "@" + job["host"]]
+    cmd = _sshcommand(job, args)
 
-    # Source the /etc/profile on machines where problems have been detected
-    # with the environment.
-    if job["env-fix"] == "true":
+    return _sendwithretries(
+        job, cmd, cmdclass, SSHTRANSIENT, exceptions.SSHError,
+        "SSH failed, make sure a normal terminal can connect to SSH to be "
+        "sure there are no connection issues.")
 
-        cmd.append("source /etc/profile;")
 
-    # add the commands to be sent to ssh.
-    cmd.extend(args)
+def sendtosshstream(job, args, callback, cmdclass="status"):
+    """Construct SSH commands and stream their output to a callback.
 
-    i = 0
+    This method is the same as sendtossh() except that the standard output of
+    the remote command is handed to the callback one line at a time (see
+    sendtoshellstream()). Commands that fail with connection problems are
+    retried from the start, so the callback may see the same lines again.
 
-    # This loop is essentially so we can do 3 retries on commands that fail,
-    # this is to catch when things go wrong over SSH like dropped connections,
-    # issues with latency etc.
-    while i != 3:
+    Required arguments are:
 
-        # Send to ssh.
-        shellout = sendtoshell(cmd)
+    job (dictionary) - A single job dictionary, this is often simply passed in
+                       as a subset of the main jobs dictionary.
 
-        errorstate = shellout[2]
+    args (list) - A list containing commands to be sent to SSH, multiple
+                  commands should each be an entry in the list.
 
-        # If no error exit loop, if errorcode is not 0 raise exception unless
-        # code is 255
-        if errorstate == 0:
+    callback (function) - Called with each line of standard output, return
+                          True to stop the command early.
 
-            break
+    Optional arguments are:
 
-        elif errorstate == 255:
+    cmdclass (string) - The class of command being sent, see sendtossh().
 
-            i = i + 1
+    Return parameters are:
 
-        else:
+    shellout (tuple of strings) - Contains the three strings returned from the
+                                  sendtoshellstream() method. These are an
+                                  empty standard output, standard error and
+                                  the exit code.
 
-            raise exceptions.SSHError(
-                "SSH failed, make sure a normal terminal can connect to SSH "
-                "to be sure there are no connection issues.", shellout)
+    """
+    cmd = _sshcommand(job, args)
+    shared = getattr(STATUSROUND, "queries", None)
+
+    if shared is None:
+
+        return _sendwithretries(
+            job, cmd, cmdclass, SSHTRANSIENT, exceptions.SSHError,
+            "SSH failed, make sure a normal terminal can connect to SSH to be "
+            "sure there are no connection issues.", callback)
+
+    # The first query of its kind in a round is streamed to its callback as
+    # usual, and the lines that went past are kept so that later ones can be
+    # answered from them. Failures are shared too so that a host that is down
+    # is only tried once.
+    key = tuple(cmd)
+
+    if key not in shared:
+
+        lines = []
+        stopped = []
+
+        def record(line):
+            """Keep a line of output and pass it on."""
+            lines.append(line)
+
+            if callback(line) is True:
 
-        # If number of retries hits 3 then give up.
-        if i == 3:
+                stopped.append(True)
 
-            raise exceptions.SSHError(
+                return True
+
+            return False
+
+        try:
+
+            shellout = _sendwithretries(
+                job, cmd, cmdclass, SSHTRANSIENT, exceptions.SSHError,
                 "SSH failed, make sure a normal terminal can connect to SSH "
-                "to be sure there are no connection issues.", shellout)
+                "to be sure there are no connection issues.", record)
+
+        except exceptions.SSHError as err:
+
+            shared[key] = err, None, True
+
+            raise
+
+        shared[key] = shellout, lines, not stopped
+
+        return shellout
+
+    shellout, lines, complete = shared[key]
+
+    if lines is None:
 
-        LOG.debug("Retry SSH after 10 second wait.")
+        raise shellout
 
-        # Wait 10 seconds to see if problem goes away before trying again.
-        time.sleep(10)
+    for line in lines:
+
+        if callback(line) is True:
+
+            return shellout
+
+    # The first query stopped before the end of the output, so the rest has to
+    # come from a query of our own (which then takes its place).
+    if complete is False:
+
+        del shared[key]
+
+        return sendtosshstream(job, args, callback, cmdclass)
 
     return shellout
 
 
-def sendtorsync(job, src, dst, includemask, excludemask):
+@contextlib.contextmanager
+def statusround():
+    """Share the output of identical status queries.
+
+    While the returned context manager is open, status queries sent through
+    sendtosshstream() by the same thread to the same host and user are only
+    run once, the callbacks of any later queries are given the output of the
+    first. This is used to ask a scheduler about many jobs with one query per
+    poll. The first query still streams its output, stopping early if its
+    callback asks to, and later queries that need more than it saw send their
+    own, so their callbacks can see the start of the output twice. Rounds can
+    be nested, the outermost round decides when the shared output is thrown
+    away.
+
+    """
+    if getattr(STATUSROUND, "queries", None) is not None:
+
+        yield
+
+        return
+
+    STATUSROUND.queries = {}
+
+    try:
+
+        yield
+
+    finally:
+
+        STATUSROUND.queries = None
+
+
+def sendtorsync(job, src, dst, includemask, excludemask, extraflags=None):
     """Construct Rsync commands and hand them off to the shell.
 
     This method constructs a string that forms an rsync command, this string is
@@ -318,6 +630,11 @@ def sendtorsync(job, src, dst, includemask, excludemask):
                            should be excluded from rsync transfer, this is
                            useful for not transfering large unwanted files.
 
+    Optional arguments are:
+
+    extraflags (list) - A list of additional rsync flags, these are placed
+                        directly after the standard flags.
+
     """
     # Initialise variables.
     include = []
@@ -364,39 +681,23 @@ def sendtorsync(job, src, dst, includemask, excludemask):
         # Just normal rsync
         cmd = ["rsync", "-azP", "-e", "ssh -p " + port, src, dst]
 
-    i = 0
+    # Any extra flags go straight after the standard ones.
+    if extraflags:
 
-    # This loop is essentially so we can do 3 retries on commands that fail,
-    # this is to catch when things go wrong over SSH like dropped connections,
-    # issues with latency etc.
-    while i != 3:
+        cmd[2:2] = extraflags
 
-        # Send to SSH.
-        shellout = sendtoshell(cmd)
+    # Let rsync itself spot transfers that have stopped making progress, it
+    # exits with code 30 which will be retried.
+    stall = _timeout(job, "stall")
 
-        errorstate = shellout[2]
+    if stall is not None:
 
-        # If no error exit loop, if errorcode is not 0 raise exception unless
-        # code is 255
-        if errorstate == 0:
+        cmd.insert(2, "--timeout=" + str(int(stall)))
 
-            break
-
-        else:
-
-            i = i + 1
-
-        # If number of retries hits 3 then give up.
-        if i == 3:
-
-            raise exceptions.RsyncError(
-                "rsync failed, make sure a normal terminal can connect to "
-                "rsync to be sure there are no connection issues.", shellout)
-
-        LOG.debug("Retry rsync after 10 second wait.")
-
-        # Wait 10 seconds to see if problem goes away before trying again.
-        time.sleep(10)
+    _sendwithretries(
+        job, cmd, "transfer", RSYNCTRANSIENT, exceptions.RsyncError,
+        "rsync failed, make sure a normal terminal can connect to rsync to be "
+        "sure there are no connection issues.")
 
 
 def localcopy(src, dst):
@@ -608,7 +909,7 @@ def remotecopy(job, src, dst):
     # Send to subprocess.
     try:
 
-        sendtossh(job, ["cp -r", src, dst])
+        sendtossh(job, ["cp -r", src, dst], cmdclass="transfer")
 
     except exceptions.SSHError:
 
@@ -639,7 +940,7 @@ def remotedelete(job):
     # Send to subprocess.
     try:
 
-        sendtossh(job, ["rm -r", job["destdir"]])
+        sendtossh(job, ["rm -r", job["destdir"]], cmdclass="transfer")
 
     except exceptions.SSHError:
 
@@ -648,6 +949,64 @@ def remotedelete(job):
             job["destdir"])
 
 
+def remotecleanup(job, paths, background=False):
+    """Delete many directories on a remote HPC machine with one command.
+
+    This method is for deleting several job directories on the same remote
+    host at once. A single script is sent via the sendtossh() method, which
+    checks each path is a directory that is not a symlink before deleting it,
+    so paths that do not exist are simply reported as missing.
+
+    Required arguments are:
+
+    job (dictionary) - A single job dictionary, this provides the connection
+                       details for the host.
+
+    paths (list) - The directories to delete.
+
+    Optional arguments are:
+
+    background (boolean) - Hand the deletion off to a detached process on the
+                           remote host, so this returns without waiting for it
+                           to finish.
+
+    Returned parameters are:
+
+    status (dictionary) - Each path mapped to "deleted" or "missing".
+
+    """
+    LOG.debug("Deleting %d directories on '%s'", len(paths), job["host"])
+
+    # Are paths absolute.
+    for path in paths:
+
+        if os.path.isabs(path) is False and path[0] != "~":
+
+            raise exceptions.AbsolutepathError(
+                "The source path is not absolute ", path)
+
+    script = CLEANUPSCRIPT.format(CLEANUPDELETE[background])
+
+    # Send to subprocess.
+    try:
+
+        shellout = sendtossh(
+            job, ["sh -c", _remotequote(script), "sh"] +
+            [_remotequote(path) for path in paths], cmdclass="transfer")
+
+    except exceptions.SSHError:
+
+        raise exceptions.RemotedeleteError(
+            "Could not delete the directories on remote host", paths)
+
+    # The script reports on the paths in the order they were given, and paths
+    # under ~ come back expanded, so match them up by position.
+    outcomes = [line.split(" ", 1)[0] for line in shellout[0].splitlines()
+                if line.split(" ", 1)[0] in ("deleted", "missing")]
+
+    return dict(zip(paths, outcomes))
+
+
 def remotelist(job):
     """List the contents of a directory on a remote HPC machine.
 
@@ -688,6 +1047,94 @@ def remotelist(job):
     return filelist
 
 
+def remotestat(job, path=None, checksum=None):
+    """List a directory tree on a remote HPC machine with file metadata.
+
+    This method is for getting a structured listing of everything below a
+    directory on a remote host. The listing comes from a single find command
+    (GNU find is needed for -printf) sent via the sendtossh() method, with
+    the entries separated by null characters so that any file name can be
+    handled. If a checksum tool is given, it is run in parallel over batches
+    of the files as part of the same command.
+
+    Required arguments are:
+
+    job (dictionary) - A single job dictionary, this is often simply passed in
+                       as a subset of the main jobs dictionary.
+
+    Optional arguments are:
+
+    path (string) - The directory to list, defaults to the job directory.
+
+    checksum (string) - A checksum tool such as sha256sum, that prints the
+                        checksum followed by the file name.
+
+    Returned parameters are:
+
+    listing (dictionary) - Paths relative to the directory, each mapped to a
+                           dictionary of "type" (the find %y letter, so "f"
+                           for files, "d" for directories and "l" for
+                           symlinks), "size" in bytes, "mtime" in seconds
+                           since the epoch and, for files when a checksum
+                           tool was given, "checksum".
+
+    """
+    if path is None:
+
+        path = job["destdir"]
+
+    LOG.debug("Listing the tree under '%s'", path)
+
+    # Are paths absolute.
+    if os.path.isabs(path) is False and path[0] != "~":
+
+        raise exceptions.AbsolutepathError(
+            "The source path is not absolute ", path)
+
+    # An empty entry separates the listing from the checksum tool output.
+    # Small batches keep the output of each parallel checksum process within
+    # a single pipe write, so lines from different processes cannot mix.
+    cmd = ("cd " + _remotequote(path) + " && find . -mindepth 1 -printf "
+           "'%y %s %T@ %P\\0'")
+
+    if checksum is not None:
+
+        cmd += (" && printf '\\0' && find . -type f -print0 | "
+                "xargs -0 -r -P 4 -n 8 " + checksum)
+
+    try:
+
+        shellout = sendtossh(job, [cmd], cmdclass="transfer")
+
+    except exceptions.SSHError:
+
+        raise exceptions.RemotelistError(
+            "Could not list the directory ", path)
+
+    listing = {}
+    entries, _, sums = shellout[0].partition("\0\0")
+
+    for entry in entries.split("\0"):
+
+        words = entry.split(" ", 3)
+
+        if len(words) == 4:
+
+            listing[words[3]] = {
+                "type": words[0],
+                "size": int(words[1]),
+                "mtime": float(words[2])
+            }
+
+    for name, value in _parsechecksums(sums).items():
+
+        if name in listing:
+
+            listing[name]["checksum"] = value
+
+    return listing
+
+
 def upload(job):
     """Upload a file/s to a remote machine.
 
@@ -732,7 +1179,7 @@ def upload(job):
         raise
 
 
-def download(job):
+def download(job, extraflags=None):
     """Download file/s from a remote machine.
 
     This method is for downloading files from a remote host, this method is
@@ -746,6 +1193,11 @@ def download(job):
     job (dictionary) - A single job dictionary, this is often simply passed in
                        as a subset of the main jobs dictionary.
 
+    Optional arguments are:
+
+    extraflags (list) - A list of additional rsync flags, for example to
+                        resume partial files during a verified download.
+
     """
     # Are paths absolute.
     if os.path.isabs(job["destdir"]) is False and job["destdir"][0] != "~":
@@ -772,8 +1224,321 @@ def download(job):
     try:
 
         sendtorsync(job, src, job["localworkdir"], job["download-include"],
-                    job["download-exclude"])
+                    job["download-exclude"], extraflags)
 
     except exceptions.RsyncError:
 
         raise
+
+
+def _sshcommand(job, args):
+    """Build the ssh command for a list of remote commands."""
+    # basic ssh command.
+    cmd = ["ssh", "-p " + job["port"], job["user"] + "@" + job["host"]]
+
+    # Source the /etc/profile on machines where problems have been detected
+    # with the environment.
+    if job["env-fix"] == "true":
+
+        cmd.append("source /etc/profile;")
+
+    # add the commands to be sent to ssh.
+    cmd.extend(args)
+
+    return cmd
+
+
+def _parsechecksums(output):
+    """Parse the output of a checksum tool into a path to checksum map."""
+    checksums = {}
+
+    for line in output.splitlines():
+
+        # Tools escape awkward file names with a leading backslash.
+        escaped = line.startswith("\\")
+
+        if escaped:
+
+            line = line[1:]
+
+        checksum, _, path = line.partition(" ")
+
+        # Strip the binary/text mode marker.
+        path = path[1:] if path[:1] in (" ", "*") else path
+
+        if escaped:
+
+            # In one pass, so that an escaped backslash followed by an n
+            # stays as it is.
+            path = re.sub(r"\\(.)", lambda match: CHECKSUMESCAPES.get(
+                match.group(1), match.group(0)), path, flags=re.DOTALL)
+
+        if path.startswith("./"):
+
+            path = path[2:]
+
+        if checksum != "" and path != "":
+
+            checksums[path] = checksum
+
+    return checksums
+
+
+def _remotequote(path):
+    """Quote a path for the remote shell, leaving a leading ~/ to expand."""
+    if path.startswith("~/"):
+
+        return '"$HOME"/' + _remotequote(path[2:])
+
+    return "'" + path.replace("'", "'\\''") + "'"
+
+
+def _sendwithretries(job, cmd, cmdclass, transient, error, message,
+                     callback=None):
+    """Send a command to the shell, retrying on transient failures.
+
+    Commands that exit with one of the transient codes are retried with an
+    exponential backoff and full jitter, so that many jobs hitting the same
+    hiccup on a host do not all retry in lockstep. Commands that keep failing
+    count towards a per host circuit breaker, once that opens further commands
+    for the host fail straight away until the cool down period has passed.
+
+    Commands that hang are killed once the timeout for their class is up and
+    treated as transient, apart from submits, which might have gone through
+    and so are never repeated.
+
+    If a callback is given, the output is streamed to it by
+    sendtoshellstream() rather than returned.
+
+    Each command is timed as a "remote" span, along with the number of
+    retries, the bytes of output and for rsync the bytes transferred.
+
+    """
+    policy = _retrypolicy(job)
+    timeout = _timeout(job, cmdclass)
+    host = job["host"]
+    attempt = 0
+
+    _circuitcheck(host, policy, error, message)
+
+    with metrics.span("remote", host=host, cmdclass=cmdclass) as details:
+
+        details["bytes"] = 0
+        details["retries"] = 0
+
+        if callback is not None:
+
+            streamed = callback
+
+            # Count the output as it goes past.
+            def callback(line):
+                """Count a line of output and pass it on."""
+                details["bytes"] += len(line) + 1
+
+                return streamed(line)
+
+        while True:
+
+            if callback is None:
+
+                shellout = sendtoshell(cmd, timeout)
+
+                details["bytes"] += len(shellout[0]) + len(shellout[1])
+
+            else:
+
+                shellout = sendtoshellstream(cmd, callback, timeout)
+
+            errorstate = shellout[2]
+
+            if errorstate == TIMEOUTCODE and timeout is not None:
+
+                metrics.count("timeout", host=host, cmdclass=cmdclass)
+
+                LOG.warning("A %s command to '%s' timed out after %s "
+                            "seconds.", cmdclass, host, int(timeout))
+
+                if cmdclass == "submit":
+
+                    _circuitrecord(host, policy, False)
+
+                    raise error(message, shellout)
+
+            elif errorstate == 30 and transient is RSYNCTRANSIENT:
+
+                metrics.count("timeout", host=host, cmdclass="stall")
+
+                LOG.warning("A transfer to or from '%s' stalled.", host)
+
+            else:
+
+                # Anything that isn't a connection issue means the host is
+                # fine.
+                if errorstate == 0 or errorstate not in transient:
+
+                    _circuitrecord(host, policy, True)
+
+                    if errorstate == 0:
+
+                        if transient is RSYNCTRANSIENT:
+
+                            details["transferred"] = _transferred(
+                                shellout[0])
+
+                        return shellout
+
+                    raise error(message, shellout)
+
+            attempt = attempt + 1
+            details["retries"] = attempt
+
+            # If number of retries hits the limit then give up.
+            if attempt >= policy["retry-attempts"]:
+
+                _circuitrecord(host, policy, False)
+
+                raise error(message, shellout)
+
+            delay = _retrydelay(policy, attempt)
+
+            LOG.debug("Retry after %.1f second wait, exit code was %s.",
+                      delay, errorstate)
+
+            # Wait to see if the problem goes away before trying again.
+            time.sleep(delay)
+
+
+def _retrypolicy(job):
+    """Get the retry settings for a job, with defaults from the template."""
+    policy = {}
+
+    for key in ["retry-attempts", "retry-backoff", "retry-backoff-max",
+                "circuit-threshold", "circuit-cooldown"]:
+
+        try:
+
+            policy[key] = float(job[key])
+
+        except KeyError:
+
+            policy[key] = float(configuration.JOBTEMPLATE[key])
+
+        except ValueError:
+
+            raise exceptions.ConfigurationError(
+                "The parameter '{0}' must be a number, '{1}' was given."
+                .format(key, job[key]))
+
+    return policy
+
+
+def _retrydelay(policy, attempt):
+    """Exponential backoff with full jitter for the given retry attempt."""
+    ceiling = min(policy["retry-backoff-max"],
+                  policy["retry-backoff"] * 2 ** (attempt - 1))
+
+    return random.uniform(0, ceiling)
+
+
+def _circuitcheck(host, policy, error, message):
+    """Fail fast if the circuit breaker for a host is open."""
+    with CIRCUITLOCK:
+
+        try:
+
+            circuit = CIRCUITS[host]
+
+        except KeyError:
+
+            return
+
+        if circuit["opened"] == 0:
+
+            return
+
+        remaining = circuit["opened"] + policy["circuit-cooldown"] - \
+            time.time()
+
+    if remaining > 0:
+
+        raise error(
+            "{0} Host '{1}' has failed repeatedly, not trying again for "
+            "another {2} seconds.".format(message, host, int(remaining)),
+            ("", "", 255))
+
+    LOG.info("Trying host '%s' again after the cool down period.", host)
+
+
+def _circuitrecord(host, policy, success):
+    """Record the outcome of a command against the circuit for a host."""
+    with CIRCUITLOCK:
+
+        if host not in CIRCUITS:
+
+            CIRCUITS[host] = {"failures": 0, "opened": 0}
+
+        circuit = CIRCUITS[host]
+
+        if success is True:
+
+            circuit["failures"] = 0
+            circuit["opened"] = 0
+
+            return
+
+        circuit["failures"] = circuit["failures"] + 1
+
+        if (policy["circuit-threshold"] > 0 and
+                circuit["failures"] >= policy["circuit-threshold"]):
+
+            if circuit["opened"] == 0:
+
+                LOG.warning("Host '%s' has failed %s times in a row, commands "
+                            "for it will be suspended for %s seconds.", host,
+                            circuit["failures"],
+                            int(policy["circuit-cooldown"]))
+
+            circuit["opened"] = time.time()
+
+
+def _timeout(job, cmdclass):
+    """Get the timeout in seconds for a class of command, None for no limit."""
+    key = "timeout-" + cmdclass
+
+    try:
+
+        timeout = float(job[key])
+
+    except KeyError:
+
+        timeout = float(configuration.JOBTEMPLATE[key])
+
+    except ValueError:
+
+        raise exceptions.ConfigurationError(
+            "The parameter '{0}' must be a number, '{1}' was given."
+            .format(key, job[key]))
+
+    if timeout <= 0:
+
+        return None
+
+    return timeout
+
+
+def _transferred(output):
+    """Total the sizes of the files rsync reports as transferred."""
+    return sum(int(size.replace(",", ""))
+               for size in TRANSFERRED.findall(output))
+
+
+def _killgroup(handle):
+    """Kill a process started by sendtoshell and everything it started."""
+    try:
+
+        os.killpg(handle.pid, signal.SIGKILL)
+
+    except OSError:
+
+        # Already gone.
+        pass
@@ -44,6 +44,10 @@ stage_upstream(jobs)
     rsync is configured to transfer blockwise and only transfer the
     newest/changed blocks, this saves a lot of time during persistant staging.
 
+stage_upstreamjob(item, job)
+    A method for staging the files of a single job to the target HPC host, in
+    the same way as stage_upstream.
+
 stage_downstream(job)
     A method for staging files for each job to from target HPC host. The
     underlying utility behind this transfer is rsync, thus it is possible
@@ -54,17 +58,32 @@ stage_downstream(job)
 cleanup(jobs)
     A method for cleaning up the working directory on the HPC host, this method
     will only delete job directories that are valid for the given Longbow
-    instance, thus avoid data loss.
+    instance, thus avoid data loss. Where verified downloads have been
+    requested, directories are only deleted once verification has passed.
+    The directories on each resource are deleted with a single command.
 """
 
+import fnmatch
+import hashlib
 import logging
 import os
+import posixpath
+import re
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
 
 import longbow.exceptions as exceptions
 import longbow.shellwrappers as shellwrappers
 
 LOG = logging.getLogger("longbow.staging")
 
+# Number of job directories dealt with at once.
+WORKERS = 8
+
+# Number of times the checksum manifest is compared before giving up.
+VERIFYATTEMPTS = 3
+
 
 def stage_upstream(jobs):
     """Transfer files for all jobs, to a remote HPC machine.
@@ -86,41 +105,59 @@ def stage_upstream(jobs):
 
     for item in [a for a in jobs if "lbowconf" not in a]:
 
-        job = jobs[item]
-        destdir = job["destdir"]
+        stage_upstreamjob(item, jobs[item])
 
-        LOG.info("Transfering files for job '%s' to host '%s'",
-                 item, job["resource"])
+    LOG.info("Staging files upstream - complete.")
 
-        try:
 
-            shellwrappers.sendtossh(job, ["mkdir -p " + destdir + "\n"])
+def stage_upstreamjob(item, job):
+    """Transfer the files for a single job, to a remote HPC machine.
 
-            LOG.info("Creation of directory '%s' - successful.", destdir)
+    This is the same as stage_upstream but for one job, the remote job
+    directory is created and then the files are uploaded. This allows jobs
+    to be staged one at a time, for example in pipeline mode where each job
+    is submitted as soon as it has been staged.
 
-        except exceptions.SSHError:
+    Required arguments are:
 
-            LOG.error(
-                "Creation of directory '%s' - failed. Make sure that you "
-                "have write permissions at the top level of the path given.",
-                destdir)
+    item (string) - The name of the job.
 
-            raise
+    job (dictionary) - A single job dictionary, this is often simply passed in
+                       as a subset of the main jobs dictionary.
 
-        # Transfer files upstream.
-        try:
+    """
+    destdir = job["destdir"]
 
-            shellwrappers.upload(job)
+    LOG.info("Transfering files for job '%s' to host '%s'",
+             item, job["resource"])
 
-        except exceptions.RsyncError:
+    try:
 
-            raise exceptions.StagingError(
-                "Could not stage '{0}' upstream, make sure that you have "
-                "supplied the correct remote working directory and that you "
-                "have chosen a path that you can write to."
-                .format(job["localworkdir"]))
+        shellwrappers.sendtossh(job, ["mkdir -p " + destdir + "\n"])
 
-    LOG.info("Staging files upstream - complete.")
+        LOG.info("Creation of directory '%s' - successful.", destdir)
+
+    except exceptions.SSHError:
+
+        LOG.error(
+            "Creation of directory '%s' - failed. Make sure that you "
+            "have write permissions at the top level of the path given.",
+            destdir)
+
+        raise
+
+    # Transfer files upstream.
+    try:
+
+        shellwrappers.upload(job)
+
+    except exceptions.RsyncError:
+
+        raise exceptions.StagingError(
+            "Could not stage '{0}' upstream, make sure that you have "
+            "supplied the correct remote working directory and that you "
+            "have chosen a path that you can write to."
+            .format(job["localworkdir"]))
 
 
 def stage_downstream(job):
@@ -137,13 +174,26 @@ def stage_downstream(job):
     job (dictionary) - A single job dictionary, this is often simply passed in
                        as a subset of the main jobs dictionary.
 
+    If the job has "download-verify = true" and has finished, then the final
+    download will resume any partially transferred files and the result is
+    verified against a checksum manifest computed on the remote host.
+
     """
     LOG.info("For job '%s' staging files downstream.", job["jobname"])
 
+    verify = _verifyrequested(job)
+
     # Download the whole directory with rsync.
     try:
 
-        shellwrappers.download(job)
+        if verify is True:
+
+            # Resume partial files, checking the existing data on the way.
+            shellwrappers.download(job, ["--append-verify"])
+
+        else:
+
+            shellwrappers.download(job)
 
     except exceptions.RsyncError:
 
@@ -151,6 +201,10 @@ def stage_downstream(job):
             "Could not download a file from '{0}' to '{1}'".format(
                 job["destdir"], job["localworkdir"]))
 
+    if verify is True:
+
+        _verifydownstream(job)
+
     LOG.info("Staging complete.")
 
 
@@ -161,6 +215,10 @@ def cleanup(jobs):
     a given Longbow instance, thus avoiding catastrophic data loss. It will
     also fail gracefully with debug level log messages should the cleanup
     function be triggered at a stage prior to remote job directory creation.
+    Each directory to be deleted must be one that Longbow created for the job
+    inside its remoteworkdir, and the directories on each resource are checked
+    and deleted by a single remote command. If "cleanup-detach" is set for
+    a resource, the deletion carries on there after Longbow has exited.
     This method also contains the code for cleaning up the recovery file used
     in the session.
 
@@ -173,61 +231,308 @@ def cleanup(jobs):
     """
     LOG.info("Cleaning up the work directories.")
 
+    groups = {}
+
     for item in [a for a in jobs if "lbowconf" not in a]:
 
-        job = jobs[item]
-        destdir = job["destdir"]
-        remotedir = job["remoteworkdir"]
+        if _cleanupwanted(jobs[item], item):
 
-        try:
+            groups.setdefault(jobs[item]["resource"], []).append(item)
+
+    # Each resource is cleaned over its own connection, so do these at once.
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
 
-            shellwrappers.remotelist(job)
+        for future in [pool.submit(_cleanupresource, jobs, items)
+                       for items in groups.values()]:
 
-            if destdir != remotedir:
+            future.result()
 
-                LOG.info("Deleting directory for job '%s' - '%s'",
-                         item, destdir)
+    recfile = jobs["lbowconf"]["recoveryfile"]
+    fpath = os.path.expanduser('~/.longbow')
 
-                shellwrappers.remotedelete(job)
+    if (recfile != "" and os.path.isfile(os.path.join(fpath, recfile))):
 
-            else:
+        LOG.info("Removing the recovery file.")
 
-                raise exceptions.RemoteworkdirError(
-                    "Subdirectory of remoteworkdir not yet created")
+        os.remove(os.path.join(fpath, recfile))
 
-        except exceptions.RemoteworkdirError:
+    LOG.info("Cleaning up complete.")
 
-            LOG.debug("For job '%s', cleanup not required because the "
-                      "'%sxxxxx' subdirectory of '%s' in which the job "
-                      "would have run has not yet been created on the remote "
-                      "resource.", item, item, remotedir)
 
-        except exceptions.RemotelistError:
+def _cleanupwanted(job, item):
+    """Check that a job has a directory that cleanup may delete."""
+    if ("destdir" not in job or "remoteworkdir" not in job or
+            "resource" not in job):
+
+        LOG.debug("For job '%s', cleanup not required - skipping.", item)
+
+        return False
+
+    destdir = job["destdir"].rstrip("/")
+    remotedir = job["remoteworkdir"].rstrip("/")
+
+    if _verifypending(job):
+
+        LOG.warning("For job '%s', the downloaded files have not passed "
+                    "verification so the directory '%s' will be kept on "
+                    "the remote resource.", item, destdir)
+
+        return False
+
+    if destdir == remotedir:
+
+        LOG.debug("For job '%s', cleanup not required because the "
+                  "'%sxxxxx' subdirectory of '%s' in which the job "
+                  "would have run has not yet been created on the remote "
+                  "resource.", item, item, remotedir)
+
+        return False
+
+    # Only ever delete the directory Longbow made for the job, which is the
+    # job name plus five random digits directly inside remoteworkdir.
+    if (posixpath.dirname(destdir) != remotedir or
+            re.match(re.escape(item) + r"\d{5}$",
+                     posixpath.basename(destdir)) is None):
+
+        LOG.warning("For job '%s', the directory '%s' was not created by "
+                    "Longbow inside '%s' so it will be kept on the remote "
+                    "resource.", item, destdir, remotedir)
+
+        return False
+
+    return True
+
+
+def _cleanupresource(jobs, items):
+    """Delete the directories of jobs on a single resource, see cleanup."""
+    job = jobs[items[0]]
+    paths = [jobs[item]["destdir"] for item in items]
+
+    try:
+
+        background = job["cleanup-detach"].lower() == "true"
+
+    except KeyError:
+
+        background = False
+
+    try:
+
+        status = shellwrappers.remotecleanup(job, paths, background)
+
+    except exceptions.RemotedeleteError:
+
+        LOG.debug("Cannot delete the directories on '%s' - skipping.",
+                  job["resource"])
+
+        return
+
+    except exceptions.AbsolutepathError:
+
+        LOG.debug("Directories on '%s' are not absolute paths - skipping.",
+                  job["resource"])
+
+        return
+
+    for item in items:
+
+        destdir = jobs[item]["destdir"]
+
+        if status.get(destdir) == "deleted":
+
+            LOG.info("Deleting directory for job '%s' - '%s'", item, destdir)
+
+        else:
 
             # Directory doesn't exist.
             LOG.debug("Directory on path '%s' does not exist - skipping.",
                       destdir)
 
-        except KeyError:
 
-            LOG.debug("For job '%s', cleanup not required - skipping.", item)
+def _verifyrequested(job):
+    """Check if a verified final download has been requested for a job."""
+    try:
 
-        except exceptions.RemotedeleteError:
+        return (job["download-verify"].lower() == "true" and
+                job["laststatus"] == "Finished")
 
-            LOG.debug("For job '%s', cannot delete directory '%s' - skipping.",
-                      item, destdir)
+    except KeyError:
 
-        except NameError:
+        return False
 
-            pass
 
-    recfile = jobs["lbowconf"]["recoveryfile"]
-    fpath = os.path.expanduser('~/.longbow')
+def _verifypending(job):
+    """Check if a job still has a download waiting to be verified."""
+    try:
 
-    if (recfile != "" and os.path.isfile(os.path.join(fpath, recfile))):
+        if job["download-verify"].lower() != "true":
 
-        LOG.info("Removing the recovery file.")
+            return False
 
-        os.remove(os.path.join(fpath, recfile))
+    except KeyError:
 
-    LOG.info("Cleaning up complete.")
+        return False
+
+    try:
+
+        return job["download-verified"] != "true"
+
+    except KeyError:
+
+        return True
+
+
+def _verifydownstream(job):
+    """Verify the downloaded files for a job against the remote copies.
+
+    A checksum manifest for the whole job directory is computed on the remote
+    host in a single SSH call and compared with the local files. Any files that
+    are missing or do not match are downloaded again before re-checking. The
+    outcome is recorded in job["download-verified"] so that cleanup can refuse
+    to delete remote data that has not arrived intact.
+
+    """
+    tool = job["download-checksum"]
+    attempt = 0
+
+    while True:
+
+        attempt += 1
+        mismatched = []
+
+        try:
+
+            remote = _remotemanifest(job, tool)
+
+        except exceptions.RemotelistError:
+
+            LOG.warning("For job '%s', could not compute the remote checksum "
+                        "manifest.", job["jobname"])
+
+            remote = None
+
+        if remote is not None:
+
+            for path in sorted(remote):
+
+                if not _rsyncfiltered(path, job["download-include"],
+                                      job["download-exclude"]):
+
+                    continue
+
+                localpath = os.path.join(job["localworkdir"], path)
+
+                if (not os.path.isfile(localpath) or
+                        _localchecksum(localpath, tool) != remote[path]):
+
+                    mismatched.append(path)
+
+            if len(mismatched) == 0:
+
+                LOG.info("For job '%s', all %s downloaded files passed "
+                         "verification.", job["jobname"], len(remote))
+
+                job["download-verified"] = "true"
+
+                return True
+
+        if attempt >= VERIFYATTEMPTS:
+
+            break
+
+        if len(mismatched) > 0:
+
+            LOG.info("For job '%s', %s files failed verification - "
+                     "downloading them again.", job["jobname"],
+                     len(mismatched))
+
+            _refetch(job, mismatched)
+
+    LOG.error("For job '%s', downloaded files could not be verified after %s "
+              "attempts.", job["jobname"], attempt)
+
+    job["download-verified"] = "false"
+
+    return False
+
+
+def _remotemanifest(job, tool):
+    """Compute checksums for all files in a remote job directory.
+
+    All checksums are computed in a single SSH call, see
+    shellwrappers.remotestat.
+
+    """
+    listing = shellwrappers.remotestat(job, checksum=tool)
+
+    return dict((path, entry["checksum"]) for path, entry in listing.items()
+                if "checksum" in entry)
+
+
+def _localchecksum(path, tool):
+    """Compute the checksum of a local file with the same tool as remote."""
+    algorithm = tool[:-3] if tool.endswith("sum") else tool
+
+    # Use hashlib where possible, otherwise fall back to the local tool.
+    if algorithm in hashlib.algorithms_available:
+
+        digest = hashlib.new(algorithm)
+
+        with open(path, "rb") as fil:
+
+            for block in iter(lambda: fil.read(1048576), b""):
+
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    shellout = shellwrappers.sendtoshell([tool, path])
+
+    return shellout[0].split(" ")[0].lstrip("\\")
+
+
+def _rsyncfiltered(path, includemask, excludemask):
+    """Check if a path would be transferred by rsync with these masks."""
+    name = os.path.basename(path)
+
+    # Includes are given to rsync before excludes, the first match wins.
+    for mask, result in [(includemask, True), (excludemask, False)]:
+
+        for pattern in mask.split(","):
+
+            pattern = pattern.replace(" ", "")
+
+            if pattern == "":
+
+                continue
+
+            target = path if "/" in pattern else name
+
+            if fnmatch.fnmatch(target, pattern.strip("/")):
+
+                return result
+
+    return True
+
+
+def _refetch(job, paths):
+    """Download a list of files again, comparing by checksum."""
+    handle, fileslist = tempfile.mkstemp(prefix="longbow-")
+
+    try:
+
+        with os.fdopen(handle, "w") as fil:
+
+            fil.write("\n".join(paths) + "\n")
+
+        shellwrappers.download(job, ["--checksum",
+                                     "--files-from=" + fileslist])
+
+    except exceptions.RsyncError:
+
+        LOG.warning("For job '%s', re-download of files failed.",
+                    job["jobname"])
+
+    finally:
+
+        os.remove(fileslist)
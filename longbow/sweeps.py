@@ -0,0 +1,251 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing methods for expanding parameter sweeps.
+
+A section of a job configuration file can describe a whole family of jobs by
+giving a "sweep" parameter. This lists one or more variables, each with the
+values it takes, and a job is made for every combination of them, so a large
+ensemble does not need a section per job. For example:
+
+[md]
+executable = pmemd.MPI
+executableargs = -i md-{temp}.in -c start.rst -p system.top -o md.out
+sweep = temp: 300..350..25; resource: archer, hartree
+
+makes the six jobs md-300-archer, md-300-hartree, md-325-archer and so on.
+Each variable is separated by ";", and its values are separated by "," where
+"first..last" and "first..last..step" give a range of whole numbers (last is
+included). Wherever "{name}" appears in the other parameters of the section it
+is replaced with the value of the variable, and variables that share the name
+of a Longbow parameter (such as resource, cores or replicates) set that
+parameter directly. The following methods can be found within this module:
+
+parse(spec)
+    This method will parse the value of a sweep parameter into its variables.
+
+expand(section, options)
+    This method will generate the jobs described by a job file section.
+
+expandjobs(jobdata)
+    This method will expand every sweep in the data loaded from a job file.
+"""
+
+import collections
+import itertools
+import re
+
+import longbow.exceptions as exceptions
+
+# Characters that are not safe to use in a job name (and so directory name).
+UNSAFE = re.compile(r"[^\w.+-]")
+
+
+def parse(spec):
+    """Parse the value of a sweep parameter.
+
+    Required arguments are:
+
+    spec (string): The value of the sweep parameter, for example
+                   "temp: 300..350..25; seed: 1, 2, 3".
+
+    Return parameters are:
+
+    variables (list): A (name, values) tuple for each variable, in the order
+                      they were given, where values is a list of strings.
+
+    """
+    variables = []
+
+    for item in spec.split(";"):
+
+        if item.strip() == "":
+
+            continue
+
+        name, colon, values = item.partition(":")
+        name = name.strip()
+
+        if colon == "" or re.match(r"^[\w-]+$", name) is None:
+
+            raise exceptions.ConfigurationError(
+                "The sweep variable '{0}' should be given as 'name: values'"
+                .format(item.strip()))
+
+        expanded = []
+
+        for value in values.split(","):
+
+            expanded.extend(_values(name, value.strip()))
+
+        if len(expanded) == 0:
+
+            raise exceptions.ConfigurationError(
+                "The sweep variable '{0}' has no values".format(name))
+
+        if name in [a[0] for a in variables]:
+
+            raise exceptions.ConfigurationError(
+                "The sweep variable '{0}' is given more than once"
+                .format(name))
+
+        variables.append((name, expanded))
+
+    return variables
+
+
+def expand(section, options):
+    """Generate the jobs described by a job file section.
+
+    Sections without a sweep parameter describe a single job and are given
+    back unchanged. Each job only holds its own values, the rest are looked
+    up in the section they came from.
+
+    Required arguments are:
+
+    section (string): The name of the section, which is used as the start of
+                      the name of each job.
+
+    options (dictionary): The parameters given in the section.
+
+    Return parameters are:
+
+    jobs (generator): A (job name, parameters) tuple for each job.
+
+    """
+    if "sweep" not in options:
+
+        yield section, options
+
+        return
+
+    variables = parse(options["sweep"])
+    names = [a[0] for a in variables]
+    base = dict((key, value) for key, value in options.items()
+                if key != "sweep")
+
+    # Only the parameters that mention a variable need rendering per job.
+    placeholder = re.compile(
+        "{(" + "|".join(re.escape(name) for name in names) + ")}")
+    templated = [key for key, value in base.items()
+                 if placeholder.search(value) is not None]
+
+    for values in itertools.product(*[a[1] for a in variables]):
+
+        lookup = dict(zip(names, values))
+        job = {}
+
+        for key in templated:
+
+            job[key] = placeholder.sub(
+                lambda match: lookup[match.group(1)], base[key])
+
+        job.update(lookup)
+
+        yield (section + "-" + "-".join(UNSAFE.sub("_", a) for a in values),
+               collections.ChainMap(job, base))
+
+
+def expandjobs(jobdata):
+    """Expand every sweep in the data loaded from a job file.
+
+    Required arguments are:
+
+    jobdata (dictionary): The sections loaded from a job configuration file,
+                          see configuration.loadconfigs.
+
+    Return parameters are:
+
+    jobdata (dictionary): The same data with each sweep replaced by the jobs
+                          it describes, in order.
+
+    Every job of every sweep is made here. The rest of Longbow (preparing,
+    staging, submitting, monitoring and the recovery file) works on the whole
+    jobs structure, so configuration.processconfigs goes on to give each job
+    a full record of its own. A sweep saves writing and parsing a section
+    per job, but memory still grows with the number of jobs in it.
+
+    """
+    if not any("sweep" in options for options in jobdata.values()):
+
+        return jobdata
+
+    expanded = {}
+
+    for section in jobdata:
+
+        for job, options in expand(section, jobdata[section]):
+
+            if job in expanded:
+
+                raise exceptions.ConfigurationError(
+                    "The sweep in section '{0}' gives the job name '{1}' "
+                    "which is already in use".format(section, job))
+
+            expanded[job] = options
+
+    return expanded
+
+
+def _values(name, value):
+    """Expand a single sweep value, which may be a range."""
+    if ".." not in value:
+
+        return [value] if value != "" else []
+
+    bounds = value.split("..")
+
+    try:
+
+        if len(bounds) not in (2, 3):
+
+            raise ValueError
+
+        first, last = int(bounds[0]), int(bounds[1])
+        step = int(bounds[2]) if len(bounds) == 3 else 1
+
+        if step <= 0:
+
+            raise ValueError
+
+    except ValueError:
+
+        raise exceptions.ConfigurationError(
+            "The range '{0}' for sweep variable '{1}' should be of the form "
+            "'first..last' or 'first..last..step' with whole numbers and a "
+            "positive step".format(value, name))
+
+    if first <= last:
+
+        return [str(a) for a in range(first, last + 1, step)]
+
+    return [str(a) for a in range(first, last - 1, -step)]
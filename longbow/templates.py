@@ -0,0 +1,339 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""A module containing methods for rendering submit script templates.
+
+Each scheduler plugin describes its submit script as a template, which is
+parsed once and then rendered for each job. Sites can supply their own
+template for a resource through the "submit-template" parameter in the hosts
+configuration file. The following methods can be found within this module:
+
+compiletemplate(text)
+    This method will parse a template, templates already parsed are reused.
+
+render(text, variables)
+    This method will render a template with the given variables.
+
+variables(job)
+    This method will set up the variables common to all submit scripts.
+
+write(job, filename, text, variables)
+    This method will render a submit script into the job directory, using the
+    site template for the job if there is one.
+
+Templates are plain text with the following additions, directives must be on
+a line of their own and the whole line is dropped from the output:
+
+{{name}}
+    Replaced with the value of the variable.
+
+{% if name %}, {% if not name %}, {% else %}, {% endif %}
+    Only include the lines within if the variable is set (or not), where
+    empty strings, lists and False count as not set.
+
+{% for item in name %}, {% endfor %}
+    Include the lines within once for each value in the list variable, with
+    {{item}} set to each value in turn.
+"""
+
+import os
+import re
+import threading
+
+import longbow.exceptions as exceptions
+
+# Parsed templates, keyed by the template text.
+TEMPLATES = {}
+
+# Site templates read from disk, keyed by path.
+SITETEMPLATES = {}
+
+LOCK = threading.Lock()
+
+_DIRECTIVE = re.compile(r"^\s*{%\s*(.*?)\s*%}\s*$")
+_VARIABLE = re.compile(r"{{\s*([\w-]+)\s*}}")
+
+
+def compiletemplate(text):
+    """Parse a template.
+
+    Required arguments are:
+
+    text (string) - The template.
+
+    Returns the parsed template, a list of nodes that are each either a line
+    split into literal text and variable names, or an if or for block holding
+    lists of nodes.
+
+    """
+    with LOCK:
+
+        if text in TEMPLATES:
+
+            return TEMPLATES[text]
+
+    nodes = []
+    stack = [("top", nodes)]
+
+    for number, line in enumerate(text.splitlines(True), 1):
+
+        directive = _DIRECTIVE.match(line)
+
+        if directive is None:
+
+            # Even entries are literal text, odd entries variable names.
+            stack[-1][1].append(("line", _VARIABLE.split(line)))
+
+            continue
+
+        words = directive.group(1).split()
+
+        if len(words) == 2 and words[0] == "if" and words[1] != "not":
+
+            block = ["if", words[1], False, [], []]
+
+        elif len(words) == 3 and words[:2] == ["if", "not"]:
+
+            block = ["if", words[2], True, [], []]
+
+        elif len(words) == 4 and words[0] == "for" and words[2] == "in":
+
+            block = ["for", words[3], words[1], []]
+
+        elif words == ["else"] and stack[-1][0] == "if":
+
+            block = stack[-1][2]
+            stack[-1] = ("else", block[4], block)
+
+            continue
+
+        elif ((words == ["endif"] and stack[-1][0] in ("if", "else")) or
+              (words == ["endfor"] and stack[-1][0] == "for")):
+
+            stack.pop()
+
+            continue
+
+        else:
+
+            raise exceptions.TemplateError(
+                "Unexpected '{0}' on line {1} of the submit template"
+                .format(directive.group(1), number))
+
+        stack[-1][1].append(block)
+        stack.append((block[0], block[3], block))
+
+    if len(stack) > 1:
+
+        raise exceptions.TemplateError(
+            "The submit template has an '{0}' block that is never closed"
+            .format(stack[-1][0].replace("else", "if")))
+
+    with LOCK:
+
+        TEMPLATES[text] = nodes
+
+    return nodes
+
+
+def render(text, variables):
+    """Render a template.
+
+    Required arguments are:
+
+    text (string) - The template.
+
+    variables (dictionary) - The values of the variables in the template.
+
+    Returns the rendered text.
+
+    """
+    output = []
+
+    _render(compiletemplate(text), variables, output)
+
+    return "".join(output)
+
+
+def variables(job):
+    """Set up the variables common to all submit scripts.
+
+    These are all of the job parameters, along with "array" which is set for
+    jobs with replicates, "modules" and "scripts" as lists, "mpirun" for the
+    job handler and "statusfile" which is empty unless status-push is on.
+
+    Required arguments are:
+
+    job (dictionary) - A single job dictionary, this is often simply passed in
+                       as a subset of the main jobs dictionary.
+
+    """
+    values = dict(job)
+
+    values["array"] = int(job["replicates"]) > 1
+    values["mpirun"] = job["handler"]
+    values["statusfile"] = job.get("statusfile", "")
+    values["scripts"] = []
+    values["modules"] = []
+
+    if job["scripts"] != "":
+
+        values["scripts"] = [item.strip()
+                             for item in job["scripts"].split(",")]
+
+    if job["modules"] != "":
+
+        values["modules"] = [module.replace(" ", "")
+                             for module in job["modules"].split(",")]
+
+    return values
+
+
+def write(job, filename, text, values):
+    """Render a submit script into the job directory.
+
+    The site template given by the "submit-template" parameter of the job is
+    used in place of the plugin template if there is one. The script is only
+    written if it differs from what is already on disk, so that unchanged
+    scripts are not staged again, and the file is added to the upload list.
+
+    Required arguments are:
+
+    job (dictionary) - A single job dictionary, this is often simply passed in
+                       as a subset of the main jobs dictionary.
+
+    filename (string) - The name of the submit script.
+
+    text (string) - The plugin template.
+
+    values (dictionary) - The values of the variables in the template.
+
+    """
+    if job.get("submit-template", "") != "":
+
+        text = _sitetemplate(job["submit-template"])
+
+    script = render(text, values)
+    path = os.path.join(job["localworkdir"], filename)
+
+    try:
+
+        with open(path, "r") as fil:
+
+            unchanged = fil.read() == script
+
+    except (IOError, OSError, UnicodeDecodeError):
+
+        unchanged = False
+
+    if unchanged is False:
+
+        with open(path, "w") as fil:
+
+            fil.write(script)
+
+    job["upload-include"] = job["upload-include"] + ", " + filename
+    job["subfile"] = filename
+
+
+def _render(nodes, values, output):
+    """Render a list of nodes into output."""
+    for node in nodes:
+
+        if node[0] == "line":
+
+            parts = node[1]
+
+            for index, part in enumerate(parts):
+
+                output.append(_value(values, part) if index % 2 else part)
+
+        elif node[0] == "if":
+
+            if bool(_value(values, node[1])) is not node[2]:
+
+                _render(node[3], values, output)
+
+            else:
+
+                _render(node[4], values, output)
+
+        else:
+
+            inner = dict(values)
+
+            for item in _value(values, node[1]):
+
+                inner[node[2]] = item
+                _render(node[3], inner, output)
+
+
+def _value(values, name):
+    """Look up a variable."""
+    try:
+
+        return values[name]
+
+    except KeyError:
+
+        raise exceptions.TemplateError(
+            "The submit template uses '{0}' which is not a job parameter"
+            .format(name))
+
+
+def _sitetemplate(path):
+    """Read a site template, relative paths are from ~/.longbow."""
+    path = os.path.join(os.path.expanduser("~/.longbow"),
+                        os.path.expanduser(path))
+
+    with LOCK:
+
+        if path in SITETEMPLATES:
+
+            return SITETEMPLATES[path]
+
+    try:
+
+        with open(path, "r") as fil:
+
+            text = fil.read()
+
+    except (IOError, OSError):
+
+        raise exceptions.TemplateError(
+            "Can't read the submit template '{0}'".format(path))
+
+    with LOCK:
+
+        SITETEMPLATES[path] = text
+
+    return text
@@ -0,0 +1,74 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the FileList class within the
+applications module.
+"""
+
+from longbow.applications import FileList
+
+
+def test_filelist_order():
+
+    """
+    Test that the list keeps the order that files were added in.
+    """
+
+    files = FileList(["a"])
+
+    files.append("c")
+    files.extend(["b", "d"])
+    files.insert(0, "e")
+
+    assert files == ["e", "a", "c", "b", "d"]
+    assert ", ".join(files) == "e, a, c, b, d"
+
+
+def test_filelist_contains():
+
+    """
+    Test that membership checks follow additions and removals.
+    """
+
+    files = FileList()
+
+    assert "a" not in files
+    assert not files
+
+    files.append("a")
+    files.append("b")
+
+    assert "a" in files
+
+    files.remove("a")
+
+    assert "a" not in files
+    assert files.pop() == "b"
+    assert "b" not in files
@@ -0,0 +1,72 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the _isfile method within the
+applications module.
+"""
+
+from longbow.applications import _isfile, _forgetlisting
+
+
+def test_isfile_nolisting(tmpdir):
+
+    """
+    Test that outside of processjobs the filesystem is checked directly.
+    """
+
+    tmpdir.join("input").write("input")
+
+    assert _isfile(str(tmpdir.join("input"))) is True
+    assert _isfile(str(tmpdir.join("missing"))) is False
+    assert _isfile(str(tmpdir)) is False
+
+
+def test_isfile_listing(tmpdir):
+
+    """
+    Test that directory listings are used and can be refreshed.
+    """
+
+    tmpdir.join("input").write("input")
+    tmpdir.mkdir("rep1")
+
+    listings = {}
+
+    assert _isfile(str(tmpdir.join("input")), listings) is True
+    assert _isfile(str(tmpdir.join("rep1")), listings) is False
+    assert _isfile(str(tmpdir.join("missing", "input")), listings) is False
+
+    tmpdir.join("new").write("new")
+
+    assert _isfile(str(tmpdir.join("new")), listings) is False
+
+    _forgetlisting(str(tmpdir), listings)
+
+    assert _isfile(str(tmpdir.join("new")), listings) is True
@@ -50,7 +50,7 @@ from longbow.applications import processjobs
 import longbow.exceptions as exceptions
 
 
-def _proccommandline(job, filelist, foundfile, _):
+def _proccommandline(job, filelist, foundfile, _, pool=None, listings=None):
 
     """Quick method to mock functionality"""
     for index, arg in enumerate(job["executableargs"]):
@@ -300,3 +300,35 @@ def test_processjobs_genericexec2():
         "testexec -f input -c file -p test"
     assert jobs["jobone"]["upload-include"] == ""
     assert jobs["jobone"]["upload-exclude"] == "*.log"
+
+
+def test_processjobs_unsupportedmulti():
+
+    """
+    Test that a job using an unsupported executable doesn't stop the jobs
+    after it from being processed.
+    """
+
+    jobs = {
+        "jobone": {
+            "executableargs": ["input"],
+            "localworkdir": os.path.join(os.getcwd(),
+                                         "tests/standards/jobs/multi"),
+            "executable": "unsupported.exe",
+            "upload-include": "",
+            "upload-exclude": ""
+        },
+        "jobtwo": {
+            "executableargs": ["input"],
+            "localworkdir": os.path.join(os.getcwd(),
+                                         "tests/standards/jobs/multi"),
+            "executable": "unsupported.exe",
+            "upload-include": "",
+            "upload-exclude": ""
+        }
+    }
+
+    processjobs(jobs)
+
+    assert jobs["jobone"]["executableargs"] == "unsupported.exe input"
+    assert jobs["jobtwo"]["executableargs"] == "unsupported.exe input"
@@ -34,6 +34,8 @@
 This testing module contains the tests for the applications module methods.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 from longbow.applications import _procfiles
 from longbow.configuration import JOBTEMPLATE
 
@@ -205,3 +207,30 @@ def test_procfiles_reps2():
 
     assert foundflags == ["-p"]
     assert filelist == ["rep1", "topol", "rep2", "rep3"]
+
+
+def test_procfiles_pool():
+
+    """
+    Test that scanning replicates with a thread pool gives the same files in
+    the same order as scanning them one at a time.
+    """
+
+    job = JOBTEMPLATE.copy()
+
+    filelist = []
+    foundflags = []
+    job["executable"] = "pmemd.MPI"
+    job["replicates"] = "3"
+    job["localworkdir"] = "tests/standards/jobs/replicate"
+    job["executableargs"] = ["-i", "input", "-c", "coords", "-p", "topol"]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+
+        for arg in ["coords", "topol"]:
+
+            foundflags = _procfiles(job, arg, filelist, foundflags, {}, pool)
+
+    assert foundflags == ["-c", "-p"]
+    assert filelist == ["rep1", "rep1/coords", "rep2", "rep2/coords", "rep3",
+                        "rep3/coords", "topol"]
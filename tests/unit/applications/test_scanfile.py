@@ -0,0 +1,209 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the _scanfile method within the
+applications module.
+"""
+
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import longbow.applications as applications
+from longbow.applications import _scanfile
+
+
+def _parser(filename, path, files, substitutions=None):
+    """A simple parser that finds one dependency per input file."""
+
+    files.append(filename)
+    files.append(filename + ".dep")
+
+
+def test_scanfile_cached(tmpdir):
+
+    """
+    Test that an input file shared between replicates and jobs is only
+    parsed once.
+    """
+
+    tmpdir.join("input").write("input")
+    tmpdir.join("input.dep").write("dep")
+
+    parser = mock.Mock(side_effect=_parser)
+    cwd = str(tmpdir)
+
+    for _ in range(3):
+
+        found, _ = _scanfile(parser, "test", "input", cwd, {})
+
+        assert found == ["input", "input.dep"]
+
+    assert parser.call_count == 1
+
+
+@mock.patch('longbow.dependencies.store')
+@mock.patch('longbow.dependencies.lookup', return_value=None)
+def test_scanfile_concurrent(m_lookup, m_store, tmpdir):
+
+    """
+    Test that an input file shared by many replicates is only parsed once
+    when they are scanned at the same time.
+    """
+
+    tmpdir.join("md.conf").write("input")
+    tmpdir.join("md.conf.dep").write("dep")
+
+    def slowparser(filename, path, files, substitutions=None):
+
+        time.sleep(0.1)
+        _parser(filename, path, files, substitutions)
+
+    parser = mock.Mock(side_effect=slowparser)
+    cwd = str(tmpdir)
+
+    with ThreadPoolExecutor(8) as pool:
+
+        scans = list(pool.map(
+            lambda _: _scanfile(parser, "test", "md.conf", cwd, {}),
+            range(50)))
+
+    assert parser.call_count == 1
+    assert m_store.call_count == 1
+    assert all(found == ["md.conf", "md.conf.dep"] for found, _ in scans)
+    assert not applications.SCANNING
+
+
+@mock.patch('longbow.dependencies.lookup', return_value=None)
+def test_scanfile_changed(m_lookup, tmpdir):
+
+    """
+    Test that a file is scanned again if it or its dependencies change.
+    """
+
+    tmpdir.join("input").write("input")
+    tmpdir.join("input.dep").write("dep")
+
+    parser = mock.Mock(side_effect=_parser)
+    cwd = str(tmpdir)
+
+    _scanfile(parser, "test", "input", cwd, {})
+
+    tmpdir.join("input.dep").write("changed dep")
+
+    _scanfile(parser, "test", "input", cwd, {})
+
+    assert parser.call_count == 2
+
+    _scanfile(parser, "test", "input", cwd, {"var": "1"})
+
+    assert parser.call_count == 3
+
+
+def test_scanfile_substitutions(tmpdir):
+
+    """
+    Test that substitutions picked up by the parser from within files are
+    returned rather than changed in place, including when the scan comes from
+    the cache.
+    """
+
+    tmpdir.join("input").write("input")
+
+    def parser(filename, path, files, substitutions=None):
+
+        files.append(filename)
+        substitutions["picked"] = "up"
+
+    cwd = str(tmpdir)
+
+    substitution = {"given": "1"}
+
+    _, after = _scanfile(parser, "test", "input", cwd, substitution)
+
+    assert after == {"given": "1", "picked": "up"}
+    assert substitution == {"given": "1"}
+
+    _, after = _scanfile(parser, "test", "input", cwd, substitution)
+
+    assert after == {"given": "1", "picked": "up"}
+    assert len([key for key in applications.SCANCACHE
+                if key[1] == os.path.abspath(cwd)]) == 1
+
+
+@mock.patch('longbow.dependencies.store')
+@mock.patch('longbow.dependencies.lookup')
+def test_scanfile_previousrun(m_lookup, m_store, tmpdir):
+
+    """
+    Test that a scan from a previous run is used instead of parsing.
+    """
+
+    tmpdir.join("other").write("other")
+
+    m_lookup.return_value = (["other", "other.dep"], {"picked": "up"})
+
+    parser = mock.Mock(side_effect=_parser)
+    cwd = str(tmpdir)
+
+    found, after = _scanfile(parser, "test", "other", cwd, {})
+
+    assert found == ["other", "other.dep"]
+    assert after == {"picked": "up"}
+    assert parser.call_count == 0
+    assert m_store.call_count == 0
+
+
+@mock.patch('longbow.dependencies.store')
+@mock.patch('longbow.dependencies.lookup', return_value=None)
+def test_scanfile_storerun(m_lookup, m_store, tmpdir):
+
+    """
+    Test that a parsed scan is kept for the next run.
+    """
+
+    tmpdir.join("another").write("another")
+
+    cwd = str(tmpdir)
+
+    _scanfile(_parser, "test", "another", cwd, {"var": "1"})
+
+    m_store.assert_called_once_with(
+        "test", "another", cwd, {"var": "1"}, ["another", "another.dep"],
+        {"var": "1"})
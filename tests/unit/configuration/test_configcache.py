@@ -0,0 +1,258 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the configuration cache used by
+the processconfigs method within the configuration module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import os
+
+import longbow.configuration as configuration
+from longbow.configuration import processconfigs
+
+
+def _parameters(tmpdir):
+
+    """Write a host and job file and build the matching parameters."""
+
+    tmpdir.join("hosts.conf").write("[HPC1]\n"
+                                    "host = login.test.ac.uk\n"
+                                    "user = test\n"
+                                    "remoteworkdir = /work/dir\n")
+    tmpdir.join("job.conf").write("[job1]\n"
+                                  "executable = pmemd.MPI\n"
+                                  "executableargs = -i example.in\n"
+                                  "[job2]\n"
+                                  "executable = namd2\n"
+                                  "executableargs = example.in\n"
+                                  "cores = 48\n")
+
+    return {
+        "debug": False,
+        "executable": "",
+        "executableargs": "",
+        "hosts": str(tmpdir.join("hosts.conf")),
+        "job": str(tmpdir.join("job.conf")),
+        "jobname": "",
+        "resource": "",
+        "replicates": ""
+    }
+
+
+def test_configcache_hit(tmpdir):
+
+    """
+    Test that a second launch with the same inputs skips loading the files
+    and gives the same jobs.
+    """
+
+    parameters = _parameters(tmpdir)
+    cachefile = str(tmpdir.join("configcache"))
+
+    with mock.patch('longbow.configuration.CONFIGCACHE', cachefile):
+
+        first = processconfigs(parameters)
+
+        with mock.patch('longbow.configuration.loadconfigs') as mock_load:
+
+            second = processconfigs(parameters)
+
+    assert mock_load.call_count == 0
+    assert os.path.isfile(cachefile)
+    assert second["job2"]["cores"] == "48"
+    assert second["job1"]["host"] == "login.test.ac.uk"
+    assert second["job1"]["executableargs"] == ["-i", "example.in"]
+
+    # Each launch gets its own random job directories.
+    for job in ["job1", "job2"]:
+
+        first[job].pop("destdir")
+        second[job].pop("destdir")
+
+    assert first == second
+
+
+def test_configcache_changes(tmpdir):
+
+    """
+    Test that changing a file, a parameter or the working directory misses
+    the cache.
+    """
+
+    parameters = _parameters(tmpdir)
+    cachefile = str(tmpdir.join("configcache"))
+
+    with mock.patch('longbow.configuration.CONFIGCACHE', cachefile):
+
+        key = configuration._configcachekey(parameters)
+        configuration._configcachesave(key, {"job1": {}})
+
+        assert configuration._configcacheload(key) is not None
+
+        parameters["resource"] = "HPC1"
+
+        assert configuration._configcachekey(parameters) != key
+
+        parameters["resource"] = ""
+        tmpdir.join("job.conf").write("[job1]\nexecutable = namd2\n")
+
+        assert configuration._configcachekey(parameters) != key
+
+        tmpdir.join("job.conf").write(
+            "[job1]\nexecutable = pmemd.MPI\nexecutableargs = -i example.in\n"
+            "[job2]\nexecutable = namd2\nexecutableargs = example.in\n"
+            "cores = 48\n")
+
+        assert configuration._configcachekey(parameters) == key
+
+        with mock.patch('os.getcwd') as mock_cwd:
+
+            mock_cwd.return_value = "/somewhere/else"
+
+            assert configuration._configcachekey(parameters) != key
+
+
+def test_configcache_nodirectory(tmpdir):
+
+    """
+    Test that nothing is written when the directory does not exist.
+    """
+
+    cachefile = str(tmpdir.join("missing", "configcache"))
+
+    with mock.patch('longbow.configuration.CONFIGCACHE', cachefile):
+
+        configuration._configcachesave("key", {"job1": {}})
+
+    assert not os.path.exists(cachefile)
+
+
+def test_configcache_corrupt(tmpdir):
+
+    """
+    Test that a corrupt cache file is ignored and then replaced.
+    """
+
+    cachefile = tmpdir.join("configcache")
+    cachefile.write("not a cache")
+
+    with mock.patch('longbow.configuration.CONFIGCACHE', str(cachefile)):
+
+        assert configuration._configcacheload("key") is None
+
+        configuration._configcachesave("key", {"job1": {"cores": "8"}})
+
+        jobs = configuration._configcacheload("key")
+
+    assert jobs["job1"]["cores"] == "8"
+    assert jobs["job1"]["replicates"] == "1"
+
+
+def test_configcache_size(tmpdir):
+
+    """
+    Test that only the newest configurations are kept.
+    """
+
+    cachefile = str(tmpdir.join("configcache"))
+
+    with mock.patch('longbow.configuration.CONFIGCACHE', cachefile), \
+            mock.patch('longbow.configuration.CONFIGCACHESIZE', 2):
+
+        for key in ["one", "two", "three"]:
+
+            configuration._configcachesave(key, {"job1": {}})
+
+        assert configuration._configcacheload("one") is None
+        assert configuration._configcacheload("two") is not None
+        assert configuration._configcacheload("three") is not None
+
+
+def test_configcache_missingfile(tmpdir):
+
+    """
+    Test that there is no key when a configuration file is missing.
+    """
+
+    parameters = _parameters(tmpdir)
+    parameters["job"] = str(tmpdir.join("missing.conf"))
+
+    assert configuration._configcachekey(parameters) is None
+
+
+def test_configcache_plugins(tmpdir):
+
+    """
+    Test that installing a plugin means the cached jobs are not used.
+    """
+
+    parameters = _parameters(tmpdir)
+    cachefile = str(tmpdir.join("configcache"))
+    registry = {"apps": {"sitenamd": {"module": "longbow.apps.namd",
+                                      "executables": ["sitenamd2"],
+                                      "modulename": {}}},
+                "schedulers": {}}
+
+    with mock.patch('longbow.configuration.CONFIGCACHE', cachefile):
+
+        processconfigs(parameters)
+
+        with mock.patch('longbow.plugins.REGISTRY', registry), \
+                mock.patch('longbow.configuration.loadconfigs',
+                           wraps=configuration.loadconfigs) as mock_load:
+
+            processconfigs(parameters)
+
+    assert mock_load.call_count == 2
+
+
+def test_configcache_upgrade(tmpdir):
+
+    """
+    Test that a different version of Longbow doesn't use the cached jobs.
+    """
+
+    parameters = _parameters(tmpdir)
+    key = configuration._configcachekey(parameters)
+
+    with mock.patch('longbow.__version__', "0.0.1"):
+
+        assert configuration._configcachekey(parameters) != key
+
+    assert configuration._configcachekey(parameters) == key
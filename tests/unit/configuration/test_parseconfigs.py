@@ -0,0 +1,121 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the parseconfigs method within the
+configuration module.
+"""
+
+import os
+import pytest
+
+from longbow.configuration import loadconfigs, parseconfigs
+import longbow.exceptions as ex
+
+
+def test_parseconfigs_lines():
+
+    """
+    Test that parseconfigs records where each section and option is.
+    """
+
+    conffile = os.path.join(os.getcwd(), "tests/standards/simplehostfile.txt")
+
+    contents, sections, params, lines = parseconfigs(conffile)
+
+    assert (contents, sections, params) == loadconfigs(conffile)
+    assert lines["HPC1-shortqueue"] == 0
+    assert lines[("HPC1-shortqueue", "queue")] == 1
+    assert lines[("HPC1-shortqueue", "maxtime")] == 9
+    assert lines["HPC1"] == 12
+    assert lines[("HPC1", "account")] == 17
+    assert contents[lines[("HPC1", "account")]] == "account = acc300"
+
+
+def test_parseconfigs_spacing(tmpdir):
+
+    """
+    Test that options are split with or without spaces around the equals sign
+    and that only the first equals sign counts.
+    """
+
+    conffile = tmpdir.join("job.conf")
+    conffile.write("[job]\n"
+                   "a=1\n"
+                   "b =2\n"
+                   "c= 3\n"
+                   "d = 4\n"
+                   "e  =  5\n"
+                   "f = x = y\n"
+                   "# g = 7\n")
+
+    _, _, params, lines = parseconfigs(str(conffile))
+
+    assert params["job"] == {"a": "1", "b": "2", "c": "3", "d": "4",
+                             "e ": " 5", "f": "x = y"}
+    assert ("job", "g") not in lines
+
+
+def test_parseconfigs_nosection(tmpdir):
+
+    """
+    Test that an option before the first section is reported with its line.
+    """
+
+    conffile = tmpdir.join("job.conf")
+    conffile.write("# header\n"
+                   "cores = 24\n"
+                   "[job]\n"
+                   "cores = 48\n")
+
+    with pytest.raises(ex.ConfigurationError) as err:
+
+        parseconfigs(str(conffile))
+
+    assert "line 2" in str(err.value)
+
+
+def test_parseconfigs_emptysection(tmpdir):
+
+    """
+    Test that a section without options is reported with its line.
+    """
+
+    conffile = tmpdir.join("job.conf")
+    conffile.write("[job1]\n"
+                   "cores = 24\n"
+                   "\n"
+                   "[job2]\n")
+
+    with pytest.raises(ex.ConfigurationError) as err:
+
+        parseconfigs(str(conffile))
+
+    assert "line 4" in str(err.value)
@@ -34,6 +34,14 @@
 This testing module contains the tests for the configuration module methods.
 """
 
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
 import os
 import pytest
 
@@ -41,6 +49,19 @@ from longbow.configuration import processconfigs
 import longbow.exceptions as ex
 
 
+@pytest.fixture(autouse=True)
+def configcache(tmpdir):
+
+    """
+    Keep the configuration cache out of the real ~/.longbow.
+    """
+
+    with mock.patch('longbow.configuration.CONFIGCACHE',
+                    str(tmpdir.join("configcache"))):
+
+        yield
+
+
 def test_processconfigs_test1():
 
     """
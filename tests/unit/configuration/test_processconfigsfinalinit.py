@@ -153,3 +153,41 @@ def test_processconfigsfinalinit3(attr):
     assert jobs["jobone"]["destdir"] != ""
     assert jobs["jobone"]["remoteworkdir"] == "/work/dir"
     assert jobs["jobone"]["modules"] == "fictionmodule"
+
+
+def test_processconfigsfinalinit4():
+
+    """
+    Test that a local working directory given in the parameters is used as
+    the default and for relative paths.
+    """
+
+    jobs = {
+        "jobone": {
+            "modules": "",
+            "localworkdir": "/somepath/to/dir",
+            "executableargs": "",
+            "executable": "pmemd.MPI",
+            "remoteworkdir": "/work/dir"
+        },
+        "jobtwo": {
+            "modules": "",
+            "localworkdir": "",
+            "executableargs": "",
+            "executable": "gmx",
+            "remoteworkdir": "/work/dir"
+        },
+        "jobthree": {
+            "modules": "",
+            "localworkdir": "sub/dir",
+            "executableargs": "",
+            "executable": "gmx",
+            "remoteworkdir": "/work/dir"
+        }
+    }
+
+    _processconfigsfinalinit(jobs, "/client/dir")
+
+    assert jobs["jobone"]["localworkdir"] == "/somepath/to/dir"
+    assert jobs["jobtwo"]["localworkdir"] == "/client/dir"
+    assert jobs["jobthree"]["localworkdir"] == "/client/dir/sub/dir"
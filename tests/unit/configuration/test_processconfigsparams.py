@@ -395,3 +395,49 @@ def test_processconfigsparams_test3():
 
     assert jobs["jobone"]["cores"] == "48"
     assert jobs["jobtwo"]["cores"] == "96"
+
+
+def test_processconfigsparams_test4():
+
+    """
+    Test that the local working directory parameter doesn't override the
+    configuration files.
+    """
+
+    jobs = {
+        "jobone": {
+            "executable": "",
+            "localworkdir": "",
+            "resource": "host1"
+        },
+        "jobtwo": {
+            "executable": "",
+            "localworkdir": "",
+            "resource": "host2"
+        }
+    }
+
+    parameters = {
+        "executable": "",
+        "localworkdir": "/client/dir",
+        "resource": ""
+    }
+
+    hostdata = {
+        "host1": {
+            "localworkdir": "/host/dir"
+        },
+        "host2": {}
+    }
+
+    jobdata = {
+        "jobone": {
+            "localworkdir": "/job/dir"
+        },
+        "jobtwo": {}
+    }
+
+    _processconfigsparams(jobs, parameters, jobdata, hostdata)
+
+    assert jobs["jobone"]["localworkdir"] == "/job/dir"
+    assert jobs["jobtwo"]["localworkdir"] == ""
@@ -110,6 +110,21 @@ def test_processconfigsresource1():
             "email-address": "",
             "email-flags": "",
             "env-fix": "false",
+            "cleanup-detach": "false",
+            "submit-template": "",
+            "status-push": "false",
+            "timeout-probe": "60",
+            "timeout-stall": "600",
+            "timeout-status": "120",
+            "timeout-submit": "120",
+            "timeout-transfer": "0",
+            "retry-attempts": "3",
+            "retry-backoff": "10",
+            "retry-backoff-max": "300",
+            "circuit-cooldown": "300",
+            "circuit-threshold": "5",
+            "download-checksum": "sha256sum",
+            "download-verify": "false",
             "executable": "",
             "executableargs": "",
             "handler": "",
@@ -223,6 +238,21 @@ def test_processconfigsresource2():
             "email-address": "",
             "email-flags": "",
             "env-fix": "false",
+            "cleanup-detach": "false",
+            "submit-template": "",
+            "status-push": "false",
+            "timeout-probe": "60",
+            "timeout-stall": "600",
+            "timeout-status": "120",
+            "timeout-submit": "120",
+            "timeout-transfer": "0",
+            "retry-attempts": "3",
+            "retry-backoff": "10",
+            "retry-backoff-max": "300",
+            "circuit-cooldown": "300",
+            "circuit-threshold": "5",
+            "download-checksum": "sha256sum",
+            "download-verify": "false",
             "executable": "",
             "executableargs": "",
             "polling-frequency": "300",
@@ -337,6 +367,21 @@ def test_processconfigsresource3():
             "email-address": "",
             "email-flags": "",
             "env-fix": "false",
+            "cleanup-detach": "false",
+            "submit-template": "",
+            "status-push": "false",
+            "timeout-probe": "60",
+            "timeout-stall": "600",
+            "timeout-status": "120",
+            "timeout-submit": "120",
+            "timeout-transfer": "0",
+            "retry-attempts": "3",
+            "retry-backoff": "10",
+            "retry-backoff-max": "300",
+            "circuit-cooldown": "300",
+            "circuit-threshold": "5",
+            "download-checksum": "sha256sum",
+            "download-verify": "false",
             "executable": "",
             "executableargs": "",
             "polling-frequency": "300",
@@ -450,6 +495,21 @@ def test_processconfigsresource4():
             "email-address": "",
             "email-flags": "",
             "env-fix": "false",
+            "cleanup-detach": "false",
+            "submit-template": "",
+            "status-push": "false",
+            "timeout-probe": "60",
+            "timeout-stall": "600",
+            "timeout-status": "120",
+            "timeout-submit": "120",
+            "timeout-transfer": "0",
+            "retry-attempts": "3",
+            "retry-backoff": "10",
+            "retry-backoff-max": "300",
+            "circuit-cooldown": "300",
+            "circuit-threshold": "5",
+            "download-checksum": "sha256sum",
+            "download-verify": "false",
             "executable": "",
             "executableargs": "",
             "polling-frequency": "300",
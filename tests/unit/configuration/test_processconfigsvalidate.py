@@ -170,3 +170,30 @@ def test_validate_test6():
     with pytest.raises(ex.ConfigurationError):
 
         _processconfigsvalidate(jobs)
+
+
+def test_validate_test7():
+
+    """
+    Test to make sure that a retry setting that is not a number throws an
+    exception.
+    """
+
+    jobs = {
+        "testjob": {
+            "executable": "testexec",
+            "executableargs": "arg1 arg2 arg3",
+            "host": "login.machine.ac.uk",
+            "user": "user",
+            "remoteworkdir": "/work/dir",
+            "replicates": "1",
+            "retry-attempts": "3",
+            "circuit-cooldown": "5m"
+        }
+    }
+
+    with pytest.raises(ex.ConfigurationError) as err:
+
+        _processconfigsvalidate(jobs)
+
+    assert "circuit-cooldown" in str(err.value)
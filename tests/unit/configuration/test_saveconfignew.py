@@ -34,7 +34,7 @@
 This testing module contains the tests for the configuration module methods.
 """
 
-from longbow.configuration import _saveconfignew
+from longbow.configuration import _parseconfiglines, _saveconfignew
 
 
 def test_saveconfignew_test1():
@@ -55,7 +55,9 @@ def test_saveconfignew_test1():
         }
     }
 
-    _saveconfignew(contents, keydiff)
+    _, _, lines = _parseconfiglines(contents, "test.conf")
+
+    contents = _saveconfignew(contents, lines, keydiff)
 
     assert contents == ["[test1]", "param1 = 2", "param2 = test",
                         "param3 = true", "[test2]", "parama = f",
@@ -77,7 +79,9 @@ def test_saveconfignew_test2():
         }
     }
 
-    _saveconfignew(contents, keydiff)
+    _, _, lines = _parseconfiglines(contents, "test.conf")
+
+    contents = _saveconfignew(contents, lines, keydiff)
 
     assert contents == ["[test1]", "param1 = 2", "param2 = test",
                         "[test2]", "parama = f", "paramb = 12", "", "[test3]",
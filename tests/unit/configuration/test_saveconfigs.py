@@ -34,6 +34,17 @@
 This testing module contains the tests for the configuration module methods.
 """
 
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import os
+import stat
+
 import pytest
 
 from longbow.configuration import saveconfigs
@@ -98,3 +109,88 @@ def test_saveconfigs_test2():
     with pytest.raises(ex.ConfigurationError):
 
         saveconfigs(configfile, params)
+
+
+def test_saveconfigs_update(tmpdir):
+
+    """
+    Test that changed and new parameters are written in place, keeping the
+    comments and layout, even when values contain square brackets.
+    """
+
+    configfile = tmpdir.join("hosts.conf")
+    configfile.write("[test1]\n"
+                     "# A comment\n"
+                     "param1 = [2]\n"
+                     "param2=test\n"
+                     "\n"
+                     "[test2]\n"
+                     "parama = f\n")
+
+    params = {
+        "test1": {
+            "param1": "[2]",
+            "param2": "changed",
+            "param3": "new"
+        },
+        "test2": {
+            "parama": "f",
+            "paramb": "12"
+        },
+        "test3": {
+            "paramx": "y"
+        }
+    }
+
+    saveconfigs(str(configfile), params)
+
+    assert configfile.read() == ("[test1]\n"
+                                 "# A comment\n"
+                                 "param1 = [2]\n"
+                                 "param2 = changed\n"
+                                 "param3 = new\n"
+                                 "\n"
+                                 "[test2]\n"
+                                 "parama = f\n"
+                                 "paramb = 12\n"
+                                 "\n"
+                                 "[test3]\n"
+                                 "paramx = y\n")
+
+
+def test_saveconfigs_mode(tmpdir):
+
+    """
+    Test that the file is replaced without leaving temporary files behind and
+    that its permissions are kept.
+    """
+
+    configfile = tmpdir.join("hosts.conf")
+    configfile.write("[test1]\nparam1 = 1\n")
+    os.chmod(str(configfile), 0o640)
+
+    saveconfigs(str(configfile), {"test1": {"param1": "2"}})
+
+    assert configfile.read() == "[test1]\nparam1 = 2\n"
+    assert stat.S_IMODE(os.stat(str(configfile)).st_mode) == 0o640
+    assert os.listdir(str(tmpdir)) == ["hosts.conf"]
+
+
+@mock.patch('os.replace')
+def test_saveconfigs_failed(mock_replace, tmpdir):
+
+    """
+    Test that a failed write leaves the original file alone.
+    """
+
+    configfile = tmpdir.join("hosts.conf")
+    configfile.write("[test1]\nparam1 = 1\n")
+
+    mock_replace.side_effect = OSError
+
+    with pytest.raises(ex.ConfigurationError):
+
+        saveconfigs(str(configfile), {"test1": {"param1": "2"}})
+
+    assert configfile.read() == "[test1]\nparam1 = 1\n"
+    assert os.listdir(str(tmpdir)) == ["hosts.conf"]
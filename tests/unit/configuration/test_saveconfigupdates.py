@@ -34,7 +34,7 @@
 This testing module contains the tests for the configuration module methods.
 """
 
-from longbow.configuration import _saveconfigupdates
+from longbow.configuration import _parseconfiglines, _saveconfigupdates
 
 
 def test_saveconfigupdates_test1():
@@ -57,20 +57,9 @@ def test_saveconfigupdates_test1():
         }
     }
 
-    oldparams = {
-        "test1": {
-            "param1": "2",
-            "param2": "test",
-            "param3": "true"
-        },
-        "test2": {
-            "parama": "f",
-            "paramb": "12",
-            "paramc": "/path/to/somethingelse"
-        }
-    }
+    _, _, lines = _parseconfiglines(contents, "test.conf")
 
-    _saveconfigupdates(contents, oldparams, valuediff)
+    _saveconfigupdates(contents, lines, valuediff)
 
     assert contents == ["[test1]", "param1 = 1", "param2 = test",
                         "param3 = true", "[test2]", "parama = f",
@@ -96,20 +85,9 @@ def test_saveconfigupdates_test2():
         }
     }
 
-    oldparams = {
-        "test1": {
-            "param1": "2",
-            "param2": "test",
-            "param3": "true"
-        },
-        "test2": {
-            "parama": "f",
-            "paramb": "12",
-            "paramc": "/path/to/somethingelse"
-        }
-    }
+    _, _, lines = _parseconfiglines(contents, "test.conf")
 
-    _saveconfigupdates(contents, oldparams, valuediff)
+    _saveconfigupdates(contents, lines, valuediff)
 
     assert contents == ["[test1]", "param1 = 1", "param2=test", "param3=true",
                         "[test2]", "parama=f", "paramb = 1293",
@@ -0,0 +1,423 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the serve method within the
+daemon module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.daemon import request, serve
+
+
+def _start(socketpath):
+
+    """
+    Start a daemon in a thread and wait for it to listen.
+    """
+
+    thread = threading.Thread(target=serve, args=(socketpath,))
+    thread.daemon = True
+    thread.start()
+
+    for _ in range(100):
+
+        try:
+
+            request("status", socketpath)
+
+            break
+
+        except exceptions.DaemonError:
+
+            time.sleep(0.05)
+
+    return thread
+
+
+def _stop(socketpath, thread):
+
+    """
+    Stop a daemon started by _start.
+    """
+
+    assert request("shutdown", socketpath) == "Stopping."
+
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert not os.path.exists(socketpath)
+
+
+def _jobs(name="recovery-YYMMDD-HHMMSS"):
+
+    """
+    Build a jobs structure for the tests.
+    """
+
+    return {
+        "lbowconf": {
+            "recoveryfile": name
+        },
+        "jobone": {
+            "resource": "hpc1",
+            "jobid": "123",
+            "laststatus": "Queued",
+            "polling-frequency": "60",
+            "staging-frequency": "0"
+        }
+    }
+
+
+def test_serve_status(tmp_path):
+
+    """
+    Test that a daemon with no sessions answers and stops.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+    thread = _start(socketpath)
+
+    try:
+
+        assert request("status", socketpath) == {}
+        assert oct(os.stat(socketpath).st_mode & 0o777) == oct(0o600)
+
+    finally:
+
+        _stop(socketpath, thread)
+
+
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.configuration.loadrecovery')
+def test_serve_recover(m_load, m_step, tmp_path):
+
+    """
+    Test that a recovered session is monitored and reported.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+    m_load.return_value = _jobs()
+    m_step.return_value = False, False
+    thread = _start(socketpath)
+
+    try:
+
+        assert request("recover", socketpath,
+                       recoveryfile="recovery-YYMMDD-HHMMSS") == \
+            "recovery-YYMMDD-HHMMSS"
+
+        assert request("status", socketpath) == {
+            "recovery-YYMMDD-HHMMSS": {
+                "jobone": {
+                    "jobid": "123",
+                    "laststatus": "Queued",
+                    "resource": "hpc1"
+                }
+            }
+        }
+
+        with pytest.raises(exceptions.DaemonError):
+
+            request("recover", socketpath,
+                    recoveryfile="recovery-YYMMDD-HHMMSS")
+
+        for _ in range(50):
+
+            if m_step.call_count > 0:
+
+                break
+
+            time.sleep(0.1)
+
+        assert m_step.call_args[0][1]["align"] is True
+
+    finally:
+
+        _stop(socketpath, thread)
+
+
+@mock.patch('longbow.staging.cleanup')
+@mock.patch('longbow.scheduling.monitorfinish')
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.configuration.loadrecovery')
+def test_serve_complete(m_load, m_step, m_finish, m_clean, tmp_path):
+
+    """
+    Test that complete sessions are cleaned up and dropped.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+    m_load.side_effect = [_jobs("recovery-one"), _jobs("recovery-two")]
+    m_step.side_effect = lambda jobs, state, now: (
+        jobs["lbowconf"]["recoveryfile"] == "recovery-one", False)
+    thread = _start(socketpath)
+
+    try:
+
+        request("recover", socketpath, recoveryfile="recovery-one")
+        request("recover", socketpath, recoveryfile="recovery-two")
+
+        for _ in range(50):
+
+            if m_clean.call_count > 0:
+
+                break
+
+            time.sleep(0.1)
+
+        assert m_finish.call_count == 1
+        assert m_clean.call_count == 1
+        assert list(request("status", socketpath)) == ["recovery-two"]
+
+    finally:
+
+        _stop(socketpath, thread)
+
+
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.configuration.loadrecovery')
+def test_serve_sharedpoll(m_load, m_step, tmp_path):
+
+    """
+    Test that every session is stepped inside one status round.
+    """
+
+    import longbow.shellwrappers as shellwrappers
+
+    socketpath = str(tmp_path / "daemon.sock")
+    m_load.side_effect = [_jobs("recovery-one"), _jobs("recovery-two")]
+    rounds = []
+
+    def step(jobs, state, now):
+
+        rounds.append((now, id(shellwrappers.STATUSROUND.queries)))
+
+        return False, False
+
+    m_step.side_effect = step
+    thread = _start(socketpath)
+
+    try:
+
+        request("recover", socketpath, recoveryfile="recovery-one")
+        request("recover", socketpath, recoveryfile="recovery-two")
+
+        for _ in range(50):
+
+            if len(rounds) >= 4:
+
+                break
+
+            time.sleep(0.1)
+
+    finally:
+
+        _stop(socketpath, thread)
+
+    shared = {}
+
+    for now, queries in rounds:
+
+        shared.setdefault(now, set()).add(queries)
+
+    assert all(len(queries) == 1 for queries in shared.values())
+    assert any(rounds.count(entry) == 2 for entry in rounds)
+
+
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_serve_submit(m_longbow, m_step, tmp_path):
+
+    """
+    Test that a submitted session finds its files from the given directory
+    without the daemon changing its own.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+    m_step.return_value = False, False
+    seen = {}
+
+    def submit(jobs, parameters):
+
+        seen["cwd"] = os.getcwd()
+        seen["parameters"] = parameters
+        jobs.update(_jobs())
+
+        raise exceptions.DisconnectException
+
+    m_longbow.side_effect = submit
+    cwd = os.getcwd()
+    hosts = str(tmp_path / "hosts.conf")
+    job = str(tmp_path / "job.conf")
+    open(hosts, "w").close()
+    open(job, "w").close()
+    thread = _start(socketpath)
+
+    try:
+
+        assert request("submit", socketpath, cwd=str(tmp_path),
+                       parameters={"disconnect": False, "job": "job.conf"}) \
+            == "recovery-YYMMDD-HHMMSS"
+
+    finally:
+
+        _stop(socketpath, thread)
+
+    assert seen["cwd"] == cwd
+    assert seen["parameters"]["disconnect"] is True
+    assert seen["parameters"]["hosts"] == hosts
+    assert seen["parameters"]["job"] == job
+    assert seen["parameters"]["localworkdir"] == str(tmp_path)
+    assert os.getcwd() == cwd
+
+
+@mock.patch('longbow.entrypoints.longbow')
+def test_serve_submiterror(m_longbow, tmp_path):
+
+    """
+    Test that a failed submission is reported back to the client.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+    m_longbow.side_effect = exceptions.RequiredinputError("No jobs")
+    open(str(tmp_path / "hosts.conf"), "w").close()
+    thread = _start(socketpath)
+
+    try:
+
+        with pytest.raises(exceptions.DaemonError) as err:
+
+            request("submit", socketpath, cwd=str(tmp_path), parameters={})
+
+        assert str(err.value) == "No jobs"
+        assert request("status", socketpath) == {}
+
+    finally:
+
+        _stop(socketpath, thread)
+
+
+def test_serve_badrequest(tmp_path):
+
+    """
+    Test that requests that cannot be understood are answered with an error.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+    thread = _start(socketpath)
+
+    try:
+
+        with pytest.raises(exceptions.DaemonError):
+
+            request("bogus", socketpath)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+
+            sock.connect(socketpath)
+            sock.sendall(b"nonsense\n")
+
+            assert b'"error"' in sock.makefile("rb").readline()
+
+    finally:
+
+        _stop(socketpath, thread)
+
+
+def test_serve_running(tmp_path):
+
+    """
+    Test that a second daemon will not take over the socket.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+    thread = _start(socketpath)
+
+    try:
+
+        with pytest.raises(exceptions.DaemonError):
+
+            serve(socketpath)
+
+    finally:
+
+        _stop(socketpath, thread)
+
+
+def test_serve_stale(tmp_path):
+
+    """
+    Test that a socket left behind by a dead daemon is replaced.
+    """
+
+    socketpath = str(tmp_path / "daemon.sock")
+
+    with open(socketpath, "w") as stale:
+
+        stale.write("")
+
+    thread = _start(socketpath)
+
+    try:
+
+        assert request("status", socketpath) == {}
+
+    finally:
+
+        _stop(socketpath, thread)
+
+
+def test_request_nodaemon(tmp_path):
+
+    """
+    Test that talking to a daemon that is not there raises an error.
+    """
+
+    with pytest.raises(exceptions.DaemonError):
+
+        request("status", str(tmp_path / "daemon.sock"))
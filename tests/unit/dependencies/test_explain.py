@@ -0,0 +1,82 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the explain method within the
+dependencies module.
+"""
+
+import os
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import longbow.dependencies as dependencies
+
+
+def test_explain_jobs(tmpdir):
+
+    """
+    Test that each job lists the files scanned for it, where the scan came
+    from and the files they depend on.
+    """
+
+    tmpdir.mkdir("job1")
+    tmpdir.mkdir("job2")
+    tmpdir.join("job1", "input").write("input")
+    tmpdir.join("job1", "input.dep").write("dep")
+
+    jobs = {
+        "lbowconf": {},
+        "job1": {"localworkdir": str(tmpdir.join("job1"))},
+        "job2": {"localworkdir": str(tmpdir.join("job2"))}
+        }
+
+    cache = {"version": dependencies.VERSION, "files": {}, "graphs": {}}
+
+    with mock.patch('longbow.dependencies.CACHE', cache), \
+            mock.patch('longbow.dependencies.USED', []):
+
+        dependencies.record(jobs["job1"]["localworkdir"], "input",
+                            ["input", "input.dep"], "parsed")
+
+        output = dependencies.explain(jobs)
+
+    digest = cache["files"][os.path.abspath(
+        str(tmpdir.join("job1", "input.dep")))][2]
+
+    assert "Job 'job1'" in output
+    assert "    input (parsed)" in output
+    assert "        " + digest[:12] + "  input.dep" in output
+    assert "no input files were scanned" in output.split("Job 'job2'")[1]
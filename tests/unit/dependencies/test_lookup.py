@@ -0,0 +1,138 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the lookup and store methods within
+the dependencies module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import longbow.dependencies as dependencies
+
+
+def _empty():
+    """A fresh cache."""
+
+    return {"version": dependencies.VERSION, "files": {}, "graphs": {}}
+
+
+def test_lookup_miss(tmpdir):
+
+    """
+    Test that a file never scanned is not found.
+    """
+
+    tmpdir.join("input").write("input")
+
+    with mock.patch('longbow.dependencies.CACHE', _empty()):
+
+        assert dependencies.lookup("app", "input", str(tmpdir), {}) is None
+
+
+def test_lookup_hit(tmpdir):
+
+    """
+    Test that a stored scan is found, from any directory with the same files.
+    """
+
+    tmpdir.mkdir("one")
+    tmpdir.mkdir("two")
+
+    for directory in ["one", "two"]:
+
+        tmpdir.join(directory, "input").write("input")
+        tmpdir.join(directory, "input.dep").write("dep")
+
+    with mock.patch('longbow.dependencies.CACHE', _empty()):
+
+        dependencies.store("app", "input", str(tmpdir.join("one")), {},
+                           ["input", "input.dep"], {"picked": "up"})
+
+        for directory in ["one", "two"]:
+
+            found, after = dependencies.lookup(
+                "app", "input", str(tmpdir.join(directory)), {})
+
+            assert found == ["input", "input.dep"]
+            assert after == {"picked": "up"}
+
+        assert dependencies.lookup(
+            "other", "input", str(tmpdir.join("one")), {}) is None
+        assert dependencies.lookup(
+            "app", "input", str(tmpdir.join("one")), {"var": "1"}) is None
+
+
+def test_lookup_changed(tmpdir):
+
+    """
+    Test that a scan is not used once one of its files has changed, even if
+    the input file itself is unchanged.
+    """
+
+    tmpdir.join("input").write("input")
+    tmpdir.join("input.dep").write("dep")
+
+    cwd = str(tmpdir)
+
+    with mock.patch('longbow.dependencies.CACHE', _empty()):
+
+        dependencies.store("app", "input", cwd, {}, ["input", "input.dep"],
+                           {})
+
+        tmpdir.join("input.dep").write("changed dep")
+
+        assert dependencies.lookup("app", "input", cwd, {}) is None
+
+        tmpdir.join("input.dep").remove()
+
+        assert dependencies.lookup("app", "input", cwd, {}) is None
+
+
+def test_lookup_missing(tmpdir):
+
+    """
+    Test that a missing input file is never looked up or stored.
+    """
+
+    cwd = str(tmpdir)
+    cache = _empty()
+
+    with mock.patch('longbow.dependencies.CACHE', cache):
+
+        dependencies.store("app", "input", cwd, {}, ["input"], {})
+
+        assert dependencies.lookup("app", "input", cwd, {}) is None
+        assert cache["graphs"] == {}
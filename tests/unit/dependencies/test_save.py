@@ -0,0 +1,155 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the save method within the
+dependencies module.
+"""
+
+import json
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import longbow.dependencies as dependencies
+
+
+def test_save_roundtrip(tmpdir):
+
+    """
+    Test that scans saved by one run are used by the next.
+    """
+
+    tmpdir.join("input").write("input")
+
+    cachefile = str(tmpdir.join("dependencies.json"))
+    cwd = str(tmpdir)
+
+    with mock.patch('longbow.dependencies.CACHEFILE', cachefile), \
+            mock.patch('longbow.dependencies.CACHE', None), \
+            mock.patch('longbow.dependencies._DIRTY', [False]):
+
+        dependencies.store("app", "input", cwd, {}, ["input"], {})
+        dependencies.save()
+
+    assert json.load(open(cachefile))["version"] == dependencies.VERSION
+
+    with mock.patch('longbow.dependencies.CACHEFILE', cachefile), \
+            mock.patch('longbow.dependencies.CACHE', None):
+
+        assert dependencies.lookup("app", "input", cwd, {}) == (["input"], {})
+
+
+def test_save_nodirectory(tmpdir):
+
+    """
+    Test that nothing is written if the Longbow directory doesn't exist.
+    """
+
+    tmpdir.join("input").write("input")
+
+    cachefile = str(tmpdir.join("missing", "dependencies.json"))
+
+    with mock.patch('longbow.dependencies.CACHEFILE', cachefile), \
+            mock.patch('longbow.dependencies.CACHE', None), \
+            mock.patch('longbow.dependencies._DIRTY', [False]):
+
+        dependencies.store("app", "input", str(tmpdir), {}, ["input"], {})
+        dependencies.save()
+
+    assert tmpdir.join("missing").check() is False
+
+
+def test_save_version(tmpdir):
+
+    """
+    Test that a cache written by another version is ignored.
+    """
+
+    tmpdir.join("input").write("input")
+
+    cachefile = tmpdir.join("dependencies.json")
+    cachefile.write(json.dumps({"version": 0, "graphs": "old"}))
+
+    with mock.patch('longbow.dependencies.CACHEFILE', str(cachefile)), \
+            mock.patch('longbow.dependencies.CACHE', None):
+
+        assert dependencies.lookup("app", "input", str(tmpdir), {}) is None
+
+    cachefile.write("not json")
+
+    with mock.patch('longbow.dependencies.CACHEFILE', str(cachefile)), \
+            mock.patch('longbow.dependencies.CACHE', None):
+
+        assert dependencies.lookup("app", "input", str(tmpdir), {}) is None
+
+
+def test_save_prune(tmpdir):
+
+    """
+    Test that stale entries and the hashes of missing files are dropped.
+    """
+
+    tmpdir.join("input").write("input")
+    tmpdir.join("gone").write("gone")
+
+    cachefile = str(tmpdir.join("dependencies.json"))
+    cwd = str(tmpdir)
+    gone = str(tmpdir.join("gone"))
+    stale = str(tmpdir.join("stale"))
+
+    cache = {"version": dependencies.VERSION, "graphs": {
+        "old": {"found": [], "digests": [], "after": {}, "used": 0}},
+        "files": {stale: [0, 0, "abc", 0]}}
+
+    with mock.patch('longbow.dependencies.CACHEFILE', cachefile), \
+            mock.patch('longbow.dependencies.CACHE', cache), \
+            mock.patch('longbow.dependencies.TOUCHED', set()), \
+            mock.patch('longbow.dependencies._DIRTY', [False]):
+
+        dependencies.store("app", "input", cwd, {}, ["input"], {})
+        dependencies.store("app", "gone", cwd, {}, ["gone"], {})
+        dependencies.save()
+
+        tmpdir.join("gone").remove()
+        dependencies.TOUCHED.clear()
+        dependencies._DIRTY[0] = True
+        dependencies.save()
+
+    saved = json.load(open(cachefile))
+
+    assert "old" not in saved["graphs"]
+    assert len(saved["graphs"]) == 2
+    assert sorted(saved["files"]) == [str(tmpdir.join("input"))]
+    assert stale not in saved["files"] and gone not in saved["files"]
@@ -0,0 +1,96 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the time taken to import the
+entrypoints module, which every run of the longbow command pays for.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# The most time, in microseconds, that importing Longbow may take. This is
+# generous, it is here to catch the plugins or some heavy module being pulled
+# in at start up again. Being a wall clock figure it depends on how busy the
+# machine is, so it is only checked when benchmarks are asked for by setting
+# LONGBOW_BENCHMARKS in the environment.
+IMPORTBUDGET = 500000
+
+
+def _importtimes():
+    """Import the entrypoints in a fresh interpreter and time each module."""
+
+    shellout = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "import longbow.entrypoints"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+
+    times = {}
+
+    for line in shellout.stderr.splitlines():
+
+        if line.startswith("import time:") and "|" in line:
+
+            _, cumulative, module = line.split("|")
+
+            if cumulative.strip().isdigit():
+
+                times[module.strip()] = int(cumulative)
+
+    return times
+
+
+def test_importtime_plugins():
+
+    """
+    Test that no plugins are imported just to start Longbow.
+    """
+
+    times = _importtimes()
+
+    assert "longbow.apps" in times
+    assert "longbow.schedulers" in times
+    assert [module for module in times
+            if module.startswith("longbow.apps.") or
+            module.startswith("longbow.schedulers.")] == []
+
+
+@pytest.mark.skipif("LONGBOW_BENCHMARKS" not in os.environ,
+                    reason="set LONGBOW_BENCHMARKS to run benchmarks")
+def test_importtime_budget():
+
+    """
+    Test that importing Longbow stays within its time budget.
+    """
+
+    assert _importtimes()["longbow"] < IMPORTBUDGET
@@ -362,7 +362,7 @@ def test_main_test8(m_isfile, m_longbowmain, m_recovery):
 
 @mock.patch('longbow.staging.cleanup')
 @mock.patch('longbow.staging.stage_downstream')
-@mock.patch('longbow.scheduling.delete')
+@mock.patch('longbow.scheduling.bulkdelete')
 @mock.patch('longbow.scheduling.monitor')
 @mock.patch('longbow.scheduling.submit')
 @mock.patch('longbow.staging.stage_upstream')
@@ -400,7 +400,8 @@ def test_main_test9(m_isfile, m_procconf, m_testcon, m_testenv, m_testapp,
     assert m_stagup.call_count == 1
     assert m_sub.call_count == 1
     assert m_mon.call_count == 1
-    assert m_del.call_count == 2
+    assert m_del.call_count == 1
+    assert len(m_del.call_args[0][0]) == 2
     assert m_stagdown.call_count == 2
     assert m_clean.call_count == 1
 
@@ -581,3 +582,117 @@ def test_main_test13(m_isfile, m_procconf, m_testcon, m_testenv, m_testapp,
     assert m_del.call_count == 0
     assert m_stagdown.call_count == 0
     assert m_clean.call_count == 0
+
+
+@mock.patch('longbow.daemon.serve')
+@mock.patch('longbow.entrypoints.longbow')
+@mock.patch('longbow.entrypoints.recovery')
+@mock.patch('os.path.isfile')
+def test_main_test14(m_isfile, m_recovery, m_longbow, m_serve):
+
+    """
+    Check that the daemon is started without needing an executable.
+    """
+
+    m_isfile.return_value = True
+
+    args = ["longbow", "--daemon", "--log", "new-log.file"]
+
+    with mock.patch('sys.argv', args):
+
+        launcher()
+
+    assert m_serve.call_count == 1
+    assert m_longbow.call_count == 0
+    assert m_recovery.call_count == 0
+
+
+@mock.patch('longbow.metrics.trace')
+@mock.patch('longbow.entrypoints.longbow')
+@mock.patch('os.path.isfile')
+def test_main_test15(m_isfile, m_longbow, m_trace):
+
+    """
+    Check that the trace file is opened and then closed at exit.
+    """
+
+    m_isfile.return_value = True
+
+    args = ["longbow", "--trace", "trace.jsonl", "--log", "new-log.file",
+            "pmemd.MPI", "-O", "-i", "ex.in"]
+
+    with mock.patch('sys.argv', args):
+
+        launcher()
+
+    assert m_trace.call_args_list == [mock.call("trace.jsonl"),
+                                      mock.call(None)]
+
+
+@mock.patch('longbow.metrics.listen')
+@mock.patch('longbow.metrics.textfile')
+@mock.patch('longbow.entrypoints.longbow')
+@mock.patch('os.path.isfile')
+def test_main_test16(m_isfile, m_longbow, m_textfile, m_listen):
+
+    """
+    Check that the metrics are exported and then stopped at exit.
+    """
+
+    m_isfile.return_value = True
+
+    args = ["longbow", "--metrics-file", "longbow.prom", "--metrics-port",
+            "9464", "--log", "new-log.file", "pmemd.MPI", "-O", "-i", "ex.in"]
+
+    with mock.patch('sys.argv', args):
+
+        launcher()
+
+    assert m_textfile.call_args_list == [mock.call("longbow.prom"),
+                                         mock.call(None)]
+    assert m_listen.call_args_list == [mock.call(9464), mock.call(None)]
+
+
+@mock.patch('longbow.metrics.listen')
+@mock.patch('longbow.entrypoints.longbow')
+@mock.patch('os.path.isfile')
+def test_main_test17(m_isfile, m_longbow, m_listen):
+
+    """
+    Check that a metrics port that is not a number is an error.
+    """
+
+    m_isfile.return_value = True
+
+    args = ["longbow", "--metrics-port", "abc", "--log", "new-log.file",
+            "pmemd.MPI", "-O", "-i", "ex.in"]
+
+    with mock.patch('sys.argv', args):
+
+        with pytest.raises(SystemExit):
+
+            launcher()
+
+    assert m_longbow.call_count == 0
+    assert m_listen.call_args_list == [mock.call(None)]
+
+
+@mock.patch('longbow.entrypoints.longbow')
+@mock.patch('os.path.isfile')
+def test_main_test18(m_isfile, m_longbow, capsys):
+
+    """
+    Check that the explanation of the dependencies is printed.
+    """
+
+    m_isfile.return_value = True
+    m_longbow.return_value = "Job 'job1'"
+
+    args = ["longbow", "--explain-deps", "--log", "new-log.file",
+            "pmemd.MPI", "-O", "-i", "ex.in"]
+
+    with mock.patch('sys.argv', args):
+
+        launcher()
+
+    assert "Job 'job1'" in capsys.readouterr().out
@@ -160,3 +160,114 @@ def test_longbowmain_testcalls2(m_procconf, m_testcon, m_testenv, m_testapp,
     assert m_mon.call_count == 1
     assert m_clean.call_count == 1
 
+
+
+@mock.patch('longbow.dependencies.explain')
+@mock.patch('longbow.scheduling.submit')
+@mock.patch('longbow.scheduling.prepare')
+@mock.patch('longbow.applications.processjobs')
+@mock.patch('longbow.scheduling.checkenv')
+@mock.patch('longbow.shellwrappers.checkconnections')
+@mock.patch('longbow.configuration.processconfigs')
+def test_longbowmain_explaindeps(m_procconf, m_testcon, m_testenv, m_procjob,
+                                 m_schedprep, m_sub, m_explain, capsys):
+
+    """
+    Check that explain mode returns the dependencies without connecting.
+    """
+
+    params = {
+        "hosts": "some/file",
+        "disconnect": False,
+        "explain-deps": True,
+        "nochecks": False
+        }
+
+    m_explain.return_value = "Job 'job1'"
+
+    assert longbow({}, params) == "Job 'job1'"
+
+    assert m_procconf.call_count == 1
+    assert m_procjob.call_count == 1
+    assert m_testcon.call_count == 0
+    assert m_testenv.call_count == 0
+    assert m_schedprep.call_count == 0
+    assert m_sub.call_count == 0
+    assert capsys.readouterr().out == ""
+
+
+@mock.patch('longbow.staging.cleanup')
+@mock.patch('longbow.scheduling.monitor')
+@mock.patch('longbow.scheduling.pipeline')
+@mock.patch('longbow.scheduling.submit')
+@mock.patch('longbow.staging.stage_upstream')
+@mock.patch('longbow.scheduling.prepare')
+@mock.patch('longbow.applications.processjobs')
+@mock.patch('longbow.applications.checkapp')
+@mock.patch('longbow.scheduling.checkenv')
+@mock.patch('longbow.shellwrappers.checkconnections')
+@mock.patch('longbow.configuration.processconfigs')
+def test_longbowmain_pipeline(m_procconf, m_testcon, m_testenv, m_testapp,
+                              m_procjob, m_schedprep, m_stagup, m_sub,
+                              m_pipe, m_mon, m_clean):
+
+    """
+    Check that pipeline mode replaces the prepare, stage and submit calls.
+    """
+
+    params = {
+        "hosts": "some/file",
+        "disconnect": False,
+        "nochecks": False,
+        "pipeline": True
+        }
+
+    longbow({}, params)
+
+    assert m_procjob.call_count == 1
+    assert m_schedprep.call_count == 0
+    assert m_stagup.call_count == 0
+    assert m_sub.call_count == 0
+    assert m_pipe.call_count == 1
+    assert m_mon.call_count == 1
+    assert m_clean.call_count == 1
+
+
+@mock.patch('longbow.staging.cleanup')
+@mock.patch('longbow.scheduling.monitor')
+@mock.patch('longbow.scheduling.submit')
+@mock.patch('longbow.staging.stage_upstream')
+@mock.patch('longbow.scheduling.prepare')
+@mock.patch('longbow.applications.processjobs')
+@mock.patch('longbow.applications.checkapp')
+@mock.patch('longbow.scheduling.checkenv')
+@mock.patch('longbow.shellwrappers.checkconnections')
+@mock.patch('longbow.configuration.processconfigs')
+def test_longbowmain_phases(m_procconf, m_testcon, m_testenv, m_testapp,
+                            m_procjob, m_schedprep, m_stagup, m_sub, m_mon,
+                            m_clean):
+
+    """
+    Check that each phase of the session is timed.
+    """
+
+    import longbow.metrics as metrics
+
+    params = {
+        "hosts": "some/file",
+        "disconnect": False,
+        "nochecks": False
+        }
+
+    metrics.reset()
+
+    longbow({}, params)
+
+    phases = [key[0][1] for key in metrics.TIMINGS["phase"]]
+
+    metrics.reset()
+
+    assert sorted(phases) == ["checkapp", "checkconnections", "checkenv",
+                              "cleanup", "monitor", "prepare",
+                              "processconfigs", "processjobs",
+                              "stage_upstream", "submit"]
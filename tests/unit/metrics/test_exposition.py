@@ -0,0 +1,207 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the exposition, textfile and
+listen methods within the metrics module.
+"""
+
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+
+import longbow.metrics as metrics
+
+
+@pytest.fixture(autouse=True)
+def clean():
+
+    """
+    Start each test with nothing recorded and nothing being exported.
+    """
+
+    metrics.reset()
+
+    yield
+
+    metrics.textfile(None)
+    metrics.listen(None)
+    metrics.reset()
+
+
+def test_exposition_empty():
+
+    """
+    Test that nothing is exported if nothing was recorded.
+    """
+
+    assert metrics.exposition() == ""
+
+
+def test_exposition_histogram():
+
+    """
+    Test that timings are exported as cumulative histograms.
+    """
+
+    metrics.observe("remote", 0.07, host="hpc1", cmdclass="status")
+    metrics.observe("remote", 3.0, host="hpc1", cmdclass="status")
+    metrics.observe("remote", 1000.0, host="hpc1", cmdclass="status")
+
+    lines = metrics.exposition().splitlines()
+    labels = 'cmdclass="status",host="hpc1"'
+
+    assert lines[0] == "# TYPE longbow_remote_seconds histogram"
+    assert ('longbow_remote_seconds_bucket{' + labels + ',le="0.05"} 0' in
+            lines)
+    assert 'longbow_remote_seconds_bucket{' + labels + ',le="0.1"} 1' in lines
+    assert ('longbow_remote_seconds_bucket{' + labels + ',le="5.0"} 2' in
+            lines)
+    assert ('longbow_remote_seconds_bucket{' + labels + ',le="300.0"} 2' in
+            lines)
+    assert ('longbow_remote_seconds_bucket{' + labels + ',le="+Inf"} 3' in
+            lines)
+    assert 'longbow_remote_seconds_sum{' + labels + '} 1003.07' in lines
+    assert 'longbow_remote_seconds_count{' + labels + '} 3' in lines
+
+
+def test_exposition_counters_gauges():
+
+    """
+    Test that counters and gauges are exported with safe names.
+    """
+
+    metrics.count("remote-bytes", 2048, host="hpc1")
+    metrics.gauge("jobs", 3, resource="hpc1", state="Running")
+
+    lines = metrics.exposition().splitlines()
+
+    assert lines == [
+        "# TYPE longbow_remote_bytes_total counter",
+        'longbow_remote_bytes_total{host="hpc1"} 2048',
+        "# TYPE longbow_jobs gauge",
+        'longbow_jobs{resource="hpc1",state="Running"} 3']
+
+
+def test_exposition_escaping():
+
+    """
+    Test that awkward label values are escaped.
+    """
+
+    metrics.count("timeout", host='a"b\\c\nd')
+
+    assert ('longbow_timeout_total{host="a\\"b\\\\c\\nd"} 1' in
+            metrics.exposition().splitlines())
+
+
+def test_cleargauges():
+
+    """
+    Test that only the gauges with the given labels are removed.
+    """
+
+    metrics.gauge("jobs", 1, resource="hpc1", state="Queued", session="a")
+    metrics.gauge("jobs", 2, resource="hpc1", state="Running", session="a")
+    metrics.gauge("jobs", 3, resource="hpc1", state="Running", session="b")
+
+    metrics.cleargauges("jobs", session="a")
+
+    assert metrics.exposition().splitlines()[1:] == [
+        'longbow_jobs{resource="hpc1",session="b",state="Running"} 3']
+
+
+def test_textfile(tmpdir):
+
+    """
+    Test that the exposition is written to file on starting and stopping.
+    """
+
+    path = os.path.join(str(tmpdir), "longbow.prom")
+
+    metrics.count("timeout", host="hpc1")
+    metrics.textfile(path, interval=3600)
+
+    with open(path) as prom:
+
+        assert 'longbow_timeout_total{host="hpc1"} 1' in prom.read()
+
+    metrics.count("timeout", host="hpc1")
+    metrics.textfile(None)
+
+    with open(path) as prom:
+
+        assert 'longbow_timeout_total{host="hpc1"} 2' in prom.read()
+
+    assert os.listdir(str(tmpdir)) == ["longbow.prom"]
+
+
+def test_textfile_unwritable(tmpdir):
+
+    """
+    Test that not being able to write the file is not fatal.
+    """
+
+    path = os.path.join(str(tmpdir), "missing", "longbow.prom")
+
+    metrics.textfile(path, interval=3600)
+    metrics.textfile(None)
+
+    assert not os.path.exists(path)
+
+
+def test_listen():
+
+    """
+    Test that the exposition is served over HTTP.
+    """
+
+    metrics.count("timeout", host="hpc1")
+
+    port = metrics.listen(0)
+    url = "http://127.0.0.1:{0}".format(port)
+
+    with urllib.request.urlopen(url + "/metrics") as response:
+
+        assert response.status == 200
+        assert (response.headers["Content-Type"] ==
+                "text/plain; version=0.0.4")
+        assert (b'longbow_timeout_total{host="hpc1"} 1' in
+                response.read())
+
+    with pytest.raises(urllib.error.HTTPError):
+
+        urllib.request.urlopen(url + "/other")
+
+    assert metrics.listen(None) is None
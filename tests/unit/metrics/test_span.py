@@ -0,0 +1,130 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the span method within the
+metrics module.
+"""
+
+import pytest
+
+import longbow.metrics as metrics
+
+
+@pytest.fixture(autouse=True)
+def clean():
+
+    """
+    Start each test with nothing recorded.
+    """
+
+    metrics.reset()
+
+    yield
+
+    metrics.reset()
+
+
+def test_span_timing():
+
+    """
+    Test that each span is counted and timed under its labels.
+    """
+
+    for _ in range(3):
+
+        with metrics.span("remote", host="hpc1", cmdclass="status"):
+
+            pass
+
+    with metrics.span("remote", host="hpc2", cmdclass="status"):
+
+        pass
+
+    timings = metrics.TIMINGS["remote"]
+    hpc1 = timings[(("cmdclass", "status"), ("host", "hpc1"))]
+
+    assert hpc1[0] == 3
+    assert hpc1[1] >= hpc1[2] >= 0
+    assert timings[(("cmdclass", "status"), ("host", "hpc2"))][0] == 1
+
+
+def test_span_details():
+
+    """
+    Test that numeric details are added to counters named after the span.
+    """
+
+    for size in (10, 20):
+
+        with metrics.span("remote", host="hpc1") as details:
+
+            details["bytes"] = size
+            details["retries"] = 0
+            details["flag"] = True
+            details["note"] = "text"
+
+    assert metrics.total("remote-bytes", host="hpc1") == 30
+    assert metrics.total("remote-retries", host="hpc1") == 0
+    assert metrics.total("remote-flag", host="hpc1") == 0
+    assert metrics.total("remote-note", host="hpc1") == 0
+
+
+def test_span_error():
+
+    """
+    Test that a span that raises is still timed, and counted as an error.
+    """
+
+    with pytest.raises(ValueError):
+
+        with metrics.span("phase", phase="submit"):
+
+            raise ValueError("Broken")
+
+    assert metrics.TIMINGS["phase"][(("phase", "submit"),)][0] == 1
+    assert metrics.total("phase-errors", phase="submit") == 1
+
+
+def test_span_count():
+
+    """
+    Test that counters add up and that labels are kept apart.
+    """
+
+    metrics.count("timeout", host="hpc1", cmdclass="status")
+    metrics.count("timeout", cmdclass="status", host="hpc1")
+    metrics.count("timeout", host="hpc1", cmdclass="submit")
+
+    assert metrics.total("timeout", host="hpc1", cmdclass="status") == 2
+    assert metrics.total("timeout", host="hpc1", cmdclass="submit") == 1
+    assert metrics.total("timeout", host="hpc2", cmdclass="submit") == 0
@@ -0,0 +1,121 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the summary and trace methods
+within the metrics module.
+"""
+
+import json
+
+import pytest
+
+import longbow.metrics as metrics
+
+
+@pytest.fixture(autouse=True)
+def clean():
+
+    """
+    Start each test with nothing recorded and no trace file.
+    """
+
+    metrics.reset()
+
+    yield
+
+    metrics.trace(None)
+    metrics.reset()
+
+
+def test_summary_empty():
+
+    """
+    Test that there is no summary if nothing was recorded.
+    """
+
+    assert metrics.summary() == []
+
+
+def test_summary_table():
+
+    """
+    Test that timings and counters are both in the summary.
+    """
+
+    metrics.observe("phase", 2.0, phase="submit")
+    metrics.observe("phase", 4.0, phase="submit")
+    metrics.count("remote-bytes", 2048, host="hpc1")
+    metrics.count("remote-retries", 0, host="hpc1")
+
+    lines = metrics.summary()
+
+    assert lines[0].split() == ["Timing", "count", "total(s)", "mean(s)",
+                                "max(s)"]
+    assert lines[1].split() == ["phase", "phase=submit", "2", "6.000",
+                                "3.000", "4.000"]
+    assert lines[2].split() == ["Counter", "value"]
+    assert lines[3].split() == ["remote-bytes", "host=hpc1", "2048"]
+    assert len(lines) == 4
+
+
+def test_trace_file(tmp_path):
+
+    """
+    Test that each timing is written to the trace file as it happens.
+    """
+
+    path = str(tmp_path / "trace.jsonl")
+
+    metrics.trace(path)
+
+    with metrics.span("remote", host="hpc1", cmdclass="status") as details:
+
+        details["bytes"] = 12
+
+    metrics.observe("monitor", 0.5)
+    metrics.trace(None)
+    metrics.observe("monitor", 0.5)
+
+    with open(path) as trace:
+
+        events = [json.loads(line) for line in trace]
+
+    assert len(events) == 2
+    assert events[0]["name"] == "remote"
+    assert events[0]["host"] == "hpc1"
+    assert events[0]["cmdclass"] == "status"
+    assert events[0]["bytes"] == 12
+    assert events[0]["seconds"] >= 0
+    assert events[1]["name"] == "monitor"
+    assert events[1]["seconds"] == 0.5
+    assert events[1]["start"] > 0
@@ -0,0 +1,103 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the plugin indexes within the apps
+and schedulers packages.
+"""
+
+import importlib
+
+import pytest
+
+import longbow.apps as apps
+import longbow.schedulers as schedulers
+
+
+def test_index_apps():
+
+    """
+    Test that every application plugin shipped is indexed with the
+    executables from its EXECDATA and its MODULENAME overrides.
+    """
+
+    shipped = [name for name in apps.PLUGINS
+               if apps.MODULES[name] == "longbow.apps." + name]
+
+    assert sorted(apps.INDEX) == shipped
+
+    for plugin in shipped:
+
+        mod = importlib.import_module("longbow.apps." + plugin)
+
+        assert apps.INDEX[plugin]["executables"] == list(mod.EXECDATA.keys())
+        assert apps.INDEX[plugin]["modulename"] == dict(
+            getattr(mod, "MODULENAME", {}))
+
+        for executable in mod.EXECDATA:
+
+            assert apps.PLUGINEXECS[executable] == plugin
+            assert executable in apps.EXECLIST
+
+
+def test_index_schedulers():
+
+    """
+    Test that every scheduler plugin shipped is indexed with its query string.
+    """
+
+    shipped = [name for name in schedulers.PLUGINS
+               if schedulers.MODULES[name] == "longbow.schedulers." + name]
+
+    assert sorted(schedulers.INDEX) == shipped
+
+    for plugin in shipped:
+
+        mod = importlib.import_module("longbow.schedulers." + plugin)
+
+        assert schedulers.QUERY[plugin] == [mod.QUERY_STRING]
+
+
+def test_index_lazy():
+
+    """
+    Test that plugins are imported on first use through the package.
+    """
+
+    assert apps.namd.EXECDATA["namd2"]["requiredfiles"] == ["<"]
+    assert hasattr(schedulers.pbs, "submit")
+    assert getattr(getattr(apps, "amber"), "file_parser", None) is None
+
+    with pytest.raises(AttributeError):
+
+        getattr(apps, "notaplugin")
+
+    with pytest.raises(AttributeError):
+
+        getattr(schedulers, "notaplugin")
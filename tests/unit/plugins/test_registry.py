@@ -0,0 +1,202 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the registry method within the
+plugins module.
+"""
+
+import importlib
+import json
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import longbow.apps as apps
+import longbow.plugins as plugins
+import longbow.schedulers as schedulers
+
+
+def _entrypoint(name, value):
+    """A stand in for an installed entry point."""
+
+    entrypoint = mock.Mock(value=value)
+    entrypoint.name = name
+
+    return entrypoint
+
+
+def _entrypoints(group):
+    """Entry points as if registered by a site package."""
+
+    if group == "longbow.apps":
+
+        return [_entrypoint("sitenamd", "longbow.apps.namd"),
+                _entrypoint("broken", "longbow.apps.notamodule")]
+
+    return [_entrypoint("sitepbs", "longbow.schedulers.pbs:submit")]
+
+
+@mock.patch('longbow.plugins._entrypoints', side_effect=_entrypoints)
+def test_registry_scan(m_entry):
+
+    """
+    Test that installed plugins are imported to find their executables and
+    query strings, and broken ones are skipped.
+    """
+
+    registry = plugins._scan()
+
+    assert registry["apps"] == {
+        "sitenamd": {
+            "module": "longbow.apps.namd",
+            "executables": ["namd2", "namd2.mpi", "namd2.cuda"],
+            "modulename": {}
+            }
+        }
+    assert registry["schedulers"] == {
+        "sitepbs": {
+            "module": "longbow.schedulers.pbs",
+            "query": "env | grep -i 'pbs'"
+            }
+        }
+
+
+@mock.patch('longbow.plugins._fingerprint')
+@mock.patch('longbow.plugins._scan')
+def test_registry_cache(m_scan, m_print, tmpdir):
+
+    """
+    Test that installed packages are only scanned again once the python path
+    changes.
+    """
+
+    cachefile = tmpdir.join("plugins.json")
+    found = {"apps": {}, "schedulers": {"sitepbs": {
+        "module": "longbow.schedulers.pbs", "query": "which qsub"}}}
+
+    m_scan.return_value = found
+    m_print.return_value = [plugins.VERSION, [3, 11], [["/some/path", 1.0]]]
+
+    with mock.patch('longbow.plugins.CACHEFILE', str(cachefile)):
+
+        for _ in range(2):
+
+            with mock.patch('longbow.plugins.REGISTRY', None):
+
+                assert plugins.registry() == found
+
+        assert m_scan.call_count == 1
+        assert json.load(cachefile)["registry"] == found
+
+        m_print.return_value = [plugins.VERSION, [3, 11],
+                                [["/some/path", 2.0]]]
+
+        with mock.patch('longbow.plugins.REGISTRY', None):
+
+            plugins.registry()
+
+        assert m_scan.call_count == 2
+
+
+@mock.patch('longbow.plugins._scan')
+def test_registry_nodirectory(m_scan, tmpdir):
+
+    """
+    Test that the registry isn't saved if the Longbow directory is missing.
+    """
+
+    m_scan.return_value = {"apps": {}, "schedulers": {}}
+
+    cachefile = tmpdir.join("missing", "plugins.json")
+
+    with mock.patch('longbow.plugins.CACHEFILE', str(cachefile)), \
+            mock.patch('longbow.plugins.REGISTRY', None):
+
+        plugins.registry()
+
+    assert tmpdir.join("missing").check() is False
+
+
+def test_registry_packages():
+
+    """
+    Test that the apps and schedulers packages take up installed plugins,
+    without letting them replace those shipped with Longbow.
+    """
+
+    registry = {
+        "apps": {
+            "sitenamd": {
+                "module": "longbow.apps.namd",
+                "executables": ["namd2", "sitenamd2"],
+                "modulename": {"sitenamd": "namd/site"}
+                },
+            "amber": {
+                "module": "longbow.apps.namd",
+                "executables": ["sander"],
+                "modulename": {}
+                }
+            },
+        "schedulers": {
+            "sitepbs": {
+                "module": "longbow.schedulers.pbs",
+                "query": "which qsub"
+                }
+            }
+        }
+
+    try:
+
+        with mock.patch('longbow.plugins.REGISTRY', registry):
+
+            importlib.reload(apps)
+            importlib.reload(schedulers)
+
+            assert apps.PLUGINEXECS["sitenamd2"] == "sitenamd"
+            assert apps.PLUGINEXECS["namd2"] == "namd"
+            assert "sander" not in apps.PLUGINEXECS
+            assert list(apps.MODNAMEOVERRIDES["sitenamd"]) == [
+                ("sitenamd", "namd/site")]
+            assert apps.sitenamd is importlib.import_module(
+                "longbow.apps.namd")
+            assert schedulers.QUERY["sitepbs"] == ["which qsub"]
+            assert hasattr(schedulers.sitepbs, "submit")
+
+    finally:
+
+        vars(apps).pop("sitenamd", None)
+        vars(schedulers).pop("sitepbs", None)
+        importlib.reload(apps)
+        importlib.reload(schedulers)
@@ -0,0 +1,81 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the compilepattern method within
+the scanner module.
+"""
+
+from longbow.scanner import compilepattern
+
+
+def test_compilepattern_first():
+
+    """
+    Test that words are only matched as the first word on a line, whole and
+    regardless of case.
+    """
+
+    pattern = compilepattern(first=["structure", "set"], comment="#")
+
+    assert pattern("structure file.psf\n") is True
+    assert pattern("  STRUCTURE file.psf\n") is True
+    assert pattern("set x = 1\n") is True
+    assert pattern("structure#comment\n") is True
+    assert pattern("structure\n") is True
+    assert pattern("structures file.psf\n") is False
+    assert pattern("coordinates structure\n") is False
+    assert pattern("# structure file.psf\n") is False
+
+
+def test_compilepattern_anywhere():
+
+    """
+    Test that words are looked for anywhere on a line.
+    """
+
+    pattern = compilepattern(first=["set"], anywhere=["name"], comment="!")
+
+    assert pattern("OPEN UNIT 1 CARD READ NAME file\n") is True
+    assert pattern("read name! comment\n") is True
+    assert pattern("SET x 1\n") is True
+    assert pattern("read file\n") is False
+    assert pattern("x set 1\n") is False
+
+
+def test_compilepattern_escape():
+
+    """
+    Test that words and comment characters are matched literally.
+    """
+
+    pattern = compilepattern(first=["ave/time"], comment="*")
+
+    assert pattern("ave/time*\n") is True
+    assert pattern("aveXtime\n") is False
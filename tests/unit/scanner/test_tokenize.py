@@ -0,0 +1,86 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the tokenize method within the
+scanner module.
+"""
+
+import pytest
+
+from longbow.scanner import compilepattern, tokenize
+
+
+def test_tokenize_all():
+
+    """
+    Test that without a pattern every line is tokenized, with comments and
+    blank lines dropped.
+    """
+
+    lines = ["include file # comment\n", "# comment\n", "\n", "   \n",
+             "read_data\tdata.file\n"]
+
+    assert list(tokenize(lines, None, "#")) == [
+        ["include", "file"], ["read_data", "data.file"]]
+
+
+def test_tokenize_pattern():
+
+    """
+    Test that only the lines matching the pattern are tokenized.
+    """
+
+    pattern = compilepattern(first=["parameters"], comment="#")
+
+    lines = ["parameters par.prm # comment\n", "cutoff 12\n",
+             "#parameters old.prm\n", "PARAMETERS other.prm\n"]
+
+    assert list(tokenize(lines, pattern, "#")) == [
+        ["parameters", "par.prm"], ["PARAMETERS", "other.prm"]]
+
+
+def test_tokenize_lazy():
+
+    """
+    Test that errors reading lines are raised as the caller iterates.
+    """
+
+    def lines():
+
+        yield "parameters par.prm\n"
+        raise UnicodeDecodeError('blah', b'', 80, 0, '')
+
+    tokens = tokenize(lines(), None, "#")
+
+    assert next(tokens) == ["parameters", "par.prm"]
+
+    with pytest.raises(UnicodeDecodeError):
+
+        next(tokens)
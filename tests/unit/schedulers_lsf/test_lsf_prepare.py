@@ -396,3 +396,42 @@ def test_prepare_case10():
         os.path.join(
             os.getcwd(),
             "tests/standards/lsf_submitfiles/case10.txt"), "rb").read()
+
+
+def test_prepare_statusfile():
+
+    """
+    Test that each task of a job array writes start and finish markers
+    to the status file.
+    """
+
+    job = {
+        "account": "",
+        "cores": "24",
+        "executableargs": "pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out",
+        "handler": "mpirun",
+        "email-address": "",
+        "email-flags": "",
+        "jobname": "testjob",
+        "localworkdir": "/tmp",
+        "lsf-cluster": "",
+        "maxtime": "24:00",
+        "memory": "",
+        "modules": "amber",
+        "queue": "debug",
+        "replicates": "5",
+        "stdout": "",
+        "stderr": "",
+        "scripts": "",
+        "upload-include": "file1, file2",
+        "statusfile": "/home/test/.longbow-status"
+    }
+
+    prepare(job)
+
+    submitfile = open("/tmp/submit.lsf", "r").read()
+
+    assert ('echo "testjob start ${LSB_JOBINDEX} 5" >> '
+            '/home/test/.longbow-status\n' in submitfile)
+    assert ('echo "testjob finish ${LSB_JOBINDEX} 5 $?" >> '
+            '/home/test/.longbow-status\n' in submitfile)
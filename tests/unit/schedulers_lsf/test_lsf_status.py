@@ -59,7 +59,23 @@ out = ("953580  scarf45 DONE  scarf      scarf.rl.ac             3t3b_sym   Feb
        "953717  scarf45 ZOMBI scarf      scarf.rl.ac             2t4b       Feb 26 14:40\n")
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+def _stream(output):
+    """Feed output to the status parser a line at a time."""
+
+    def sendtosshstream(job, args, callback):
+
+        for line in output.split("\n"):
+
+            if callback(line) is True:
+
+                break
+
+        return "", "", 0
+
+    return sendtosshstream
+
+
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state1(mock_ssh):
 
     """
@@ -71,14 +87,14 @@ def test_status_state1(mock_ssh):
         "jobid": "953580"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Job Exited Properly"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state2(mock_ssh):
 
     """
@@ -90,14 +106,14 @@ def test_status_state2(mock_ssh):
         "jobid": "953601"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Job Exited in Error"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state3(mock_ssh):
 
     """
@@ -109,14 +125,14 @@ def test_status_state3(mock_ssh):
         "jobid": "953631"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Queued"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state4(mock_ssh):
 
     """
@@ -128,14 +144,14 @@ def test_status_state4(mock_ssh):
         "jobid": "953710"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Suspended"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state5(mock_ssh):
 
     """
@@ -147,14 +163,14 @@ def test_status_state5(mock_ssh):
         "jobid": "953711"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Running"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state6(mock_ssh):
 
     """
@@ -166,14 +182,14 @@ def test_status_state6(mock_ssh):
         "jobid": "953712"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Suspended"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state7(mock_ssh):
 
     """
@@ -185,14 +201,14 @@ def test_status_state7(mock_ssh):
         "jobid": "953713"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Unknown Status"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state8(mock_ssh):
 
     """
@@ -204,14 +220,14 @@ def test_status_state8(mock_ssh):
         "jobid": "953715"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Suspended"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state9(mock_ssh):
 
     """
@@ -223,14 +239,14 @@ def test_status_state9(mock_ssh):
         "jobid": "953716"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == ("Waiting for Start Time")
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state10(mock_ssh):
 
     """
@@ -242,14 +258,14 @@ def test_status_state10(mock_ssh):
         "jobid": "953717"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Zombie Job"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state11(mock_ssh):
 
     """
@@ -261,14 +277,14 @@ def test_status_state11(mock_ssh):
         "jobid": "3538341"
     }
 
-    mock_ssh.return_value = ("", "", 0)
+    mock_ssh.side_effect = _stream("")
 
     output = status(job)
 
     assert output == "Finished"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_except1(mock_ssh):
 
     """
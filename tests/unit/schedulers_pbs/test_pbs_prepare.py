@@ -454,3 +454,90 @@ def test_prepare_case11():
         os.path.join(
             os.getcwd(),
             "tests/standards/pbs_submitfiles/case11.txt"), "rb").read()
+
+
+def test_prepare_statusfile():
+
+    """
+    Test that each task of a job array writes start and finish markers
+    to the status file.
+    """
+
+    job = {
+        "account": "",
+        "cluster": "",
+        "cores": "24",
+        "corespernode": "24",
+        "executableargs": "pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out",
+        "handler": "mpirun",
+        "email-address": "",
+        "email-flags": "",
+        "jobname": "testjob",
+        "localworkdir": "/tmp",
+        "maxtime": "24:00",
+        "memory": "",
+        "modules": "amber",
+        "mpiprocs": "",
+        "queue": "debug",
+        "replicates": "5",
+        "stdout": "",
+        "stderr": "",
+        "scripts": "",
+        "upload-include": "file1, file2",
+        "statusfile": "/home/test/.longbow-status"
+    }
+
+    prepare(job)
+
+    submitfile = open("/tmp/submit.pbs", "r").read()
+
+    assert ('echo "testjob start ${PBS_ARRAY_INDEX} 5" >> '
+            '/home/test/.longbow-status\n' in submitfile)
+    assert ('echo "testjob finish ${PBS_ARRAY_INDEX} 5 $?" >> '
+            '/home/test/.longbow-status\n' in submitfile)
+
+
+def test_prepare_sitetemplate(tmpdir):
+
+    """
+    Test that a site template can use the values worked out by the plugin.
+    """
+
+    tmpdir.join("site.tmpl").write(
+        "#PBS -l {{resources}}\n"
+        "{% if array %}\n"
+        "#PBS -J 1-{{replicates}}\n"
+        "{% endif %}\n"
+        "{{mpirun}} {{executableargs}}\n")
+
+    job = {
+        "account": "",
+        "cluster": "",
+        "cores": "48",
+        "corespernode": "24",
+        "executableargs": "pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out",
+        "handler": "aprun",
+        "email-address": "",
+        "email-flags": "",
+        "jobname": "testjob",
+        "localworkdir": str(tmpdir),
+        "maxtime": "24:00",
+        "memory": "",
+        "modules": "amber",
+        "mpiprocs": "",
+        "queue": "debug",
+        "replicates": "5",
+        "stdout": "",
+        "stderr": "",
+        "scripts": "",
+        "submit-template": str(tmpdir.join("site.tmpl")),
+        "upload-include": "file1, file2"
+    }
+
+    prepare(job)
+
+    assert job["subfile"] == "submit.pbs"
+    assert tmpdir.join("submit.pbs").read() == (
+        "#PBS -l select=2:ncpus=24:mpiprocs=24\n"
+        "#PBS -J 1-5\n"
+        "aprun -n 48 -N 24 pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out\n")
@@ -62,7 +62,23 @@ out = ("Job ID          Username Queue    Jobname    SessID NDS TSK Memory Time
        "3538341.sdb     katrine  standard ZrF-mir       --    4  96    --  00:20 X   -- \n")
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+def _stream(output):
+    """Feed output to the status parser a line at a time."""
+
+    def sendtosshstream(job, args, callback):
+
+        for line in output.split("\n"):
+
+            if callback(line) is True:
+
+                break
+
+        return "", "", 0
+
+    return sendtosshstream
+
+
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state1(mock_ssh):
 
     """
@@ -74,14 +90,14 @@ def test_status_state1(mock_ssh):
         "jobid": "3530460"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Subjob(s) Running"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state2(mock_ssh):
 
     """
@@ -93,14 +109,14 @@ def test_status_state2(mock_ssh):
         "jobid": "3530473"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Exiting"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state3(mock_ssh):
 
     """
@@ -112,14 +128,14 @@ def test_status_state3(mock_ssh):
         "jobid": "3537896"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Held"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state4(mock_ssh):
 
     """
@@ -131,14 +147,14 @@ def test_status_state4(mock_ssh):
         "jobid": "3537971"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Job Moved to Server"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state5(mock_ssh):
 
     """
@@ -150,14 +166,14 @@ def test_status_state5(mock_ssh):
         "jobid": "3537972"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Queued"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state6(mock_ssh):
 
     """
@@ -169,14 +185,14 @@ def test_status_state6(mock_ssh):
         "jobid": "3537974"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Running"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state7(mock_ssh):
 
     """
@@ -188,14 +204,14 @@ def test_status_state7(mock_ssh):
         "jobid": "3538328"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Suspended"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state8(mock_ssh):
 
     """
@@ -207,14 +223,14 @@ def test_status_state8(mock_ssh):
         "jobid": "3538333"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Job Moved to New Location"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state9(mock_ssh):
 
     """
@@ -226,7 +242,7 @@ def test_status_state9(mock_ssh):
         "jobid": "3538337"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
@@ -234,7 +250,7 @@ def test_status_state9(mock_ssh):
                       "Activity")
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state10(mock_ssh):
 
     """
@@ -246,14 +262,14 @@ def test_status_state10(mock_ssh):
         "jobid": "3538340"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Waiting for Start Time"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state11(mock_ssh):
 
     """
@@ -265,14 +281,14 @@ def test_status_state11(mock_ssh):
         "jobid": "3538341"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Subjob Completed Execution/Has Been Deleted"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state12(mock_ssh):
 
     """
@@ -284,14 +300,14 @@ def test_status_state12(mock_ssh):
         "jobid": "3538341"
     }
 
-    mock_ssh.return_value = ("", "", 0)
+    mock_ssh.side_effect = _stream("")
 
     output = status(job)
 
     assert output == "Finished"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_except1(mock_ssh):
 
     """
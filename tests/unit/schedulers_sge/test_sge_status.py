@@ -54,7 +54,23 @@ out = ("job-ID  prior name       user         state submit/start at     queue
        "     22     0 sleep.sh   sysadm1      r      12/23/2003 23:22:09 frontend-0 MASTER           \n")
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+def _stream(output):
+    """Feed output to the status parser a line at a time."""
+
+    def sendtosshstream(job, args, callback):
+
+        for line in output.split("\n"):
+
+            if callback(line) is True:
+
+                break
+
+        return "", "", 0
+
+    return sendtosshstream
+
+
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state1(mock_ssh):
 
     """
@@ -66,14 +82,14 @@ def test_status_state1(mock_ssh):
         "jobid": "20"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Queued"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state2(mock_ssh):
 
     """
@@ -85,14 +101,14 @@ def test_status_state2(mock_ssh):
         "jobid": "21"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Held"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state3(mock_ssh):
 
     """
@@ -104,14 +120,14 @@ def test_status_state3(mock_ssh):
         "jobid": "22"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Running"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state4(mock_ssh):
 
     """
@@ -123,14 +139,14 @@ def test_status_state4(mock_ssh):
         "jobid": "3538341"
     }
 
-    mock_ssh.return_value = ("", "", 0)
+    mock_ssh.side_effect = _stream("")
 
     output = status(job)
 
     assert output == "Finished"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_except1(mock_ssh):
 
     """
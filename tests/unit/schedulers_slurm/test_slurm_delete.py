@@ -45,7 +45,7 @@ except ImportError:
 import pytest
 
 import longbow.exceptions as exceptions
-from longbow.schedulers.slurm import delete
+from longbow.schedulers.slurm import bulkdelete, delete
 
 
 @mock.patch('longbow.shellwrappers.sendtossh')
@@ -88,3 +88,46 @@ def test_delete_except1(mock_ssh):
     with pytest.raises(exceptions.JobdeleteError):
 
         delete(job)
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_bulkdelete_test1(mock_ssh):
+
+    """
+    Test that several jobs are killed with a single command.
+    """
+
+    jobs = [
+        {"jobid": "12345"},
+        {"jobid": "12346"}
+    ]
+
+    mock_ssh.return_value = ("Success", "", 0)
+
+    output = bulkdelete(jobs)
+
+    args = mock_ssh.call_args[0][1]
+
+    assert output == "Success"
+    assert mock_ssh.call_count == 1
+    assert " ".join(args) == "scancel 12345 12346"
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_bulkdelete_except1(mock_ssh):
+
+    """
+    Test if jobdelete exception is triggered based on output from scheduler.
+    """
+
+    jobs = [
+        {"jobid": "12345"},
+        {"jobid": "12346"}
+    ]
+
+    mock_ssh.side_effect = exceptions.SSHError(
+        "Error", ("out", "", 0))
+
+    with pytest.raises(exceptions.JobdeleteError):
+
+        bulkdelete(jobs)
@@ -397,3 +397,97 @@ def test_prepare_case9():
         os.path.join(
             os.getcwd(),
             "tests/standards/slurm_submitfiles/case9.txt"), "rb").read()
+
+
+def test_prepare_statusfile():
+
+    """
+    Test that the job writes start and finish markers to the status file,
+    the replicates all run within the one job.
+    """
+
+    job = {
+        "account": "",
+        "cluster": "",
+        "cores": "24",
+        "corespernode": "24",
+        "executableargs": "pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out",
+        "handler": "mpirun",
+        "email-address": "",
+        "email-flags": "",
+        "jobname": "testjob",
+        "localworkdir": "/tmp",
+        "maxtime": "24:00",
+        "memory": "",
+        "modules": "amber",
+        "queue": "debug",
+        "replicates": "5",
+        "stdout": "",
+        "stderr": "",
+        "scripts": "",
+        "slurm-gres": "",
+        "sge-peflag": "mpi",
+        "sge-peoverride": "false",
+        "upload-include": "file1, file2",
+        "statusfile": "/home/test/.longbow-status"
+    }
+
+    prepare(job)
+
+    submitfile = open("/tmp/submit.slurm", "r").read()
+
+    assert ('echo "testjob start 1 1" >> /home/test/.longbow-status\n'
+            in submitfile)
+    assert ('echo "testjob finish 1 1 $status" >> '
+            '/home/test/.longbow-status\n' in submitfile)
+
+    # The replicates run one after another, so the exit code of each has to
+    # be kept rather than that of the wait at the end.
+    loop = submitfile[submitfile.index("do\n"):submitfile.index("done\n")]
+
+    assert "status=0\n" in submitfile
+    assert "  rc=$?\n" in loop
+    assert "  if [ $rc -ne 0 ]; then status=$rc; fi\n" in loop
+
+
+def test_prepare_statusfile_single():
+
+    """
+    Test that a job without replicates reports the exit code of its run.
+    """
+
+    job = {
+        "account": "",
+        "cluster": "",
+        "cores": "24",
+        "corespernode": "24",
+        "executableargs": "pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out",
+        "handler": "mpirun",
+        "email-address": "",
+        "email-flags": "",
+        "jobname": "testjob",
+        "localworkdir": "/tmp",
+        "maxtime": "24:00",
+        "memory": "",
+        "modules": "amber",
+        "queue": "debug",
+        "replicates": "1",
+        "stdout": "",
+        "stderr": "",
+        "scripts": "",
+        "slurm-gres": "",
+        "sge-peflag": "mpi",
+        "sge-peoverride": "false",
+        "upload-include": "file1, file2",
+        "statusfile": "/home/test/.longbow-status"
+    }
+
+    prepare(job)
+
+    submitfile = open("/tmp/submit.slurm", "r").read()
+
+    assert ("mpirun pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out\n"
+            "status=$?\n" in submitfile)
+    assert ('echo "testjob finish 1 1 $status" >> '
+            '/home/test/.longbow-status\n' in submitfile)
+    assert "rc=$?" not in submitfile
@@ -61,7 +61,23 @@ out = ("             JOBID PARTITION     NAME     USER ST       TIME  NODES NODE
        "               610 interacti  run2.sh     user TO       0:19      1 blade01)\n")
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+def _stream(output):
+    """Feed output to the status parser a line at a time."""
+
+    def sendtosshstream(job, args, callback):
+
+        for line in output.split("\n"):
+
+            if callback(line) is True:
+
+                break
+
+        return "", "", 0
+
+    return sendtosshstream
+
+
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state1(mock_ssh):
 
     """
@@ -73,14 +89,14 @@ def test_status_state1(mock_ssh):
         "jobid": "600"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Cancelled"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state2(mock_ssh):
 
     """
@@ -92,14 +108,14 @@ def test_status_state2(mock_ssh):
         "jobid": "601"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Completed"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state3(mock_ssh):
 
     """
@@ -111,14 +127,14 @@ def test_status_state3(mock_ssh):
         "jobid": "602"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Configuring"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state4(mock_ssh):
 
     """
@@ -130,14 +146,14 @@ def test_status_state4(mock_ssh):
         "jobid": "603"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Completing"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state5(mock_ssh):
 
     """
@@ -149,14 +165,14 @@ def test_status_state5(mock_ssh):
         "jobid": "604"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Failed"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state6(mock_ssh):
 
     """
@@ -168,14 +184,14 @@ def test_status_state6(mock_ssh):
         "jobid": "605"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Node Failure"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state7(mock_ssh):
 
     """
@@ -187,14 +203,14 @@ def test_status_state7(mock_ssh):
         "jobid": "606"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Pending"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state8(mock_ssh):
 
     """
@@ -206,14 +222,14 @@ def test_status_state8(mock_ssh):
         "jobid": "607"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Preempted"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state9(mock_ssh):
 
     """
@@ -225,14 +241,14 @@ def test_status_state9(mock_ssh):
         "jobid": "608"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == ("Running")
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state10(mock_ssh):
 
     """
@@ -244,14 +260,14 @@ def test_status_state10(mock_ssh):
         "jobid": "609"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Suspended"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state11(mock_ssh):
 
     """
@@ -263,14 +279,14 @@ def test_status_state11(mock_ssh):
         "jobid": "610"
     }
 
-    mock_ssh.return_value = (out, "", 0)
+    mock_ssh.side_effect = _stream(out)
 
     output = status(job)
 
     assert output == "Timed out"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_state12(mock_ssh):
 
     """
@@ -282,14 +298,14 @@ def test_status_state12(mock_ssh):
         "jobid": "3538341"
     }
 
-    mock_ssh.return_value = ("", "", 0)
+    mock_ssh.side_effect = _stream("")
 
     output = status(job)
 
     assert output == "Finished"
 
 
-@mock.patch('longbow.shellwrappers.sendtossh')
+@mock.patch('longbow.shellwrappers.sendtosshstream')
 def test_status_except1(mock_ssh):
 
     """
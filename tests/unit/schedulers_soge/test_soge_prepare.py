@@ -388,3 +388,45 @@ def test_prepare_case9():
         os.path.join(
             os.getcwd(),
             "tests/standards/soge_submitfiles/case9.txt"), "rb").read()
+
+
+def test_prepare_statusfile():
+
+    """
+    Test that each task of a job array writes start and finish markers
+    to the status file.
+    """
+
+    job = {
+        "account": "",
+        "cluster": "",
+        "cores": "24",
+        "corespernode": "24",
+        "executableargs": "pmemd.MPI -O -i e.in -c e.min -p e.top -o e.out",
+        "handler": "mpirun",
+        "email-address": "",
+        "email-flags": "",
+        "jobname": "testjob",
+        "localworkdir": "/tmp",
+        "maxtime": "24:00",
+        "memory": "",
+        "modules": "amber",
+        "queue": "debug",
+        "replicates": "5",
+        "stdout": "",
+        "stderr": "",
+        "scripts": "",
+        "sge-peflag": "mpi",
+        "sge-peoverride": "false",
+        "upload-include": "file1, file2",
+        "statusfile": "/home/test/.longbow-status"
+    }
+
+    prepare(job)
+
+    submitfile = open("/tmp/submit.soge", "r").read()
+
+    assert ('echo "testjob start ${SGE_TASK_ID} 5" >> '
+            '/home/test/.longbow-status\n' in submitfile)
+    assert ('echo "testjob finish ${SGE_TASK_ID} 5 $?" >> '
+            '/home/test/.longbow-status\n' in submitfile)
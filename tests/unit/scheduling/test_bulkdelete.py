@@ -0,0 +1,153 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the bulkdelete method within the
+scheduling module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import longbow.exceptions as exceptions
+from longbow.scheduling import bulkdelete
+
+
+def _jobs(count, resource="test-machine", scheduler="LSF"):
+
+    """Build a list of job dictionaries."""
+
+    return [{"jobname": "job" + str(i), "resource": resource,
+             "scheduler": scheduler, "jobid": str(i)} for i in range(count)]
+
+
+@mock.patch('longbow.scheduling.delete')
+@mock.patch('longbow.schedulers.lsf.bulkdelete')
+def test_bulkdelete_single(mock_bulk, mock_delete):
+
+    """
+    Test that jobs on one resource are deleted with one command.
+    """
+
+    jobs = _jobs(3)
+
+    bulkdelete(jobs)
+
+    assert mock_bulk.call_count == 1
+    assert mock_bulk.call_args[0][0] == jobs
+    assert mock_delete.call_count == 0
+
+
+@mock.patch('longbow.schedulers.slurm.bulkdelete')
+@mock.patch('longbow.schedulers.lsf.bulkdelete')
+def test_bulkdelete_resources(mock_lsf, mock_slurm):
+
+    """
+    Test that jobs are grouped by resource and scheduler.
+    """
+
+    jobs = (_jobs(2) + _jobs(2, "other-machine") +
+            _jobs(1, "slurm-machine", "Slurm"))
+
+    bulkdelete(jobs)
+
+    assert mock_lsf.call_count == 2
+    assert mock_slurm.call_count == 1
+    assert len(mock_slurm.call_args[0][0]) == 1
+
+
+@mock.patch('longbow.schedulers.lsf.bulkdelete')
+def test_bulkdelete_batches(mock_bulk):
+
+    """
+    Test that large numbers of jobs are split into batches.
+    """
+
+    bulkdelete(_jobs(250))
+
+    sizes = sorted(len(call[0][0]) for call in mock_bulk.call_args_list)
+
+    assert sizes == [50, 100, 100]
+
+
+@mock.patch('longbow.scheduling.delete')
+@mock.patch('longbow.schedulers.lsf.bulkdelete')
+def test_bulkdelete_fallback(mock_bulk, mock_delete):
+
+    """
+    Test that a failed bulk command falls back to deleting each job.
+    """
+
+    mock_bulk.side_effect = exceptions.JobdeleteError("Delete Error")
+
+    bulkdelete(_jobs(3))
+
+    assert mock_bulk.call_count == 1
+    assert mock_delete.call_count == 3
+
+
+@mock.patch('longbow.scheduling.delete')
+@mock.patch('longbow.schedulers.lsf')
+def test_bulkdelete_noplugin(mock_plugin, mock_delete):
+
+    """
+    Test that plugins without bulkdelete delete each job in turn.
+    """
+
+    del mock_plugin.bulkdelete
+
+    bulkdelete(_jobs(2))
+
+    assert mock_delete.call_count == 2
+
+
+@mock.patch('longbow.scheduling.delete')
+@mock.patch('longbow.schedulers.lsf.bulkdelete')
+def test_bulkdelete_notsubmitted(mock_bulk, mock_delete):
+
+    """
+    Test that jobs waiting to be submitted, which have no job id, are left
+    out rather than stopping the others being deleted.
+    """
+
+    jobs = _jobs(3)
+    waiting = {"jobname": "job3", "resource": "test-machine",
+               "scheduler": "LSF", "laststatus": "Waiting Submission"}
+
+    bulkdelete(jobs + [waiting])
+
+    assert mock_bulk.call_count == 1
+    assert mock_bulk.call_args[0][0] == jobs
+    assert mock_delete.call_count == 0
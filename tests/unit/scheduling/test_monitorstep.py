@@ -0,0 +1,281 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the monitorstep method within the
+scheduling module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import longbow.metrics as metrics
+
+from longbow.scheduling import monitorstart, monitorstep, monitorstop
+
+
+def _jobs():
+
+    """
+    Build a jobs structure for the tests.
+    """
+
+    return {
+        "lbowconf": {
+            "recoveryfile": "recovery-YYMMDD-HHMMSS",
+            "hpc1-queue-slots": "1",
+            "hpc1-queue-max": "2"
+        },
+        "jobone": {
+            "resource": "hpc1",
+            "laststatus": "Running",
+            "polling-frequency": "60",
+            "staging-frequency": "0"
+        }
+    }
+
+
+@mock.patch('longbow.scheduling._checkwaitingjobs')
+@mock.patch('longbow.scheduling._polljobs')
+def test_monitorstep_poll(m_poll, m_wait):
+
+    """
+    Test that jobs are only polled once the polling interval has passed.
+    """
+
+    jobs = _jobs()
+    m_poll.return_value = False
+    m_wait.return_value = False
+
+    state = monitorstart(jobs)
+
+    monitorstep(jobs, state, 1000.0)
+    monitorstep(jobs, state, 1030.0)
+    monitorstep(jobs, state, 1061.0)
+
+    assert m_poll.call_count == 2
+    assert state["lastpolltime"] == 1061
+
+
+@mock.patch('longbow.scheduling._checkwaitingjobs')
+@mock.patch('longbow.scheduling._polljobs')
+def test_monitorstep_align(m_poll, m_wait):
+
+    """
+    Test that aligned sessions started at different times poll together.
+    """
+
+    first = _jobs()
+    second = _jobs()
+    m_poll.return_value = False
+    m_wait.return_value = False
+
+    firststate = monitorstart(first, align=True)
+    monitorstep(first, firststate, 1000.0)
+
+    secondstate = monitorstart(second, align=True)
+    monitorstep(second, secondstate, 1025.0)
+
+    assert firststate["lastpolltime"] == 960
+    assert secondstate["lastpolltime"] == 1020
+
+    polls = {"first": [], "second": []}
+
+    for now in range(1026, 1150):
+
+        for name, jobs, state in (("first", first, firststate),
+                                  ("second", second, secondstate)):
+
+            last = state["lastpolltime"]
+
+            monitorstep(jobs, state, float(now))
+
+            if state["lastpolltime"] != last:
+
+                polls[name].append(now)
+
+    assert polls["first"] == [1026, 1081, 1141]
+    assert polls["second"] == [1081, 1141]
+
+
+@mock.patch('os.path.isdir', mock.MagicMock(return_value=True))
+@mock.patch('longbow.configuration.saveini')
+@mock.patch('longbow.scheduling._checkwaitingjobs')
+@mock.patch('longbow.scheduling._polljobs')
+def test_monitorstep_save(m_poll, m_wait, m_save):
+
+    """
+    Test that the recovery file is only saved when something has changed.
+    """
+
+    jobs = _jobs()
+    m_poll.return_value = False
+    m_wait.side_effect = lambda jobs, save: save
+
+    state = monitorstart(jobs)
+
+    monitorstep(jobs, state, 1000.0)
+
+    assert m_save.call_count == 0
+
+    m_poll.return_value = True
+
+    monitorstep(jobs, state, 1100.0)
+    monitorstep(jobs, state, 1110.0)
+
+    assert m_save.call_count == 1
+    assert m_save.call_args[0][0].endswith("recovery-YYMMDD-HHMMSS")
+
+
+@mock.patch('longbow.staging.stage_downstream')
+@mock.patch('longbow.scheduling._checkwaitingjobs')
+@mock.patch('longbow.scheduling._polljobs')
+def test_monitorstep_complete(m_poll, m_wait, m_down):
+
+    """
+    Test that finished jobs are staged and the session reported complete.
+    """
+
+    jobs = _jobs()
+    jobs["jobone"]["laststatus"] = "Finished"
+    m_poll.return_value = False
+    m_wait.return_value = False
+
+    state = monitorstart(jobs)
+
+    assert monitorstep(jobs, state, 1000.0) == (False, True)
+    assert monitorstep(jobs, state, 1001.0)[0] is True
+    assert m_down.call_count == 1
+    assert jobs["jobone"]["laststatus"] == "Complete"
+
+
+@mock.patch.dict('longbow.scheduling.JOBSTATES', clear=True)
+@mock.patch('longbow.scheduling._checkwaitingjobs')
+@mock.patch('longbow.scheduling._polljobs')
+def test_monitorstep_gauges(m_poll, m_wait):
+
+    """
+    Test that each pass counts the jobs in each state for Prometheus.
+    """
+
+    jobs = _jobs()
+    jobs["jobtwo"] = dict(jobs["jobone"])
+    m_poll.return_value = False
+    m_wait.return_value = False
+
+    metrics.reset()
+    state = monitorstart(jobs)
+    monitorstep(jobs, state, 1000.0)
+
+    assert ('longbow_jobs{resource="hpc1",state="Running"} 2' in
+            metrics.exposition().splitlines())
+
+    jobs["jobtwo"]["laststatus"] = "Queued"
+    monitorstep(jobs, state, 1001.0)
+
+    assert [line for line in metrics.exposition().splitlines()
+            if line.startswith("longbow_jobs")] == [
+                'longbow_jobs{resource="hpc1",state="Queued"} 1',
+                'longbow_jobs{resource="hpc1",state="Running"} 1']
+
+    monitorstop(jobs)
+    metrics.reset()
+
+
+@mock.patch.dict('longbow.scheduling.JOBSTATES', clear=True)
+@mock.patch('longbow.scheduling._checkwaitingjobs')
+@mock.patch('longbow.scheduling._polljobs')
+def test_monitorstep_gaugesessions(m_poll, m_wait):
+
+    """
+    Test that the gauges total the jobs of every session, including ones
+    without a recovery file, and that sessions that stop are taken out.
+    """
+
+    first = _jobs()
+    second = _jobs()
+    first["lbowconf"]["recoveryfile"] = ""
+    second["lbowconf"]["recoveryfile"] = ""
+    m_poll.return_value = False
+    m_wait.return_value = False
+
+    def gauges():
+
+        return [line for line in metrics.exposition().splitlines()
+                if line.startswith("longbow_jobs")]
+
+    metrics.reset()
+    monitorstep(first, monitorstart(first), 1000.0)
+    monitorstep(second, monitorstart(second), 1000.0)
+
+    assert first["lbowconf"]["session"] != second["lbowconf"]["session"]
+    assert gauges() == ['longbow_jobs{resource="hpc1",state="Running"} 2']
+
+    monitorstop(first)
+
+    assert gauges() == ['longbow_jobs{resource="hpc1",state="Running"} 1']
+
+    monitorstop(second)
+
+    assert gauges() == []
+
+
+@mock.patch.dict('longbow.scheduling.JOBSTATES', clear=True)
+@mock.patch('longbow.scheduling._checkwaitingjobs')
+@mock.patch('longbow.scheduling._polljobs')
+def test_monitorstep_gaugerecover(m_poll, m_wait):
+
+    """
+    Test that a recovered session keeps its id, so that it replaces its own
+    counts rather than adding to them.
+    """
+
+    jobs = _jobs()
+    m_poll.return_value = False
+    m_wait.return_value = False
+
+    metrics.reset()
+    monitorstep(jobs, monitorstart(jobs), 1000.0)
+    session = jobs["lbowconf"]["session"]
+    monitorstep(jobs, monitorstart(jobs), 2000.0)
+
+    assert jobs["lbowconf"]["session"] == session
+    assert ('longbow_jobs{resource="hpc1",state="Running"} 1' in
+            metrics.exposition().splitlines())
+
+    monitorstop(jobs)
+    metrics.reset()
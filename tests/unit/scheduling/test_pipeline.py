@@ -0,0 +1,248 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the pipeline method within the
+scheduling module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import threading
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.scheduling import pipeline
+
+
+def _jobs(count):
+
+    """
+    Build a jobs structure with the given number of jobs.
+    """
+
+    jobs = {"lbowconf": {"recoveryfile": ""}}
+
+    for index in range(count):
+
+        jobs["job" + str(index)] = {
+            "resource": "test-machine",
+            "scheduler": "LSF",
+            "subfile": "",
+            "jobid": "test" + str(index)
+        }
+
+    return jobs
+
+
+@mock.patch('longbow.staging.stage_upstreamjob')
+@mock.patch('longbow.schedulers.lsf.submit')
+@mock.patch('longbow.schedulers.lsf.prepare')
+def test_pipeline_all(m_prepare, m_submit, m_upload):
+
+    """
+    Test that every job is prepared, staged and submitted once.
+    """
+
+    jobs = _jobs(50)
+
+    pipeline(jobs)
+
+    assert m_prepare.call_count == 50
+    assert m_upload.call_count == 50
+    assert m_submit.call_count == 50
+    assert all(jobs[item]["laststatus"] == "Queued"
+               for item in jobs if item != "lbowconf")
+    assert jobs["lbowconf"]["test-machine-queue-slots"] == "50"
+    assert jobs["lbowconf"]["test-machine-queue-max"] == "50"
+
+
+@mock.patch('longbow.staging.stage_upstreamjob')
+@mock.patch('longbow.schedulers.lsf.submit')
+@mock.patch('longbow.schedulers.lsf.prepare')
+def test_pipeline_overlap(m_prepare, m_submit, m_upload):
+
+    """
+    Test that the first job is submitted before the last one is staged.
+    """
+
+    jobs = _jobs(5)
+    submitted = threading.Event()
+
+    def upload(item, job):
+
+        if item == "job4":
+
+            assert submitted.wait(5)
+
+    m_upload.side_effect = upload
+    m_submit.side_effect = lambda job: submitted.set()
+
+    pipeline(jobs)
+
+    assert m_submit.call_count == 5
+
+
+@mock.patch('longbow.staging.stage_upstreamjob')
+@mock.patch('longbow.schedulers.lsf.submit')
+@mock.patch('longbow.schedulers.lsf.prepare')
+def test_pipeline_queuemax(m_prepare, m_submit, m_upload):
+
+    """
+    Test that jobs after a queue limit are staged but held back.
+    """
+
+    jobs = _jobs(4)
+    calls = []
+
+    def submit(job):
+
+        calls.append(job)
+
+        if len(calls) > 2:
+
+            raise exceptions.QueuemaxError
+
+    m_submit.side_effect = submit
+
+    pipeline(jobs)
+
+    statuses = [jobs[item]["laststatus"] for item in jobs
+                if item != "lbowconf"]
+
+    assert m_upload.call_count == 4
+    assert m_submit.call_count == 3
+    assert statuses.count("Queued") == 2
+    assert statuses.count("Waiting Submission") == 2
+    assert jobs["lbowconf"]["test-machine-queue-max"] == "2"
+
+
+@mock.patch('longbow.staging.stage_upstreamjob')
+@mock.patch('longbow.schedulers.lsf.submit')
+@mock.patch('longbow.schedulers.lsf.prepare')
+def test_pipeline_submiterror(m_prepare, m_submit, m_upload):
+
+    """
+    Test that a failed submission does not stop the other jobs.
+    """
+
+    jobs = _jobs(3)
+
+    def submit(job):
+
+        if job["jobid"] == "test1":
+
+            raise exceptions.JobsubmitError("Error")
+
+    m_submit.side_effect = submit
+
+    pipeline(jobs)
+
+    assert m_submit.call_count == 3
+    assert jobs["job1"]["laststatus"] == "Submit Error"
+    assert jobs["job0"]["laststatus"] == "Queued"
+    assert jobs["job2"]["laststatus"] == "Queued"
+
+
+@mock.patch('longbow.staging.stage_upstreamjob')
+@mock.patch('longbow.schedulers.lsf.submit')
+@mock.patch('longbow.schedulers.lsf.prepare')
+def test_pipeline_stagingerror(m_prepare, m_submit, m_upload):
+
+    """
+    Test that a staging error is raised once staging has stopped.
+    """
+
+    jobs = _jobs(100)
+
+    def upload(item, job):
+
+        if item == "job3":
+
+            raise exceptions.StagingError("Error")
+
+    m_upload.side_effect = upload
+
+    with pytest.raises(exceptions.StagingError):
+
+        pipeline(jobs)
+
+    assert m_upload.call_count < 100
+    assert "laststatus" not in jobs["job3"]
+
+
+@mock.patch('longbow.staging.stage_upstreamjob')
+@mock.patch('longbow.schedulers.lsf.submit')
+@mock.patch('longbow.schedulers.lsf.prepare')
+def test_pipeline_prepareerror(m_prepare, m_submit, m_upload):
+
+    """
+    Test that an error preparing a job is raised.
+    """
+
+    jobs = _jobs(3)
+    jobs["job1"]["scheduler"] = "missing"
+
+    with pytest.raises(exceptions.PluginattributeError):
+
+        pipeline(jobs)
+
+    assert m_upload.call_count == 1
+    assert m_submit.call_count <= 1
+
+
+@mock.patch('longbow.configuration.saveini')
+@mock.patch('longbow.staging.stage_upstreamjob')
+@mock.patch('longbow.schedulers.lsf.submit')
+@mock.patch('longbow.schedulers.lsf.prepare')
+@mock.patch('os.path.isdir')
+def test_pipeline_recovery(m_isdir, m_prepare, m_submit, m_upload, m_save):
+
+    """
+    Test that the recovery file is written once all jobs are submitted.
+    """
+
+    jobs = _jobs(3)
+    jobs["lbowconf"]["recoveryfile"] = "recovery-file"
+    m_isdir.return_value = True
+
+    pipeline(jobs)
+
+    assert m_save.call_count == 1
+    assert m_save.call_args[0][0].endswith("recovery-file")
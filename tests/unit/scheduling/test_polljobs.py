@@ -46,7 +46,7 @@ except ImportError:
 import pytest
 
 import longbow.exceptions as exceptions
-from longbow.scheduling import _polljobs
+from longbow.scheduling import _polljobs, PUSHCONFIRM
 
 
 @mock.patch('longbow.schedulers.lsf.status')
@@ -209,3 +209,139 @@ def test_polljobs_except(mock_status):
     with pytest.raises(exceptions.PluginattributeError):
 
         _polljobs(jobs, False)
+
+
+@mock.patch('longbow.schedulers.lsf.status')
+def test_polljobs_sshfailure(mock_status):
+
+    """
+    Test that a failure to reach one host does not stop other jobs from being
+    polled.
+    """
+
+    jobs = {
+        "jobone": {
+            "laststatus": "Running",
+            "scheduler": "LSF",
+            "resource": "broken-machine",
+            "jobid": "123456"
+        },
+        "jobtwo": {
+            "laststatus": "Queued",
+            "scheduler": "LSF",
+            "resource": "test-machine",
+            "jobid": "123457"
+        }
+    }
+
+    def status(job):
+
+        if job["resource"] == "broken-machine":
+
+            raise exceptions.SSHError("SSH failed", ("", "", 255))
+
+        return "Running"
+
+    mock_status.side_effect = status
+
+    _polljobs(jobs, False)
+
+    assert jobs["jobone"]["laststatus"] == "Running"
+    assert jobs["jobtwo"]["laststatus"] == "Running"
+
+
+def _statusfile(output):
+    """Feed a status file to the parser a line at a time."""
+
+    def sendtosshstream(job, args, callback):
+
+        for line in output.split("\n"):
+
+            callback(line)
+
+        return "", "", 0
+
+    return sendtosshstream
+
+
+@mock.patch('longbow.shellwrappers.sendtosshstream')
+@mock.patch('longbow.schedulers.lsf.status')
+def test_polljobs_statuspush(mock_status, mock_stream):
+
+    """
+    Test that the status of jobs pushing their status is read from the status
+    file in one go, with the scheduler only asked about jobs that have not
+    started.
+    """
+
+    jobs = {
+        "lbowconf": {
+            "test-machine-queue-slots": "3"
+        }
+    }
+
+    for job in ["jobone", "jobtwo", "jobthree"]:
+
+        jobs[job] = {
+            "jobname": job,
+            "laststatus": "Queued",
+            "scheduler": "LSF",
+            "resource": "test-machine",
+            "statusfile": "/home/test/.longbow-status",
+            "jobid": "123456"
+        }
+
+    mock_stream.side_effect = _statusfile(
+        "jobone start 1 1\n"
+        "jobtwo start 1 2\n"
+        "jobtwo start 2 2\n"
+        "jobtwo finish 1 2 0\n"
+        "jobtwo finish 2 2 0\n")
+    mock_status.return_value = "Queued"
+
+    _polljobs(jobs, False)
+
+    assert mock_stream.call_count == 1
+    assert mock_status.call_count == 1
+    assert jobs["jobone"]["laststatus"] == "Running"
+    assert jobs["jobtwo"]["laststatus"] == "Finished"
+    assert jobs["jobthree"]["laststatus"] == "Queued"
+
+
+@mock.patch('longbow.shellwrappers.sendtosshstream')
+@mock.patch('longbow.schedulers.lsf.status')
+def test_polljobs_statuspushconfirm(mock_status, mock_stream):
+
+    """
+    Test that running jobs are checked with the scheduler every so often, in
+    case they were killed before they could write their finish marker.
+    """
+
+    jobs = {
+        "lbowconf": {
+            "test-machine-queue-slots": "1"
+        },
+        "jobone": {
+            "jobname": "jobone",
+            "laststatus": "Running",
+            "scheduler": "LSF",
+            "resource": "test-machine",
+            "statusfile": "/home/test/.longbow-status",
+            "jobid": "123456"
+        }
+    }
+
+    mock_stream.side_effect = _statusfile("jobone start 1 1\n")
+    mock_status.return_value = "Finished"
+
+    for _ in range(PUSHCONFIRM - 1):
+
+        _polljobs(jobs, False)
+
+    assert mock_status.call_count == 0
+    assert jobs["jobone"]["laststatus"] == "Running"
+
+    _polljobs(jobs, False)
+
+    assert mock_status.call_count == 1
+    assert jobs["jobone"]["laststatus"] == "Finished"
@@ -151,3 +151,40 @@ def test_prepare_ownscript(mock_prepare):
     assert mock_prepare.call_count == 0, \
         "This method shouldn't be called at all in this case."
     assert jobs["job-one"]["upload-include"] == "file1, file2, file3, test.lsf"
+
+
+@mock.patch('longbow.schedulers.lsf.prepare')
+def test_prepare_statuspush(mock_prepare):
+
+    """
+    Test that jobs using push style status updates are given a status file
+    for the session, and that others are not.
+    """
+
+    jobs = {
+        "lbowconf": {
+            "recoveryfile": "recovery-20181010-101010"
+        },
+        "job-one": {
+            "resource": "test-machine",
+            "scheduler": "LSF",
+            "jobid": "test123",
+            "remoteworkdir": "/home/test/work",
+            "status-push": "true",
+            "subfile": ""
+        },
+        "job-two": {
+            "resource": "test-machine",
+            "scheduler": "LSF",
+            "jobid": "test456",
+            "remoteworkdir": "/home/test/work",
+            "status-push": "false",
+            "subfile": ""
+        }
+    }
+
+    prepare(jobs)
+
+    assert jobs["job-one"]["statusfile"] == \
+        "/home/test/work/.longbow-20181010-101010.status"
+    assert "statusfile" not in jobs["job-two"]
@@ -0,0 +1,433 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the Session class within the
+session module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.session import Session
+
+
+def _longbow(statuses):
+
+    """
+    Build a fake entrypoints.longbow that submits a job for each status.
+    """
+
+    calls = []
+
+    def longbow(jobs, parameters):
+
+        calls.append(parameters)
+
+        jobs["lbowconf"] = {"recoveryfile": "recovery-YYMMDD-HHMMSS"}
+
+        for index, status in enumerate(statuses):
+
+            jobs["job" + str(index)] = {
+                "resource": "hpc1",
+                "jobid": str(100 + index),
+                "laststatus": status,
+                "polling-frequency": "60",
+                "staging-frequency": "0"
+            }
+
+        raise exceptions.DisconnectException
+
+    longbow.calls = calls
+
+    return longbow
+
+
+def _finish(jobs, state, now):
+
+    """
+    A fake monitorstep that completes every queued job.
+    """
+
+    for item in [a for a in jobs if "lbowconf" not in a]:
+
+        if jobs[item]["laststatus"] == "Queued":
+
+            jobs[item]["laststatus"] = "Complete"
+
+    return True, False
+
+
+@pytest.fixture
+def hosts(tmp_path):
+
+    """
+    A host configuration file for the sessions to use.
+    """
+
+    path = tmp_path / "hosts.conf"
+    path.write_text("[hpc1]\nhost = hpc1\n")
+
+    return str(path)
+
+
+@mock.patch('longbow.staging.cleanup')
+@mock.patch('longbow.scheduling.monitorfinish')
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_submit(m_longbow, m_step, m_finish, m_clean, hosts):
+
+    """
+    Test that submitted jobs are returned as handles that complete.
+    """
+
+    m_longbow.side_effect = _longbow(["Queued", "Queued"])
+    m_step.side_effect = _finish
+
+    with Session(hosts=hosts, resource="hpc1") as session:
+
+        jobs = session.submit(executable="pmemd.MPI", resource="hpc2")
+
+        assert [job.name for job in jobs] == ["job0", "job1"]
+        assert [job.jobid for job in jobs] == ["100", "101"]
+        assert all(job.wait(10) == "Complete" for job in jobs)
+        assert all(job.done() for job in jobs)
+
+    parameters = m_longbow.side_effect.calls[0]
+
+    assert parameters["hosts"] == hosts
+    assert parameters["executable"] == "pmemd.MPI"
+    assert parameters["resource"] == "hpc2"
+    assert parameters["disconnect"] is True
+    assert m_step.call_args[0][1]["align"] is True
+    assert m_finish.call_count == 1
+    assert m_clean.call_count == 1
+
+
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_submiterror(m_longbow, m_step, hosts):
+
+    """
+    Test that a job that failed to submit raises from its future.
+    """
+
+    m_longbow.side_effect = _longbow(["Queued", "Submit Error"])
+    m_step.return_value = False, False
+
+    with Session(hosts=hosts) as session:
+
+        jobs = session.submit(executable="pmemd.MPI")
+
+        with pytest.raises(exceptions.JobsubmitError):
+
+            jobs[1].wait(0)
+
+        assert jobs[0].done() is False
+        assert jobs[0].status() == "Queued"
+
+    assert jobs[0].future.cancelled()
+
+
+@mock.patch('longbow.staging.cleanup')
+@mock.patch('longbow.scheduling.monitorfinish')
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_futures(m_longbow, m_step, m_finish, m_clean, hosts):
+
+    """
+    Test that many submissions are followed by one monitor thread.
+    """
+
+    m_longbow.side_effect = _longbow(["Queued"] * 50)
+    m_step.side_effect = _finish
+
+    with Session(hosts=hosts) as session:
+
+        jobs = session.submit(executable="pmemd.MPI")
+        jobs.extend(session.submit(executable="pmemd.MPI"))
+        monitor = session._monitor
+
+        done, pending = wait([job.future for job in jobs], timeout=10)
+
+    assert len(done) == 100
+    assert not pending
+    assert not monitor.is_alive()
+
+
+@mock.patch('longbow.staging.cleanup')
+@mock.patch('longbow.scheduling.monitorfinish')
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_await(m_longbow, m_step, m_finish, m_clean, hosts):
+
+    """
+    Test that job handles can be awaited.
+    """
+
+    m_longbow.side_effect = _longbow(["Queued", "Queued"])
+    m_step.side_effect = _finish
+
+    async def run(session):
+
+        return await asyncio.gather(*session.submit(executable="pmemd.MPI"))
+
+    with Session(hosts=hosts) as session:
+
+        assert asyncio.run(run(session)) == ["Complete", "Complete"]
+
+
+@mock.patch('longbow.staging.cleanup')
+@mock.patch('longbow.scheduling.monitorfinish')
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_monitorerror(m_longbow, m_step, m_finish, m_clean, hosts):
+
+    """
+    Test that a failure while monitoring is tried again on the next pass.
+    """
+
+    failed = []
+
+    def step(jobs, state, now):
+
+        if not failed:
+
+            failed.append(True)
+
+            raise exceptions.SSHError("Lost connection", ("", "", 1))
+
+        return _finish(jobs, state, now)
+
+    m_longbow.side_effect = _longbow(["Queued", "Queued"])
+    m_step.side_effect = step
+
+    with Session(hosts=hosts) as session:
+
+        jobs = session.submit(executable="pmemd.MPI")
+
+        assert all(job.wait(10) == "Complete" for job in jobs)
+
+    assert m_step.call_count == 2
+    assert m_finish.call_count == 1
+
+
+@mock.patch('longbow.session.MONITORRETRIES', 2)
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_monitorgiveup(m_longbow, m_step, hosts):
+
+    """
+    Test that jobs that keep failing to be monitored are given up on, with
+    the failure raised from every future.
+    """
+
+    m_longbow.side_effect = _longbow(["Queued", "Queued"])
+    m_step.side_effect = exceptions.PluginattributeError("No status")
+
+    with Session(hosts=hosts) as session:
+
+        jobs = session.submit(executable="pmemd.MPI")
+
+        for job in jobs:
+
+            with pytest.raises(exceptions.PluginattributeError):
+
+                job.wait(10)
+
+        assert m_step.call_count == 2
+        assert session._groups == []
+
+
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_submitpartial(m_longbow, m_step, hosts):
+
+    """
+    Test that jobs that were submitted before a failure are still monitored.
+    """
+
+    def longbow(jobs, parameters):
+
+        jobs["lbowconf"] = {"recoveryfile": "recovery-YYMMDD-HHMMSS"}
+        jobs["job0"] = {"resource": "hpc1", "jobid": "100",
+                        "laststatus": "Queued", "polling-frequency": "60",
+                        "staging-frequency": "0"}
+        jobs["job1"] = {"resource": "hpc1", "laststatus": "",
+                        "polling-frequency": "60", "staging-frequency": "0"}
+
+        raise exceptions.StagingError("Upload failed")
+
+    m_longbow.side_effect = longbow
+    m_step.return_value = False, False
+
+    with Session(hosts=hosts) as session:
+
+        with pytest.raises(exceptions.StagingError):
+
+            session.submit(executable="pmemd.MPI", pipeline=True)
+
+        assert [job.name for job in session.jobs] == ["job0"]
+        assert len(session._groups) == 1
+        assert "job1" not in session._groups[0][0]
+
+
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_submitlock(m_longbow, m_step, hosts):
+
+    """
+    Test that sessions in different threads submit one at a time.
+    """
+
+    submit = _longbow(["Queued"])
+    running = []
+    overlaps = []
+
+    def longbow(jobs, parameters):
+
+        overlaps.append(len(running))
+        running.append(True)
+        time.sleep(0.05)
+        running.pop()
+
+        submit(jobs, parameters)
+
+    m_longbow.side_effect = longbow
+    m_step.return_value = False, False
+
+    with Session(hosts=hosts) as first, Session(hosts=hosts) as second:
+
+        threads = [threading.Thread(target=session.submit,
+                                    kwargs={"executable": "pmemd.MPI"})
+                   for session in (first, second, first, second)]
+
+        for thread in threads:
+
+            thread.start()
+
+        for thread in threads:
+
+            thread.join()
+
+    assert overlaps == [0, 0, 0, 0]
+
+
+@mock.patch('longbow.staging.stage_downstream')
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_download(m_longbow, m_step, m_down, hosts):
+
+    """
+    Test that the output of a running job can be downloaded.
+    """
+
+    m_longbow.side_effect = _longbow(["Running"])
+    m_step.return_value = False, False
+
+    with Session(hosts=hosts) as session:
+
+        job = session.submit(executable="pmemd.MPI")[0]
+        job.download()
+
+    assert m_down.call_count == 1
+    assert m_down.call_args[0][0]["jobid"] == "100"
+
+
+@mock.patch('longbow.scheduling.monitorstop')
+@mock.patch('longbow.scheduling.monitorstep')
+@mock.patch('longbow.entrypoints.longbow')
+def test_session_closegauges(m_longbow, m_step, m_stop, hosts):
+
+    """
+    Test that closing a session stops its running jobs being counted.
+    """
+
+    m_longbow.side_effect = _longbow(["Running"])
+    m_step.return_value = False, False
+
+    with Session(hosts=hosts) as session:
+
+        session.submit(executable="pmemd.MPI")
+
+    assert m_stop.call_count == 1
+    assert m_stop.call_args[0][0]["job0"]["jobid"] == "100"
+
+
+def test_session_closed(hosts):
+
+    """
+    Test that a closed session does not submit jobs.
+    """
+
+    session = Session(hosts=hosts)
+    session.close()
+
+    with pytest.raises(exceptions.SessionError):
+
+        session.submit(executable="pmemd.MPI")
+
+
+def test_session_nohosts(tmp_path):
+
+    """
+    Test that a missing host configuration file is reported.
+    """
+
+    cwd = os.getcwd()
+    os.chdir(str(tmp_path))
+
+    try:
+
+        with mock.patch('os.path.expanduser', return_value=str(tmp_path)):
+
+            with pytest.raises(exceptions.RequiredinputError):
+
+                Session().submit(executable="pmemd.MPI")
+
+    finally:
+
+        os.chdir(cwd)
@@ -49,7 +49,7 @@ import longbow.exceptions as exceptions
 from longbow.shellwrappers import checkconnections
 
 
-def sshfunc(job, cmd):
+def sshfunc(job, cmd, cmdclass="status"):
     """Function to mock the throwing of exception for a test."""
 
     if cmd[0] == "module avail" and job["resource"] == "resource1":
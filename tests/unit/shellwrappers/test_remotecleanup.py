@@ -0,0 +1,153 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the remotecleanup method within the
+shellwrappers module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import os
+import subprocess
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.shellwrappers import remotecleanup
+
+JOB = {
+    "port": "22",
+    "user": "juan_trique-ponee",
+    "host": "massive-machine"
+}
+
+
+def test_remotecleanup_srcpath():
+
+    """
+    Test that the absolute path exception is raised with non absolute paths.
+    """
+
+    with pytest.raises(exceptions.AbsolutepathError):
+
+        remotecleanup(JOB, ["/path/to/job12345", "source/directory/path"])
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotecleanup_formattest(mock_sendtossh):
+
+    """
+    Check that one command is sent with every path quoted as an argument.
+    """
+
+    mock_sendtossh.return_value = ("deleted /path/to/job one12345\n"
+                                   "missing /home/juan/job12346\n", "", 0)
+
+    status = remotecleanup(JOB, ["/path/to/job one12345", "~/job12346"])
+
+    callargs = mock_sendtossh.call_args[0][1]
+
+    assert mock_sendtossh.call_count == 1
+    assert callargs[0] == "sh -c"
+    assert callargs[-2:] == ["'/path/to/job one12345'", '"$HOME"/\'job12346\'']
+    assert "nohup" not in callargs[1]
+    assert status == {"/path/to/job one12345": "deleted",
+                      "~/job12346": "missing"}
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotecleanup_background(mock_sendtossh):
+
+    """
+    Check that the deletion is detached when asked for.
+    """
+
+    mock_sendtossh.return_value = ("", "", 0)
+
+    remotecleanup(JOB, ["/path/to/job12345"], True)
+
+    assert "nohup rm -r" in mock_sendtossh.call_args[0][1][1]
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotecleanup_exceptiontest(mock_sendtossh):
+
+    """
+    Check that the SSH exception is percolated properly.
+    """
+
+    mock_sendtossh.side_effect = exceptions.SSHError("SSHError", "Error")
+
+    with pytest.raises(exceptions.RemotedeleteError):
+
+        remotecleanup(JOB, ["/path/to/job12345"])
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotecleanup_script(mock_sendtossh, tmpdir):
+
+    """
+    Run the cleanup script in a local shell, only real directories should be
+    deleted.
+    """
+
+    real = os.path.join(str(tmpdir), "job 12345")
+    target = os.path.join(str(tmpdir), "target")
+    link = os.path.join(str(tmpdir), "link12346")
+    missing = os.path.join(str(tmpdir), "job12347")
+
+    os.mkdir(real)
+    os.mkdir(target)
+    os.symlink(target, link)
+
+    def _run(job, args, cmdclass):
+
+        """Run the remote command locally."""
+
+        shell = subprocess.Popen(" ".join(args), shell=True,
+                                 stdout=subprocess.PIPE)
+
+        return (shell.communicate()[0].decode("utf-8"), "", 0)
+
+    mock_sendtossh.side_effect = _run
+
+    status = remotecleanup(JOB, [real, link, missing])
+
+    assert status == {real: "deleted", link: "missing", missing: "missing"}
+    assert not os.path.exists(real)
+    assert os.path.isdir(target)
+    assert os.path.islink(link)
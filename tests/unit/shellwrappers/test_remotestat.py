@@ -0,0 +1,201 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the remotestat method within the
+shellwrappers module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import hashlib
+import os
+import subprocess
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.shellwrappers import remotestat, _parsechecksums
+
+JOB = {
+    "port": "22",
+    "user": "juan_trique-ponee",
+    "host": "massive-machine",
+    "destdir": "/path/to/job12345"
+}
+
+
+def _run(job, args, cmdclass):
+
+    """Run the remote command locally."""
+
+    shell = subprocess.Popen(args[0], shell=True, stdout=subprocess.PIPE)
+
+    return (shell.communicate()[0].decode("utf-8"), "", 0)
+
+
+def test_remotestat_srcpath():
+
+    """
+    Test that the absolute path exception is raised with non absolute paths.
+    """
+
+    with pytest.raises(exceptions.AbsolutepathError):
+
+        remotestat(JOB, "source/directory/path")
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotestat_formattest(mock_sendtossh):
+
+    """
+    Check that a single find command is sent, with checksums only when asked
+    for.
+    """
+
+    mock_sendtossh.return_value = ("", "", 0)
+
+    remotestat(JOB)
+
+    callargs = mock_sendtossh.call_args[0][1]
+
+    assert mock_sendtossh.call_count == 1
+    assert callargs[0].startswith("cd '/path/to/job12345' && find . ")
+    assert "xargs" not in callargs[0]
+
+    remotestat(JOB, "~/other", "md5sum")
+
+    callargs = mock_sendtossh.call_args[0][1]
+
+    assert callargs[0].startswith("cd \"$HOME\"/'other' && find . ")
+    assert callargs[0].endswith("xargs -0 -r -P 4 -n 8 md5sum")
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotestat_parse(mock_sendtossh):
+
+    """
+    Check that the listing is parsed, including names with spaces.
+    """
+
+    mock_sendtossh.return_value = ("d 4096 1700000000.5 rep 1\0"
+                                   "f 12 1700000001.0 rep 1/my file.log\0"
+                                   "l 6 1700000002.0 link\0", "", 0)
+
+    listing = remotestat(JOB)
+
+    assert listing == {
+        "rep 1": {"type": "d", "size": 4096, "mtime": 1700000000.5},
+        "rep 1/my file.log": {"type": "f", "size": 12, "mtime": 1700000001.0},
+        "link": {"type": "l", "size": 6, "mtime": 1700000002.0}
+    }
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotestat_exceptiontest(mock_sendtossh):
+
+    """
+    Check that the SSH exception is percolated properly.
+    """
+
+    mock_sendtossh.side_effect = exceptions.SSHError("SSHError", "Error")
+
+    with pytest.raises(exceptions.RemotelistError):
+
+        remotestat(JOB)
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotestat_tree(mock_sendtossh, tmpdir):
+
+    """
+    Run the listing command in a local shell over a real directory tree.
+    """
+
+    tmpdir.mkdir("rep 1").join("out file.log").write("output")
+    tmpdir.join("top.txt").write("top")
+    os.symlink("top.txt", str(tmpdir.join("link")))
+
+    mock_sendtossh.side_effect = _run
+
+    listing = remotestat(JOB, str(tmpdir), "sha256sum")
+
+    assert sorted(listing) == ["link", "rep 1", "rep 1/out file.log",
+                               "top.txt"]
+    assert listing["rep 1"]["type"] == "d"
+    assert listing["link"]["type"] == "l"
+    assert listing["rep 1/out file.log"]["size"] == 6
+    assert listing["rep 1/out file.log"]["checksum"] == \
+        hashlib.sha256(b"output").hexdigest()
+    assert listing["top.txt"]["mtime"] == pytest.approx(
+        os.path.getmtime(str(tmpdir.join("top.txt"))))
+    assert "checksum" not in listing["link"]
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotestat_escapednames(mock_sendtossh, tmpdir):
+
+    """
+    Check that file names the checksum tool has to escape, including one
+    with a backslash followed by an n, get the right checksums.
+    """
+
+    tmpdir.join("a\\nb").write("backslash")
+    tmpdir.join("c\nd").write("newline")
+
+    mock_sendtossh.side_effect = _run
+
+    listing = remotestat(JOB, str(tmpdir), "sha256sum")
+
+    assert sorted(listing) == ["a\\nb", "c\nd"]
+    assert listing["a\\nb"]["checksum"] == \
+        hashlib.sha256(b"backslash").hexdigest()
+    assert listing["c\nd"]["checksum"] == \
+        hashlib.sha256(b"newline").hexdigest()
+
+
+def test_parsechecksums_escapes():
+
+    """
+    Check that the escapes in file names are decoded in one pass.
+    """
+
+    output = ("\\0123 *a\\\\nb\n"
+              "\\4567  c\\nd\\\\\n"
+              "89ab  ./plain\n")
+
+    assert _parsechecksums(output) == {
+        "a\\nb": "0123", "c\nd\\": "4567", "plain": "89ab"}
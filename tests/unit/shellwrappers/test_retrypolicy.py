@@ -0,0 +1,255 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the retry policy methods within
+the shellwrappers module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import pytest
+
+import longbow.exceptions as exceptions
+import longbow.metrics as metrics
+import longbow.shellwrappers as shellwrappers
+from longbow.shellwrappers import (sendtossh, sendtorsync, _retrydelay,
+                                  _retrypolicy)
+
+
+def _job(host):
+
+    """Build a basic job for the retry tests."""
+
+    return {
+        "port": "22",
+        "user": "juan_trique-ponee",
+        "host": host,
+        "env-fix": "false",
+        "retry-attempts": "4",
+        "retry-backoff": "2",
+        "retry-backoff-max": "5",
+        "circuit-threshold": "2",
+        "circuit-cooldown": "60"
+    }
+
+
+def test_retrypolicy_defaults():
+
+    """
+    Test that missing retry parameters fall back to the job template.
+    """
+
+    policy = _retrypolicy({})
+
+    assert policy["retry-attempts"] == 3
+    assert policy["retry-backoff"] == 10
+
+
+def test_retrypolicy_malformed():
+
+    """
+    Test that a retry parameter that is not a number is reported as a
+    configuration error naming the parameter.
+    """
+
+    job = _job("host")
+    job["retry-backoff"] = "ten"
+
+    with pytest.raises(exceptions.ConfigurationError) as err:
+
+        _retrypolicy(job)
+
+    assert "retry-backoff" in str(err.value)
+
+
+def test_retrydelay_bounds():
+
+    """
+    Test that the backoff grows exponentially and is capped.
+    """
+
+    policy = _retrypolicy(_job("host"))
+
+    for _ in range(100):
+
+        assert 0 <= _retrydelay(policy, 1) <= 2
+        assert 0 <= _retrydelay(policy, 2) <= 4
+        assert 0 <= _retrydelay(policy, 6) <= 5
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_retrypolicy_attempts(mock_sendtoshell, mock_time):
+
+    """
+    Test that the number of attempts comes from the job and that the waits
+    between them are jittered.
+    """
+
+    mock_sendtoshell.return_value = "Output message", "Error message", 255
+
+    with pytest.raises(exceptions.SSHError):
+
+        sendtossh(_job("attempts-machine"), ["ls"])
+
+    assert mock_sendtoshell.call_count == 4
+    assert mock_time.call_count == 3
+
+    for call in mock_time.call_args_list:
+
+        assert 0 <= call[0][0] <= 5
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_retrypolicy_circuit(mock_sendtoshell, mock_time):
+
+    """
+    Test that the circuit breaker opens after repeated failures and then
+    fails fast, and closes again after a success.
+    """
+
+    job = _job("circuit-machine")
+
+    mock_sendtoshell.return_value = "Output message", "Error message", 255
+
+    for _ in range(2):
+
+        with pytest.raises(exceptions.SSHError):
+
+            sendtossh(job, ["ls"])
+
+    assert mock_sendtoshell.call_count == 8
+
+    # Circuit is now open so nothing reaches the shell.
+    with pytest.raises(exceptions.SSHError):
+
+        sendtossh(job, ["ls"])
+
+    assert mock_sendtoshell.call_count == 8
+
+    # After the cool down, a good call closes the circuit again.
+    shellwrappers.CIRCUITS["circuit-machine"]["opened"] -= 61
+    mock_sendtoshell.return_value = "Output message", "", 0
+
+    sendtossh(job, ["ls"])
+
+    assert shellwrappers.CIRCUITS["circuit-machine"]["failures"] == 0
+    assert shellwrappers.CIRCUITS["circuit-machine"]["opened"] == 0
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_retrypolicy_timeout(mock_sendtoshell, mock_time):
+
+    """
+    Test that commands are given the timeout for their class, and that timed
+    out commands are retried and counted.
+    """
+
+    job = _job("timeout-machine")
+    job["timeout-status"] = "30"
+
+    mock_sendtoshell.side_effect = [
+        ("", "", shellwrappers.TIMEOUTCODE), ("Output message", "", 0)]
+
+    sendtossh(job, ["ls"])
+
+    assert mock_sendtoshell.call_count == 2
+    assert mock_sendtoshell.call_args[0][1] == 30
+    assert metrics.total("timeout", host="timeout-machine",
+                         cmdclass="status") == 1
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_retrypolicy_timeoutsubmit(mock_sendtoshell, mock_time):
+
+    """
+    Test that a submit that timed out is never sent again, as it may well
+    have gone through.
+    """
+
+    job = _job("submit-machine")
+
+    mock_sendtoshell.return_value = "", "", shellwrappers.TIMEOUTCODE
+
+    with pytest.raises(exceptions.SSHError):
+
+        sendtossh(job, ["bsub < submit.lsf"], cmdclass="submit")
+
+    assert mock_sendtoshell.call_count == 1
+    assert mock_sendtoshell.call_args[0][1] == 120
+    assert metrics.total("timeout", host="submit-machine",
+                         cmdclass="submit") == 1
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_retrypolicy_notimeout(mock_sendtoshell, mock_time):
+
+    """
+    Test that a timeout of zero means no limit.
+    """
+
+    job = _job("transfer-machine")
+
+    mock_sendtoshell.return_value = "Output message", "", 0
+
+    sendtossh(job, ["cp -r a b"], cmdclass="transfer")
+
+    assert mock_sendtoshell.call_args[0][1] is None
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_retrypolicy_stall(mock_sendtoshell, mock_time):
+
+    """
+    Test that stalled rsync transfers are retried and counted.
+    """
+
+    job = _job("stall-machine")
+
+    mock_sendtoshell.side_effect = [
+        ("", "", 30), ("Output message", "", 0)]
+
+    sendtorsync(job, "src", "dst", "", "")
+
+    assert mock_sendtoshell.call_count == 2
+    assert "--timeout=600" in mock_sendtoshell.call_args[0][0]
+    assert metrics.total("timeout", host="stall-machine",
+                         cmdclass="stall") == 1
@@ -46,6 +46,7 @@ except ImportError:
 import pytest
 
 import longbow.exceptions as exceptions
+import longbow.metrics as metrics
 from longbow.shellwrappers import sendtorsync
 
 
@@ -54,8 +55,8 @@ from longbow.shellwrappers import sendtorsync
 def test_sendtorsync_retries(mock_sendtoshell, mock_time):
 
     """
-    Test that the rsync method will try three times if rsync fails before
-    finally raising the RsyncError exception.
+    Test that the rsync method will try three times if rsync fails with a
+    transient error before finally raising the RsyncError exception.
     """
 
     job = {
@@ -65,7 +66,7 @@ def test_sendtorsync_retries(mock_sendtoshell, mock_time):
     }
 
     # Set the return values of sendtoshell.
-    mock_sendtoshell.return_value = "Output message", "Error message", 1
+    mock_sendtoshell.return_value = "Output message", "Error message", 12
 
     # Set the timout for retries to 0 seconds to speed up test.
     mock_time.return_value = None
@@ -77,6 +78,32 @@ def test_sendtorsync_retries(mock_sendtoshell, mock_time):
     assert mock_sendtoshell.call_count == 3, "This method should retry 3 times"
 
 
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_sendtorsync_fatal(mock_sendtoshell, mock_time):
+
+    """
+    Test that the rsync method does not retry errors that will not go away on
+    their own, such as a syntax error.
+    """
+
+    job = {
+        "port": "22",
+        "user": "juan_trique-ponee",
+        "host": "massive-machine"
+    }
+
+    # Set the return values of sendtoshell.
+    mock_sendtoshell.return_value = "Output message", "Error message", 1
+
+    with pytest.raises(exceptions.RsyncError):
+
+        sendtorsync(job, "src", "dst", "", "")
+
+    assert mock_sendtoshell.call_count == 1, "Fatal errors are not retried"
+    assert mock_time.call_count == 0
+
+
 @mock.patch('longbow.shellwrappers.sendtoshell')
 def test_sendtorsync_rsyncformat1(mock_sendtoshell):
 
@@ -97,7 +124,7 @@ def test_sendtorsync_rsyncformat1(mock_sendtoshell):
     sendtorsync(job, "src", "dst", "", "")
 
     callargs = mock_sendtoshell.call_args[0][0]
-    testargs = "rsync -azP -e ssh -p 22 src dst"
+    testargs = "rsync -azP --timeout=600 -e ssh -p 22 src dst"
 
     assert " ".join(callargs) == testargs
 
@@ -123,7 +150,8 @@ def test_sendtorsync_rsyncformat2(mock_sendtoshell):
     sendtorsync(job, "src", "dst", "", "exfile")
 
     callargs = mock_sendtoshell.call_args[0][0]
-    testargs = "rsync -azP --exclude exfile -e ssh -p 22 src dst"
+    testargs = ("rsync -azP --timeout=600 --exclude exfile -e ssh -p 22 src "
+                "dst")
 
     assert " ".join(callargs) == testargs
 
@@ -149,8 +177,8 @@ def test_sendtorsync_rsyncformat3(mock_sendtoshell):
     sendtorsync(job, "src", "dst", "", "exfile1, exfile2")
 
     callargs = mock_sendtoshell.call_args[0][0]
-    testargs = ("rsync -azP --exclude exfile1 --exclude exfile2 -e ssh -p 22 "
-                "src dst")
+    testargs = ("rsync -azP --timeout=600 --exclude exfile1 --exclude "
+                "exfile2 -e ssh -p 22 src dst")
 
     assert " ".join(callargs) == testargs
 
@@ -176,7 +204,70 @@ def test_sendtorsync_rsyncformat4(mock_sendtoshell):
     sendtorsync(job, "src", "dst", "incfile", "exfile1, exfile2")
 
     callargs = mock_sendtoshell.call_args[0][0]
-    testargs = ("rsync -azP --include incfile --exclude exfile1 --exclude "
-                "exfile2 -e ssh -p 22 src dst")
+    testargs = ("rsync -azP --timeout=600 --include incfile --exclude "
+                "exfile1 --exclude exfile2 -e ssh -p 22 src dst")
 
     assert " ".join(callargs) == testargs
+
+
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_sendtorsync_extraflags(mock_sendtoshell):
+
+    """
+    Testing the format of the rsync call sent to the shell. This test will
+    check that extra flags are placed after the standard flags.
+    """
+
+    job = {
+        "port": "22",
+        "user": "juan_trique-ponee",
+        "host": "massive-machine"
+    }
+
+    # Set the return values of sendtoshell.
+    mock_sendtoshell.return_value = "Output message", "Error message", 0
+
+    sendtorsync(job, "src", "dst", "", "exfile", ["--append-verify"])
+
+    callargs = mock_sendtoshell.call_args[0][0]
+    testargs = ("rsync -azP --timeout=600 --append-verify --exclude exfile "
+                "-e ssh -p 22 src dst")
+
+    assert " ".join(callargs) == testargs
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshell')
+def test_sendtorsync_metrics(mock_sendtoshell, mock_time):
+
+    """
+    Test that transfers are timed, along with their retries and the bytes
+    rsync reports as transferred.
+    """
+
+    job = {
+        "port": "22",
+        "user": "juan_trique-ponee",
+        "host": "metrics-machine"
+    }
+
+    output = ("sending incremental file list\n"
+              "md.out\n"
+              "\r          1,024   0%    0.00kB/s    0:00:00"
+              "\r      1,048,576 100%   95.24MB/s    0:00:00 "
+              "(xfr#1, to-chk=1/3)\n"
+              "md.rst\n"
+              "\r            512 100%    0.49kB/s    0:00:00 "
+              "(xfr#2, to-chk=0/3)\n")
+
+    mock_sendtoshell.side_effect = [("", "", 12), (output, "", 0)]
+
+    sendtorsync(job, "src", "dst", "", "")
+
+    labels = {"host": "metrics-machine", "cmdclass": "transfer"}
+
+    assert metrics.total("remote-transferred", **labels) == 1049088
+    assert metrics.total("remote-retries", **labels) == 1
+    assert metrics.total("remote-bytes", **labels) == len(output)
+    assert metrics.TIMINGS["remote"][
+        (("cmdclass", "transfer"), ("host", "metrics-machine"))][0] == 1
@@ -43,7 +43,9 @@ except ImportError:
 
     import mock
 
-from longbow.shellwrappers import sendtoshell
+import time
+
+from longbow.shellwrappers import sendtoshell, TIMEOUTCODE
 
 
 def test_sendtoshell_stdoutcapture():
@@ -134,3 +136,18 @@ def test_sendtoshell_unicode2(mock_subprocess):
     stderr = sendtoshell(["uname"])[1]
 
     assert stderr == "Linux"
+
+
+def test_sendtoshell_timeout():
+
+    """
+    Test that a command that hangs is killed once the timeout is up, along
+    with anything that it started that would hold the pipes open.
+    """
+
+    start = time.time()
+
+    errcode = sendtoshell(["sh", "-c", "sleep 30 | cat"], 0.5)[2]
+
+    assert errcode == TIMEOUTCODE
+    assert time.time() - start < 10
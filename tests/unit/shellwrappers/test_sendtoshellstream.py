@@ -0,0 +1,99 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the sendtoshellstream method
+within the shellwrappers module.
+"""
+
+import time
+
+from longbow.shellwrappers import sendtoshellstream, TIMEOUTCODE
+
+
+def test_sendtoshellstream_lines():
+
+    """
+    Test that each line of stdout is handed to the callback.
+    """
+
+    lines = []
+
+    shellout = sendtoshellstream(["printf", "one\ntwo\nthree\n"], lines.append)
+
+    assert lines == ["one", "two", "three"]
+    assert shellout == ("", "", 0)
+
+
+def test_sendtoshellstream_stop():
+
+    """
+    Test that the command is stopped as soon as the callback returns True,
+    a command that never ends on its own is used to prove this.
+    """
+
+    lines = []
+
+    def callback(line):
+
+        lines.append(line)
+
+        return len(lines) == 3
+
+    shellout = sendtoshellstream(["yes"], callback)
+
+    assert lines == ["y", "y", "y"]
+    assert shellout[2] == 0
+
+
+def test_sendtoshellstream_stderr():
+
+    """
+    Test that stderr and the exit code are captured.
+    """
+
+    shellout = sendtoshellstream(["ls", "-al dir"], lambda line: False)
+
+    assert shellout[1] != ""
+    assert shellout[2] == 2
+
+
+def test_sendtoshellstream_timeout():
+
+    """
+    Test that a command that hangs is killed once the timeout is up.
+    """
+
+    start = time.time()
+
+    shellout = sendtoshellstream(["sh", "-c", "echo one; sleep 30 | cat"],
+                                 lambda line: False, 0.5)
+
+    assert shellout[2] == TIMEOUTCODE
+    assert time.time() - start < 10
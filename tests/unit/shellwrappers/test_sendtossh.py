@@ -46,7 +46,7 @@ except ImportError:
 import pytest
 
 import longbow.exceptions as exceptions
-from longbow.shellwrappers import sendtossh
+from longbow.shellwrappers import sendtossh, sendtosshstream
 
 
 @mock.patch('longbow.shellwrappers.sendtoshell')
@@ -183,3 +183,39 @@ def test_sendtossh_retries(mock_sendtoshell, mock_time):
         sendtossh(job, args)
 
     assert mock_sendtoshell.call_count == 3, "This method should retry 3 times"
+
+
+@mock.patch('longbow.shellwrappers.sendtoshellstream')
+def test_sendtosshstream(mock_sendtoshellstream):
+
+    """
+    Test that the streaming variant forms the same command and hands the
+    callback through.
+    """
+
+    job = {
+        "port": "22",
+        "user": "juan_trique-ponee",
+        "host": "stream-machine",
+        "env-fix": "false"
+    }
+
+    lines = []
+
+    def callback(line):
+
+        lines.append(line)
+
+        return line == "stop"
+
+    mock_sendtoshellstream.return_value = ("", "", 0)
+
+    sendtosshstream(job, ["qstat -u juan_trique-ponee"], callback)
+
+    callargs = mock_sendtoshellstream.call_args[0]
+
+    assert " ".join(callargs[0]) == \
+        "ssh -p 22 juan_trique-ponee@stream-machine qstat -u juan_trique-ponee"
+    assert callargs[1]("123 R") is False
+    assert callargs[1]("stop") is True
+    assert lines == ["123 R", "stop"]
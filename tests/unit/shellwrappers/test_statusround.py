@@ -0,0 +1,233 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the statusround method within the
+shellwrappers module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.shellwrappers import sendtosshstream, statusround
+
+
+def _job(user="test"):
+
+    """
+    Build a job for the tests.
+    """
+
+    return {
+        "port": "22",
+        "user": user,
+        "host": "massive-machine",
+        "env-fix": "false"
+    }
+
+
+def _stream(lines):
+
+    """
+    Build a fake sendtoshellstream that outputs the given lines.
+    """
+
+    def stream(cmd, callback, timeout=None):
+
+        for line in lines:
+
+            if callback(line) is True:
+
+                break
+
+        return "", "", 0
+
+    return stream
+
+
+@mock.patch('longbow.shellwrappers.sendtoshellstream')
+def test_statusround_shared(m_stream):
+
+    """
+    Test that identical queries in a round are only sent once.
+    """
+
+    m_stream.side_effect = _stream(["123 R", "456 PD"])
+    first = []
+    second = []
+
+    with statusround():
+
+        sendtosshstream(_job(), ["squeue"], first.append)
+        sendtosshstream(_job(), ["squeue"], second.append)
+
+    assert m_stream.call_count == 1
+    assert first == ["123 R", "456 PD"]
+    assert second == ["123 R", "456 PD"]
+
+
+@mock.patch('longbow.shellwrappers.sendtoshellstream')
+def test_statusround_stopearly(m_stream):
+
+    """
+    Test that the first query still stops early, and that a later one which
+    needs more of the output sends its own query.
+    """
+
+    m_stream.side_effect = _stream(["123 R", "456 PD"])
+    first = []
+    second = []
+
+    def stop(line):
+
+        first.append(line)
+
+        return True
+
+    with statusround():
+
+        sendtosshstream(_job(), ["squeue"], stop)
+
+        assert m_stream.call_count == 1
+
+        sendtosshstream(_job(), ["squeue"], second.append)
+
+        assert m_stream.call_count == 2
+
+        sendtosshstream(_job(), ["squeue"], lambda line: None)
+
+    assert m_stream.call_count == 2
+    assert first == ["123 R"]
+    assert second == ["123 R", "123 R", "456 PD"]
+
+
+@mock.patch('longbow.shellwrappers.sendtoshellstream')
+def test_statusround_stopearlyshared(m_stream):
+
+    """
+    Test that a later query that stops within the output the first one saw
+    is answered from it.
+    """
+
+    m_stream.side_effect = _stream(["123 R", "456 PD", "789 PD"])
+    second = []
+
+    def stop(line):
+
+        return line.startswith("456")
+
+    def stopsecond(line):
+
+        second.append(line)
+
+        return line.startswith("123")
+
+    with statusround():
+
+        sendtosshstream(_job(), ["squeue"], stop)
+        sendtosshstream(_job(), ["squeue"], stopsecond)
+
+    assert m_stream.call_count == 1
+    assert second == ["123 R"]
+
+
+@mock.patch('longbow.shellwrappers.sendtoshellstream')
+def test_statusround_different(m_stream):
+
+    """
+    Test that queries for different users or commands are sent separately.
+    """
+
+    m_stream.side_effect = _stream(["123 R"])
+
+    with statusround():
+
+        sendtosshstream(_job(), ["squeue"], lambda line: None)
+        sendtosshstream(_job("other"), ["squeue"], lambda line: None)
+        sendtosshstream(_job(), ["qstat"], lambda line: None)
+
+    assert m_stream.call_count == 3
+
+
+@mock.patch('longbow.shellwrappers.sendtoshellstream')
+def test_statusround_ended(m_stream):
+
+    """
+    Test that queries are sent again once the round has ended.
+    """
+
+    m_stream.side_effect = _stream(["123 R"])
+
+    with statusround():
+
+        with statusround():
+
+            sendtosshstream(_job(), ["squeue"], lambda line: None)
+
+        sendtosshstream(_job(), ["squeue"], lambda line: None)
+
+    sendtosshstream(_job(), ["squeue"], lambda line: None)
+
+    assert m_stream.call_count == 2
+
+
+@mock.patch('time.sleep')
+@mock.patch('longbow.shellwrappers.sendtoshellstream')
+def test_statusround_error(m_stream, m_sleep):
+
+    """
+    Test that a failed query is not retried by later jobs in the round.
+    """
+
+    m_stream.return_value = "", "ssh: connect to host", 1
+
+    with statusround():
+
+        with pytest.raises(exceptions.SSHError):
+
+            sendtosshstream(_job(), ["squeue"], lambda line: None)
+
+        calls = m_stream.call_count
+
+        with pytest.raises(exceptions.SSHError):
+
+            sendtosshstream(_job(), ["squeue"], lambda line: None)
+
+    assert m_stream.call_count == calls
@@ -47,9 +47,8 @@ import longbow.exceptions as exceptions
 from longbow.staging import cleanup
 
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_single(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_single(mock_clean):
 
     """
     Test that the correct number of function calls are made.
@@ -60,25 +59,23 @@ def test_cleanup_single(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
     cleanup(jobs)
 
-    assert mock_delete.call_count == 1, \
-        "There is only one job, this should only be called once"
-    assert mock_list.call_count == 1, \
+    assert mock_clean.call_count == 1, \
         "There is only one job, this should only be called once"
 
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_multiple(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_multiple(mock_clean):
 
     """
-    Test that the correct number of function calls are made.
+    Test that the jobs on a resource are deleted with one command.
     """
 
     jobs = {
@@ -86,30 +83,67 @@ def test_cleanup_multiple(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             },
         "jobtwo": {
-            "destdir": "/path/to/jobtwo12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobtwo12484",
+            "remoteworkdir": "/path/to/local/dir"
             },
         "jobthree": {
-            "destdir": "/path/to/jobthree12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobthree12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
     cleanup(jobs)
 
-    assert mock_delete.call_count == 3, \
-        "There is only one job, this should only be called once"
-    assert mock_list.call_count == 3, \
-        "There is only one job, this should only be called once"
+    assert mock_clean.call_count == 1, \
+        "The jobs are all on one resource, this should only be called once"
+    assert len(mock_clean.call_args[0][1]) == 3
 
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_params(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_resources(mock_clean):
+
+    """
+    Test that each resource gets its own command.
+    """
+
+    jobs = {
+        "lbowconf": {
+            "recoveryfile": "rec.file"
+        },
+        "jobone": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
+            },
+        "jobtwo": {
+            "resource": "other-machine",
+            "destdir": "/path/to/local/dir/jobtwo12484",
+            "remoteworkdir": "/path/to/local/dir"
+            },
+        "jobthree": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobthree12484",
+            "remoteworkdir": "/path/to/local/dir"
+            }
+    }
+
+    cleanup(jobs)
+
+    paths = sorted(len(call[0][1]) for call in mock_clean.call_args_list)
+
+    assert mock_clean.call_count == 2
+    assert paths == [1, 2]
+
+
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_params(mock_clean):
 
     """
     Test the correct arguments make it to the method calls.
@@ -120,26 +154,28 @@ def test_cleanup_params(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
     cleanup(jobs)
 
-    listarg1 = mock_list.call_args[0][0]
-    deletearg1 = mock_delete.call_args[0][0]
+    jobarg = mock_clean.call_args[0][0]
+    paths = mock_clean.call_args[0][1]
+    background = mock_clean.call_args[0][2]
 
-    assert isinstance(listarg1, dict)
-    assert isinstance(deletearg1, dict)
+    assert isinstance(jobarg, dict)
+    assert paths == ["/path/to/local/dir/jobone12484"]
+    assert background is False
 
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_nodelete(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_detach(mock_clean):
 
     """
-    Test that the following exception is handled correctly.
+    Test that cleanup-detach hands the deletion off to the remote host.
     """
 
     jobs = {
@@ -147,26 +183,46 @@ def test_cleanup_nodelete(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/jobone12484",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir",
+            "cleanup-detach": "true"
             }
     }
 
-    mock_list.return_value = None
-    mock_delete.return_value = None
+    cleanup(jobs)
+
+    assert mock_clean.call_args[0][2] is True
+
+
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_nodelete(mock_clean):
+
+    """
+    Test that the following exception is handled correctly.
+    """
+
+    jobs = {
+        "lbowconf": {
+            "recoveryfile": "rec.file"
+        },
+        "jobone": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir",
+            "remoteworkdir": "/path/to/local/dir"
+            }
+    }
 
     cleanup(jobs)
 
-    assert mock_delete.call_count == 0, "Should not be called in this case."
+    assert mock_clean.call_count == 0, "Should not be called in this case."
 
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_excepttest1(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_notowned(mock_clean):
 
     """
-    Test that the listerror exception is entercepted and does not percolate
-    up from here.
+    Test that directories Longbow did not create are never deleted.
     """
 
     jobs = {
@@ -174,20 +230,62 @@ def test_cleanup_excepttest1(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
+            "resource": "test-machine",
             "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "remoteworkdir": "/path/to/local/dir"
+            },
+        "jobtwo": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/other12484",
+            "remoteworkdir": "/path/to/local/dir"
+            },
+        "jobthree": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobthree12484/..",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
-    mock_delete.return_value = None
-    mock_list.side_effect = exceptions.RemotelistError("List Error", "blah")
+    cleanup(jobs)
+
+    assert mock_clean.call_count == 0, "Should not be called in this case."
+
+
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_missing(mock_clean):
+
+    """
+    Test that jobs whose directories are missing are handled.
+    """
+
+    jobs = {
+        "lbowconf": {
+            "recoveryfile": "rec.file"
+        },
+        "jobone": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
+            },
+        "jobtwo": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobtwo12484",
+            "remoteworkdir": "/path/to/local/dir"
+            }
+    }
+
+    mock_clean.return_value = {
+        "/path/to/local/dir/jobone12484": "deleted",
+        "/path/to/local/dir/jobtwo12484": "missing"
+    }
 
     cleanup(jobs)
 
+    assert mock_clean.call_count == 1
+
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_excepttest2(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_excepttest1(mock_clean):
 
     """
     Test that the KeyError exception is entercepted and does not percolate
@@ -199,23 +297,24 @@ def test_cleanup_excepttest2(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
-    mock_delete.return_value = None
-    mock_list.side_effect = KeyError("blah")
+    del jobs["jobone"]["resource"]
 
     cleanup(jobs)
 
+    assert mock_clean.call_count == 0
+
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_excepttest3(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_excepttest2(mock_clean):
 
     """
-    Test that the KeyError exception is entercepted and does not percolate
+    Test that the delete exception is entercepted and does not percolate
     up from here.
     """
 
@@ -224,24 +323,23 @@ def test_cleanup_excepttest3(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
-    mock_delete.side_effect = exceptions.RemotedeleteError("Error", "blah")
-    mock_list.return_value = None
+    mock_clean.side_effect = exceptions.RemotedeleteError("Error", "blah")
 
     cleanup(jobs)
 
 
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_excepttest4(mock_delete, mock_list):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_excepttest3(mock_clean):
 
     """
-    Test that the KeyError exception is entercepted and does not percolate
-    up from here.
+    Test that the absolute path exception is entercepted and does not
+    percolate up from here.
     """
 
     jobs = {
@@ -249,22 +347,21 @@ def test_cleanup_excepttest4(mock_delete, mock_list):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
-    mock_delete.return_value = None
-    mock_list.side_effect = NameError("blah")
+    mock_clean.side_effect = exceptions.AbsolutepathError("Error", "blah")
 
     cleanup(jobs)
 
 
 @mock.patch('os.remove')
 @mock.patch('os.path.isfile')
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_recoveryfilerm1(m_delete, m_list, m_isfile, m_remove):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_recoveryfilerm1(m_clean, m_isfile, m_remove):
 
     """
     Test that the recoveryfile would be removed.
@@ -275,14 +372,13 @@ def test_cleanup_recoveryfilerm1(m_delete, m_list, m_isfile, m_remove):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
     m_isfile.return_value = True
-    m_delete.return_value = None
-    m_list.return_value = None
 
     cleanup(jobs)
 
@@ -291,9 +387,8 @@ def test_cleanup_recoveryfilerm1(m_delete, m_list, m_isfile, m_remove):
 
 @mock.patch('os.remove')
 @mock.patch('os.path.isfile')
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_recoveryfilerm2(m_delete, m_list, m_isfile, m_remove):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_recoveryfilerm2(m_clean, m_isfile, m_remove):
 
     """
     Test that the recoveryfile would be removed.
@@ -304,14 +399,13 @@ def test_cleanup_recoveryfilerm2(m_delete, m_list, m_isfile, m_remove):
             "recoveryfile": ""
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
     m_isfile.return_value = True
-    m_delete.return_value = None
-    m_list.return_value = None
 
     cleanup(jobs)
 
@@ -320,9 +414,8 @@ def test_cleanup_recoveryfilerm2(m_delete, m_list, m_isfile, m_remove):
 
 @mock.patch('os.remove')
 @mock.patch('os.path.isfile')
-@mock.patch('longbow.shellwrappers.remotelist')
-@mock.patch('longbow.shellwrappers.remotedelete')
-def test_cleanup_recoveryfilerm3(m_delete, m_list, m_isfile, m_remove):
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_recoveryfilerm3(m_clean, m_isfile, m_remove):
 
     """
     Test that the recoveryfile would be removed.
@@ -333,15 +426,54 @@ def test_cleanup_recoveryfilerm3(m_delete, m_list, m_isfile, m_remove):
             "recoveryfile": "rec.file"
         },
         "jobone": {
-            "destdir": "/path/to/jobone12484",
-            "remoteworkdir": "/path/to/local/dir",
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir"
             }
     }
 
     m_isfile.return_value = False
-    m_delete.return_value = None
-    m_list.return_value = None
 
     cleanup(jobs)
 
     assert m_remove.call_count == 0
+
+
+@mock.patch('longbow.shellwrappers.remotecleanup')
+def test_cleanup_unverified(mock_clean):
+
+    """
+    Test that directories are kept for jobs whose downloads have not passed
+    verification, and deleted for those that have.
+    """
+
+    jobs = {
+        "lbowconf": {
+            "recoveryfile": "rec.file"
+        },
+        "jobone": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobone12484",
+            "remoteworkdir": "/path/to/local/dir",
+            "download-verify": "true",
+            "download-verified": "false"
+            },
+        "jobtwo": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobtwo12484",
+            "remoteworkdir": "/path/to/local/dir",
+            "download-verify": "true",
+            "download-verified": "true"
+            },
+        "jobthree": {
+            "resource": "test-machine",
+            "destdir": "/path/to/local/dir/jobthree12484",
+            "remoteworkdir": "/path/to/local/dir",
+            "download-verify": "true"
+            }
+    }
+
+    cleanup(jobs)
+
+    assert mock_clean.call_count == 1
+    assert mock_clean.call_args[0][1] == ["/path/to/local/dir/jobtwo12484"]
@@ -87,3 +87,48 @@ def test_stage_downstream_params(mock_download):
     downloadarg1 = mock_download.call_args[0][0]
 
     assert isinstance(downloadarg1, dict)
+
+
+@mock.patch('longbow.staging._verifydownstream')
+@mock.patch('longbow.shellwrappers.download')
+def test_stage_downstream_verify(mock_download, mock_verify):
+
+    """
+    Test that a finished job with verification switched on resumes partial
+    files and then gets verified.
+    """
+
+    job = {
+        "jobname": "jobone",
+        "destdir": "/path/to/jobone12484",
+        "localworkdir": "/path/to/local/dir",
+        "download-verify": "true",
+        "laststatus": "Finished"
+    }
+
+    stage_downstream(job)
+
+    assert mock_download.call_args[0][1] == ["--append-verify"]
+    assert mock_verify.call_count == 1
+
+
+@mock.patch('longbow.staging._verifydownstream')
+@mock.patch('longbow.shellwrappers.download')
+def test_stage_downstream_verifyrunning(mock_download, mock_verify):
+
+    """
+    Test that running jobs are not verified, as files are still changing.
+    """
+
+    job = {
+        "jobname": "jobone",
+        "destdir": "/path/to/jobone12484",
+        "localworkdir": "/path/to/local/dir",
+        "download-verify": "true",
+        "laststatus": "Running"
+    }
+
+    stage_downstream(job)
+
+    assert len(mock_download.call_args[0]) == 1
+    assert mock_verify.call_count == 0
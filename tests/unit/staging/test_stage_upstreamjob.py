@@ -0,0 +1,112 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+This testing module contains the tests for the stage_upstreamjob method within
+the staging module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.staging import stage_upstreamjob
+
+
+@mock.patch('longbow.shellwrappers.upload')
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_stage_upstreamjob(mock_ssh, mock_upload):
+
+    """
+    Test that the job directory is made and then the files uploaded.
+    """
+
+    job = {
+        "destdir": "/path/to/jobone12484",
+        "resource": "test-machine"
+    }
+
+    stage_upstreamjob("jobone", job)
+
+    assert mock_ssh.call_args[0][1] == ["mkdir -p /path/to/jobone12484\n"]
+    assert mock_upload.call_args[0][0] is job
+
+
+@mock.patch('longbow.shellwrappers.upload')
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_stage_upstreamjob_mkdirfail(mock_ssh, mock_upload):
+
+    """
+    Test that nothing is uploaded if the job directory can't be made.
+    """
+
+    job = {
+        "destdir": "/path/to/jobone12484",
+        "resource": "test-machine"
+    }
+
+    mock_ssh.side_effect = exceptions.SSHError("Error", ("out", "err", 1))
+
+    with pytest.raises(exceptions.SSHError):
+
+        stage_upstreamjob("jobone", job)
+
+    assert mock_upload.call_count == 0
+
+
+@mock.patch('longbow.shellwrappers.upload')
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_stage_upstreamjob_uploadfail(mock_ssh, mock_upload):
+
+    """
+    Test that a failed upload is reported as a staging error.
+    """
+
+    job = {
+        "destdir": "/path/to/jobone12484",
+        "localworkdir": "/local/jobone",
+        "resource": "test-machine"
+    }
+
+    mock_upload.side_effect = exceptions.RsyncError("Error",
+                                                    ("out", "err", 1))
+
+    with pytest.raises(exceptions.StagingError):
+
+        stage_upstreamjob("jobone", job)
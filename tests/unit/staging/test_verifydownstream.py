@@ -0,0 +1,176 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the download verification methods
+within the staging module.
+"""
+
+import hashlib
+import os
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+from longbow.staging import _verifydownstream, _remotemanifest
+
+
+def _job(path):
+
+    """Build a basic job for verification tests."""
+
+    return {
+        "jobname": "jobone",
+        "destdir": "/path/to/jobone12484/",
+        "localworkdir": str(path),
+        "download-checksum": "sha256sum",
+        "download-include": "",
+        "download-exclude": "",
+    }
+
+
+def _stat(checksum, path):
+
+    """Build the remotestat output for a single file."""
+
+    return ("f 6 1700000000.0 " + path + "\0\0" + checksum + "  ./" + path +
+            "\n", "", 0)
+
+
+@mock.patch('longbow.staging._refetch')
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_verifydownstream_pass(mock_ssh, mock_refetch, tmpdir):
+
+    """
+    Test that matching checksums mark the job as verified.
+    """
+
+    tmpdir.join("out.log").write("output")
+    checksum = hashlib.sha256(b"output").hexdigest()
+
+    mock_ssh.return_value = _stat(checksum, "out.log")
+
+    job = _job(tmpdir)
+
+    assert _verifydownstream(job) is True
+    assert job["download-verified"] == "true"
+    assert mock_refetch.call_count == 0
+
+
+@mock.patch('longbow.staging._refetch')
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_verifydownstream_refetch(mock_ssh, mock_refetch, tmpdir):
+
+    """
+    Test that missing or mismatched files are downloaded again and that the
+    job is verified once they match.
+    """
+
+    tmpdir.join("out.log").write("partial")
+    checksum = hashlib.sha256(b"output").hexdigest()
+
+    mock_ssh.return_value = _stat(checksum, "out.log")
+
+    def refetch(job, paths):
+
+        assert paths == ["out.log"]
+        tmpdir.join("out.log").write("output")
+
+    mock_refetch.side_effect = refetch
+
+    job = _job(tmpdir)
+
+    assert _verifydownstream(job) is True
+    assert mock_refetch.call_count == 1
+
+
+@mock.patch('longbow.staging._refetch')
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_verifydownstream_fail(mock_ssh, mock_refetch, tmpdir):
+
+    """
+    Test that a persistent mismatch leaves the job unverified.
+    """
+
+    checksum = hashlib.sha256(b"output").hexdigest()
+
+    mock_ssh.return_value = _stat(checksum, "rep1/out.log")
+
+    job = _job(tmpdir)
+
+    assert _verifydownstream(job) is False
+    assert job["download-verified"] == "false"
+    assert mock_ssh.call_count == 3
+    assert mock_refetch.call_count == 2
+
+
+@mock.patch('longbow.staging._refetch')
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_verifydownstream_masks(mock_ssh, mock_refetch, tmpdir):
+
+    """
+    Test that files excluded from the download are not verified.
+    """
+
+    mock_ssh.return_value = ("abcd  ./big.dcd\n", "", 0)
+
+    job = _job(tmpdir)
+    job["download-exclude"] = "*.dcd"
+
+    assert _verifydownstream(job) is True
+    assert mock_refetch.call_count == 0
+
+
+@mock.patch('longbow.shellwrappers.sendtossh')
+def test_remotemanifest_parse(mock_ssh):
+
+    """
+    Test that the checksums are taken from the remote listing, including
+    escaped file names.
+    """
+
+    mock_ssh.return_value = ("f 4 1.0 out.log\0d 0 1.0 rep1\0"
+                             "f 4 1.0 rep1/out.log\0f 4 1.0 new\nline\0\0"
+                             "aaaa  ./out.log\n"
+                             "bbbb *./rep1/out.log\n"
+                             "\\cccc  ./new\\nline\n", "", 0)
+
+    manifest = _remotemanifest({"destdir": "/path/"}, "sha256sum")
+
+    assert manifest == {
+        "out.log": "aaaa",
+        "rep1/out.log": "bbbb",
+        "new\nline": "cccc"
+    }
+    assert "xargs -0 -r -P 4" in mock_ssh.call_args[0][1][0]
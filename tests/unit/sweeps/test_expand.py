@@ -0,0 +1,95 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the expand method within the sweeps
+module.
+"""
+
+import types
+
+from longbow.sweeps import expand
+
+
+def test_expand_nosweep():
+
+    """
+    Test that sections without a sweep are given back unchanged.
+    """
+
+    options = {"executable": "pmemd.MPI"}
+
+    assert list(expand("job", options)) == [("job", options)]
+
+
+def test_expand_product():
+
+    """
+    Test that every combination of the variables becomes a job, with the
+    variables substituted into the other parameters.
+    """
+
+    options = {
+        "executable": "pmemd.MPI",
+        "executableargs": "-i md-{temp}.in -o {temp}-{seed}.out {other}",
+        "sweep": "temp: 300..310..10; seed: 1, 2"
+    }
+
+    jobs = expand("md", options)
+
+    assert isinstance(jobs, types.GeneratorType)
+
+    jobs = list(jobs)
+
+    assert [a[0] for a in jobs] == ["md-300-1", "md-300-2", "md-310-1",
+                                    "md-310-2"]
+    assert jobs[3][1]["executableargs"] == "-i md-310.in -o 310-2.out {other}"
+    assert jobs[3][1]["executable"] == "pmemd.MPI"
+    assert jobs[3][1]["temp"] == "310"
+    assert "sweep" not in jobs[3][1]
+
+
+def test_expand_parameters():
+
+    """
+    Test that variables named after Longbow parameters set them, and that
+    unsafe characters are kept out of the job names.
+    """
+
+    options = {
+        "cores": "24",
+        "sweep": "resource: hpc/one; cores: 48"
+    }
+
+    jobs = list(expand("md", options))
+
+    assert jobs[0][0] == "md-hpc_one-48"
+    assert jobs[0][1]["resource"] == "hpc/one"
+    assert jobs[0][1]["cores"] == "48"
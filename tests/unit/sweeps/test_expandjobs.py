@@ -0,0 +1,147 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the expandjobs method within the
+sweeps module.
+"""
+
+try:
+
+    from unittest import mock
+
+except ImportError:
+
+    import mock
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.configuration import processconfigs
+from longbow.sweeps import expandjobs
+
+
+@pytest.fixture(autouse=True)
+def configcache(tmpdir):
+
+    """
+    Keep the configuration cache out of the real ~/.longbow.
+    """
+
+    with mock.patch('longbow.configuration.CONFIGCACHE',
+                    str(tmpdir.join("configcache"))):
+
+        yield
+
+
+def test_expandjobs_order():
+
+    """
+    Test that sweeps are replaced by their jobs in place.
+    """
+
+    jobdata = {
+        "first": {"cores": "8"},
+        "md": {"sweep": "seed: 1, 2"},
+        "last": {"cores": "16"}
+    }
+
+    jobs = expandjobs(jobdata)
+
+    assert list(jobs) == ["first", "md-1", "md-2", "last"]
+    assert jobs["first"] is jobdata["first"]
+
+
+def test_expandjobs_nosweep():
+
+    """
+    Test that data without sweeps is given back as it is.
+    """
+
+    jobdata = {"job1": {"cores": "8"}}
+
+    assert expandjobs(jobdata) is jobdata
+
+
+def test_expandjobs_clash():
+
+    """
+    Test that a sweep making a job name already in use is an error.
+    """
+
+    jobdata = {
+        "md-1": {"cores": "8"},
+        "md": {"sweep": "seed: 1, 2"}
+    }
+
+    with pytest.raises(exceptions.ConfigurationError):
+
+        expandjobs(jobdata)
+
+
+def test_expandjobs_processconfigs(tmpdir):
+
+    """
+    Test that a sweep in a job file goes through to the Longbow jobs.
+    """
+
+    tmpdir.join("hosts.conf").write("[archer]\n"
+                                    "host = login.archer.ac.uk\n"
+                                    "user = test\n"
+                                    "remoteworkdir = /work/dir\n"
+                                    "[hartree]\n"
+                                    "host = login.hartree.ac.uk\n"
+                                    "user = test\n"
+                                    "remoteworkdir = /work/dir2\n")
+    tmpdir.join("job.conf").write("[md]\n"
+                                  "executable = pmemd.MPI\n"
+                                  "executableargs = -i md-{temp}.in\n"
+                                  "sweep = temp: 300..310..10; "
+                                  "resource: archer, hartree; "
+                                  "replicates: 1, 4\n")
+
+    parameters = {
+        "debug": False,
+        "executable": "",
+        "executableargs": "",
+        "hosts": str(tmpdir.join("hosts.conf")),
+        "job": str(tmpdir.join("job.conf")),
+        "jobname": "",
+        "resource": "",
+        "replicates": ""
+    }
+
+    jobs = processconfigs(parameters)
+
+    assert len([a for a in jobs if "lbowconf" not in a]) == 8
+    assert jobs["md-310-hartree-4"]["host"] == "login.hartree.ac.uk"
+    assert jobs["md-310-hartree-4"]["replicates"] == "4"
+    assert jobs["md-310-hartree-4"]["executableargs"] == ["-i", "md-310.in"]
+    assert jobs["md-300-archer-1"]["remoteworkdir"] == "/work/dir"
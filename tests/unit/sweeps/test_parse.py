@@ -0,0 +1,84 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+
+"""
+This testing module contains the tests for the parse method within the sweeps
+module.
+"""
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.sweeps import parse
+
+
+def test_parse_lists():
+
+    """
+    Test that variables and their listed values are parsed in order.
+    """
+
+    variables = parse("resource: archer, hartree ; seed:1,2,3")
+
+    assert variables == [("resource", ["archer", "hartree"]),
+                         ("seed", ["1", "2", "3"])]
+
+
+def test_parse_ranges():
+
+    """
+    Test that ranges include their last value and can step either way.
+    """
+
+    assert parse("temp: 300..350..25") == [("temp", ["300", "325", "350"])]
+    assert parse("n: 1..3") == [("n", ["1", "2", "3"])]
+    assert parse("n: 3..1") == [("n", ["3", "2", "1"])]
+    assert parse("n: 1..2, 8, 10..20..10") == [
+        ("n", ["1", "2", "8", "10", "20"])]
+
+
+@pytest.mark.parametrize("spec", [
+    "temp 300..350",
+    "temp: 300..x",
+    "temp: 300..350..0",
+    "temp: 1..2..3..4",
+    "temp: ",
+    "temp: 1; temp: 2",
+    "bad name: 1"
+])
+def test_parse_errors(spec):
+
+    """
+    Test that badly formed sweeps raise the configuration exception.
+    """
+
+    with pytest.raises(exceptions.ConfigurationError):
+
+        parse(spec)
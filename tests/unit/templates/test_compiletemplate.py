@@ -0,0 +1,72 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the compiletemplate method within
+the templates module.
+"""
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.templates import compiletemplate
+
+
+def test_compiletemplate_cached():
+
+    """
+    Test that a template is only parsed once.
+    """
+
+    text = "#!/bin/bash\n{% if queue %}\n#PBS -q {{queue}}\n{% endif %}\n"
+
+    nodes = compiletemplate(text)
+
+    assert compiletemplate(text) is nodes
+    assert nodes[0] == ("line", ["#!/bin/bash\n"])
+    assert nodes[1][:3] == ["if", "queue", False]
+    assert nodes[1][3] == [("line", ["#PBS -q ", "queue", "\n"])]
+
+
+@pytest.mark.parametrize("text", [
+    "{% if queue %}\nline\n",
+    "{% for item in list %}\nline\n{% endif %}\n",
+    "{% endfor %}\n",
+    "{% else %}\n",
+    "{% while queue %}\n{% endwhile %}\n",
+    "{% if not %}\n{% endif %}\n"])
+def test_compiletemplate_errors(text):
+
+    """
+    Test that badly formed templates are reported.
+    """
+
+    with pytest.raises(exceptions.TemplateError):
+
+        compiletemplate(text)
@@ -0,0 +1,102 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the render method within the
+templates module.
+"""
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.templates import render
+
+
+def test_render_variables():
+
+    """
+    Test that variables are substituted, leaving bash syntax alone.
+    """
+
+    text = ("#SBATCH -J {{jobname}}\n"
+            "for i in {1..{{replicates}}};\n"
+            "cd rep${SGE_TASK_ID}/\n")
+
+    assert render(text, {"jobname": "test", "replicates": "5"}) == (
+        "#SBATCH -J test\n"
+        "for i in {1..5};\n"
+        "cd rep${SGE_TASK_ID}/\n")
+
+
+def test_render_conditions():
+
+    """
+    Test that if blocks, else and not keep the right lines, and directive
+    lines are dropped.
+    """
+
+    text = ("{% if queue %}\n"
+            "-q {{queue}}\n"
+            "{% else %}\n"
+            "no queue\n"
+            "{% endif %}\n"
+            "{% if not array %}\n"
+            "single\n"
+            "{% endif %}\n")
+
+    assert render(text, {"queue": "debug", "array": False}) == (
+        "-q debug\nsingle\n")
+    assert render(text, {"queue": "", "array": True}) == "no queue\n"
+
+
+def test_render_loops():
+
+    """
+    Test that for blocks repeat for each value.
+    """
+
+    text = ("{% for module in modules %}\n"
+            "module load {{module}}\n"
+            "{% endfor %}\n"
+            "{{module}}\n")
+
+    assert render(text, {"modules": ["amber", "gcc"], "module": "x"}) == (
+        "module load amber\nmodule load gcc\nx\n")
+    assert render(text, {"modules": [], "module": "x"}) == "x\n"
+
+
+def test_render_unknown():
+
+    """
+    Test that a template using a missing variable is reported.
+    """
+
+    with pytest.raises(exceptions.TemplateError):
+
+        render("#PBS -q {{queue}}\n", {})
@@ -0,0 +1,112 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2017, Science and Technology Facilities Council and
+# The University of Nottingham
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+"""
+This testing module contains the tests for the write method within the
+templates module.
+"""
+
+import os
+
+import pytest
+
+import longbow.exceptions as exceptions
+from longbow.templates import write
+
+
+def test_write_basic(tmpdir):
+
+    """
+    Test that the script is written and added to the files to stage.
+    """
+
+    job = {
+        "localworkdir": str(tmpdir),
+        "upload-include": "file1",
+        "jobname": "test"
+        }
+
+    write(job, "submit.test", "#TEST -N {{jobname}}\n", job)
+
+    assert tmpdir.join("submit.test").read() == "#TEST -N test\n"
+    assert job["subfile"] == "submit.test"
+    assert job["upload-include"] == "file1, submit.test"
+
+
+def test_write_unchanged(tmpdir):
+
+    """
+    Test that an identical script already on disk is not written again.
+    """
+
+    script = tmpdir.join("submit.test")
+    script.write("#TEST -N test\n")
+    os.utime(str(script), (1000, 1000))
+
+    job = {
+        "localworkdir": str(tmpdir),
+        "upload-include": "",
+        "jobname": "test"
+        }
+
+    write(job, "submit.test", "#TEST -N {{jobname}}\n", job)
+
+    assert os.path.getmtime(str(script)) == 1000
+
+    job["jobname"] = "other"
+
+    write(job, "submit.test", "#TEST -N {{jobname}}\n", job)
+
+    assert script.read() == "#TEST -N other\n"
+
+
+def test_write_site(tmpdir):
+
+    """
+    Test that a site template replaces the plugin one.
+    """
+
+    tmpdir.join("site.tmpl").write("#SITE -N {{jobname}}\n")
+
+    job = {
+        "localworkdir": str(tmpdir),
+        "upload-include": "",
+        "jobname": "test",
+        "submit-template": str(tmpdir.join("site.tmpl"))
+        }
+
+    write(job, "submit.test", "#TEST -N {{jobname}}\n", job)
+
+    assert tmpdir.join("submit.test").read() == "#SITE -N test\n"
+
+    job["submit-template"] = str(tmpdir.join("missing.tmpl"))
+
+    with pytest.raises(exceptions.TemplateError):
+
+        write(job, "submit.test", "#TEST -N {{jobname}}\n", job)